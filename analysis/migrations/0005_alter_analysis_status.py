@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analysis', '0004_analysis_current_step'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='analysis',
+            name='status',
+            field=models.CharField(choices=[('ready', '준비'), ('queued', '대기열'), ('processing', '처리 중'), ('completed', '완료'), ('failed', '실패')], default='ready', max_length=20, verbose_name='상태'),
+        ),
+    ]
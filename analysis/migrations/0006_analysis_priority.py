@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analysis', '0005_alter_analysis_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysis',
+            name='priority',
+            field=models.IntegerField(choices=[(0, '보통'), (1, '높음'), (2, '긴급')], default=0, verbose_name='우선순위'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analysis', '0007_alter_analysis_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysis',
+            name='sweep_lead',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sweep_variants', to='analysis.analysis', verbose_name='스윕 대표 분석'),
+        ),
+    ]
@@ -6,11 +6,25 @@ import json
 class Analysis(models.Model):
     STATUS_CHOICES = [
         ('ready', '준비'),
+        ('queued', '대기열'),
         ('processing', '처리 중'),
         ('completed', '완료'),
         ('failed', '실패'),
+        ('cancelled', '취소됨'),
     ]
     
+    PRIORITY_CHOICES = [
+        (0, '보통'),
+        (1, '높음'),
+        (2, '긴급'),
+    ]
+    
+    # 이 분석을 대상으로 하는 작업 종류 (jobs.queue.JOB_HANDLERS)
+    JOB_KINDS = ('analysis', 'sweep')
+    
+    # 스윕 컨택트 시트 파일 이름 (대표 분석의 결과 폴더에 저장)
+    CONTACT_SHEET_NAME = 'contact_sheet.jpg'
+    
     # video 또는 image 중 하나만 필수
     video = models.ForeignKey(
         Video, 
@@ -30,6 +44,16 @@ class Analysis(models.Model):
         verbose_name='이미지'
     )
     
+    # 파라미터 스윕의 변형이면 스윕을 대표하는 분석 (대표 분석의 작업이 함께 처리)
+    sweep_lead = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        related_name='sweep_variants',
+        null=True,
+        blank=True,
+        verbose_name='스윕 대표 분석'
+    )
+    
     preprocessing_pipeline = models.JSONField(
         default=list, 
         blank=True,
@@ -43,6 +67,13 @@ class Analysis(models.Model):
         verbose_name='상태'
     )
     
+    # 우선순위 (높을수록 먼저 실행)
+    priority = models.IntegerField(
+        choices=PRIORITY_CHOICES,
+        default=0,
+        verbose_name='우선순위'
+    )
+    
     progress = models.IntegerField(default=0, verbose_name='진행률 (%)')
     
     # 현재 단계 필드 추가
@@ -105,6 +136,30 @@ class Analysis(models.Model):
         """미디어 타입 반환"""
         return 'video' if self.video else 'image'
     
+    def get_job_object_id(self):
+        """작업 큐에서 이 분석을 처리하는 작업의 대상 ID (스윕 변형이면 대표 분석)"""
+        return self.sweep_lead_id or self.id
+    
+    def get_sweep(self):
+        """같은 스윕으로 처리되는 분석 목록 (대표 분석 포함, 생성 순)"""
+        lead_id = self.get_job_object_id()
+        return Analysis.objects.filter(
+            models.Q(id=lead_id) | models.Q(sweep_lead_id=lead_id)
+        ).order_by('id')
+    
+    def is_sweep(self):
+        """파라미터 스윕에 속한 분석인지"""
+        return bool(self.sweep_lead_id) or self.sweep_variants.exists()
+    
+    def get_contact_sheet_path(self):
+        """스윕 컨택트 시트의 media 기준 경로 (없으면 빈 문자열)"""
+        from videos.storage import get_media_store
+        
+        path = f'analysis_results/{self.get_job_object_id()}/{self.CONTACT_SHEET_NAME}'
+        if get_media_store().exists(path):
+            return path
+        return ''
+    
     # ⭐ 전처리 파이프라인 관리 메서드들
     def add_preprocessing_step(self, step_type, params=None):
         """전처리 단계 추가"""
@@ -165,17 +220,17 @@ class Analysis(models.Model):
         """상태 배지 색상 반환"""
         status_colors = {
             'ready': 'secondary',
+            'queued': 'info',
             'processing': 'primary',
             'completed': 'success',
             'failed': 'danger',
+            'cancelled': 'warning',
         }
         return status_colors.get(self.status, 'secondary')
     
     def delete_files(self):
-        """분석 결과 파일 삭제"""
-        import os
-        import shutil
-        from django.conf import settings
+        """분석 결과 파일 삭제 (미디어 저장소와 이 노드의 캐시)"""
+        from videos.storage import delete_media, delete_media_prefix
         
         deleted_files = []
         
@@ -185,25 +240,17 @@ class Analysis(models.Model):
                 # 전처리 생략한 경우 원본 파일 경로일 수 있으므로 체크
                 media = self.get_media()
                 if media and self.output_video_path != media.file.name:
-                    path = os.path.join(settings.BASE_DIR, 'media', self.output_video_path)
-                    if os.path.exists(path):
-                        os.remove(path)
-                        deleted_files.append(path)
+                    delete_media(self.output_video_path)
+                    deleted_files.append(self.output_video_path)
             except Exception as e:
                 print(f"파일 삭제 실패: {e}")
         
         # 분석 결과 폴더 삭제
-        result_dir = os.path.join(
-            settings.BASE_DIR, 
-            'media', 
-            'analysis_results', 
-            str(self.id)
-        )
-        if os.path.exists(result_dir):
-            try:
-                shutil.rmtree(result_dir)
-                deleted_files.append(result_dir)
-            except Exception as e:
-                print(f"폴더 삭제 실패: {e}")
+        result_dir = f'analysis_results/{self.id}'
+        try:
+            delete_media_prefix(result_dir)
+            deleted_files.append(result_dir)
+        except Exception as e:
+            print(f"폴더 삭제 실패: {e}")
         
         return deleted_files
\ No newline at end of file
@@ -4,6 +4,8 @@ from pathlib import Path
 import subprocess
 import os
 
+from jobs.cancel import JobCancelled, run_process
+
 class VideoPreprocessor:
     """동영상 전처리 클래스"""
     
@@ -152,7 +154,31 @@ class VideoPreprocessor:
         else:
             raise ValueError(f"Unknown preprocessing type: {preprocessing_type}")
     
-    def reencode_with_ffmpeg(self, input_path, output_path):
+    def resolve_step(self, step):
+        """파이프라인 단계 -> (메서드, 파라미터) (알 수 없는 단계면 ValueError)"""
+        step_type = step['type']
+        if step_type not in self.PREPROCESSING_METHODS:
+            raise ValueError(f"Unknown preprocessing type: {step_type}")
+        return getattr(self, step_type), step.get('params', {})
+    
+    def compile_pipeline(self, pipeline):
+        """
+        파이프라인을 프레임 -> 프레임 함수 하나로 변환
+
+        단계 메서드와 파라미터를 미리 찾아 두므로 프레임마다 getattr / dict
+        조회를 반복하지 않는다. 각 단계는 새 배열을 반환하므로 입력 프레임은
+        복사하지 않는다.
+        """
+        steps = [self.resolve_step(step) for step in pipeline or []]
+        
+        def apply(frame):
+            for method, params in steps:
+                frame = method(frame, params)
+            return frame
+        
+        return apply
+    
+    def reencode_with_ffmpeg(self, input_path, output_path, cancel_check=None):
         """
         ffmpeg로 웹 브라우저 재생 가능하도록 재인코딩
         """
@@ -207,11 +233,10 @@ class VideoPreprocessor:
             print(f"\n🎬 ffmpeg 재인코딩 시작...")
             print(f"   명령어: {' '.join(cmd[:3])} ... {cmd[-1]}")
             
-            # ffmpeg 실행
-            result = subprocess.run(
-                cmd, 
-                capture_output=True, 
-                text=True,
+            # ffmpeg 실행 (취소 요청 시 프로세스 종료)
+            result = run_process(
+                cmd,
+                cancel_check=cancel_check,
                 timeout=1800  # 30분 타임아웃
             )
             
@@ -258,6 +283,12 @@ class VideoPreprocessor:
                 
                 return False
                 
+        except JobCancelled:
+            print(f"🛑 ffmpeg 재인코딩 취소")
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            raise
+            
         except subprocess.TimeoutExpired:
             print(f"❌ ffmpeg 타임아웃 (30분 초과)")
             return False
@@ -272,8 +303,13 @@ class VideoPreprocessor:
             traceback.print_exc()
             return False
         
-    def process_video(self, video_path, pipeline, output_path, progress_callback=None):
-        """동영상에 전처리 파이프라인 적용"""
+    def process_video(self, video_path, pipeline, output_path, progress_callback=None, cancel_check=None):
+        """
+        동영상에 전처리 파이프라인 적용
+
+        cancel_check: 매 프레임 호출되는 취소 확인 함수 (jobs.cancel.CancelToken).
+        JobCancelled가 발생하면 캡처/라이터를 닫고 임시 파일을 지운 뒤 다시 던진다.
+        """
         
         print(f"\n{'='*60}")
         print(f"📹 동영상 처리 시작")
@@ -282,6 +318,8 @@ class VideoPreprocessor:
         print(f"출력: {output_path}")
         print(f"파이프라인: {len(pipeline)}단계")
         
+        apply_pipeline = self.compile_pipeline(pipeline)
+        
         cap = cv2.VideoCapture(video_path)
         
         if not cap.isOpened():
@@ -312,20 +350,20 @@ class VideoPreprocessor:
         print(f"✅ VideoWriter 생성 완료 (코덱: mp4v)")
         
         frame_count = 0
+        finished = False
         
         try:
             print(f"\n🔄 프레임 처리 중...")
             while True:
+                if cancel_check:
+                    cancel_check()
+                
                 ret, frame = cap.read()
                 if not ret:
                     break
                 
                 # 파이프라인 적용
-                processed_frame = frame.copy()
-                for step in pipeline:
-                    step_type = step['type']
-                    params = step.get('params', {})
-                    processed_frame = self.apply_preprocessing(processed_frame, step_type, params)
+                processed_frame = apply_pipeline(frame)
                 
                 # 프레임 저장
                 out.write(processed_frame)
@@ -340,17 +378,25 @@ class VideoPreprocessor:
                 if frame_count % 100 == 0:
                     percent = (frame_count / total_frames * 100) if total_frames > 0 else 0
                     print(f"   진행: {frame_count}/{total_frames} ({percent:.1f}%)")
+            
+            finished = True
         
         finally:
             print(f"\n🔒 리소스 해제 중...")
             cap.release()
             out.release()
             
-            # 파일이 완전히 닫힐 때까지 대기
-            import time
-            time.sleep(1)
-            
-            print(f"✅ OpenCV 처리 완료: {frame_count} 프레임")
+            if not finished:
+                # 취소/에러: 임시 파일 정리
+                if os.path.exists(temp_output):
+                    os.remove(temp_output)
+                    print(f"🗑️  임시 파일 삭제: {temp_output}")
+            else:
+                # 파일이 완전히 닫힐 때까지 대기
+                import time
+                time.sleep(1)
+                
+                print(f"✅ OpenCV 처리 완료: {frame_count} 프레임")
         
         # 임시 파일 확인
         if not os.path.exists(temp_output):
@@ -367,7 +413,11 @@ class VideoPreprocessor:
             progress_callback(frame_count, total_frames, 85)
         
         print(f"\n🎬 ffmpeg 재인코딩 시도...")
-        success = self.reencode_with_ffmpeg(temp_output, output_path)
+        try:
+            success = self.reencode_with_ffmpeg(temp_output, output_path, cancel_check)
+        except JobCancelled:
+            os.remove(temp_output)
+            raise
         
         if success:
             # 임시 파일 삭제
@@ -404,7 +454,7 @@ class VideoPreprocessor:
         
         return frame_count
 
-    def process_image(self, image_path, pipeline, output_path, progress_callback=None):
+    def process_image(self, image_path, pipeline, output_path, progress_callback=None, cancel_check=None):
         """이미지에 전처리 파이프라인 적용"""
         
         print(f"\n{'='*60}")
@@ -435,6 +485,9 @@ class VideoPreprocessor:
             # 파이프라인 적용
             processed_frame = frame.copy()
             for idx, step in enumerate(pipeline):
+                if cancel_check:
+                    cancel_check()
+                
                 step_type = step['type']
                 params = step.get('params', {})
                 
@@ -479,6 +532,9 @@ class VideoPreprocessor:
             
             return output_path
             
+        except JobCancelled:
+            raise
+            
         except Exception as e:
             print(f"\n❌ 이미지 처리 오류: {e}")
             import traceback
@@ -0,0 +1,275 @@
+"""
+전처리 파라미터 스윕
+
+canny_edge 임계값이나 adaptive_threshold 블록 크기 같은 파라미터 조합을
+비교할 때 조합마다 분석을 따로 실행하면 같은 영상을 조합 수만큼 디코딩한다.
+PipelineSweep은 프레임을 한 번만 디코딩하고 모든 변형 파이프라인을 적용하며,
+앞부분이 같은 파이프라인들은 공통 단계의 결과를 한 번만 계산해서 공유한다.
+변형마다 결과 파일을 따로 쓰고, 샘플 프레임으로 변형들을 나란히 비교하는
+컨택트 시트(contact sheet) 이미지를 만든다.
+"""
+import itertools
+import json
+import os
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from jobs.cancel import JobCancelled
+from .preprocessing import VideoPreprocessor
+
+
+# 스윕 한 번에 만들 수 있는 최대 변형 수 (settings.ANALYSIS_SWEEP_MAX_VARIANTS)
+DEFAULT_SWEEP_MAX_VARIANTS = 16
+
+# 컨택트 시트 샘플 프레임 수 / 썸네일 너비
+DEFAULT_SWEEP_SAMPLE_FRAMES = 6
+CONTACT_SHEET_THUMB_WIDTH = 240
+
+
+def expand_grid(pipeline, grid):
+    """
+    기준 파이프라인 + 파라미터 격자 -> 변형 파이프라인 목록 (모든 조합)
+
+    grid: {"<단계 순번>.<파라미터>": [값, ...]}
+    예) {"0.threshold1": [50, 100], "0.threshold2": [150, 200]} -> 4개 변형
+    """
+    if not grid:
+        return [pipeline]
+
+    axes = []
+    for key, values in grid.items():
+        index, _, param = str(key).partition('.')
+        try:
+            index = int(index)
+        except ValueError:
+            raise ValueError(f"격자 키 형식이 올바르지 않습니다: {key} (예: 0.threshold1)")
+        if not param or not 0 <= index < len(pipeline):
+            raise ValueError(f"격자 키가 파이프라인 단계와 맞지 않습니다: {key}")
+        if not isinstance(values, list) or not values:
+            raise ValueError(f"격자 값은 비어 있지 않은 목록이어야 합니다: {key}")
+        axes.append([(index, param, value) for value in values])
+
+    variants = []
+    for combination in itertools.product(*axes):
+        variant = [{'type': step['type'], 'params': dict(step.get('params', {}))} for step in pipeline]
+        for index, param, value in combination:
+            variant[index]['params'][param] = value
+        variants.append(variant)
+    return variants
+
+
+def get_step_key(step):
+    """단계 비교용 키 (같은 종류 + 같은 파라미터면 같은 키)"""
+    return json.dumps([step['type'], step.get('params', {})], sort_keys=True)
+
+
+def get_variant_label(pipeline):
+    """컨택트 시트에 표시할 짧은 이름 (OpenCV 글꼴이 ASCII만 지원)"""
+    parts = []
+    for step in pipeline:
+        params = ','.join(f"{key}={value}" for key, value in step.get('params', {}).items())
+        parts.append(f"{step['type']}({params})" if params else step['type'])
+    return ' > '.join(parts) or 'original'
+
+
+class PipelineSweep:
+    """여러 전처리 파이프라인을 한 번의 디코딩으로 적용"""
+
+    def __init__(self, pipelines, preprocessor=None):
+        self.preprocessor = preprocessor or VideoPreprocessor()
+        self.pipelines = list(pipelines)
+
+        # 변형별 단계: (공통 부분 캐시 키, 메서드, 파라미터)
+        self.plans = []
+        for pipeline in self.pipelines:
+            prefix = ()
+            plan = []
+            for step in pipeline:
+                method, params = self.preprocessor.resolve_step(step)
+                prefix = prefix + (get_step_key(step),)
+                plan.append((prefix, method, params))
+            self.plans.append(plan)
+
+        total = sum(len(plan) for plan in self.plans)
+        unique = len({prefix for plan in self.plans for prefix, _, _ in plan})
+        print(f"🧪 스윕: 변형 {len(self.plans)}개, 단계 {total}개 중 {unique}개만 계산 (공통 단계 공유)")
+
+    def apply(self, frame):
+        """프레임 하나에 모든 변형 적용 (같은 앞부분은 한 번만 계산)"""
+        cache = {(): frame}
+        results = []
+        for plan in self.plans:
+            current = frame
+            for prefix, method, params in plan:
+                if prefix not in cache:
+                    cache[prefix] = method(current, params)
+                current = cache[prefix]
+            results.append(current)
+        return results
+
+    def process_video(self, video_path, output_paths, progress_callback=None, cancel_check=None,
+                      sample_count=DEFAULT_SWEEP_SAMPLE_FRAMES):
+        """
+        동영상에 모든 변형 적용 (변형별 결과 파일 작성)
+
+        반환: 컨택트 시트용 샘플 [(프레임 번호, [원본, 변형1, 변형2, ...]), ...]
+        """
+        print(f"\n{'='*60}\n🧪 스윕 처리 시작 (변형 {len(self.plans)}개)\n{'='*60}")
+
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise ValueError(f"동영상을 열 수 없습니다: {video_path}")
+
+        fps = int(cap.get(cv2.CAP_PROP_FPS)) or 30
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+        print(f"해상도: {width}x{height} | FPS: {fps} | 총 프레임: {total_frames}")
+
+        # 샘플 프레임 번호 (고르게)
+        if total_frames > 0:
+            sample_frames = set(np.linspace(0, total_frames - 1, min(sample_count, total_frames)).astype(int))
+        else:
+            sample_frames = set(range(sample_count))
+
+        # 변형별 VideoWriter (임시 파일)
+        writers = []
+        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        for output_path in output_paths:
+            temp_output = str(Path(output_path).parent / f'temp_{Path(output_path).name}')
+            out = cv2.VideoWriter(temp_output, fourcc, fps, (width, height))
+            writers.append((str(output_path), temp_output, out))
+            if not out.isOpened():
+                cap.release()
+                self._discard(writers)
+                raise ValueError("출력 VideoWriter를 생성할 수 없습니다")
+
+        samples = []
+        frame_count = 0
+        finished = False
+
+        try:
+            print(f"🔄 프레임 처리 중...")
+            while True:
+                if cancel_check:
+                    cancel_check()
+
+                ret, frame = cap.read()
+                if not ret:
+                    break
+
+                processed = self.apply(frame)
+                for (_, _, out), processed_frame in zip(writers, processed):
+                    out.write(processed_frame)
+
+                if frame_count in sample_frames:
+                    samples.append((frame_count, [frame] + processed))
+
+                frame_count += 1
+                if progress_callback and frame_count % 10 == 0:
+                    progress = int((frame_count / total_frames) * 80) if total_frames > 0 else 0
+                    progress_callback(frame_count, total_frames, progress)
+
+            finished = True
+
+        finally:
+            cap.release()
+            for _, _, out in writers:
+                out.release()
+            if not finished:
+                # 취소/에러: 임시 파일 정리
+                self._discard(writers)
+
+        # 변형별 재인코딩 (80-100%)
+        if progress_callback:
+            progress_callback(frame_count, total_frames, 85)
+
+        for output_path, temp_output, _ in writers:
+            try:
+                success = self.preprocessor.reencode_with_ffmpeg(temp_output, output_path, cancel_check)
+            except JobCancelled:
+                self._discard(writers)
+                raise
+
+            if success:
+                os.remove(temp_output)
+            else:
+                print(f"⚠️  ffmpeg 재인코딩 실패 - OpenCV 출력 사용: {output_path}")
+                if os.path.exists(output_path):
+                    os.remove(output_path)
+                os.rename(temp_output, output_path)
+
+        if progress_callback:
+            progress_callback(frame_count, total_frames, 100)
+
+        return samples
+
+    def process_image(self, image_path, output_paths, progress_callback=None, cancel_check=None):
+        """이미지에 모든 변형 적용 (반환 형식은 process_video와 같음)"""
+        frame = cv2.imread(image_path)
+        if frame is None:
+            raise ValueError(f"이미지를 열 수 없습니다: {image_path}")
+
+        if cancel_check:
+            cancel_check()
+
+        processed = self.apply(frame)
+        for output_path, processed_frame in zip(output_paths, processed):
+            if not cv2.imwrite(str(output_path), processed_frame):
+                raise ValueError(f"이미지 저장 실패: {output_path}")
+
+        if progress_callback:
+            progress_callback(1, 1, 100)
+
+        return [(0, [frame] + processed)]
+
+    @staticmethod
+    def _discard(writers):
+        for _, temp_output, _ in writers:
+            if os.path.exists(temp_output):
+                os.remove(temp_output)
+
+
+def make_contact_sheet(samples, labels, output_path, thumb_width=CONTACT_SHEET_THUMB_WIDTH):
+    """
+    변형 비교용 컨택트 시트 저장
+
+    행: 원본 + 변형 (행 위에 이름 표시), 열: 샘플 프레임
+    """
+    if not samples:
+        return None
+
+    first = samples[0][1][0]
+    height, width = first.shape[:2]
+    thumb_height = max(1, int(height * thumb_width / width))
+    label_height = 22
+    rows = len(samples[0][1])
+    columns = len(samples)
+
+    sheet = np.full(
+        (rows * (thumb_height + label_height), columns * thumb_width, 3), 255, dtype=np.uint8
+    )
+
+    for column, (frame_number, frames) in enumerate(samples):
+        for row, frame in enumerate(frames):
+            if frame.ndim == 2:
+                frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+            thumb = cv2.resize(frame, (thumb_width, thumb_height), interpolation=cv2.INTER_AREA)
+            top = row * (thumb_height + label_height) + label_height
+            left = column * thumb_width
+            sheet[top:top + thumb_height, left:left + thumb_width] = thumb
+            cv2.putText(sheet, f"#{frame_number}", (left + 4, top + thumb_height - 6),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 255, 255), 1, cv2.LINE_AA)
+
+    for row, label in enumerate(['original'] + list(labels)):
+        top = row * (thumb_height + label_height)
+        cv2.putText(sheet, label if row == 0 else f"V{row}: {label}", (4, top + 15),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.45, (0, 0, 0), 1, cv2.LINE_AA)
+
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    if not cv2.imwrite(str(output_path), sheet):
+        raise ValueError(f"컨택트 시트 저장 실패: {output_path}")
+    return output_path
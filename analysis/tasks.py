@@ -1,12 +1,98 @@
 from django.utils import timezone
+from jobs.cancel import JobCancelled, get_cancel_token
+from jobs.progress import get_progress_reporter
+from videos.retention import register_artifact
+from videos.storage import delete_media_prefix, get_media_store, local_media_path, media_name, publish_media
 from .models import Analysis
 import os
 from pathlib import Path
+import shutil
 import traceback
 
+
+# 전처리 단계별 상대 비용 (1MP 프레임 1장 기준, 등록되지 않은 단계는 2.0)
+STEP_COST_WEIGHTS = {
+    'gray_scale': 0.3,
+    'threshold': 0.3,
+    'gaussian_blur': 1.0,
+    'canny_edge': 1.0,
+    'adaptive_threshold': 1.0,
+    'morphology_open': 1.0,
+    'morphology_close': 1.0,
+    'sobel_edge': 1.5,
+    'median_blur': 2.0,
+    'harris_corner': 3.0,
+}
+
+
+def estimate_analysis_cost(analysis_id):
+    """분석 작업 비용 추정 (프레임 수 x 해상도 x (디코딩/인코딩 + 전처리 단계 가중치))"""
+    from jobs.cost import megapixel_frames
+
+    analysis = Analysis.objects.get(id=analysis_id)
+    media = analysis.get_media()
+    if not media or not media.file:
+        return None
+
+    mp_frames = megapixel_frames(get_media_store().source(media.file.name))
+    if mp_frames is None:
+        return None
+
+    pipeline = analysis.preprocessing_pipeline or []
+    step_weight = sum(STEP_COST_WEIGHTS.get(step.get('type'), 2.0) for step in pipeline)
+    codec_weight = 1.0 if analysis.get_media_type() == 'video' else 0.2
+
+    return mp_frames * (codec_weight + step_weight)
+
+
+def get_analysis_output_path(analysis):
+    """분석 결과 파일 경로 (media/analysis_results/<id>/<원본이름>_processed.확장자)"""
+    output_dir = Path('media/analysis_results') / str(analysis.id)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    # 파일 이름 정리 (특수문자 제거)
+    original_name = analysis.get_media().file.name.split("/")[-1]
+    clean_name = "".join(c for c in original_name if c.isalnum() or c in '.-_')
+    
+    # ⭐ 미디어 타입에 따라 확장자 결정
+    if analysis.get_media_type() == 'image':
+        output_filename = Path(clean_name).stem + '_processed.jpg'
+    else:
+        output_filename = Path(clean_name).stem + '_processed.mp4'
+    
+    return output_dir / output_filename
+
+
+def find_reusable_analysis(analysis):
+    """
+    같은 내용(content_hash)의 미디어를 같은 파이프라인으로 처리해 끝난 분석 (없으면 None)
+
+    전처리는 입력과 파이프라인이 같으면 결과도 같으므로 결과 파일을 다시 쓸 수 있다.
+    """
+    media = analysis.get_media()
+    if not media or not media.content_hash:
+        return None
+
+    pipeline = analysis.preprocessing_pipeline or []
+    candidates = (
+        Analysis.objects
+        .filter(**{f'{analysis.get_media_type()}__content_hash': media.content_hash}, status='completed')
+        .exclude(pk=analysis.pk)
+        .exclude(output_video_path='')
+        .order_by('-completed_at')
+    )
+    store = get_media_store()
+    for candidate in candidates[:20]:
+        if (candidate.preprocessing_pipeline or []) == pipeline and store.exists(candidate.output_video_path):
+            return candidate
+    return None
+
+
 def process_video_analysis(analysis_id):
     """동영상/이미지 분석 실행"""
     analysis = None
+    cancel_check = get_cancel_token()
+    reporter = get_progress_reporter('analysis', analysis_id)
     try:
         print(f"\n{'='*50}")
         print(f"🎬 분석 시작: ID={analysis_id}")
@@ -27,29 +113,16 @@ def process_video_analysis(analysis_id):
         analysis.status = 'processing'
         analysis.started_at = timezone.now()
         analysis.current_step = '전처리 시작'
-        analysis.save()
+        analysis.save(update_fields=['status', 'started_at', 'current_step', 'updated_at'])
         
-        # 입력 파일 경로
-        input_path = media.file.path
+        # 입력 파일 경로 (원격 저장소면 이 노드의 캐시로 내려받음)
+        input_path = local_media_path(media.file.name)
         
         if not os.path.exists(input_path):
             raise FileNotFoundError(f"파일을 찾을 수 없습니다: {input_path}")
         
         # 출력 경로 설정
-        output_dir = Path('media/analysis_results') / str(analysis.id)
-        output_dir.mkdir(parents=True, exist_ok=True)
-        
-        # 파일 이름 정리 (특수문자 제거)
-        original_name = media.file.name.split("/")[-1]
-        clean_name = "".join(c for c in original_name if c.isalnum() or c in '.-_')
-        
-        # ⭐ 미디어 타입에 따라 확장자 결정
-        if media_type == 'image':
-            output_filename = Path(clean_name).stem + '_processed.jpg'
-        else:
-            output_filename = Path(clean_name).stem + '_processed.mp4'
-        
-        output_path = output_dir / output_filename
+        output_path = get_analysis_output_path(analysis)
         
         print(f"📤 출력 경로: {output_path}")
         
@@ -57,36 +130,35 @@ def process_video_analysis(analysis_id):
         from .preprocessing import VideoPreprocessor
         preprocessor = VideoPreprocessor()
         
-        # 진행률 콜백
+        # 진행률 콜백 (행 저장 대신 진행률 채널에 스로틀해서 기록)
         def progress_callback(current, total, progress):
-            analysis.processed_frames = current
-            analysis.total_frames = total
-            analysis.progress = progress
-            
             if media_type == 'image':
                 if progress < 90:
-                    analysis.current_step = f'이미지 처리 중: {current}/{total}'
+                    current_step = f'이미지 처리 중: {current}/{total}'
                 else:
-                    analysis.current_step = '완료 중...'
+                    current_step = '완료 중...'
             else:
                 if progress < 85:
-                    analysis.current_step = f'프레임 처리 중: {current}/{total}'
+                    current_step = f'프레임 처리 중: {current}/{total}'
                 elif progress < 95:
-                    analysis.current_step = 'ffmpeg 재인코딩 중...'
+                    current_step = 'ffmpeg 재인코딩 중...'
                 else:
-                    analysis.current_step = '완료 중...'
-            
-            analysis.save()
+                    current_step = '완료 중...'
             
-            if current % 30 == 0 or media_type == 'image':
-                print(f"⏳ 진행률: {progress}%")
+            # 재인코딩/완료 단계(85% 이상)는 드물게 호출되므로 바로 기록
+            reporter.update(current, total, progress, current_step, force=progress >= 85)
         
         # 파이프라인 실행
         pipeline = analysis.preprocessing_pipeline or []
+        reusable = find_reusable_analysis(analysis)
         
-        if not pipeline:
+        if reusable:
+            # 같은 원본 + 같은 파이프라인: 이전 결과 파일을 하드링크 (원격 저장소는 서버 쪽 복사)
+            print(f"♻️  같은 내용의 분석 결과 재사용: 분석 {reusable.id}")
+            get_media_store().copy(reusable.output_video_path, media_name(output_path))
+            reporter.update(reusable.processed_frames, reusable.total_frames, 95, '이전 결과 재사용', force=True)
+        elif not pipeline:
             # 파이프라인이 비어있으면 원본 복사
-            import shutil
             shutil.copy(input_path, output_path)
             analysis.total_frames = 1
             analysis.processed_frames = 1
@@ -98,7 +170,8 @@ def process_video_analysis(analysis_id):
                     input_path,
                     pipeline,
                     str(output_path),
-                    progress_callback
+                    progress_callback,
+                    cancel_check
                 )
             else:
                 # 동영상 전처리
@@ -106,20 +179,23 @@ def process_video_analysis(analysis_id):
                     input_path,
                     pipeline,
                     str(output_path),
-                    progress_callback
+                    progress_callback,
+                    cancel_check
                 )
         
-        # 출력 파일 확인
-        if not output_path.exists():
-            raise FileNotFoundError(f"출력 파일이 생성되지 않았습니다: {output_path}")
-        
-        file_size = output_path.stat().st_size
-        print(f"✅ 출력 파일: {file_size:,} bytes")
-        
         # 경로를 forward slash로 변환
         relative_path = output_path.relative_to('media')
         relative_path_str = str(relative_path).replace('\\', '/')
         
+        # 출력 파일 확인 (재사용한 결과는 저장소에서 복사됨)
+        if not reusable:
+            if not output_path.exists():
+                raise FileNotFoundError(f"출력 파일이 생성되지 않았습니다: {output_path}")
+            
+            file_size = output_path.stat().st_size
+            print(f"✅ 출력 파일: {file_size:,} bytes")
+            publish_media(relative_path_str)
+        
         print(f"💾 저장 경로: {relative_path_str}")
         
         # 완료 처리
@@ -128,12 +204,23 @@ def process_video_analysis(analysis_id):
         analysis.progress = 100
         analysis.output_video_path = relative_path_str
         analysis.current_step = '완료'
-        analysis.save()
+        analysis.processed_frames = reporter.state.get('processed_frames', analysis.processed_frames)
+        analysis.total_frames = reporter.state.get('total_frames', analysis.total_frames)
+        analysis.save(update_fields=[
+            'status', 'completed_at', 'progress', 'output_video_path', 'current_step',
+            'processed_frames', 'total_frames', 'updated_at',
+        ])
+        register_artifact('analysis', analysis.id, relative_path_str)
         
         print(f"✨ 분석 완료!")
         
         return True
         
+    except JobCancelled as e:
+        print(f"🛑 분석 중단: {e}")
+        cleanup_cancelled_analysis(analysis_id)
+        raise
+        
     except Exception as e:
         print(f"❌ 에러: {e}")
         traceback.print_exc()
@@ -142,14 +229,165 @@ def process_video_analysis(analysis_id):
             analysis.status = 'failed'
             analysis.error_message = str(e)
             analysis.current_step = '실패'
-            analysis.save()
+            analysis.save(update_fields=['status', 'error_message', 'current_step', 'updated_at'])
         
         return False
 
 
+def estimate_sweep_cost(analysis_id):
+    """스윕 비용 추정 (1회 디코딩 + 공통 단계를 뺀 고유 단계 가중치 + 변형별 인코딩)"""
+    from jobs.cost import megapixel_frames
+    from .sweep import get_step_key
+
+    lead = Analysis.objects.get(id=analysis_id)
+    media = lead.get_media()
+    if not media or not media.file:
+        return None
+
+    mp_frames = megapixel_frames(get_media_store().source(media.file.name))
+    if mp_frames is None:
+        return None
+
+    pipelines = list(lead.get_sweep().values_list('preprocessing_pipeline', flat=True))
+    steps = {}
+    for pipeline in pipelines:
+        prefix = ()
+        for step in pipeline or []:
+            prefix = prefix + (get_step_key(step),)
+            steps[prefix] = STEP_COST_WEIGHTS.get(step.get('type'), 2.0)
+    codec_weight = 1.0 if lead.get_media_type() == 'video' else 0.2
+
+    return mp_frames * (codec_weight * (0.5 + 0.5 * len(pipelines)) + sum(steps.values()))
+
+
+def process_analysis_sweep(analysis_id):
+    """
+    파라미터 스윕 실행
+
+    analysis_id는 대표 분석이고 sweep_lead로 연결된 변형 분석들을 함께
+    처리한다. 프레임은 한 번만 디코딩하고 (analysis.sweep.PipelineSweep),
+    결과는 변형마다 각자의 분석 결과로 저장한다. 대표 분석의 결과 폴더에
+    샘플 프레임 컨택트 시트를 남긴다.
+    """
+    from .sweep import PipelineSweep, get_variant_label, make_contact_sheet
+
+    sweep_ids = []
+    cancel_check = get_cancel_token()
+    reporter = get_progress_reporter('sweep', analysis_id)
+    try:
+        lead = Analysis.objects.get(id=analysis_id)
+        variants = list(lead.get_sweep())
+        sweep_ids = [variant.id for variant in variants]
+
+        print(f"\n{'='*50}")
+        print(f"🧪 스윕 시작: ID={analysis_id} (변형 {len(variants)}개)")
+
+        media = lead.get_media()
+        if not media:
+            raise ValueError("미디어를 찾을 수 없습니다")
+
+        input_path = local_media_path(media.file.name)
+        if not os.path.exists(input_path):
+            raise FileNotFoundError(f"파일을 찾을 수 없습니다: {input_path}")
+
+        # 파이프라인을 먼저 검증 (잘못된 단계면 바로 실패)
+        pipelines = [variant.preprocessing_pipeline or [] for variant in variants]
+        sweep = PipelineSweep(pipelines)
+
+        # 상태 업데이트
+        Analysis.objects.filter(id__in=sweep_ids).update(
+            status='processing', started_at=timezone.now(), current_step='스윕 처리 중',
+            error_message='', updated_at=timezone.now(),
+        )
+
+        output_paths = [get_analysis_output_path(variant) for variant in variants]
+
+        def progress_callback(current, total, progress):
+            if progress < 85:
+                current_step = f'프레임 처리 중 (변형 {len(variants)}개): {current}/{total}'
+            elif progress < 95:
+                current_step = 'ffmpeg 재인코딩 중...'
+            else:
+                current_step = '완료 중...'
+            reporter.update(current, total, progress, current_step, force=progress >= 85)
+
+        if lead.get_media_type() == 'image':
+            samples = sweep.process_image(input_path, output_paths, progress_callback, cancel_check)
+        else:
+            samples = sweep.process_video(
+                input_path, [str(path) for path in output_paths], progress_callback, cancel_check
+            )
+
+        # 컨택트 시트 (대표 분석 결과 폴더)
+        sheet_path = Path('media/analysis_results') / str(lead.id) / Analysis.CONTACT_SHEET_NAME
+        make_contact_sheet(samples, [get_variant_label(pipeline) for pipeline in pipelines], sheet_path)
+        print(f"🖼️  컨택트 시트: {sheet_path}")
+        publish_media(media_name(sheet_path))
+
+        # 변형별 완료 처리 (실행 중에 삭제된 변형은 결과 폴더만 정리)
+        alive = set(Analysis.objects.filter(id__in=sweep_ids).values_list('id', flat=True))
+        for variant, output_path in zip(variants, output_paths):
+            if variant.id not in alive:
+                shutil.rmtree(output_path.parent, ignore_errors=True)
+                continue
+            relative_path = media_name(output_path)
+            publish_media(relative_path)
+            Analysis.objects.filter(id=variant.id).update(
+                status='completed',
+                completed_at=timezone.now(),
+                progress=100,
+                output_video_path=relative_path,
+                current_step='완료',
+                processed_frames=reporter.state.get('processed_frames', 1),
+                total_frames=reporter.state.get('total_frames', 1),
+                updated_at=timezone.now(),
+            )
+            register_artifact('analysis', variant.id, relative_path)
+
+        print(f"✨ 스윕 완료!")
+
+        return True
+
+    except JobCancelled as e:
+        print(f"🛑 스윕 중단: {e}")
+        for sweep_id in sweep_ids or [analysis_id]:
+            cleanup_cancelled_analysis(sweep_id)
+        raise
+
+    except Exception as e:
+        print(f"❌ 에러: {e}")
+        traceback.print_exc()
+
+        Analysis.objects.filter(id__in=sweep_ids or [analysis_id]).update(
+            status='failed', error_message=str(e), current_step='실패',
+        )
+
+        return False
+
+
+def cleanup_cancelled_analysis(analysis_id):
+    """취소된 분석의 부분 결과 정리 (행이 삭제됐으면 결과 폴더째 삭제)"""
+    # 행을 다시 만들지 않도록 save() 대신 update() 사용
+    updated = Analysis.objects.filter(id=analysis_id).update(
+        status='cancelled',
+        current_step='취소됨',
+        error_message='',
+    )
+    if not updated:
+        delete_media_prefix(f'analysis_results/{analysis_id}')
+
+
 def start_analysis_task(analysis_id):
-    """분석 작업을 백그라운드에서 시작"""
-    import threading
-    thread = threading.Thread(target=process_video_analysis, args=(analysis_id,))
-    thread.daemon = True
-    thread.start()
\ No newline at end of file
+    """분석 작업을 작업 큐에 등록 (runworker 프로세스가 실행)"""
+    from jobs.queue import enqueue
+    priority = Analysis.objects.filter(id=analysis_id).values_list('priority', flat=True).first() or 0
+    return enqueue('analysis', analysis_id, priority=priority)
+
+
+def start_sweep_task(analysis_id):
+    """스윕 작업을 작업 큐에 등록 (analysis_id: 대표 분석)"""
+    from jobs.queue import enqueue
+    priority = Analysis.objects.filter(id=analysis_id).values_list('priority', flat=True).first() or 0
+    job = enqueue('sweep', analysis_id, priority=priority)
+    Analysis.objects.filter(sweep_lead_id=analysis_id).update(status='queued', error_message='')
+    return job
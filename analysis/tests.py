@@ -1,3 +1,182 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import tempfile
 
-# Create your tests here.
+import numpy as np
+from PIL import Image as PILImage
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from jobs.models import Job
+from videos.models import Image, Video
+from .models import Analysis
+from .preprocessing import VideoPreprocessor
+from .sweep import PipelineSweep, expand_grid
+from .tasks import find_reusable_analysis, process_video_analysis
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class AnalysisEventsViewTests(TestCase):
+    def setUp(self):
+        self.video = Video.objects.create(title='events', file='videos/events.mp4')
+
+    async def test_finished_analysis_sends_done(self):
+        analysis = await Analysis.objects.acreate(video=self.video, status='completed', progress=100)
+
+        response = await self.async_client.get(reverse('analysis_events', args=[analysis.id]))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        events = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(events[0], b'retry: 3000\n\n')
+        self.assertTrue(events[1].startswith(b'event: done\n'))
+        self.assertIn(b'"progress": 100', events[1])
+
+    async def test_missing_analysis(self):
+        response = await self.async_client.get(reverse('analysis_events', args=[12345]))
+        self.assertEqual(response.status_code, 404)
+
+
+class CountingPreprocessor(VideoPreprocessor):
+    """단계별 실행 횟수를 세는 전처리기"""
+
+    def __init__(self):
+        self.calls = []
+
+    def median_blur(self, frame, params=None):
+        self.calls.append(('median_blur', params))
+        return VideoPreprocessor.median_blur(frame, params)
+
+    def threshold(self, frame, params=None):
+        self.calls.append(('threshold', params))
+        return VideoPreprocessor.threshold(frame, params)
+
+
+class PipelineSweepTests(SimpleTestCase):
+    def test_expand_grid(self):
+        pipeline = [{'type': 'canny_edge', 'params': {'threshold1': 50}}]
+        variants = expand_grid(pipeline, {'0.threshold1': [50, 100], '0.threshold2': [150, 200]})
+
+        self.assertEqual(
+            [variant[0]['params'] for variant in variants],
+            [{'threshold1': 50, 'threshold2': 150}, {'threshold1': 50, 'threshold2': 200},
+             {'threshold1': 100, 'threshold2': 150}, {'threshold1': 100, 'threshold2': 200}],
+        )
+        self.assertEqual(pipeline[0]['params'], {'threshold1': 50})
+        self.assertEqual(expand_grid(pipeline, {}), [pipeline])
+
+        for grid in ({'x.threshold1': [1]}, {'1.threshold1': [1]}, {'0': [1]}, {'0.threshold1': []}):
+            with self.assertRaises(ValueError):
+                expand_grid(pipeline, grid)
+
+    def test_shared_prefix_is_computed_once(self):
+        blur = {'type': 'median_blur', 'params': {'kernel_size': 3}}
+        pipelines = [
+            [blur, {'type': 'threshold', 'params': {'threshold': 50}}],
+            [blur, {'type': 'threshold', 'params': {'threshold': 150}}],
+            [dict(blur)],
+        ]
+        preprocessor = CountingPreprocessor()
+        frame = np.random.default_rng(0).integers(0, 255, (16, 16, 3), dtype=np.uint8)
+
+        results = PipelineSweep(pipelines, preprocessor).apply(frame)
+
+        self.assertEqual([name for name, _ in preprocessor.calls], ['median_blur', 'threshold', 'threshold'])
+        for pipeline, result in zip(pipelines, results):
+            np.testing.assert_array_equal(result, VideoPreprocessor().compile_pipeline(pipeline)(frame))
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class StartSweepViewTests(TestCase):
+    def setUp(self):
+        self.video = Video.objects.create(title='sweep', file='videos/sweep.mp4')
+        self.analysis = Analysis.objects.create(video=self.video, status='ready')
+
+    def post(self, **data):
+        return self.client.post(reverse('start_sweep', args=[self.analysis.id]), data)
+
+    def test_pipelines_create_variants_and_job(self):
+        pipelines = [
+            [{'type': 'median_blur', 'params': {'kernel_size': 3}}],
+            [{'type': 'median_blur', 'params': {'kernel_size': 5}}],
+        ]
+        response = self.post(pipelines=json.dumps(pipelines))
+
+        self.assertRedirects(
+            response, reverse('analysis_progress', args=[self.analysis.id]), fetch_redirect_response=False
+        )
+        self.analysis.refresh_from_db()
+        self.assertEqual(self.analysis.preprocessing_pipeline, pipelines[0])
+        variants = Analysis.objects.filter(sweep_lead=self.analysis)
+        self.assertEqual([v.preprocessing_pipeline for v in variants], pipelines[1:])
+        self.assertTrue(Job.objects.filter(kind='sweep', object_id=self.analysis.id, status='queued').exists())
+
+    @override_settings(ANALYSIS_SWEEP_MAX_VARIANTS=2)
+    def test_too_many_variants_rejected(self):
+        pipelines = [[{'type': 'median_blur', 'params': {'kernel_size': k}}] for k in (3, 5, 7)]
+        response = self.post(pipelines=json.dumps(pipelines))
+
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Analysis.objects.filter(sweep_lead=self.analysis).exists())
+        self.assertFalse(Job.objects.filter(kind='sweep').exists())
+
+    def test_unknown_step_rejected(self):
+        pipelines = [[{'type': 'median_blur'}], [{'type': 'unknown'}]]
+        response = self.post(pipelines=json.dumps(pipelines))
+
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Job.objects.filter(kind='sweep').exists())
+
+
+class AnalysisReuseTests(TestCase):
+    PIPELINE = [{'type': 'gray_scale', 'params': {}}]
+
+    def setUp(self):
+        # 분석 결과는 작업 디렉토리 기준 media/ 에 쓰임
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp, ignore_errors=True)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(tmp)
+        settings_override = override_settings(MEDIA_ROOT=os.path.join(tmp, 'media'))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        os.makedirs('media/images')
+        PILImage.new('RGB', (32, 24), 'blue').save('media/images/a.png')
+        self.images = [
+            Image.objects.create(title=title, file='images/a.png', content_hash='a' * 64)
+            for title in ('first', 'second')
+        ]
+
+    def analyze(self, image, pipeline=PIPELINE):
+        analysis = Analysis.objects.create(image=image, preprocessing_pipeline=pipeline)
+        self.assertTrue(process_video_analysis(analysis.id))
+        analysis.refresh_from_db()
+        self.assertEqual(analysis.status, 'completed')
+        return analysis
+
+    def test_same_content_and_pipeline_reuses_output(self):
+        first = self.analyze(self.images[0])
+        second = self.analyze(self.images[1])
+
+        self.assertNotEqual(second.output_video_path, first.output_video_path)
+        self.assertTrue(os.path.samefile(
+            os.path.join('media', first.output_video_path), os.path.join('media', second.output_video_path),
+        ))
+
+    def test_candidates_must_match(self):
+        first = self.analyze(self.images[0])
+        pending = Analysis.objects.create(image=self.images[1], preprocessing_pipeline=self.PIPELINE)
+        self.assertEqual(find_reusable_analysis(pending), first)
+
+        other_pipeline = Analysis.objects.create(image=self.images[1], preprocessing_pipeline=[])
+        self.assertIsNone(find_reusable_analysis(other_pipeline))
+
+        Image.objects.filter(pk=self.images[1].pk).update(content_hash='b' * 64)
+        pending.refresh_from_db()
+        self.assertIsNone(find_reusable_analysis(pending))
+
+        Image.objects.filter(pk=self.images[1].pk).update(content_hash='a' * 64)
+        pending = Analysis.objects.get(pk=pending.pk)
+        os.remove(os.path.join('media', first.output_video_path))
+        self.assertIsNone(find_reusable_analysis(pending))
@@ -12,9 +12,17 @@ urlpatterns = [
     # 분석 실행
     path('<int:analysis_id>/execute/', views.ExecuteAnalysisView.as_view(), name='execute_analysis'),
 
+    # 파라미터 스윕
+    path('<int:analysis_id>/sweep/', views.StartSweepView.as_view(), name='start_sweep'),
+    path('<int:analysis_id>/sweep/result/', views.SweepResultView.as_view(), name='sweep_result'),
+
+    # 분석 취소
+    path('<int:analysis_id>/cancel/', views.CancelAnalysisView.as_view(), name='cancel_analysis'),
+
     # 진행 상황
     path('<int:analysis_id>/progress/', views.AnalysisProgressView.as_view(), name='analysis_progress'),
     path('<int:analysis_id>/status/', views.AnalysisStatusView.as_view(), name='analysis_status'),
+    path('<int:analysis_id>/events/', views.AnalysisEventsView.as_view(), name='analysis_events'),
 
     # 결과
     path('<int:analysis_id>/result/', views.AnalysisResultView.as_view(), name='analysis_result'),
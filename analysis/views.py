@@ -1,24 +1,22 @@
 import json
 import mimetypes
-import os
-import re
 
 from django.conf import settings
 from django.contrib import messages
-from django.http import (
-    FileResponse,
-    Http404,
-    HttpResponse,
-    JsonResponse,
-    StreamingHttpResponse,
-)
-from django.shortcuts import get_object_or_404, redirect, render
+from django.http import Http404, JsonResponse
+from django.shortcuts import aget_object_or_404, get_object_or_404, redirect, render
+from django.urls import reverse
 from django.utils import timezone
 from django.views import View
 from django.views.generic import DeleteView
-from wsgiref.util import FileWrapper
 
+from jobs.events import event_stream_response, progress_events
+from jobs.progress import get_job_progress
+from jobs.queue import get_active_job, request_cancel
+from jobs.scheduler import get_queue_info, parse_priority
 from videos.models import Image, Video
+from videos.retention import serve_artifact
+from vision_engine.models import Detection
 from .models import Analysis
 from .preprocessing import VideoPreprocessor
 
@@ -143,17 +141,132 @@ class ExecuteAnalysisView(View):
             messages.error(request, '미디어를 찾을 수 없습니다.')
             return redirect('media_list')
 
-        if analysis.status == 'processing':
-            messages.warning(request, '이미 처리 중입니다.')
+        if analysis.status in ('queued', 'processing'):
+            messages.warning(request, '이미 대기 중이거나 처리 중입니다.')
             return redirect('analysis_progress', analysis_id=analysis_id)
 
+        priority = parse_priority(request.POST.get('priority'), Analysis.PRIORITY_CHOICES)
+        if priority is not None and priority != analysis.priority:
+            analysis.priority = priority
+            analysis.save(update_fields=['priority'])
+
         from .tasks import start_analysis_task
 
         start_analysis_task(analysis_id)
-        messages.success(request, '분석을 시작했습니다.')
+        messages.success(request, '분석 작업이 대기열에 등록되었습니다.')
+        return redirect('analysis_progress', analysis_id=analysis_id)
+
+    def get(self, request, analysis_id):
         return redirect('analysis_progress', analysis_id=analysis_id)
 
+
+class StartSweepView(View):
+    """
+    파라미터 스윕 시작
+
+    현재 파이프라인을 기준으로 grid({"<단계 순번>.<파라미터>": [값, ...]})의
+    모든 조합, 또는 pipelines(파이프라인 목록)를 변형으로 만든다. 현재 분석이
+    첫 번째 변형(대표)이 되고 나머지 변형은 새 분석으로 만든다.
+    """
+
+    def post(self, request, analysis_id):
+        from .sweep import DEFAULT_SWEEP_MAX_VARIANTS, expand_grid
+        from .tasks import start_sweep_task
+
+        analysis = get_object_or_404(Analysis, id=analysis_id)
+        media = analysis.get_media()
+
+        if not media:
+            messages.error(request, '미디어를 찾을 수 없습니다.')
+            return redirect('media_list')
+
+        if analysis.status in ('queued', 'processing'):
+            messages.warning(request, '이미 대기 중이거나 처리 중입니다.')
+            return redirect('analysis_progress', analysis_id=analysis_id)
+
+        if analysis.is_sweep():
+            messages.warning(request, '이미 스윕에 속한 분석입니다.')
+            return redirect('sweep_result', analysis_id=analysis_id)
+
+        try:
+            pipelines = json.loads(request.POST.get('pipelines') or '[]')
+            grid = json.loads(request.POST.get('grid') or '{}')
+            if not isinstance(pipelines, list) or not isinstance(grid, dict):
+                raise ValueError('pipelines는 목록, grid는 객체여야 합니다.')
+            if not pipelines:
+                pipelines = expand_grid(analysis.preprocessing_pipeline or [], grid)
+
+            max_variants = getattr(settings, 'ANALYSIS_SWEEP_MAX_VARIANTS', DEFAULT_SWEEP_MAX_VARIANTS)
+            if len(pipelines) < 2:
+                raise ValueError('비교할 변형이 2개 이상 필요합니다.')
+            if len(pipelines) > max_variants:
+                raise ValueError(f'변형은 최대 {max_variants}개까지 만들 수 있습니다. ({len(pipelines)}개)')
+
+            for pipeline in pipelines:
+                for step in pipeline:
+                    if step.get('type') not in VideoPreprocessor.PREPROCESSING_METHODS:
+                        raise ValueError(f"알 수 없는 전처리 단계입니다: {step.get('type')}")
+        except (ValueError, TypeError, AttributeError) as e:
+            messages.error(request, f'스윕 설정이 올바르지 않습니다: {e}')
+            return redirect(f"{reverse('start_analysis', args=[media.id])}?type={analysis.get_media_type()}")
+
+        priority = parse_priority(request.POST.get('priority'), Analysis.PRIORITY_CHOICES)
+        if priority is not None:
+            analysis.priority = priority
+
+        # 현재 분석이 첫 번째 변형 (대표)
+        analysis.preprocessing_pipeline = pipelines[0]
+        analysis.save(update_fields=['preprocessing_pipeline', 'priority', 'updated_at'])
+
+        for pipeline in pipelines[1:]:
+            Analysis.objects.create(
+                video=analysis.video,
+                image=analysis.image,
+                sweep_lead=analysis,
+                preprocessing_pipeline=pipeline,
+                priority=analysis.priority,
+                status='ready',
+            )
+
+        start_sweep_task(analysis.id)
+        messages.success(request, f'스윕 작업(변형 {len(pipelines)}개)이 대기열에 등록되었습니다.')
+        return redirect('analysis_progress', analysis_id=analysis.id)
+
+
+class SweepResultView(View):
+    """스윕 결과 (컨택트 시트 + 변형 목록)"""
+    template_name = 'analysis/sweep_result.html'
+
     def get(self, request, analysis_id):
+        analysis = get_object_or_404(Analysis, id=analysis_id)
+        variants = list(analysis.get_sweep())
+
+        if len(variants) < 2:
+            return redirect('analysis_result', analysis_id=analysis_id)
+
+        context = {
+            'analysis': variants[0],
+            'media': analysis.get_media(),
+            'media_type': analysis.get_media_type(),
+            'variants': variants,
+            'contact_sheet_path': analysis.get_contact_sheet_path(),
+        }
+        return render(request, self.template_name, context)
+
+
+class CancelAnalysisView(View):
+    def post(self, request, analysis_id):
+        analysis = get_object_or_404(Analysis, id=analysis_id)
+
+        job = request_cancel(Analysis.JOB_KINDS, analysis.get_job_object_id())
+        if job is None:
+            messages.warning(request, '취소할 작업이 없습니다.')
+        elif job.status == 'cancelled':
+            # 스윕이면 함께 대기 중이던 변형도 취소
+            analysis.get_sweep().filter(status='queued').update(status='cancelled', current_step='취소됨')
+            messages.success(request, '대기 중인 분석을 취소했습니다.')
+        else:
+            messages.info(request, '분석 취소를 요청했습니다. 현재 프레임 처리 후 중단됩니다.')
         return redirect('analysis_progress', analysis_id=analysis_id)
 
 
@@ -176,17 +289,48 @@ class AnalysisProgressView(View):
         return render(request, self.template_name, context)
 
 
+def get_analysis_status(analysis_id):
+    """상태 API / SSE 공용 상태 정보 (분석이 없으면 None)"""
+    analysis = Analysis.objects.filter(id=analysis_id).first()
+    if analysis is None:
+        return None
+
+    job = get_active_job(Analysis.JOB_KINDS, analysis.get_job_object_id())
+    if job is None and analysis.status == 'processing':
+        # 전처리 + 탐지(fused) 작업이 이 분석의 전처리 결과를 만들고 있는 경우
+        for detection_id in analysis.detections.values_list('id', flat=True):
+            job = get_active_job('fused', detection_id)
+            if job:
+                break
+    return {
+        **get_queue_info(job),
+        'status': analysis.status,
+        'status_display': analysis.get_status_display(),
+        'status_badge': analysis.get_status_display_badge(),
+        'progress': analysis.progress,
+        'current_step': analysis.current_step,
+        'processed_frames': analysis.processed_frames,
+        'total_frames': analysis.total_frames,
+        'error_message': analysis.error_message,
+        # 실행 중이면 진행률 채널(Job 행) 값 사용
+        **get_job_progress(job),
+    }
+
+
 class AnalysisStatusView(View):
     def get(self, request, analysis_id):
-        analysis = get_object_or_404(Analysis, id=analysis_id)
-        return JsonResponse({
-            'status': analysis.status,
-            'progress': analysis.progress,
-            'current_step': analysis.current_step,
-            'processed_frames': analysis.processed_frames,
-            'total_frames': analysis.total_frames,
-            'error_message': analysis.error_message,
-        })
+        data = get_analysis_status(analysis_id)
+        if data is None:
+            raise Http404('분석을 찾을 수 없습니다.')
+        return JsonResponse(data)
+
+
+class AnalysisEventsView(View):
+    """진행률 SSE 스트림 (바뀔 때만 전송, ASGI에서 실행)"""
+
+    async def get(self, request, analysis_id):
+        await aget_object_or_404(Analysis, id=analysis_id)
+        return event_stream_response(progress_events(lambda: get_analysis_status(analysis_id)))
 
 
 class AnalysisResultView(View):
@@ -220,6 +364,11 @@ class AnalysisDeleteView(DeleteView):
         media = self.object.get_media()
         media_type = self.object.get_media_type()
 
+        # 실행 중인 작업이 삭제된 폴더에 계속 쓰지 않도록 먼저 취소
+        request_cancel(Analysis.JOB_KINDS, self.object.id)
+        for detection_id in self.object.detections.values_list('id', flat=True):
+            request_cancel(Detection.JOB_KINDS, detection_id)
+
         self.object.delete_files()
         self.object.delete()
 
@@ -245,45 +394,8 @@ class ServeAnalysisVideoView(View):
         if not analysis.output_video_path:
             raise Http404("처리된 동영상 파일이 없습니다.")
 
-        video_path = os.path.join(settings.BASE_DIR, 'media', analysis.output_video_path)
-
-        if not os.path.exists(video_path):
-            raise Http404("동영상 파일을 찾을 수 없습니다.")
-
-        file_size = os.path.getsize(video_path)
-        content_type, _ = mimetypes.guess_type(video_path)
-        content_type = content_type or 'video/mp4'
-
-        range_header = request.META.get('HTTP_RANGE', '').strip()
-        range_match = re.match(r'bytes\s*=\s*(\d+)\s*-\s*(\d*)', range_header, re.I)
-
-        if range_match:
-            first_byte, last_byte = range_match.groups()
-            first_byte = int(first_byte) if first_byte else 0
-            last_byte = int(last_byte) if last_byte else file_size - 1
-
-            if last_byte >= file_size:
-                last_byte = file_size - 1
-
-            length = last_byte - first_byte + 1
-
-            with open(video_path, 'rb') as file:
-                file.seek(first_byte)
-                data = file.read(length)
-
-            response = HttpResponse(data, status=206, content_type=content_type)
-            response['Content-Length'] = str(length)
-            response['Content-Range'] = f'bytes {first_byte}-{last_byte}/{file_size}'
-            response['Accept-Ranges'] = 'bytes'
-            return response
-
-        response = StreamingHttpResponse(
-            FileWrapper(open(video_path, 'rb'), 8192),
-            content_type=content_type,
-        )
-        response['Content-Length'] = str(file_size)
-        response['Accept-Ranges'] = 'bytes'
-        return response
+        content_type = mimetypes.guess_type(analysis.output_video_path)[0] or 'video/mp4'
+        return serve_artifact(request, 'analysis', analysis, content_type, "동영상 파일을 찾을 수 없습니다.")
 
 
 class ServeAnalysisImageView(View):
@@ -297,12 +409,5 @@ class ServeAnalysisImageView(View):
         if not analysis.output_video_path:
             raise Http404("처리된 이미지 파일이 없습니다.")
 
-        image_path = os.path.join(settings.BASE_DIR, 'media', analysis.output_video_path)
-
-        if not os.path.exists(image_path):
-            raise Http404("이미지 파일을 찾을 수 없습니다.")
-
-        content_type, _ = mimetypes.guess_type(image_path)
-        content_type = content_type or 'image/jpeg'
-
-        return FileResponse(open(image_path, 'rb'), content_type=content_type)
+        content_type = mimetypes.guess_type(analysis.output_video_path)[0] or 'image/jpeg'
+        return serve_artifact(request, 'analysis', analysis, content_type, "이미지 파일을 찾을 수 없습니다.")
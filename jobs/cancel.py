@@ -0,0 +1,124 @@
+"""
+작업 취소 / 선점
+
+실행 중인 작업은 외부에서 강제로 멈추지 않고, 웹 프로세스가 Job 행에
+취소(또는 선점) 요청을 기록하면 작업 루프가 CancelToken.check()로 이를
+확인하고 스스로 정리한 뒤 JobCancelled를 던진다 (협조적 취소).
+
+check()는 매 프레임 호출해도 되도록 CANCEL_CHECK_INTERVAL 초에 한 번만
+DB를 조회한다.
+
+실행 중인 작업 안에서 다른 작업을 실행하면 (jobs.queue.run_nested) 안쪽 토큰은
+바깥 토큰을 parent로 갖고, 바깥 작업이 멈추면 안쪽 작업은 선점된 것으로 본다.
+"""
+import subprocess
+import threading
+import time
+
+from django.conf import settings
+
+
+# 취소 요청 확인 간격 (초)
+DEFAULT_CANCEL_CHECK_INTERVAL = 0.5
+
+
+class JobCancelled(Exception):
+    """작업이 취소 요청을 받아 중단됨"""
+
+
+class JobPreempted(JobCancelled):
+    """더 급한 작업에 자리를 내주기 위해 중단됨 (다시 대기열로)"""
+
+
+class CancelToken:
+    """실행 중인 작업의 취소 요청 확인"""
+
+    def __init__(self, job_id=None, interval=None, parent=None):
+        self.job_id = job_id
+        self.parent = parent
+        self.interval = interval or getattr(settings, 'JOB_CANCEL_CHECK_INTERVAL', DEFAULT_CANCEL_CHECK_INTERVAL)
+        self._last_check = 0.0
+        self._state = None
+
+    def poll(self):
+        """취소/선점 요청 여부 ('cancel', 'preempt', None) - interval 마다 한 번만 조회"""
+        if self.job_id is None or self._state:
+            return self._state
+
+        # 바깥 작업이 취소/선점되면 안쪽 작업은 다시 대기열로
+        if self.parent is not None and self.parent.poll():
+            self._state = 'preempt'
+            return self._state
+
+        now = time.monotonic()
+        if now - self._last_check < self.interval:
+            return None
+        self._last_check = now
+
+        from .models import Job
+
+        row = Job.objects.filter(pk=self.job_id).values('cancel_requested', 'preempt_requested').first()
+        if row is None or row['cancel_requested']:
+            self._state = 'cancel'
+        elif row['preempt_requested']:
+            self._state = 'preempt'
+        return self._state
+
+    def check(self):
+        """요청이 있으면 JobCancelled / JobPreempted 발생"""
+        state = self.poll()
+        if state == 'preempt':
+            raise JobPreempted(f"Job #{self.job_id} 선점됨")
+        if state == 'cancel':
+            raise JobCancelled(f"Job #{self.job_id} 취소됨")
+
+    __call__ = check
+
+
+_local = threading.local()
+
+
+def get_cancel_token():
+    """현재 실행 중인 작업의 CancelToken (워커 밖에서는 항상 통과하는 토큰)"""
+    token = getattr(_local, 'token', None)
+    return token or CancelToken()
+
+
+def activate(job):
+    """run_job에서 작업 실행 직전에 호출 (이미 실행 중인 작업이 있으면 그 작업이 parent)"""
+    _local.token = CancelToken(job.pk, parent=getattr(_local, 'token', None))
+    return _local.token
+
+
+def deactivate():
+    """activate 이전 토큰으로 되돌림"""
+    token = getattr(_local, 'token', None)
+    _local.token = token.parent if token else None
+
+
+def run_process(cmd, cancel_check=None, timeout=1800):
+    """
+    외부 프로세스(ffmpeg) 실행
+
+    subprocess.run 대신 Popen으로 띄우고 주기적으로 cancel_check를 호출해
+    취소 요청이 오면 프로세스를 종료한 뒤 예외를 다시 던진다.
+    """
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    deadline = time.monotonic() + timeout
+
+    try:
+        while True:
+            try:
+                stdout, stderr = process.communicate(timeout=0.5)
+                break
+            except subprocess.TimeoutExpired:
+                if cancel_check:
+                    cancel_check()
+                if time.monotonic() > deadline:
+                    raise subprocess.TimeoutExpired(cmd, timeout)
+    except BaseException:
+        process.kill()
+        process.communicate()
+        raise
+
+    return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
@@ -0,0 +1,63 @@
+"""
+작업 비용 추정
+
+작업 종류별 추정 함수(JOB_COST_ESTIMATORS)가 프레임 수, 해상도, 전처리 단계,
+모델 크기로 상대 비용을 계산한다. 단위는 '1MP 프레임 1장을 단순 처리하는
+비용'이며 스케줄러는 이 값으로 짧은 작업을 먼저 실행한다.
+"""
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+JOB_COST_ESTIMATORS = {
+    'analysis': 'analysis.tasks.estimate_analysis_cost',
+    'detection': 'vision_engine.tasks.estimate_detection_cost',
+    'fused': 'vision_engine.tasks.estimate_fused_cost',
+    'multi': 'vision_engine.tasks.estimate_multi_cost',
+    'sweep': 'analysis.tasks.estimate_sweep_cost',
+    'chunked': 'vision_engine.tasks.estimate_detection_cost',
+    'video_ingest': 'videos.ingest.estimate_video_ingest_cost',
+    'image_ingest': 'videos.ingest.estimate_image_ingest_cost',
+}
+
+# 추정에 실패했을 때 사용할 비용 (1MP 프레임 약 300장)
+DEFAULT_JOB_COST = 300.0
+
+
+def probe_media(path):
+    """미디어 헤더만 읽어서 (프레임 수, 너비, 높이) 반환"""
+    import cv2
+
+    cap = cv2.VideoCapture(str(path))
+    try:
+        if not cap.isOpened():
+            return 0, 0, 0
+        frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or 1
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        return max(frames, 1), width, height
+    finally:
+        cap.release()
+
+
+def megapixel_frames(path):
+    """프레임 수 x 해상도(MP)"""
+    frames, width, height = probe_media(path)
+    if not frames or not width or not height:
+        return None
+    return frames * (width * height / 1_000_000)
+
+
+def estimate_job_cost(kind, object_id, payload=None):
+    """작업 비용 추정 (실패 시 기본값)"""
+    estimators = {**JOB_COST_ESTIMATORS, **getattr(settings, 'JOB_COST_ESTIMATORS', {})}
+    if kind not in estimators:
+        return DEFAULT_JOB_COST
+
+    try:
+        cost = import_string(estimators[kind])(object_id, **(payload or {}))
+    except Exception as e:
+        print(f"⚠️  작업 비용 추정 실패 ({kind}:{object_id}): {e}")
+        return DEFAULT_JOB_COST
+
+    return cost if cost and cost > 0 else DEFAULT_JOB_COST
@@ -0,0 +1,87 @@
+"""
+진행률 Server-Sent Events
+
+진행 페이지가 상태 API를 1~2초마다 폴링하는 대신 EventSource 연결 하나를
+열어 두면, 서버는 상태/진행률이 바뀔 때만 progress 이벤트를 보내고 작업이
+끝나면 done 이벤트를 보낸 뒤 연결을 닫는다.
+
+스트림은 async generator라서 ASGI 서버(videotool.asgi)에서는 대기 중인
+연결이 워커 스레드를 점유하지 않는다.
+"""
+import asyncio
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+
+# 이 상태가 되면 done 이벤트를 보내고 스트림 종료
+TERMINAL_STATUSES = ('completed', 'failed', 'cancelled')
+
+# 변경 여부 비교에서 제외할 키 (매번 달라지는 예상 시간)
+VOLATILE_KEYS = ('estimated_start', 'estimated_wait')
+
+DEFAULT_EVENTS_INTERVAL = 0.5       # 처리 중 상태 확인 간격 (초)
+DEFAULT_EVENTS_QUEUED_INTERVAL = 2.0  # 대기열에 있을 때 상태 확인 간격 (초)
+DEFAULT_EVENTS_KEEPALIVE = 15.0     # 변화가 없을 때 연결 유지용 주석 전송 간격 (초)
+DEFAULT_EVENTS_MAX_DURATION = 300   # 한 연결의 최대 시간 (초, 이후 브라우저가 재연결)
+
+
+def format_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def progress_events(snapshot):
+    """
+    snapshot() 결과가 바뀔 때만 이벤트 전송
+
+    snapshot: 상태 dict(또는 대상이 삭제됐으면 None)를 반환하는 동기 함수
+    (상태 API와 같은 함수를 사용).
+    """
+    interval = getattr(settings, 'JOB_EVENTS_INTERVAL', DEFAULT_EVENTS_INTERVAL)
+    queued_interval = getattr(settings, 'JOB_EVENTS_QUEUED_INTERVAL', DEFAULT_EVENTS_QUEUED_INTERVAL)
+    keepalive = getattr(settings, 'JOB_EVENTS_KEEPALIVE', DEFAULT_EVENTS_KEEPALIVE)
+    max_duration = getattr(settings, 'JOB_EVENTS_MAX_DURATION', DEFAULT_EVENTS_MAX_DURATION)
+
+    snapshot = sync_to_async(snapshot)
+    started = last_sent = time.monotonic()
+    last = None
+
+    # 연결이 끊기면 3초 뒤 재연결
+    yield "retry: 3000\n\n"
+
+    while True:
+        data = await snapshot()
+        now = time.monotonic()
+
+        if data is None:
+            yield format_event('gone', {})
+            return
+
+        if data.get('status') in TERMINAL_STATUSES:
+            yield format_event('done', data)
+            return
+
+        key = {name: value for name, value in data.items() if name not in VOLATILE_KEYS}
+        if key != last:
+            yield format_event('progress', data)
+            last = key
+            last_sent = now
+        elif now - last_sent >= keepalive:
+            yield ": keepalive\n\n"
+            last_sent = now
+
+        if now - started >= max_duration:
+            return
+
+        await asyncio.sleep(queued_interval if data.get('status') == 'queued' else interval)
+
+
+def event_stream_response(events):
+    """text/event-stream 응답 (프록시 버퍼링 / 캐시 비활성화)"""
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
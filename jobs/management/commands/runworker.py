@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from jobs.queue import JOB_HANDLERS
+from jobs.scheduler import get_cpu_budget, get_kind_limit
+from jobs.worker import Supervisor
+from videos.retention import DEFAULT_RETENTION_INTERVAL
+
+
+class Command(BaseCommand):
+    help = '작업 큐 워커 실행 (분석/탐지 작업을 별도 프로세스에서 처리)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', '-p',
+            type=int,
+            default=getattr(settings, 'JOB_WORKER_PROCESSES', None),
+            help='워커 프로세스 수 (기본: JOB_WORKER_PROCESSES 또는 작업 종류별 최대 동시 실행 수)',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=getattr(settings, 'JOB_POLL_INTERVAL', 2.0),
+            help='대기열이 비었을 때 조회 간격 (초)',
+        )
+
+    def handle(self, *args, **options):
+        # 동시 실행 수는 스케줄러(스레드 예산)가 제한하므로
+        # 프로세스는 가장 많이 동시에 돌 수 있는 작업 종류 기준으로 띄운다
+        processes = options['processes'] or max(get_kind_limit(kind) for kind in JOB_HANDLERS)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'🚀 워커 {processes}개 시작 (스레드 예산 {get_cpu_budget()}, Ctrl+C로 종료)'
+        ))
+        Supervisor(
+            processes=processes,
+            poll_interval=options['poll_interval'],
+            heartbeat_interval=getattr(settings, 'JOB_HEARTBEAT_INTERVAL', 15.0),
+            periodic_tasks=[
+                # 파생 결과 디스크 예산 / 고아·임시 파일 정리
+                ('videos.retention.run_retention',
+                 getattr(settings, 'MEDIA_RETENTION_INTERVAL', DEFAULT_RETENTION_INTERVAL)),
+            ],
+        ).run()
+        self.stdout.write('워커 종료 완료')
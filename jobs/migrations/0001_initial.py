@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=50, verbose_name='작업 종류')),
+                ('object_id', models.BigIntegerField(verbose_name='대상 ID')),
+                ('payload', models.JSONField(blank=True, default=dict, verbose_name='추가 인자')),
+                ('status', models.CharField(choices=[('queued', '대기'), ('running', '실행 중'), ('completed', '완료'), ('failed', '실패')], default='queued', max_length=20, verbose_name='상태')),
+                ('attempts', models.IntegerField(default=0, verbose_name='시도 횟수')),
+                ('max_attempts', models.IntegerField(default=3, verbose_name='최대 시도 횟수')),
+                ('worker_id', models.CharField(blank=True, max_length=100, verbose_name='워커')),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True, verbose_name='마지막 응답')),
+                ('error_message', models.TextField(blank=True, verbose_name='에러 메시지')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='생성일')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='시작 시간')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='종료 시간')),
+            ],
+            options={
+                'verbose_name': '작업',
+                'verbose_name_plural': '작업들',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='jobs_job_status_277b31_idx'), models.Index(fields=['kind', 'object_id'], name='jobs_job_kind_6b5bb2_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='threads',
+            field=models.IntegerField(default=1, verbose_name='스레드 예산'),
+        ),
+    ]
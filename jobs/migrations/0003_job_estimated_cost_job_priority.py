@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0002_job_threads'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='estimated_cost',
+            field=models.FloatField(default=0, verbose_name='예상 비용'),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='priority',
+            field=models.IntegerField(default=0, verbose_name='우선순위'),
+        ),
+    ]
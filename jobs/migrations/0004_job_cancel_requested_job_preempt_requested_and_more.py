@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0003_job_estimated_cost_job_priority'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='cancel_requested',
+            field=models.BooleanField(default=False, verbose_name='취소 요청'),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='preempt_requested',
+            field=models.BooleanField(default=False, verbose_name='선점 요청'),
+        ),
+        migrations.AlterField(
+            model_name='job',
+            name='status',
+            field=models.CharField(choices=[('queued', '대기'), ('running', '실행 중'), ('completed', '완료'), ('failed', '실패'), ('cancelled', '취소됨')], default='queued', max_length=20, verbose_name='상태'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0004_job_cancel_requested_job_preempt_requested_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='current_step',
+            field=models.CharField(blank=True, max_length=200, verbose_name='현재 단계'),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='processed_frames',
+            field=models.IntegerField(default=0, verbose_name='처리된 프레임'),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='progress',
+            field=models.IntegerField(default=0, verbose_name='진행률 (%)'),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='total_frames',
+            field=models.IntegerField(default=0, verbose_name='총 프레임'),
+        ),
+    ]
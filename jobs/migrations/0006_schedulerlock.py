@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:42
+
+from django.db import migrations, models
+
+
+def create_admission_lock(apps, schema_editor):
+    """claim_next가 잡는 잠금 행"""
+    apps.get_model('jobs', 'SchedulerLock').objects.get_or_create(name='admission')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0005_job_current_step_job_processed_frames_job_progress_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SchedulerLock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True, verbose_name='이름')),
+                ('acquired_at', models.DateTimeField(blank=True, null=True, verbose_name='마지막 획득')),
+            ],
+            options={
+                'verbose_name': '스케줄러 잠금',
+                'verbose_name_plural': '스케줄러 잠금들',
+            },
+        ),
+        migrations.RunPython(create_admission_lock, migrations.RunPython.noop),
+    ]
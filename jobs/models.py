@@ -0,0 +1,100 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """백그라운드 작업 (DB 기반 작업 큐)"""
+
+    STATUS_CHOICES = [
+        ('queued', '대기'),
+        ('running', '실행 중'),
+        ('completed', '완료'),
+        ('failed', '실패'),
+        ('cancelled', '취소됨'),
+    ]
+
+    # 작업 종류 ('analysis', 'detection' ...) - jobs.queue.JOB_HANDLERS 참고
+    kind = models.CharField(max_length=50, verbose_name='작업 종류')
+    object_id = models.BigIntegerField(verbose_name='대상 ID')
+    payload = models.JSONField(default=dict, blank=True, verbose_name='추가 인자')
+
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='queued',
+        verbose_name='상태'
+    )
+
+    # 스케줄링 정보
+    priority = models.IntegerField(default=0, verbose_name='우선순위')
+    estimated_cost = models.FloatField(default=0, verbose_name='예상 비용')
+
+    # 실행 정보
+    threads = models.IntegerField(default=1, verbose_name='스레드 예산')
+    attempts = models.IntegerField(default=0, verbose_name='시도 횟수')
+    max_attempts = models.IntegerField(default=3, verbose_name='최대 시도 횟수')
+    worker_id = models.CharField(max_length=100, blank=True, verbose_name='워커')
+    heartbeat_at = models.DateTimeField(null=True, blank=True, verbose_name='마지막 응답')
+
+    # 진행률 (jobs.progress.ProgressReporter가 스로틀해서 기록)
+    progress = models.IntegerField(default=0, verbose_name='진행률 (%)')
+    processed_frames = models.IntegerField(default=0, verbose_name='처리된 프레임')
+    total_frames = models.IntegerField(default=0, verbose_name='총 프레임')
+    current_step = models.CharField(max_length=200, blank=True, verbose_name='현재 단계')
+
+    # 취소 / 선점 요청 (실행 중인 작업이 jobs.cancel.CancelToken으로 확인)
+    cancel_requested = models.BooleanField(default=False, verbose_name='취소 요청')
+    preempt_requested = models.BooleanField(default=False, verbose_name='선점 요청')
+
+    # 에러
+    error_message = models.TextField(blank=True, verbose_name='에러 메시지')
+
+    # 시간
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='생성일')
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name='시작 시간')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='종료 시간')
+
+    class Meta:
+        verbose_name = '작업'
+        verbose_name_plural = '작업들'
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['kind', 'object_id']),
+        ]
+
+    def __str__(self):
+        return f"Job #{self.id} - {self.kind}:{self.object_id} ({self.get_status_display()})"
+
+    def is_active(self):
+        """대기 중이거나 실행 중인지 여부"""
+        return self.status in ('queued', 'running')
+
+    def get_duration(self):
+        """실행 시간 (초)"""
+        if self.started_at and self.finished_at:
+            return (self.finished_at - self.started_at).total_seconds()
+        return 0
+
+    def touch(self):
+        """heartbeat 갱신 (워커가 살아있음을 기록)"""
+        Job.objects.filter(pk=self.pk).update(heartbeat_at=timezone.now())
+
+
+class SchedulerLock(models.Model):
+    """
+    워커 간 배정 직렬화용 잠금 행 (jobs.queue.claim_next)
+
+    트랜잭션 안에서 이 행을 UPDATE하면 PostgreSQL/MySQL은 행 잠금, SQLite는
+    DB 쓰기 잠금을 커밋할 때까지 잡는다.
+    """
+
+    name = models.CharField(max_length=50, unique=True, verbose_name='이름')
+    acquired_at = models.DateTimeField(null=True, blank=True, verbose_name='마지막 획득')
+
+    class Meta:
+        verbose_name = '스케줄러 잠금'
+        verbose_name_plural = '스케줄러 잠금들'
+
+    def __str__(self):
+        return self.name
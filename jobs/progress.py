@@ -0,0 +1,115 @@
+"""
+작업 진행률 채널
+
+프레임 루프의 progress_callback이 Analysis/Detection 행 전체를 매번 save()
+하면 (탐지는 JSON 결과까지) SQLite 쓰기 잠금을 오래 잡아 업로드와 경쟁한다.
+ProgressReporter는 진행률을 작은 Job 행의 진행률 필드에만 기록하고, 그것도
+JOB_PROGRESS_INTERVAL 초(기본 0.25초 = 최대 4Hz)에 한 번으로 제한한다.
+상태 API는 get_job_progress()로 이 값을 읽는다.
+"""
+import time
+
+from django.apps import apps
+from django.conf import settings
+
+from .models import Job
+
+
+# 진행률 기록 최소 간격 (초)
+DEFAULT_PROGRESS_INTERVAL = 0.25
+
+PROGRESS_FIELDS = ('progress', 'processed_frames', 'total_frames', 'current_step')
+
+
+class ProgressReporter:
+    """
+    진행률 기록 (시간 기반 스로틀)
+
+    job_id가 있으면 Job 행에, 없으면(워커 밖에서 직접 실행) 대상 모델 행의
+    진행률 필드에만 update()로 기록한다.
+    """
+
+    def __init__(self, kind, object_id, job_id=None, interval=None):
+        self.kind = kind
+        self.object_id = object_id
+        self.job_id = job_id
+        self.interval = interval if interval is not None else getattr(
+            settings, 'JOB_PROGRESS_INTERVAL', DEFAULT_PROGRESS_INTERVAL
+        )
+        self.state = {}
+        self._written = {}
+        self._last_write = 0.0
+        self._last_logged = -10
+
+    def update(self, processed_frames=None, total_frames=None, progress=None, current_step=None, force=False):
+        """진행률 갱신 (interval 안에 다시 호출되면 메모리에만 반영)"""
+        values = {
+            'processed_frames': processed_frames,
+            'total_frames': total_frames,
+            'progress': progress,
+            'current_step': current_step,
+        }
+        self.state.update({key: value for key, value in values.items() if value is not None})
+
+        now = time.monotonic()
+        if not force and now - self._last_write < self.interval:
+            return False
+
+        self._last_write = now
+        return self.flush()
+
+    def flush(self):
+        """바뀐 필드만 기록"""
+        changed = {key: value for key, value in self.state.items() if self._written.get(key) != value}
+        if not changed:
+            return False
+
+        self._write(changed)
+        self._written.update(changed)
+
+        progress = self.state.get('progress', 0)
+        if progress // 10 > self._last_logged // 10:
+            print(f"⏳ {self.kind}:{self.object_id} 진행률 {progress}%")
+            self._last_logged = progress
+        return True
+
+    def _write(self, fields):
+        if self.job_id is not None:
+            Job.objects.filter(pk=self.job_id).update(**fields)
+        else:
+            write_target_progress(self.kind, self.object_id, fields)
+
+
+def write_target_progress(kind, object_id, fields):
+    """대상 모델 행에 진행률 필드만 기록 (모델에 없는 필드는 무시)"""
+    from .queue import JOB_TARGETS
+
+    if kind not in JOB_TARGETS:
+        return 0
+    model = apps.get_model(JOB_TARGETS[kind])
+    names = {field.name for field in model._meta.concrete_fields}
+    fields = {key: value for key, value in fields.items() if key in names}
+    if not fields:
+        return 0
+    return model.objects.filter(pk=object_id).update(**fields)
+
+
+def save_job_progress(job):
+    """작업이 끝났을 때 마지막 진행률을 대상 행에 남김 (실패/취소 화면용)"""
+    fields = Job.objects.filter(pk=job.pk).values(*PROGRESS_FIELDS[:3]).first()
+    if fields and fields['total_frames']:
+        write_target_progress(job.kind, job.object_id, fields)
+
+
+def get_progress_reporter(kind, object_id):
+    """현재 워커에서 실행 중인 작업의 진행률 채널"""
+    from .cancel import get_cancel_token
+
+    return ProgressReporter(kind, object_id, job_id=get_cancel_token().job_id)
+
+
+def get_job_progress(job):
+    """실행 중인 작업의 진행률 (상태 API에서 대상 행 값 대신 사용, 없으면 빈 dict)"""
+    if job is None or job.status != 'running':
+        return {}
+    return {field: getattr(job, field) for field in PROGRESS_FIELDS}
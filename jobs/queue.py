@@ -0,0 +1,331 @@
+"""
+DB 기반 작업 큐
+
+외부 브로커 없이 Job 테이블만으로 동작한다 (SQLite 포함).
+- enqueue(): 웹 프로세스에서 작업 등록
+- claim_next(): 워커가 조건부 UPDATE로 작업 하나를 원자적으로 가져감
+- run_job(): 등록된 핸들러 실행 후 결과 기록
+- run_nested(): 실행 중인 작업 안에서 다른 대상의 작업을 별도 Job으로 실행
+- requeue_stale(): heartbeat가 끊긴 작업(워커 종료/재시작)을 다시 대기열로
+- request_cancel(): 대기 중이면 바로 취소, 실행 중이면 취소 요청만 기록
+"""
+import time
+import traceback
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from . import cancel
+from .cost import estimate_job_cost
+from .models import Job, SchedulerLock
+from .progress import save_job_progress
+from .scheduler import (
+    apply_thread_budget, can_admit, find_preemption_victim, get_queue_order, get_thread_budget,
+    is_starving,
+)
+
+
+# claim_next가 잡는 SchedulerLock 행 이름
+ADMISSION_LOCK = 'admission'
+
+# 작업 종류 -> 핸들러 (handler(object_id, **payload) 형태로 호출, 실패 시 False 반환)
+JOB_HANDLERS = {
+    'analysis': 'analysis.tasks.process_video_analysis',
+    'detection': 'vision_engine.tasks.process_detection',
+    'fused': 'vision_engine.tasks.process_fused_detection',
+    'multi': 'vision_engine.tasks.process_multi_detection',
+    'sweep': 'analysis.tasks.process_analysis_sweep',
+    'chunked': 'vision_engine.tasks.process_chunked_detection',
+    'video_ingest': 'videos.ingest.process_video_ingest',
+    'image_ingest': 'videos.ingest.process_image_ingest',
+}
+
+# 작업 종류 -> 상태를 함께 갱신할 대상 모델
+JOB_TARGETS = {
+    'analysis': 'analysis.Analysis',
+    'detection': 'vision_engine.Detection',
+    'fused': 'vision_engine.Detection',
+    'multi': 'vision_engine.Detection',
+    'sweep': 'analysis.Analysis',
+    'chunked': 'vision_engine.Detection',
+    'video_ingest': 'videos.Video',
+    'image_ingest': 'videos.Image',
+}
+
+
+def get_handler(kind):
+    """작업 종류에 해당하는 핸들러 함수 반환"""
+    handlers = {**JOB_HANDLERS, **getattr(settings, 'JOB_HANDLERS', {})}
+    if kind not in handlers:
+        raise ValueError(f"등록되지 않은 작업 종류입니다: {kind}")
+    return import_string(handlers[kind])
+
+
+def update_target(kind, object_id, **fields):
+    """작업 대상(Analysis/Detection/Video/Image) 행의 지정 필드만 갱신"""
+    if kind not in JOB_TARGETS:
+        return 0
+    model = apps.get_model(JOB_TARGETS[kind])
+    return model.objects.filter(pk=object_id).update(**fields)
+
+
+def enqueue(kind, object_id, payload=None, priority=0):
+    """작업 등록 (같은 대상의 작업이 이미 대기/실행 중이면 기존 작업 반환)"""
+    get_handler(kind)
+
+    active = get_active_job(kind, object_id)
+    if active:
+        if active.status == 'queued' and priority > active.priority:
+            Job.objects.filter(pk=active.pk).update(priority=priority)
+            active.priority = priority
+        return active
+
+    job = Job.objects.create(
+        kind=kind,
+        object_id=object_id,
+        payload=payload or {},
+        priority=priority,
+        estimated_cost=estimate_job_cost(kind, object_id, payload),
+        threads=get_thread_budget(kind),
+        max_attempts=getattr(settings, 'JOB_MAX_ATTEMPTS', 3),
+    )
+    update_target(kind, object_id, status='queued', error_message='')
+    return job
+
+
+def get_active_job(kind, object_id):
+    """대기 또는 실행 중인 작업 반환 (kind에 여러 종류를 튜플로 줄 수 있음)"""
+    kinds = kind if isinstance(kind, (list, tuple)) else [kind]
+    return (
+        Job.objects
+        .filter(kind__in=kinds, object_id=object_id, status__in=['queued', 'running'])
+        .order_by('-created_at')
+        .first()
+    )
+
+
+def get_latest_job(kind, object_id):
+    """대상의 가장 최근 작업 반환"""
+    return Job.objects.filter(kind=kind, object_id=object_id).order_by('-created_at').first()
+
+
+def _lock_admission():
+    """
+    배정 잠금을 잡음 (트랜잭션 안에서 호출, 커밋/롤백 때 풀림)
+
+    잠금 행을 UPDATE하므로 PostgreSQL/MySQL은 행 잠금, SQLite는 DB 쓰기 잠금을
+    잡는다. select_for_update는 SQLite에서 아무것도 잠그지 않으므로 쓰지 않는다.
+    """
+    now = timezone.now()
+    lock = SchedulerLock.objects.filter(name=ADMISSION_LOCK)
+    if not lock.update(acquired_at=now):
+        # 마이그레이션이 만든 행이 지워졌으면 다시 만듦
+        SchedulerLock.objects.get_or_create(name=ADMISSION_LOCK)
+        lock.update(acquired_at=now)
+
+
+def claim_next(worker_id):
+    """
+    대기 중인 작업 하나를 가져옴
+
+    스케줄러 순서대로 후보를 보면서 스레드 예산 안에 들어가는 첫 작업을
+    가져간다. 예산 확인(can_admit)과 UPDATE 사이에 다른 워커가 끼어들어
+    예산을 넘기지 않도록 전체를 배정 잠금(_lock_admission) 안에서 한다.
+    status='queued' 조건부 UPDATE가 1건을 갱신한 경우에만 작업을 가져간
+    것으로 본다.
+
+    오래 기다린(is_starving) 작업이 예산 때문에 들어가지 못하면 그 뒤의
+    작은 작업을 끼워 넣지 않고 자리가 빌 때까지 기다린다. 우선순위가 더
+    낮은 작업이 실행 중이면 그 작업에 선점 요청을 보내 자리를 비운다.
+    """
+    with transaction.atomic():
+        _lock_admission()
+
+        for job in get_queue_order()[:20]:
+            if not can_admit(job):
+                victim = find_preemption_victim(job)
+                if victim and Job.objects.filter(pk=victim.pk, status='running').update(preempt_requested=True):
+                    print(f"⏸️  Job #{victim.id} 선점 요청 (Job #{job.id} 우선순위 {job.priority})")
+                if victim or is_starving(job):
+                    return None
+                continue
+
+            now = timezone.now()
+            if Job.objects.filter(pk=job.pk, status='queued').update(
+                status='running',
+                worker_id=worker_id,
+                started_at=now,
+                heartbeat_at=now,
+                attempts=F('attempts') + 1,
+            ):
+                return Job.objects.get(pk=job.pk)
+
+    return None
+
+
+def run_job(job):
+    """작업 실행 후 상태 기록"""
+    close_old_connections()
+    cancel.activate(job)
+
+    try:
+        apply_thread_budget(job.threads)
+        handler = get_handler(job.kind)
+        result = handler(job.object_id, **(job.payload or {}))
+        status = 'failed' if result is False else 'completed'
+        error_message = '' if result is not False else '핸들러가 실패를 반환했습니다'
+    except cancel.JobPreempted:
+        # 선점: 시도 횟수를 되돌리고 다시 대기열로
+        Job.objects.filter(pk=job.pk).update(
+            status='queued', worker_id='', preempt_requested=False, attempts=F('attempts') - 1,
+        )
+        update_target(job.kind, job.object_id, status='queued')
+        close_old_connections()
+        return False
+    except cancel.JobCancelled:
+        status = 'cancelled'
+        error_message = '사용자 요청으로 취소됨'
+        update_target(job.kind, job.object_id, status='cancelled')
+    except Exception as e:
+        traceback.print_exc()
+        status = 'failed'
+        error_message = str(e)
+    finally:
+        cancel.deactivate()
+
+    Job.objects.filter(pk=job.pk).update(
+        status=status,
+        error_message=error_message,
+        finished_at=timezone.now(),
+    )
+    if status != 'completed':
+        save_job_progress(job)
+    close_old_connections()
+    return status == 'completed'
+
+
+def run_nested(kind, object_id, poll_interval=1.0):
+    """
+    실행 중인 작업 안에서 다른 대상의 작업을 바로 실행 (삭제된 입력 다시 만들기 등)
+
+    안쪽 작업은 자기 Job 행을 가지므로 진행률/상태가 바깥 작업 행에 섞이지 않고,
+    바깥 작업의 자리(스레드 예산)를 그대로 쓴다. 같은 대상의 작업이 대기 중이면
+    그 작업을 가져와서 실행하고, 다른 워커가 실행 중이면 끝날 때까지 기다린다.
+    기다리는 동안 그 워커의 heartbeat가 끊기면 (워커 종료) 작업을 다시 대기열로
+    돌리고 이 자리에서 실행한다.
+    바깥 작업이 취소/선점되면 안쪽 작업은 다시 대기열로 돌아가고 바깥 작업에
+    JobCancelled / JobPreempted가 전달된다.
+
+    반환: 안쪽 작업이 완료되면 True
+    """
+    from .worker import _Heartbeat
+
+    token = cancel.get_cancel_token()
+    outer = Job.objects.filter(pk=token.job_id).first() if token.job_id else None
+    worker_id = outer.worker_id if outer else ''
+    threads = outer.threads if outer else get_thread_budget(kind)
+
+    waiting = None
+    while True:
+        token.check()
+        job = get_active_job(kind, object_id)
+
+        if job is None:
+            if waiting is not None:
+                # 다른 워커가 실행하던 작업이 끝남
+                return Job.objects.filter(pk=waiting).values_list('status', flat=True).first() == 'completed'
+            now = timezone.now()
+            job = Job.objects.create(
+                kind=kind, object_id=object_id, status='running', threads=threads, attempts=1,
+                worker_id=worker_id, started_at=now, heartbeat_at=now,
+                max_attempts=getattr(settings, 'JOB_MAX_ATTEMPTS', 3),
+            )
+            break
+
+        if job.status == 'queued':
+            now = timezone.now()
+            if Job.objects.filter(pk=job.pk, status='queued').update(
+                status='running', worker_id=worker_id, threads=threads,
+                started_at=now, heartbeat_at=now, attempts=F('attempts') + 1,
+            ):
+                job.refresh_from_db()
+                break
+            continue
+
+        waiting = job.pk
+        timeout = getattr(settings, 'JOB_HEARTBEAT_TIMEOUT', 120)
+        # 기다리던 작업의 워커가 죽었으면 대기열로 돌려 이 자리에서 실행 (시도 초과면 실패 처리)
+        if job.heartbeat_at and job.heartbeat_at < timezone.now() - timedelta(seconds=timeout):
+            requeue_stale(timeout)
+            continue
+        time.sleep(poll_interval)
+
+    print(f"↪️  {kind}:{object_id} 실행 (Job #{job.id}, 바깥 Job #{token.job_id})")
+    with _Heartbeat(job, getattr(settings, 'JOB_HEARTBEAT_INTERVAL', 15.0)):
+        success = run_job(job)
+    if not success:
+        token.check()
+    return success
+
+
+def requeue_stale(timeout=None):
+    """heartbeat가 끊긴 실행 중 작업을 다시 대기열로 (시도 횟수 초과 시 실패 처리)"""
+    timeout = timeout or getattr(settings, 'JOB_HEARTBEAT_TIMEOUT', 120)
+    deadline = timezone.now() - timedelta(seconds=timeout)
+
+    stale = Job.objects.filter(status='running', heartbeat_at__lt=deadline)
+    message = '워커 응답 없음 (최대 시도 횟수 초과)'
+
+    # 취소 요청 후 워커가 죽은 작업은 다시 실행하지 않음
+    for job in stale.filter(cancel_requested=True):
+        if Job.objects.filter(pk=job.pk, status='running').update(
+            status='cancelled', finished_at=timezone.now()
+        ):
+            update_target(job.kind, job.object_id, status='cancelled')
+    stale = stale.filter(cancel_requested=False)
+
+    failed = 0
+    for job in stale.filter(attempts__gte=F('max_attempts')):
+        if Job.objects.filter(pk=job.pk, status='running').update(
+            status='failed', error_message=message, finished_at=timezone.now()
+        ):
+            update_target(job.kind, job.object_id, status='failed', error_message=message)
+            failed += 1
+
+    requeued = 0
+    for job in stale.filter(attempts__lt=F('max_attempts')):
+        if Job.objects.filter(pk=job.pk, status='running').update(
+            status='queued', worker_id='', preempt_requested=False
+        ):
+            update_target(job.kind, job.object_id, status='queued')
+            requeued += 1
+
+    return requeued, failed
+
+
+def request_cancel(kind, object_id):
+    """
+    작업 취소 요청
+
+    대기 중인 작업은 바로 취소하고, 실행 중인 작업은 cancel_requested만
+    기록한다 (작업 루프가 확인 후 정리하고 종료). 취소할 작업이 없으면 None.
+    """
+    job = get_active_job(kind, object_id)
+    if job is None:
+        return None
+
+    if Job.objects.filter(pk=job.pk, status='queued').update(
+        status='cancelled', error_message='사용자 요청으로 취소됨', finished_at=timezone.now()
+    ):
+        update_target(job.kind, object_id, status='cancelled')
+    else:
+        # 그 사이 워커가 가져갔으면 실행 중인 작업으로 취급
+        Job.objects.filter(pk=job.pk, status='running').update(cancel_requested=True)
+
+    job.refresh_from_db()
+    return job
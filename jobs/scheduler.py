@@ -0,0 +1,213 @@
+"""
+작업 스케줄러 (CPU 기반 동시 실행 제한 + 비용 기반 우선순위)
+
+작업 종류마다 스레드 예산(threads)을 두고, 실행 중인 작업의 스레드 합이
+JOB_CPU_BUDGET(기본: CPU 코어 수)를 넘지 않을 때만 새 작업을 허용한다.
+허용되지 않은 작업은 대기열에 남고, 상태 API는 대기 순번과 예상 시작
+시간을 함께 보고한다.
+
+대기열 순서는 명시적 우선순위가 먼저이고, 같은 우선순위에서는 예상
+비용이 작은 작업(이미지, 짧은 클립)부터 실행한다. 오래 기다린 작업은
+JOB_AGING_HALF_LIFE 마다 실효 비용이 절반으로 줄어들어 결국 앞으로
+오므로 긴 작업도 굶지 않는다. 자리가 없을 때 더 낮은 우선순위의 작업이
+실행 중이면 그 작업을 선점(jobs.cancel.JobPreempted)해서 자리를 비운다.
+"""
+import heapq
+import math
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import Job
+
+
+# 작업 종류별 기본 설정 (settings.JOB_CONCURRENCY로 덮어쓸 수 있음)
+DEFAULT_JOB_CONCURRENCY = {
+    'analysis': {'threads': 2},
+    'detection': {'threads': 4},
+    'fused': {'threads': 4},
+    'multi': {'threads': 8},
+    'sweep': {'threads': 4},
+    'chunked': {'threads': 8},
+    'video_ingest': {'threads': 1},
+    'image_ingest': {'threads': 1},
+}
+
+# 완료 이력이 없을 때 사용할 비용 1당 소요 시간 (초)
+DEFAULT_SECONDS_PER_COST = 0.05
+
+# 대기 시간에 따른 실효 비용 감소 반감기 (초)
+DEFAULT_AGING_HALF_LIFE = 300
+
+# 이 시간(초) 이상 기다린 맨 앞 작업이 있으면 뒤 작업을 끼워 넣지 않음
+DEFAULT_STARVATION_TIMEOUT = 1800
+
+
+def get_cpu_budget():
+    """작업에 사용할 수 있는 전체 스레드 수"""
+    budget = getattr(settings, 'JOB_CPU_BUDGET', None)
+    return max(1, budget or os.cpu_count() or 1)
+
+
+def get_kind_config(kind):
+    config = {**DEFAULT_JOB_CONCURRENCY, **getattr(settings, 'JOB_CONCURRENCY', {})}
+    return config.get(kind, {})
+
+
+def get_thread_budget(kind):
+    """작업 1건이 사용할 스레드 수"""
+    threads = get_kind_config(kind).get('threads', 1)
+    return max(1, min(threads, get_cpu_budget()))
+
+
+def get_kind_limit(kind):
+    """작업 종류별 최대 동시 실행 수"""
+    limit = get_kind_config(kind).get('max_concurrent')
+    if limit:
+        return limit
+    return max(1, get_cpu_budget() // get_thread_budget(kind))
+
+
+def can_admit(job):
+    """지금 이 작업을 실행해도 되는지 (스레드 예산 / 종류별 상한)"""
+    running = Job.objects.filter(status='running')
+
+    if running.filter(kind=job.kind).count() >= get_kind_limit(job.kind):
+        return False
+
+    used_threads = running.aggregate(total=Sum('threads'))['total'] or 0
+    # 아무것도 실행 중이 아니면 예산보다 큰 작업도 하나는 허용
+    return used_threads == 0 or used_threads + job.threads <= get_cpu_budget()
+
+
+def find_preemption_victim(job):
+    """
+    job을 위해 자리를 비울 실행 중 작업 (없으면 None)
+
+    job보다 우선순위가 낮은 작업 중 가장 낮은 우선순위, 가장 최근에 시작한
+    작업을 고른다. 종류별 상한에 걸린 경우에는 같은 종류에서만 고르고,
+    이미 선점 요청을 받은 작업이 있으면 그 작업이 비켜줄 때까지 기다린다.
+    """
+    if not getattr(settings, 'JOB_PREEMPTION', True):
+        return None
+
+    running = Job.objects.filter(status='running', cancel_requested=False)
+    if running.filter(preempt_requested=True).exists():
+        return None
+
+    if running.filter(kind=job.kind).count() >= get_kind_limit(job.kind):
+        running = running.filter(kind=job.kind)
+
+    return running.filter(priority__lt=job.priority).order_by('priority', '-started_at').first()
+
+
+def apply_thread_budget(threads):
+    """현재 프로세스의 OpenCV / torch 스레드 수 설정"""
+    try:
+        import cv2
+        cv2.setNumThreads(threads)
+    except ImportError:
+        pass
+
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+# ------------------------------------------------------------
+# 대기 순번 / 예상 시작 시간
+# ------------------------------------------------------------
+def get_effective_cost(job, now=None):
+    """대기 시간을 반영한 실효 비용 (반감기마다 절반)"""
+    now = now or timezone.now()
+    half_life = getattr(settings, 'JOB_AGING_HALF_LIFE', DEFAULT_AGING_HALF_LIFE)
+    waited = max(0.0, (now - job.created_at).total_seconds())
+    return job.estimated_cost * math.pow(0.5, waited / half_life)
+
+
+def get_queue_order(kind=None):
+    """스케줄러가 작업을 꺼내는 순서 (대기 중인 작업 목록)"""
+    jobs = Job.objects.filter(status='queued').only(
+        'id', 'kind', 'object_id', 'priority', 'estimated_cost', 'threads', 'created_at', 'status',
+    )
+    if kind:
+        jobs = jobs.filter(kind=kind)
+
+    now = timezone.now()
+    return sorted(jobs, key=lambda job: (-job.priority, get_effective_cost(job, now), job.created_at, job.id))
+
+
+def is_starving(job, now=None):
+    """너무 오래 기다려서 자리를 예약해 줘야 하는 작업인지"""
+    now = now or timezone.now()
+    timeout = getattr(settings, 'JOB_STARVATION_TIMEOUT', DEFAULT_STARVATION_TIMEOUT)
+    return (now - job.created_at).total_seconds() >= timeout
+
+
+def parse_priority(value, choices):
+    """폼에서 받은 우선순위 값 검증 (잘못된 값이면 None)"""
+    try:
+        priority = int(value)
+    except (TypeError, ValueError):
+        return None
+    return priority if priority in dict(choices) else None
+
+
+def get_seconds_per_cost(kind, sample=20):
+    """최근 완료된 작업 기준 비용 1당 소요 시간 (초)"""
+    jobs = (
+        Job.objects
+        .filter(kind=kind, status='completed', started_at__isnull=False,
+                finished_at__isnull=False, estimated_cost__gt=0)
+        .order_by('-finished_at')
+        .values_list('started_at', 'finished_at', 'estimated_cost')[:sample]
+    )
+    total_seconds = sum((finished - started).total_seconds() for started, finished, _ in jobs)
+    total_cost = sum(cost for _, _, cost in jobs)
+    if not total_cost:
+        return DEFAULT_SECONDS_PER_COST
+    return total_seconds / total_cost
+
+
+def get_queue_info(job):
+    """
+    대기 순번과 예상 시작 시간
+
+    같은 종류의 실행 슬롯(get_kind_limit)에 스케줄러 순서상 앞선 대기
+    작업들을 각자의 예상 소요 시간(비용 x 비용당 소요 시간)만큼 차례로
+    배정해 보는 방식으로 추정한다.
+    """
+    if job is None or job.status != 'queued':
+        return {'queue_position': None, 'estimated_start': None, 'estimated_wait': None}
+
+    queue = get_queue_order(kind=job.kind)
+    ids = [queued.id for queued in queue]
+    position = ids.index(job.id) + 1 if job.id in ids else len(ids) + 1
+
+    now = timezone.now()
+    seconds_per_cost = get_seconds_per_cost(job.kind)
+
+    # 각 슬롯이 비는 시각 (초, 지금 기준)
+    slots = []
+    running = Job.objects.filter(kind=job.kind, status='running').values_list('started_at', 'estimated_cost')
+    for started_at, cost in running:
+        elapsed = (now - started_at).total_seconds() if started_at else 0
+        slots.append(max(0.0, cost * seconds_per_cost - elapsed))
+    slots.extend([0.0] * max(0, get_kind_limit(job.kind) - len(slots)))
+    heapq.heapify(slots)
+
+    for ahead in queue[:position - 1]:
+        free_at = heapq.heappop(slots)
+        heapq.heappush(slots, free_at + ahead.estimated_cost * seconds_per_cost)
+
+    wait = slots[0] if slots else 0.0
+    return {
+        'queue_position': position,
+        'estimated_start': (now + timedelta(seconds=wait)).isoformat(),
+        'estimated_wait': int(wait),
+    }
@@ -0,0 +1,511 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from . import cancel
+from .cancel import CancelToken, JobCancelled, JobPreempted, get_cancel_token
+from .events import progress_events
+from .models import Job, SchedulerLock
+from .progress import ProgressReporter, get_progress_reporter
+from .queue import ADMISSION_LOCK, claim_next, enqueue, request_cancel, requeue_stale, run_job, run_nested
+
+# 테스트 핸들러가 본 값
+seen = {}
+
+
+def ok_handler(object_id, **payload):
+    return True
+
+
+def fail_handler(object_id, **payload):
+    return False
+
+
+def raise_handler(object_id, **payload):
+    raise RuntimeError(f"boom {object_id}")
+
+
+def report_handler(object_id):
+    """진행률을 기록하는 안쪽 작업"""
+    seen['job_id'] = get_cancel_token().job_id
+    get_progress_reporter('test_inner', object_id).update(progress=50, current_step='inner', force=True)
+    return True
+
+
+def cancel_outer_handler(object_id):
+    """실행 중에 바깥 작업이 취소되는 안쪽 작업"""
+    Job.objects.filter(pk=seen['outer']).update(cancel_requested=True)
+    get_cancel_token().check()
+    return True
+
+
+def yield_handler(object_id):
+    """선점 요청을 받는 작업"""
+    Job.objects.filter(kind='test_yield', object_id=object_id).update(preempt_requested=True)
+    get_cancel_token().check()
+    return True
+
+
+def progress_fail_handler(object_id):
+    """진행률을 남기고 실패하는 작업"""
+    get_progress_reporter('analysis', object_id).update(
+        processed_frames=30, total_frames=120, progress=25, current_step='step', force=True,
+    )
+    return False
+
+
+def running_job(kind, object_id=1, **fields):
+    now = timezone.now()
+    return Job.objects.create(
+        kind=kind, object_id=object_id, status='running', worker_id='w1',
+        started_at=now, heartbeat_at=now, attempts=1, **fields,
+    )
+
+
+def queued_job(kind, object_id=1, age=0, **fields):
+    """대기 중인 작업 (age: 등록 후 지난 시간, 초)"""
+    job = Job.objects.create(kind=kind, object_id=object_id, **fields)
+    if age:
+        job.created_at = timezone.now() - timedelta(seconds=age)
+        Job.objects.filter(pk=job.pk).update(created_at=job.created_at)
+    return job
+
+
+@override_settings(JOB_HANDLERS={
+    'test_ok': 'jobs.tests.ok_handler',
+    'test_fail': 'jobs.tests.fail_handler',
+    'test_raise': 'jobs.tests.raise_handler',
+})
+class QueueTests(TestCase):
+    def test_enqueue_returns_active_job(self):
+        job = enqueue('test_ok', 1, {'x': 1})
+        self.assertEqual((job.status, job.payload), ('queued', {'x': 1}))
+        self.assertEqual(enqueue('test_ok', 1).pk, job.pk)
+        self.assertNotEqual(enqueue('test_ok', 2).pk, job.pk)
+
+        Job.objects.filter(pk=job.pk).update(status='completed')
+        self.assertNotEqual(enqueue('test_ok', 1).pk, job.pk)
+
+    def test_unknown_kind_rejected(self):
+        with self.assertRaises(ValueError):
+            enqueue('test_unknown', 1)
+        self.assertFalse(Job.objects.exists())
+
+    def test_claim_oldest_first(self):
+        queued_job('test_ok', object_id=1)
+        old = queued_job('test_ok', object_id=2, age=60)
+
+        claimed = claim_next('w1')
+        self.assertEqual(claimed.pk, old.pk)
+        self.assertEqual((claimed.status, claimed.worker_id, claimed.attempts), ('running', 'w1', 1))
+
+        Job.objects.filter(pk=old.pk).update(status='completed')
+        self.assertNotEqual(claim_next('w2').pk, old.pk)
+        self.assertIsNone(claim_next('w3'))
+
+    @mock.patch('jobs.queue.traceback.print_exc')
+    def test_run_job_records_result(self, print_exc):
+        for kind, status in (('test_ok', 'completed'), ('test_fail', 'failed'), ('test_raise', 'failed')):
+            job = running_job(kind, object_id=7)
+            self.assertEqual(run_job(job), status == 'completed')
+            job.refresh_from_db()
+            self.assertEqual(job.status, status)
+            self.assertIsNotNone(job.finished_at)
+
+        self.assertEqual(Job.objects.get(kind='test_raise').error_message, 'boom 7')
+
+    @override_settings(JOB_HEARTBEAT_TIMEOUT=60)
+    def test_requeue_stale(self):
+        alive = running_job('test_ok', object_id=1)
+        stale = running_job('test_ok', object_id=2)
+        exhausted = running_job('test_ok', object_id=3, max_attempts=1)
+        Job.objects.filter(pk__in=[stale.pk, exhausted.pk]).update(
+            heartbeat_at=timezone.now() - timedelta(seconds=120),
+        )
+
+        self.assertEqual(requeue_stale(), (1, 1))
+        statuses = dict(Job.objects.values_list('pk', 'status'))
+        self.assertEqual(
+            [statuses[alive.pk], statuses[stale.pk], statuses[exhausted.pk]],
+            ['running', 'queued', 'failed'],
+        )
+
+
+@override_settings(JOB_CPU_BUDGET=8, JOB_PREEMPTION=False, JOB_CONCURRENCY={})
+class AdmissionTests(TestCase):
+    def test_claims_job_within_budget(self):
+        running_job('detection', threads=4)
+        job = queued_job('analysis', threads=2)
+
+        claimed = claim_next('w2')
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertEqual((claimed.status, claimed.worker_id, claimed.attempts), ('running', 'w2', 1))
+        self.assertIsNotNone(claimed.heartbeat_at)
+
+    def test_job_over_budget_waits(self):
+        running_job('detection', threads=4)
+        job = queued_job('multi', threads=8)
+
+        self.assertIsNone(claim_next('w2'))
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'queued')
+
+    def test_large_job_admitted_when_idle(self):
+        job = queued_job('multi', threads=16)
+        self.assertEqual(claim_next('w2').pk, job.pk)
+
+    def test_smaller_job_fills_remaining_budget(self):
+        running_job('detection', threads=4)
+        queued_job('multi', threads=8, estimated_cost=1)
+        small = queued_job('analysis', threads=2, estimated_cost=5)
+
+        self.assertEqual(claim_next('w2').pk, small.pk)
+
+    @override_settings(JOB_CONCURRENCY={'analysis': {'threads': 1, 'max_concurrent': 1}})
+    def test_kind_limit(self):
+        running_job('analysis', threads=1)
+        queued_job('analysis', object_id=2, threads=1, estimated_cost=1)
+        detection = queued_job('detection', threads=4, estimated_cost=5)
+
+        self.assertEqual(claim_next('w2').pk, detection.pk)
+        self.assertIsNone(claim_next('w3'))
+
+    def test_budget_checked_under_admission_lock(self):
+        from .scheduler import can_admit
+
+        lock = SchedulerLock.objects.get(name=ADMISSION_LOCK)
+        self.assertIsNone(lock.acquired_at)
+        checks = []
+
+        def check(job):
+            lock.refresh_from_db()
+            checks.append(lock.acquired_at is not None)
+            return can_admit(job)
+
+        job = queued_job('analysis', threads=2)
+        with mock.patch('jobs.queue.can_admit', side_effect=check):
+            self.assertEqual(claim_next('w2').pk, job.pk)
+        self.assertEqual(checks, [True])
+
+    def test_missing_lock_row_is_recreated(self):
+        SchedulerLock.objects.all().delete()
+        job = queued_job('analysis', threads=2)
+
+        self.assertEqual(claim_next('w2').pk, job.pk)
+        self.assertIsNotNone(SchedulerLock.objects.get(name=ADMISSION_LOCK).acquired_at)
+
+
+@override_settings(
+    JOB_HANDLERS={
+        'test_inner': 'jobs.tests.report_handler',
+        'test_cancel': 'jobs.tests.cancel_outer_handler',
+    },
+    JOB_CANCEL_CHECK_INTERVAL=1e-6,
+)
+class RunNestedTests(TestCase):
+    def setUp(self):
+        seen.clear()
+        self.outer = running_job('detection', threads=3)
+        seen['outer'] = self.outer.pk
+        cancel.activate(self.outer)
+        self.addCleanup(cancel.deactivate)
+
+    def test_inner_job_gets_own_row(self):
+        self.assertTrue(run_nested('test_inner', 7))
+
+        inner = Job.objects.get(kind='test_inner', object_id=7)
+        self.assertEqual(seen['job_id'], inner.pk)
+        self.assertEqual((inner.status, inner.progress, inner.current_step), ('completed', 50, 'inner'))
+        self.assertEqual((inner.worker_id, inner.threads), ('w1', 3))
+
+        self.outer.refresh_from_db()
+        self.assertEqual((self.outer.progress, self.outer.current_step), (0, ''))
+        self.assertEqual(get_cancel_token().job_id, self.outer.pk)
+
+    def test_claims_queued_job(self):
+        queued = Job.objects.create(kind='test_inner', object_id=7, status='queued')
+
+        self.assertTrue(run_nested('test_inner', 7))
+        self.assertEqual(seen['job_id'], queued.pk)
+        self.assertEqual(Job.objects.filter(kind='test_inner').count(), 1)
+
+    def test_waits_for_job_running_elsewhere(self):
+        other = running_job('test_inner', object_id=7)
+
+        def finish(seconds):
+            Job.objects.filter(pk=other.pk).update(status='completed')
+
+        with mock.patch('jobs.queue.time.sleep', side_effect=finish):
+            self.assertTrue(run_nested('test_inner', 7))
+        self.assertNotIn('job_id', seen)
+        self.assertEqual(Job.objects.filter(kind='test_inner').count(), 1)
+
+    def test_outer_cancel_requeues_inner(self):
+        with self.assertRaises(JobCancelled):
+            run_nested('test_cancel', 7)
+
+        inner = Job.objects.get(kind='test_cancel')
+        self.assertEqual((inner.status, inner.attempts), ('queued', 0))
+        self.assertEqual(get_cancel_token().job_id, self.outer.pk)
+
+
+    @override_settings(JOB_HEARTBEAT_TIMEOUT=60)
+    def test_takes_over_job_whose_worker_died_mid_wait(self):
+        other = running_job('test_inner', object_id=7, max_attempts=3)
+
+        def worker_dies(seconds):
+            Job.objects.filter(pk=other.pk).update(heartbeat_at=timezone.now() - timedelta(seconds=61))
+
+        with mock.patch('jobs.queue.time.sleep', side_effect=worker_dies) as sleep:
+            self.assertTrue(run_nested('test_inner', 7))
+        self.assertEqual(sleep.call_count, 1)
+
+        other.refresh_from_db()
+        self.assertEqual(seen['job_id'], other.pk)
+        self.assertEqual((other.status, other.attempts, other.worker_id), ('completed', 2, 'w1'))
+        self.assertEqual(Job.objects.filter(kind='test_inner').count(), 1)
+
+    @override_settings(JOB_HEARTBEAT_TIMEOUT=60)
+    def test_stale_job_out_of_attempts_fails(self):
+        other = running_job('test_inner', object_id=7, max_attempts=1)
+        Job.objects.filter(pk=other.pk).update(heartbeat_at=timezone.now() - timedelta(seconds=61))
+
+        with mock.patch('jobs.queue.time.sleep') as sleep:
+            self.assertFalse(run_nested('test_inner', 7))
+        sleep.assert_not_called()
+
+        other.refresh_from_db()
+        self.assertEqual(other.status, 'failed')
+        self.assertNotIn('job_id', seen)
+        self.assertEqual(Job.objects.filter(kind='test_inner').count(), 1)
+
+
+@override_settings(
+    JOB_CPU_BUDGET=8, JOB_PREEMPTION=False, JOB_CONCURRENCY={},
+    JOB_AGING_HALF_LIFE=300, JOB_STARVATION_TIMEOUT=1800,
+)
+class QueueOrderTests(TestCase):
+    def test_priority_before_cost(self):
+        queued_job('analysis', object_id=1, threads=1, estimated_cost=1)
+        urgent = queued_job('analysis', object_id=2, threads=1, estimated_cost=1000, priority=10)
+
+        self.assertEqual(claim_next('w1').pk, urgent.pk)
+
+    def test_cheaper_job_first(self):
+        queued_job('analysis', object_id=1, threads=1, estimated_cost=100)
+        cheap = queued_job('analysis', object_id=2, threads=1, estimated_cost=10)
+
+        self.assertEqual(claim_next('w1').pk, cheap.pk)
+
+    def test_aging_moves_old_job_ahead(self):
+        # 1시간 대기 = 반감기 12번 -> 실효 비용 100 / 4096
+        old = queued_job('analysis', object_id=1, threads=1, estimated_cost=100, age=3600)
+        queued_job('analysis', object_id=2, threads=1, estimated_cost=1)
+
+        self.assertEqual(claim_next('w1').pk, old.pk)
+
+    def test_starving_job_is_not_bypassed(self):
+        running_job('detection', threads=4)
+        starving = queued_job('multi', object_id=1, threads=8, estimated_cost=1, age=2000)
+        queued_job('analysis', object_id=2, threads=2, estimated_cost=5)
+
+        self.assertIsNone(claim_next('w2'))
+
+        Job.objects.filter(status='running').update(status='completed')
+        self.assertEqual(claim_next('w2').pk, starving.pk)
+
+
+@override_settings(JOB_CANCEL_CHECK_INTERVAL=60)
+class CancelTokenTests(TestCase):
+    def test_cancel_and_preempt_requests(self):
+        job = running_job('analysis')
+        token = CancelToken(job.pk)
+        token.check()
+
+        Job.objects.filter(pk=job.pk).update(preempt_requested=True)
+        with self.assertRaises(JobPreempted):
+            CancelToken(job.pk).check()
+
+        Job.objects.filter(pk=job.pk).update(cancel_requested=True)
+        with self.assertRaises(JobCancelled) as raised:
+            CancelToken(job.pk).check()
+        self.assertNotIsInstance(raised.exception, JobPreempted)
+
+    def test_poll_is_throttled(self):
+        job = running_job('analysis')
+        token = CancelToken(job.pk)
+        token.check()
+
+        Job.objects.filter(pk=job.pk).update(cancel_requested=True)
+        with self.assertNumQueries(0):
+            token.check()
+
+    def test_deleted_job_counts_as_cancelled(self):
+        with self.assertRaises(JobCancelled):
+            CancelToken(12345).check()
+
+    def test_no_job_never_cancels(self):
+        with self.assertNumQueries(0):
+            CancelToken().check()
+
+    def test_request_cancel(self):
+        queued = queued_job('analysis', object_id=1)
+        running = running_job('analysis', object_id=2)
+
+        self.assertEqual(request_cancel('analysis', 1).status, 'cancelled')
+        self.assertEqual(request_cancel('analysis', 2).status, 'running')
+        running.refresh_from_db()
+        self.assertTrue(running.cancel_requested)
+        self.assertIsNone(request_cancel('analysis', 3))
+        queued.refresh_from_db()
+        self.assertEqual(queued.error_message, '사용자 요청으로 취소됨')
+
+
+@override_settings(
+    JOB_CPU_BUDGET=8, JOB_PREEMPTION=True, JOB_CONCURRENCY={},
+    JOB_HANDLERS={'test_yield': 'jobs.tests.yield_handler'},
+    JOB_CANCEL_CHECK_INTERVAL=1e-6,
+)
+class PreemptionTests(TestCase):
+    def test_higher_priority_job_requests_preemption(self):
+        low = running_job('multi', threads=8, priority=0)
+        high = queued_job('analysis', threads=2, priority=10)
+
+        self.assertIsNone(claim_next('w2'))
+        low.refresh_from_db()
+        self.assertTrue(low.preempt_requested)
+
+        # 이미 선점 요청을 보냈으면 다시 보내지 않고 자리가 빌 때까지 대기
+        self.assertIsNone(claim_next('w2'))
+        Job.objects.filter(pk=low.pk).update(status='queued', preempt_requested=False)
+        self.assertEqual(claim_next('w2').pk, high.pk)
+
+    def test_same_priority_is_not_preempted(self):
+        running = running_job('multi', threads=8, priority=0)
+        queued_job('analysis', threads=2, priority=0)
+
+        self.assertIsNone(claim_next('w2'))
+        running.refresh_from_db()
+        self.assertFalse(running.preempt_requested)
+
+    @override_settings(JOB_PREEMPTION=False)
+    def test_preemption_disabled(self):
+        running = running_job('multi', threads=8, priority=0)
+        queued_job('analysis', threads=2, priority=10)
+
+        self.assertIsNone(claim_next('w2'))
+        running.refresh_from_db()
+        self.assertFalse(running.preempt_requested)
+
+    def test_preempted_job_is_requeued(self):
+        job = queued_job('test_yield', object_id=5, threads=1)
+        job = claim_next('w1')
+
+        self.assertFalse(run_job(job))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker_id, job.attempts), ('queued', '', 0))
+        self.assertFalse(job.preempt_requested)
+        self.assertIsNone(get_cancel_token().job_id)
+
+
+@override_settings(JOB_HANDLERS={'analysis': 'jobs.tests.progress_fail_handler'})
+class ProgressReporterTests(TestCase):
+    def setUp(self):
+        from analysis.models import Analysis
+        from videos.models import Video
+
+        video = Video.objects.create(title='progress', file='videos/progress.mp4')
+        self.analysis = Analysis.objects.create(video=video, status='processing')
+        self.job = running_job('analysis', object_id=self.analysis.id)
+
+    @mock.patch('jobs.progress.time.monotonic')
+    def test_writes_are_throttled(self, monotonic):
+        reporter = ProgressReporter('analysis', self.analysis.id, job_id=self.job.pk, interval=1.0)
+
+        monotonic.return_value = 100.0
+        self.assertTrue(reporter.update(processed_frames=1, total_frames=10, progress=10))
+
+        monotonic.return_value = 100.5
+        with self.assertNumQueries(0):
+            self.assertFalse(reporter.update(processed_frames=2, progress=20))
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.processed_frames, self.job.progress), (1, 10))
+
+        # 간격이 지나면 메모리에 쌓인 마지막 값 기록
+        monotonic.return_value = 101.0
+        self.assertTrue(reporter.update(processed_frames=3))
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.processed_frames, self.job.total_frames, self.job.progress), (3, 10, 20))
+
+    @mock.patch('jobs.progress.time.monotonic', return_value=100.0)
+    def test_force_and_unchanged_fields(self, monotonic):
+        reporter = ProgressReporter('analysis', self.analysis.id, job_id=self.job.pk, interval=60)
+        reporter.update(progress=10, force=True)
+
+        self.assertTrue(reporter.update(current_step='encode', force=True))
+        self.assertEqual(Job.objects.get(pk=self.job.pk).current_step, 'encode')
+        with self.assertNumQueries(0):
+            self.assertFalse(reporter.update(progress=10, force=True))
+
+    def test_without_job_writes_target_row(self):
+        reporter = ProgressReporter('analysis', self.analysis.id, interval=0)
+        reporter.update(processed_frames=5, total_frames=50, progress=10, current_step='decode')
+
+        self.analysis.refresh_from_db()
+        self.assertEqual(
+            (self.analysis.processed_frames, self.analysis.total_frames, self.analysis.progress),
+            (5, 50, 10),
+        )
+        self.assertEqual(self.analysis.status, 'processing')
+
+    def test_failed_job_keeps_last_progress(self):
+        self.assertFalse(run_job(self.job))
+
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.status, self.job.progress, self.job.current_step), ('failed', 25, 'step'))
+        self.analysis.refresh_from_db()
+        self.assertEqual((self.analysis.processed_frames, self.analysis.total_frames), (30, 120))
+
+
+@mock.patch('jobs.events.asyncio.sleep', new_callable=mock.AsyncMock)
+@override_settings(JOB_EVENTS_KEEPALIVE=60, JOB_EVENTS_MAX_DURATION=300)
+class ProgressEventsTests(SimpleTestCase):
+    async def collect(self, *snapshots):
+        values = iter(snapshots)
+        return [chunk async for chunk in progress_events(lambda: next(values))]
+
+    async def test_sends_only_changes_then_done(self, sleep):
+        events = await self.collect(
+            {'status': 'queued', 'progress': 0, 'estimated_wait': 30},
+            {'status': 'queued', 'progress': 0, 'estimated_wait': 20},
+            {'status': 'processing', 'progress': 10},
+            {'status': 'processing', 'progress': 10},
+            {'status': 'completed', 'progress': 100},
+        )
+
+        self.assertEqual(events, [
+            'retry: 3000\n\n',
+            'event: progress\ndata: {"status": "queued", "progress": 0, "estimated_wait": 30}\n\n',
+            'event: progress\ndata: {"status": "processing", "progress": 10}\n\n',
+            'event: done\ndata: {"status": "completed", "progress": 100}\n\n',
+        ])
+        self.assertEqual(sleep.await_count, 4)
+
+    async def test_deleted_target_sends_gone(self, sleep):
+        events = await self.collect(None)
+        self.assertEqual(events, ['retry: 3000\n\n', 'event: gone\ndata: {}\n\n'])
+
+    @override_settings(JOB_EVENTS_KEEPALIVE=0)
+    async def test_keepalive_while_unchanged(self, sleep):
+        snapshot = {'status': 'processing', 'progress': 10}
+        events = await self.collect(snapshot, snapshot, {'status': 'failed'})
+        self.assertEqual(events[2:], [': keepalive\n\n', 'event: done\ndata: {"status": "failed"}\n\n'])
+
+    @override_settings(JOB_EVENTS_MAX_DURATION=0)
+    async def test_stream_ends_after_max_duration(self, sleep):
+        snapshot = {'status': 'processing', 'progress': 10}
+        events = [chunk async for chunk in progress_events(lambda: snapshot)]
+        self.assertEqual(len(events), 2)
+        self.assertTrue(events[1].startswith('event: progress'))
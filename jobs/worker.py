@@ -0,0 +1,187 @@
+"""
+작업 큐 워커 (프로세스 풀)
+
+runworker 명령이 Supervisor를 띄우고, Supervisor는 spawn 방식으로 워커
+프로세스 N개를 유지한다. 각 워커는 Job 테이블에서 작업을 하나씩 가져와
+실행하므로 OpenCV/torch 연산이 웹 프로세스의 GIL과 경쟁하지 않는다.
+
+이 모듈은 spawn 된 자식 프로세스에서 import 되므로 모델은 django.setup()
+이후에 import 한다.
+"""
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+
+
+def _setup_django():
+    """자식 프로세스에서 Django 초기화"""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'videotool.settings')
+    import django
+    django.setup()
+
+
+class _Heartbeat:
+    """작업 실행 중 주기적으로 heartbeat 기록 (별도 스레드)"""
+
+    def __init__(self, job, interval):
+        self.job = job
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        from django.db import connection
+
+        while not self._stop.wait(self.interval):
+            try:
+                self.job.touch()
+            except Exception as e:
+                print(f"⚠️  heartbeat 기록 실패: {e}")
+        connection.close()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join(timeout=self.interval)
+
+
+def worker_main(worker_id, stop_event, poll_interval=2.0, heartbeat_interval=15.0):
+    """워커 프로세스 진입점: 작업을 가져와서 실행하는 루프"""
+    _setup_django()
+
+    from django.db import close_old_connections
+    from .queue import claim_next, run_job
+
+    # 종료 신호는 Supervisor가 stop_event로 전달
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    print(f"👷 워커 시작: {worker_id} (pid={os.getpid()})")
+
+    while not stop_event.is_set():
+        try:
+            job = claim_next(worker_id)
+        except Exception as e:
+            print(f"⚠️  작업 조회 실패: {e}")
+            close_old_connections()
+            job = None
+
+        if job is None:
+            stop_event.wait(poll_interval)
+            continue
+
+        print(f"▶️  [{worker_id}] {job.kind}:{job.object_id} 실행 (Job #{job.id})")
+        started = time.monotonic()
+
+        with _Heartbeat(job, heartbeat_interval):
+            success = run_job(job)
+
+        elapsed = time.monotonic() - started
+        mark = '✅' if success else '❌'
+        print(f"{mark} [{worker_id}] Job #{job.id} 종료 ({elapsed:.1f}초)")
+
+    print(f"👋 워커 종료: {worker_id}")
+
+
+class _PeriodicTask:
+    """Supervisor에서 주기적으로 실행하는 정리 작업 (별도 스레드, 이전 실행이 끝나야 다시 실행)"""
+
+    def __init__(self, path, interval):
+        self.path = path
+        self.interval = interval
+        self.last_run = None
+        self._thread = None
+
+    def _run(self):
+        from django.db import connection
+        from django.utils.module_loading import import_string
+
+        try:
+            import_string(self.path)()
+        except Exception as e:
+            print(f"⚠️  주기 작업 실패 ({self.path}): {e}")
+        finally:
+            connection.close()
+
+    def maybe_run(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        if self.last_run is not None and time.monotonic() - self.last_run < self.interval:
+            return
+        self.last_run = time.monotonic()
+        self._thread = threading.Thread(target=self._run, daemon=True, name=f'periodic-{self.path}')
+        self._thread.start()
+
+
+class Supervisor:
+    """워커 프로세스 풀 관리 (비정상 종료된 워커는 다시 띄움)"""
+
+    def __init__(self, processes, poll_interval=2.0, heartbeat_interval=15.0, periodic_tasks=None):
+        self.processes = processes
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        # [(함수 경로, 주기 초), ...] (파생 결과 정리 등, 주기가 None이면 실행 안 함)
+        self.periodic_tasks = [
+            _PeriodicTask(path, interval) for path, interval in periodic_tasks or [] if interval
+        ]
+        self.context = multiprocessing.get_context('spawn')
+        self.stop_event = self.context.Event()
+        self.workers = {}
+        self._stopping = False
+
+    def _worker_id(self, index):
+        return f"{socket.gethostname()}:{os.getpid()}:{index}"
+
+    def _start_worker(self, index):
+        process = self.context.Process(
+            target=worker_main,
+            args=(self._worker_id(index), self.stop_event, self.poll_interval, self.heartbeat_interval),
+            name=f'videotool-worker-{index}',
+        )
+        process.start()
+        self.workers[index] = process
+
+    def stop(self, *args):
+        # 시그널 핸들러에서는 플래그만 바꾼다
+        # (wait 중인 multiprocessing.Event를 핸들러에서 set 하면 교착될 수 있음)
+        self._stopping = True
+
+    def run(self):
+        from .queue import requeue_stale
+
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+
+        # 이전 실행에서 중단된 작업 복구
+        requeued, failed = requeue_stale()
+        if requeued or failed:
+            print(f"♻️  중단된 작업 복구: 재시도 {requeued}건, 실패 처리 {failed}건")
+
+        for index in range(self.processes):
+            self._start_worker(index)
+
+        last_check = time.monotonic()
+        try:
+            while not self._stopping:
+                time.sleep(0.5)
+                if time.monotonic() - last_check < self.heartbeat_interval:
+                    continue
+                last_check = time.monotonic()
+
+                requeue_stale()
+                for task in self.periodic_tasks:
+                    task.maybe_run()
+                for index, process in list(self.workers.items()):
+                    if not process.is_alive():
+                        print(f"⚠️  워커 {index} 비정상 종료 (exitcode={process.exitcode}) - 재시작")
+                        self._start_worker(index)
+        finally:
+            print("🛑 종료 요청 - 실행 중인 작업이 끝나면 워커가 종료됩니다")
+            self.stop_event.set()
+            for process in self.workers.values():
+                process.join()
@@ -1,16 +1,36 @@
 from django.contrib import admin
 
-from .models import Video, Image
+from .models import DerivedArtifact, Video, Image, MediaBlob, UploadSession
 
 @admin.register(Video)
 class VideoAdmin(admin.ModelAdmin):
-    list_display = ['title', 'file_size', 'uploaded_at']
-    list_filter = ['uploaded_at']
+    list_display = ['title', 'file_size', 'status', 'uploaded_at']
+    list_filter = ['status', 'uploaded_at']
     search_fields = ['title', 'description']
 
 @admin.register(Image)
 class ImageAdmin(admin.ModelAdmin):
-    list_display = ['title', 'file_size', 'width', 'height', 'uploaded_at']
-    list_filter = ['uploaded_at']
+    list_display = ['title', 'file_size', 'width', 'height', 'status', 'uploaded_at']
+    list_filter = ['status', 'uploaded_at']
     search_fields = ['title', 'description']
-    readonly_fields = ['file_size', 'width', 'height']
\ No newline at end of file
+    readonly_fields = ['file_size', 'width', 'height']
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ['filename', 'media_type', 'status', 'offset', 'total_size', 'created_at']
+    list_filter = ['media_type', 'status']
+    search_fields = ['title', 'filename']
+    readonly_fields = ['offset', 'total_size', 'checksum', 'video', 'image']
+
+@admin.register(MediaBlob)
+class MediaBlobAdmin(admin.ModelAdmin):
+    list_display = ['content_hash', 'size', 'ref_count', 'created_at']
+    search_fields = ['content_hash']
+    readonly_fields = ['content_hash', 'file', 'size', 'ref_count']
+
+@admin.register(DerivedArtifact)
+class DerivedArtifactAdmin(admin.ModelAdmin):
+    list_display = ['name', 'kind', 'object_id', 'size', 'last_accessed_at', 'evicted_at']
+    list_filter = ['kind', 'evicted_at']
+    search_fields = ['name']
+    readonly_fields = ['name', 'kind', 'object_id', 'size', 'last_accessed_at', 'evicted_at']
@@ -3,3 +3,11 @@ from django.apps import AppConfig
 class VideosConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "videos"
+
+    def ready(self):
+        # 검색 인덱스 동기화 (videos.search), 원본 참조 해제 (videos.blobs),
+        # 삭제된 행의 파생 파일 정리 (videos.retention)
+        from . import blobs, retention, search
+        search.connect_signals()
+        blobs.connect_signals()
+        retention.connect_signals()
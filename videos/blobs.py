@@ -0,0 +1,163 @@
+"""
+내용 주소 원본 저장 (MediaBlob)
+
+업로드는 받는 동안 SHA-256을 계산하고 (폼: HashingUploadHandler, 분할: 완료 시 1회)
+MEDIA_ROOT/blobs/<해시 앞 2자리>/<해시>.확장자 에 저장한다. 같은 내용이 이미 있으면
+새로 받은 파일은 버리고 기존 파일을 공유하며 ref_count만 올린다.
+
+- Video/Image.file 은 blob.file 과 같은 경로를 가리키므로 기존 코드(file.path)는 그대로 동작
+- Video/Image가 삭제되면 post_delete 신호로 참조를 내려놓고, 0이 되면 파일도 지움
+- 같은 해시의 다른 행이 이미 만든 결과(메타데이터, 썸네일, 미리보기, 분석 결과)는
+  하드링크(저장소 복사)해서 재사용 (videos.ingest, analysis.tasks)
+- 파일은 MEDIA_ROOT에 쓴 뒤 미디어 저장소(videos.storage)에 올린다
+"""
+import hashlib
+import os
+
+from django.conf import settings
+from django.core.files.move import file_move_safe
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete
+
+from .models import Image, MediaBlob, Video, blob_upload_path
+from .storage import delete_media, get_media_store, publish_media
+
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def compute_content_hash(content):
+    """업로드 파일 SHA-256 (업로드 핸들러가 계산했으면 그 값)"""
+    content_hash = getattr(content, 'sha256', None)
+    if content_hash:
+        return content_hash
+    digest = hashlib.sha256()
+    for chunk in content.chunks(HASH_CHUNK_SIZE):
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+def _write_blob_file(name, source_path=None, content=None):
+    """blob 경로에 원자적으로 기록 (source_path는 옮기고, content는 복사)"""
+    target = default_storage.path(name)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    if source_path:
+        file_move_safe(source_path, target, allow_overwrite=True)
+    else:
+        temp_path = f"{target}.{os.getpid()}.part"
+        try:
+            with open(temp_path, 'wb') as f:
+                for chunk in content.chunks(HASH_CHUNK_SIZE):
+                    f.write(chunk)
+            os.replace(temp_path, target)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    os.chmod(target, getattr(settings, 'FILE_UPLOAD_PERMISSIONS', None) or 0o644)
+    publish_media(name)
+
+
+def acquire_blob(content_hash, filename, size, source_path=None, content=None):
+    """
+    내용 해시의 blob 참조를 하나 늘림 (없으면 받은 파일로 생성)
+
+    source_path: 옮길 임시 파일 경로 (이미 있는 내용이면 지움)
+    content: 복사할 Django File (업로드 파일)
+    반환: (blob, 새로 만들었는지)
+    """
+    for _ in range(2):
+        try:
+            with transaction.atomic():
+                if MediaBlob.objects.filter(content_hash=content_hash).update(ref_count=F('ref_count') + 1):
+                    blob = MediaBlob.objects.get(content_hash=content_hash)
+                    if get_media_store().exists(blob.file.name):
+                        if source_path:
+                            _remove_source(source_path)
+                        print(f"♻️  중복 업로드: 기존 원본 공유 ({content_hash[:12]}, 참조 {blob.ref_count})")
+                        return blob, False
+                    # 파일이 사라졌으면 받은 내용으로 복구
+                    _write_blob_file(blob.file.name, source_path, content)
+                    return blob, False
+
+                # 행을 먼저 넣고 파일은 그다음에 씀: 동시에 만든 쪽이 지면 받은 파일은 그대로 남아
+                # 다음 시도에서 기존 blob을 공유하고 지움 (파일 쓰기가 실패하면 행도 롤백)
+                blob = MediaBlob(content_hash=content_hash, size=size, ref_count=1)
+                blob.file.name = blob_upload_path(blob, filename)
+                blob.save()
+                _write_blob_file(blob.file.name, source_path, content)
+                return blob, True
+        except IntegrityError:
+            # 같은 내용이 동시에 올라온 경우: 먼저 만든 blob을 공유
+            continue
+    raise IntegrityError(f"blob을 만들 수 없습니다: {content_hash}")
+
+
+def _remove_source(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def release_blob(blob_id):
+    """blob 참조를 하나 줄이고 0이면 파일과 행 삭제"""
+    with transaction.atomic():
+        MediaBlob.objects.filter(pk=blob_id).update(ref_count=F('ref_count') - 1)
+        blob = MediaBlob.objects.filter(pk=blob_id, ref_count__lte=0).first()
+        if blob is None or blob.videos.exists() or blob.images.exists():
+            return False
+        blob.delete()
+    delete_media(blob.file.name)
+    print(f"🗑️  원본 삭제: {blob.content_hash[:12]}")
+    return True
+
+
+def store_upload(media):
+    """
+    업로드된 파일(저장 전 Video/Image)을 blob으로 저장하고 media.file을 blob 경로로 바꿈
+
+    이미 blob에 연결된 경우(분할 업로드)는 그대로 둔다.
+    """
+    if media.blob_id or not media.file or media.file._committed:
+        return media
+    content = media.file.file
+    content_hash = compute_content_hash(content)
+    if hasattr(content, 'temporary_file_path'):
+        blob, _ = acquire_blob(content_hash, content.name, content.size, source_path=content.temporary_file_path())
+    else:
+        blob, _ = acquire_blob(content_hash, content.name, content.size, content=content)
+    attach_blob(media, blob)
+    return media
+
+
+def attach_blob(media, blob):
+    media.blob = blob
+    media.file = blob.file.name
+    media.file_size = blob.size
+    media.content_hash = blob.content_hash
+
+
+def find_duplicate(media):
+    """같은 내용으로 처리가 끝난 다른 Video/Image (없으면 None)"""
+    if not media.content_hash:
+        return None
+    return (
+        type(media).objects
+        .filter(content_hash=media.content_hash, status='completed')
+        .exclude(pk=media.pk)
+        .order_by('-ingested_at')
+        .first()
+    )
+
+
+def _release_media_blob(sender, instance, **kwargs):
+    if instance.blob_id:
+        transaction.on_commit(lambda: release_blob(instance.blob_id))
+
+
+def connect_signals():
+    for model in (Video, Image):
+        post_delete.connect(_release_media_blob, sender=model, dispatch_uid=f'release_blob_{model.__name__}')
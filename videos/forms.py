@@ -5,6 +5,11 @@ from django.core.exceptions import ValidationError
 
 from .models import Video, Image
 
+# 업로드 크기 / 이미지 확장자 제한 (폼 업로드와 분할 업로드 공통)
+MAX_VIDEO_SIZE = 1024 * 1024 * 1024
+MAX_IMAGE_SIZE = 10 * 1024 * 1024
+IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp']
+
 class VideoUploadForm(forms.ModelForm):
     class Meta:
         model = Video
@@ -29,7 +34,7 @@ class VideoUploadForm(forms.ModelForm):
         file = self.cleaned_data.get('file')
         if file:
             # 파일 크기 체크 (1GB 제한)
-            if file.size > 1024 * 1024 * 1024:
+            if file.size > MAX_VIDEO_SIZE:
                 raise forms.ValidationError('파일 크기는 1GB를 초과할 수 없습니다.')
         return file
 
@@ -58,13 +63,12 @@ class ImageUploadForm(forms.ModelForm):
         
         if file:
             # 파일 크기 체크 (10MB 제한)
-            max_size = 10 * 1024 * 1024
-            if file.size > max_size:
+            if file.size > MAX_IMAGE_SIZE:
                 raise ValidationError(f'이미지 크기는 10MB를 초과할 수 없습니다.')
             
             # 확장자 검증
             ext = os.path.splitext(file.name)[1].lower()
-            allowed_extensions = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp']
+            allowed_extensions = IMAGE_EXTENSIONS
             
             if ext not in allowed_extensions:
                 raise ValidationError(
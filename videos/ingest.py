@@ -0,0 +1,325 @@
+"""
+업로드 후 처리 (작업 종류 'video_ingest' / 'image_ingest')
+
+업로드 요청은 파일만 저장하고 바로 응답한다. 영상 길이와 코덱에 따라 오래
+걸리는 일은 runworker가 실행하는 ingest 작업이 처리한다.
+
+- 동영상: 메타데이터(길이, 해상도, FPS, 코덱) -> 포스터/스프라이트 (videos.previews) -> SHA-256
+  -> 재생용 프록시(선택)
+- 이미지: 해상도 -> SHA-256 -> 썸네일 (videos.thumbnails)
+
+진행 상태는 Video/Image.status에 기록되고 미디어 목록에 표시된다.
+원본은 미디어 저장소에서 읽고 (videos.storage), 포스터/미리보기/프록시는 만든 뒤 저장소에 올린다.
+이미지 썸네일은 원본에서 언제든 다시 만들 수 있으므로 각 노드의 MEDIA_ROOT에만 둔다.
+
+같은 내용(content_hash)으로 처리가 끝난 행이 있으면 다시 계산하지 않고
+메타데이터는 복사, 파일(썸네일, 미리보기, 프록시)은 하드링크한다 (videos.blobs).
+"""
+import os
+import shutil
+import traceback
+from io import BytesIO
+
+import ffmpeg
+from PIL import Image as PILImage
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from jobs.cancel import JobCancelled, get_cancel_token, run_process
+from jobs.progress import get_progress_reporter
+
+from .blobs import find_duplicate
+from .models import Image, Video, proxy_upload_path
+from .previews import get_preview_dir, generate_video_previews
+from .storage import get_media_store, link_file, local_media_path, media_name, publish_media
+from .thumbnails import generate_image_thumbnails, get_thumbnail_dir
+from .uploads import compute_file_sha256
+
+
+# 재생용 프록시 생성 여부 / 프록시 최대 높이
+DEFAULT_VIDEO_PROXY = False
+DEFAULT_VIDEO_PROXY_HEIGHT = 720
+
+
+def parse_frame_rate(value):
+    """ffprobe 프레임 레이트 ('30000/1001') -> float"""
+    try:
+        num, _, den = str(value).partition('/')
+        rate = float(num) / float(den or 1)
+    except (TypeError, ValueError, ZeroDivisionError):
+        return None
+    return rate or None
+
+
+def probe_video(path):
+    """동영상 메타데이터 {duration, width, height, fps, codec} (ffprobe가 없으면 OpenCV)"""
+    try:
+        info = ffmpeg.probe(path)
+        stream = next(s for s in info['streams'] if s.get('codec_type') == 'video')
+    except StopIteration:
+        raise ValueError("동영상 스트림이 없습니다")
+    except (ffmpeg.Error, OSError, KeyError, ValueError) as e:
+        print(f"⚠️  ffprobe 실패 - OpenCV로 확인: {e}")
+    else:
+        duration = info.get('format', {}).get('duration') or stream.get('duration')
+        return {
+            'duration': float(duration) if duration else None,
+            'width': int(stream.get('width') or 0),
+            'height': int(stream.get('height') or 0),
+            'fps': parse_frame_rate(stream.get('avg_frame_rate')) or parse_frame_rate(stream.get('r_frame_rate')),
+            'codec': stream.get('codec_name', ''),
+        }
+
+    import cv2
+
+    cap = cv2.VideoCapture(path)
+    try:
+        if not cap.isOpened():
+            raise ValueError("동영상을 열 수 없습니다")
+        fps = cap.get(cv2.CAP_PROP_FPS) or None
+        frames = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+        fourcc = int(cap.get(cv2.CAP_PROP_FOURCC))
+        return {
+            'duration': frames / fps if fps and frames > 0 else None,
+            'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            'fps': fps,
+            'codec': ''.join(chr((fourcc >> (8 * i)) & 0xFF) for i in range(4)).strip('\x00 ').lower(),
+        }
+    finally:
+        cap.release()
+
+
+def generate_thumbnail(video_path):
+    try:
+        out, _ = (
+            ffmpeg.input(video_path, ss=0)
+            .output('pipe:', vframes=1, format='image2', vcodec='mjpeg')
+            .run(capture_stdout=True, capture_stderr=True)
+        )
+
+        image = PILImage.open(BytesIO(out))
+        image.thumbnail((640, 360), PILImage.Resampling.LANCZOS)
+
+        thumb_io = BytesIO()
+        image.save(thumb_io, format='JPEG', quality=85)
+        thumb_io.seek(0)
+
+        return ContentFile(thumb_io.read())
+    except Exception as exc:
+        print(f"썸네일 생성 오류: {exc}")
+        return None
+
+
+def build_proxy(video, height=DEFAULT_VIDEO_PROXY_HEIGHT, cancel_check=None):
+    """브라우저 재생용 H.264 프록시 생성 후 저장 경로(name) 반환"""
+    name = default_storage.get_available_name(proxy_upload_path(video, os.path.basename(video.file.name)))
+    target = default_storage.path(name)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    temp_path = f"{target}.part"
+
+    cmd = [
+        'ffmpeg', '-i', local_media_path(video.file.name),
+        '-vf', f"scale=-2:'min({height},ih)'",
+        '-c:v', 'libx264',
+        '-preset', 'veryfast',
+        '-crf', '23',
+        '-pix_fmt', 'yuv420p',
+        '-c:a', 'aac',
+        '-movflags', '+faststart',
+        '-f', 'mp4',
+        '-y', temp_path,
+    ]
+    try:
+        result = run_process(cmd, cancel_check=cancel_check)
+        if result.returncode != 0:
+            raise RuntimeError(f"프록시 생성 실패: {result.stderr[-500:]}")
+        os.replace(temp_path, target)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    publish_media(name)
+    return name
+
+
+def link_dir(source_dir, target_dir):
+    """디렉토리의 파일을 모두 하드링크 (기존 대상은 교체)"""
+    shutil.rmtree(target_dir, ignore_errors=True)
+    for name in os.listdir(source_dir):
+        link_file(os.path.join(source_dir, name), os.path.join(target_dir, name))
+
+
+def reuse_video_ingest(video, duplicate):
+    """같은 내용의 처리 결과 재사용 -> Video에 기록할 필드"""
+    store = get_media_store()
+    fields = {name: getattr(duplicate, name) for name in ('duration', 'width', 'height', 'fps', 'codec')}
+
+    if duplicate.thumbnail and store.exists(duplicate.thumbnail.name):
+        original_name = os.path.splitext(os.path.basename(video.file.name))[0]
+        name = default_storage.get_available_name(
+            video.thumbnail.field.generate_filename(video, f"{original_name}_thumb.jpg")
+        )
+        store.copy(duplicate.thumbnail.name, name)
+        fields['thumbnail'] = name
+
+    source_prefix = media_name(get_preview_dir(duplicate.pk))
+    preview_files = store.listdir(source_prefix) if duplicate.preview_vtt else []
+    if preview_files:
+        target_prefix = media_name(get_preview_dir(video.pk))
+        store.delete_prefix(target_prefix)
+        for filename in preview_files:
+            store.copy(f"{source_prefix}/{filename}", f"{target_prefix}/{filename}")
+        fields['preview_vtt'] = f"{target_prefix}/{os.path.basename(duplicate.preview_vtt)}"
+
+    if duplicate.proxy and store.exists(duplicate.proxy.name):
+        name = default_storage.get_available_name(proxy_upload_path(video, os.path.basename(video.file.name)))
+        store.copy(duplicate.proxy.name, name)
+        fields['proxy'] = name
+    return fields
+
+
+def estimate_video_ingest_cost(video_id):
+    """메타데이터/썸네일/해시는 가볍고, 프록시를 만들면 재인코딩 비용"""
+    from jobs.cost import megapixel_frames
+
+    video = Video.objects.get(id=video_id)
+    if not getattr(settings, 'VIDEO_INGEST_PROXY', DEFAULT_VIDEO_PROXY):
+        return 5.0 + video.file_size / (100 * 1024 * 1024)
+    return (megapixel_frames(get_media_store().source(video.file.name)) or 300.0) * 0.5
+
+
+def estimate_image_ingest_cost(image_id):
+    return 1.0
+
+
+def process_video_ingest(video_id):
+    """동영상 업로드 후 처리"""
+    cancel_check = get_cancel_token()
+    reporter = get_progress_reporter('video_ingest', video_id)
+    try:
+        print(f"\n📥 동영상 처리 시작: ID={video_id}")
+        video = Video.objects.get(id=video_id)
+        Video.objects.filter(pk=video_id).update(status='processing', error_message='')
+
+        path = local_media_path(video.file.name)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"파일을 찾을 수 없습니다: {path}")
+
+        duplicate = find_duplicate(video)
+        if duplicate:
+            fields = reuse_video_ingest(video, duplicate)
+            reporter.update(1, 1, 100, '완료', force=True)
+            Video.objects.filter(pk=video_id).update(status='completed', ingested_at=timezone.now(), **fields)
+            print(f"♻️  같은 내용의 처리 결과 재사용: {video.title} <- 동영상 {duplicate.pk}")
+            return True
+
+        use_proxy = getattr(settings, 'VIDEO_INGEST_PROXY', DEFAULT_VIDEO_PROXY)
+        steps = ['메타데이터', '미리보기', '해시'] + (['프록시'] if use_proxy else [])
+
+        def start_step(index):
+            cancel_check()
+            reporter.update(index, len(steps), int(index * 100 / len(steps)), f'{steps[index]} 처리 중', force=True)
+
+        # 행이 그 사이 삭제될 수 있으므로 save() 대신 update()로 기록
+        fields = {}
+
+        start_step(0)
+        fields.update(probe_video(path))
+        print(f"🎞️  {fields['width']}x{fields['height']}, {fields['codec']}, "
+              f"{fields['duration'] or 0:.1f}초, {fields['fps'] or 0:.2f}fps")
+
+        # 포스터 + 스프라이트 + VTT (ffmpeg 1회), 실패하면 첫 프레임 썸네일
+        start_step(1)
+        original_name = os.path.splitext(os.path.basename(video.file.name))[0]
+        try:
+            previews = generate_video_previews(
+                video_id, path, fields['width'], fields['height'], fields['duration'], cancel_check,
+            )
+        except (OSError, RuntimeError) as e:
+            print(f"⚠️  미리보기 생성 실패 - 첫 프레임 썸네일 사용: {e}")
+            thumbnail_content = generate_thumbnail(path)
+        else:
+            fields['preview_vtt'] = previews['vtt']
+            with open(previews['poster'], 'rb') as f:
+                thumbnail_content = ContentFile(f.read())
+            publish_media(os.path.dirname(previews['vtt']))
+        if thumbnail_content:
+            video.thumbnail.save(f"{original_name}_thumb.jpg", thumbnail_content, save=False)
+            fields['thumbnail'] = video.thumbnail.name
+            publish_media(video.thumbnail.name)
+
+        # 원본(blob)으로 올라온 파일은 업로드 때 이미 계산됨
+        start_step(2)
+        fields['content_hash'] = video.content_hash or compute_file_sha256(path)
+
+        if use_proxy:
+            start_step(3)
+            height = getattr(settings, 'VIDEO_PROXY_HEIGHT', DEFAULT_VIDEO_PROXY_HEIGHT)
+            fields['proxy'] = build_proxy(video, height, cancel_check)
+
+        reporter.update(len(steps), len(steps), 100, '완료', force=True)
+        Video.objects.filter(pk=video_id).update(status='completed', ingested_at=timezone.now(), **fields)
+        print(f"✅ 동영상 처리 완료: {video.title}")
+        return True
+
+    except JobCancelled as e:
+        print(f"🛑 동영상 처리 중단: {e}")
+        Video.objects.filter(pk=video_id).update(status='cancelled')
+        raise
+
+    except Exception as e:
+        print(f"❌ 동영상 처리 실패: {e}")
+        traceback.print_exc()
+        Video.objects.filter(pk=video_id).update(status='failed', error_message=str(e))
+        return False
+
+
+def process_image_ingest(image_id):
+    """이미지 업로드 후 처리"""
+    cancel_check = get_cancel_token()
+    try:
+        image = Image.objects.get(id=image_id)
+        Image.objects.filter(pk=image_id).update(status='processing', error_message='')
+        cancel_check()
+
+        duplicate = find_duplicate(image)
+        if duplicate and os.path.isdir(get_thumbnail_dir(duplicate.pk)):
+            link_dir(get_thumbnail_dir(duplicate.pk), get_thumbnail_dir(image.pk))
+            Image.objects.filter(pk=image_id).update(
+                status='completed', ingested_at=timezone.now(), width=duplicate.width, height=duplicate.height,
+            )
+            print(f"♻️  같은 내용의 처리 결과 재사용: {image.title} <- 이미지 {duplicate.pk}")
+            return True
+
+        path = local_media_path(image.file.name)
+        fields = {}
+        with PILImage.open(path) as img:
+            fields['width'], fields['height'] = img.size
+        fields['content_hash'] = image.content_hash or compute_file_sha256(path)
+        cancel_check()
+        generate_image_thumbnails(image)
+
+        Image.objects.filter(pk=image_id).update(status='completed', ingested_at=timezone.now(), **fields)
+        print(f"✅ 이미지 처리 완료: {image.title} ({fields['width']}x{fields['height']})")
+        return True
+
+    except JobCancelled as e:
+        print(f"🛑 이미지 처리 중단: {e}")
+        Image.objects.filter(pk=image_id).update(status='cancelled')
+        raise
+
+    except Exception as e:
+        print(f"❌ 이미지 처리 실패: {e}")
+        traceback.print_exc()
+        Image.objects.filter(pk=image_id).update(status='failed', error_message=str(e))
+        return False
+
+
+def start_ingest_task(media):
+    """업로드 후 처리를 작업 큐에 등록 (runworker 프로세스가 실행)"""
+    from jobs.queue import enqueue
+
+    kind = 'image_ingest' if isinstance(media, Image) else 'video_ingest'
+    return enqueue(kind, media.pk)
@@ -0,0 +1,140 @@
+"""
+미디어 목록 (동영상 + 이미지, DB에서 합치고 키셋 페이지네이션)
+
+두 테이블을 UNION ALL로 합쳐 (uploaded_at, id, 종류) 역순으로 정렬하고
+페이지 크기 + 1개만 가져온다. 각 테이블의 (uploaded_at, id) 인덱스를
+따라 읽으므로 SQLite는 정렬 없이 두 인덱스를 병합(MERGE UNION ALL)하고,
+목록이 10만 건을 넘어도 한 페이지에 필요한 행만 읽는다.
+
+OFFSET 대신 마지막 항목의 (uploaded_at, id, 종류)를 커서로 넘긴다.
+- after: 커서보다 오래된 항목 (다음 페이지)
+- before: 커서보다 최근 항목 (이전 페이지)
+
+검색어가 있으면 전문 검색 인덱스(videos.search)로 일치하는 id만 남긴다.
+"""
+import base64
+import binascii
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db.models import CharField, Q, Value
+
+from .models import Image, Video
+from .search import filter_queryset
+
+
+DEFAULT_PAGE_SIZE = 12
+
+MEDIA_MODELS = {
+    'video': Video,
+    'image': Image,
+}
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def encode_cursor(uploaded_at, media_id, media_type):
+    """(업로드 시간, id, 종류) -> URL에 쓸 수 있는 문자열"""
+    micros = (uploaded_at - EPOCH) // timedelta(microseconds=1)
+    raw = f"{micros}:{media_id}:{media_type}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """커서 문자열 -> (업로드 시간, id, 종류), 잘못된 값이면 None"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        micros, media_id, media_type = raw.split(':')
+        if media_type not in MEDIA_MODELS:
+            return None
+        return EPOCH + timedelta(microseconds=int(micros)), int(media_id), media_type
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+def keyset_filter(media_type, cursor, older):
+    """
+    커서보다 오래된(older) / 최근 행 조건
+
+    정렬 키 (uploaded_at, id, 종류)에서 종류는 테이블마다 상수이므로
+    종류 비교를 미리 계산해 인덱스 범위 조건만 남긴다.
+    """
+    uploaded_at, media_id, cursor_type = cursor
+    if older:
+        id_lookup = 'id__lte' if media_type < cursor_type else 'id__lt'
+        return Q(uploaded_at__lt=uploaded_at) | Q(uploaded_at=uploaded_at, **{id_lookup: media_id})
+    id_lookup = 'id__gte' if media_type > cursor_type else 'id__gt'
+    return Q(uploaded_at__gt=uploaded_at) | Q(uploaded_at=uploaded_at, **{id_lookup: media_id})
+
+
+def get_media_keys(tab='all', search='', after=None, before=None, limit=DEFAULT_PAGE_SIZE + 1):
+    """정렬 순서대로 (uploaded_at, id, 종류) 목록 (UNION ALL 한 번)"""
+    media_types = [tab] if tab in MEDIA_MODELS else list(MEDIA_MODELS)
+    cursor = decode_cursor(before) or decode_cursor(after)
+    older = not decode_cursor(before)
+
+    queries = []
+    for media_type in media_types:
+        queryset = MEDIA_MODELS[media_type].objects.all()
+        if search:
+            queryset = filter_queryset(queryset, media_type, search)
+        if cursor:
+            queryset = queryset.filter(keyset_filter(media_type, cursor, older))
+        queries.append(
+            queryset
+            .annotate(media_type=Value(media_type, output_field=CharField()))
+            .values_list('uploaded_at', 'id', 'media_type')
+            .order_by()
+        )
+
+    union = queries[0].union(*queries[1:], all=True) if len(queries) > 1 else queries[0]
+    if older:
+        keys = list(union.order_by('-uploaded_at', '-id', '-media_type')[:limit])
+    else:
+        keys = list(union.order_by('uploaded_at', 'id', 'media_type')[:limit])
+    return keys, older
+
+
+class MediaPage:
+    """키셋 페이지 (items: 정렬된 Video/Image 객체)"""
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    def has_other_pages(self):
+        return bool(self.next_cursor or self.prev_cursor)
+
+
+def get_media_page(tab='all', search='', after=None, before=None, page_size=DEFAULT_PAGE_SIZE):
+    """한 페이지의 Video/Image 객체와 이전/다음 커서"""
+    keys, older = get_media_keys(tab, search, after, before, limit=page_size + 1)
+    has_more = len(keys) > page_size
+    keys = keys[:page_size]
+    if not older:
+        keys.reverse()
+
+    # 페이지에 들어간 행만 종류별로 한 번씩 조회
+    ids = {media_type: [] for media_type in MEDIA_MODELS}
+    for _, media_id, media_type in keys:
+        ids[media_type].append(media_id)
+    objects = {}
+    for media_type, media_ids in ids.items():
+        if media_ids:
+            queryset = MEDIA_MODELS[media_type].objects.filter(id__in=media_ids)
+            objects.update({(media_type, obj.id): obj for obj in queryset})
+
+    items = [objects[(media_type, media_id)] for _, media_id, media_type in keys
+             if (media_type, media_id) in objects]
+
+    next_cursor = prev_cursor = None
+    if keys:
+        first, last = keys[0], keys[-1]
+        # 앞으로 넘길 때는 더 있는지 알 수 있고, 뒤로 넘긴 경우 다음 페이지는 항상 있음
+        if has_more or not older:
+            next_cursor = encode_cursor(*last)
+        if (older and decode_cursor(after)) or (not older and has_more):
+            prev_cursor = encode_cursor(*first)
+    return MediaPage(items, next_cursor, prev_cursor)
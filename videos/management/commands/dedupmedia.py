@@ -0,0 +1,48 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from videos.blobs import acquire_blob
+from videos.models import Image, Video
+from videos.uploads import compute_file_sha256
+
+
+class Command(BaseCommand):
+    help = '원본(blob) 도입 전에 올라온 동영상/이미지를 내용 주소 원본으로 옮기고 중복 파일 제거'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='옮기지 않고 중복만 확인')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        seen = {}
+        moved = duplicates = saved = 0
+
+        for model in (Video, Image):
+            for media in model.objects.filter(blob__isnull=True).exclude(file='').iterator():
+                path = media.file.path
+                if not os.path.isfile(path):
+                    self.stdout.write(self.style.WARNING(f'⚠️  파일 없음: {model.__name__} {media.pk} ({path})'))
+                    continue
+
+                content_hash = media.content_hash or compute_file_sha256(path)
+                size = os.path.getsize(path)
+                if content_hash in seen:
+                    duplicates += 1
+                    saved += size
+                    self.stdout.write(f'♻️  중복: {model.__name__} {media.pk} = {seen[content_hash]}')
+                else:
+                    seen[content_hash] = f'{model.__name__} {media.pk}'
+                if dry_run:
+                    continue
+
+                blob, _ = acquire_blob(content_hash, os.path.basename(path), size, source_path=path)
+                model.objects.filter(pk=media.pk).update(
+                    blob=blob, file=blob.file.name, file_size=blob.size, content_hash=content_hash,
+                )
+                moved += 1
+
+        action = '확인' if dry_run else f'{moved}개 이동'
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ 원본 정리 {action}: 중복 {duplicates}개, {saved / (1024 * 1024):.1f} MB 절약'
+        ))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from videos.retention import run_retention
+
+
+class Command(BaseCommand):
+    help = '파생 결과 정리 (고아 폴더·중단된 작업의 임시 파일 삭제, 디스크 예산을 넘으면 오래 안 쓴 결과 삭제)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='지우지 않고 대상만 확인')
+
+    def handle(self, *args, **options):
+        stats = run_retention(dry_run=options['dry_run'])
+        action = '확인' if options['dry_run'] else '정리'
+        self.stdout.write(self.style.SUCCESS(
+            f"🧹 {action} 완료: 고아 폴더 {stats['orphan_dirs']}개, 임시 파일 {stats['temp_files']}개 "
+            f"({stats['bytes']:,} bytes), 결과 기록 {stats['records']}개, "
+            f"예산 초과 삭제 {stats['evicted']}개 ({stats['evicted_bytes']:,} bytes)"
+        ))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from videos.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = '검색 인덱스 다시 만들기 (신호를 거치지 않고 바뀐 데이터 반영)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='한 번에 저장할 문서 수')
+
+    def handle(self, *args, **options):
+        counts = rebuild_index(batch_size=options['batch_size'])
+        summary = ', '.join(f'{kind} {count}개' for kind, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'🔎 검색 인덱스 재생성 완료: {summary}'))
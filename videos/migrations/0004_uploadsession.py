@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:33
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('videos', '0003_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('media_type', models.CharField(choices=[('video', '동영상'), ('image', '이미지')], default='video', max_length=10, verbose_name='종류')),
+                ('title', models.CharField(max_length=200, verbose_name='제목')),
+                ('description', models.TextField(blank=True, verbose_name='설명')),
+                ('filename', models.CharField(max_length=255, verbose_name='원본 파일명')),
+                ('total_size', models.BigIntegerField(verbose_name='전체 크기')),
+                ('offset', models.BigIntegerField(default=0, verbose_name='받은 크기')),
+                ('checksum', models.CharField(blank=True, max_length=64, verbose_name='SHA-256')),
+                ('status', models.CharField(choices=[('uploading', '업로드 중'), ('completed', '완료'), ('failed', '실패')], default='uploading', max_length=20, verbose_name='상태')),
+                ('error_message', models.TextField(blank=True, verbose_name='오류 메시지')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='생성 시간')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='갱신 시간')),
+                ('image', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='videos.image')),
+                ('video', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='videos.video')),
+            ],
+            options={
+                'verbose_name': '업로드 세션',
+                'verbose_name_plural': '업로드 세션들',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:35
+
+import videos.models
+from django.db import migrations, models
+
+
+def mark_existing_completed(apps, schema_editor):
+    """기존 행은 업로드 때 썸네일까지 만들었으므로 처리 완료로 표시"""
+    apps.get_model('videos', 'Video').objects.update(status='completed')
+    apps.get_model('videos', 'Image').objects.update(status='completed')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('videos', '0004_uploadsession'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='image',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=64, verbose_name='SHA-256'),
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='error_message',
+            field=models.TextField(blank=True, verbose_name='오류 메시지'),
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='ingested_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='처리 완료 시간'),
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='status',
+            field=models.CharField(choices=[('pending', '처리 전'), ('queued', '대기열'), ('processing', '처리 중'), ('completed', '완료'), ('failed', '실패'), ('cancelled', '취소됨')], default='pending', max_length=20, verbose_name='처리 상태'),
+        ),
+        migrations.AddField(
+            model_name='video',
+            name='codec',
+            field=models.CharField(blank=True, max_length=50, verbose_name='코덱'),
+        ),
+        migrations.AddField(
+            model_name='video',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=64, verbose_name='SHA-256'),
+        ),
+        migrations.AddField(
+            model_name='video',
+            name='duration',
+            field=models.FloatField(blank=True, null=True, verbose_name='길이 (초)'),
+        ),
+        migrations.AddField(
+            model_name='video',
+            name='error_message',
+            field=models.TextField(blank=True, verbose_name='오류 메시지'),
+        ),
+        migrations.AddField(
+            model_name='video',
+            name='fps',
+            field=models.FloatField(blank=True, null=True, verbose_name='FPS'),
+        ),
+        migrations.AddField(
+            model_name='video',
+            name='height',
+            field=models.IntegerField(default=0, verbose_name='높이'),
+        ),
+        migrations.AddField(
+            model_name='video',
+            name='ingested_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='처리 완료 시간'),
+        ),
+        migrations.AddField(
+            model_name='video',
+            name='proxy',
+            field=models.FileField(blank=True, null=True, upload_to=videos.models.proxy_upload_path, verbose_name='재생용 프록시'),
+        ),
+        migrations.AddField(
+            model_name='video',
+            name='status',
+            field=models.CharField(choices=[('pending', '처리 전'), ('queued', '대기열'), ('processing', '처리 중'), ('completed', '완료'), ('failed', '실패'), ('cancelled', '취소됨')], default='pending', max_length=20, verbose_name='처리 상태'),
+        ),
+        migrations.AddField(
+            model_name='video',
+            name='width',
+            field=models.IntegerField(default=0, verbose_name='너비'),
+        ),
+        migrations.RunPython(mark_existing_completed, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('videos', '0005_image_content_hash_image_error_message_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='video',
+            name='preview_vtt',
+            field=models.CharField(blank=True, max_length=500, verbose_name='미리보기 VTT 경로'),
+        ),
+    ]
@@ -0,0 +1,117 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:44
+
+from django.db import migrations, models
+
+
+SQLITE_CREATE = [
+    # SearchEntry를 content 테이블로 쓰는 FTS5 인덱스 (2·3글자 접두어 인덱스)
+    """CREATE VIRTUAL TABLE videos_searchentry_fts USING fts5(
+        title, body,
+        content='videos_searchentry', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER videos_searchentry_fts_insert AFTER INSERT ON videos_searchentry BEGIN
+        INSERT INTO videos_searchentry_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END""",
+    """CREATE TRIGGER videos_searchentry_fts_delete AFTER DELETE ON videos_searchentry BEGIN
+        INSERT INTO videos_searchentry_fts(videos_searchentry_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+    END""",
+    """CREATE TRIGGER videos_searchentry_fts_update AFTER UPDATE OF title, body ON videos_searchentry BEGIN
+        INSERT INTO videos_searchentry_fts(videos_searchentry_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO videos_searchentry_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END""",
+]
+
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS videos_searchentry_fts_insert",
+    "DROP TRIGGER IF EXISTS videos_searchentry_fts_delete",
+    "DROP TRIGGER IF EXISTS videos_searchentry_fts_update",
+    "DROP TABLE IF EXISTS videos_searchentry_fts",
+]
+
+POSTGRES_CREATE = [
+    "ALTER TABLE videos_searchentry ADD COLUMN search_vector tsvector",
+    "CREATE INDEX videos_searchentry_vector ON videos_searchentry USING GIN (search_vector)",
+    """CREATE FUNCTION videos_searchentry_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('simple', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(NEW.body, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql""",
+    """CREATE TRIGGER videos_searchentry_vector BEFORE INSERT OR UPDATE OF title, body
+        ON videos_searchentry FOR EACH ROW EXECUTE FUNCTION videos_searchentry_vector_update()""",
+]
+
+POSTGRES_DROP = [
+    "DROP TRIGGER IF EXISTS videos_searchentry_vector ON videos_searchentry",
+    "DROP FUNCTION IF EXISTS videos_searchentry_vector_update()",
+    "DROP INDEX IF EXISTS videos_searchentry_vector",
+    "ALTER TABLE videos_searchentry DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def create_search_index(apps, schema_editor):
+    """DB별 전문 검색 인덱스 (그 밖의 DB는 videos.search가 icontains로 검색)"""
+    statements = {'sqlite': SQLITE_CREATE, 'postgresql': POSTGRES_CREATE}.get(schema_editor.connection.vendor, [])
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    statements = {'sqlite': SQLITE_DROP, 'postgresql': POSTGRES_DROP}.get(schema_editor.connection.vendor, [])
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def index_existing(apps, schema_editor):
+    """기존 동영상/이미지/탐지 색인 (트리거가 FTS 인덱스를 채움)"""
+    SearchEntry = apps.get_model('videos', 'SearchEntry')
+    sources = [
+        ('video', apps.get_model('videos', 'Video')),
+        ('image', apps.get_model('videos', 'Image')),
+        ('detection', apps.get_model('vision_engine', 'Detection')),
+    ]
+    for kind, model in sources:
+        entries = []
+        for obj in model.objects.iterator(chunk_size=500):
+            body = [obj.description or '']
+            if kind == 'detection':
+                body.extend(str(label) for label in (obj.detection_summary or {}))
+            entries.append(SearchEntry(
+                kind=kind, object_id=obj.pk, title=(obj.title or '')[:200],
+                body='\n'.join(part for part in body if part),
+            ))
+        SearchEntry.objects.bulk_create(entries, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('videos', '0007_image_videos_imag_uploade_94934b_idx_and_more'),
+        ('vision_engine', '0008_detection_cache_hits_detection_cache_lookups_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=20, verbose_name='종류')),
+                ('object_id', models.BigIntegerField(verbose_name='객체 ID')),
+                ('title', models.CharField(blank=True, max_length=200, verbose_name='제목')),
+                ('body', models.TextField(blank=True, verbose_name='본문')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='갱신 시간')),
+            ],
+            options={
+                'verbose_name': '검색 문서',
+                'verbose_name_plural': '검색 문서들',
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='videos_searchentry_kind_object')],
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(index_existing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:49
+
+import django.db.models.deletion
+import videos.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('videos', '0008_searchentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64, unique=True, verbose_name='SHA-256')),
+                ('file', models.FileField(max_length=255, upload_to=videos.models.blob_upload_path, verbose_name='파일')),
+                ('size', models.BigIntegerField(default=0, verbose_name='크기')),
+                ('ref_count', models.IntegerField(default=0, verbose_name='참조 수')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='생성 시간')),
+            ],
+            options={
+                'verbose_name': '원본 파일',
+                'verbose_name_plural': '원본 파일들',
+            },
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='images', to='videos.mediablob', verbose_name='원본 파일'),
+        ),
+        migrations.AddField(
+            model_name='video',
+            name='blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='videos', to='videos.mediablob', verbose_name='원본 파일'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:00
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('videos', '0009_mediablob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DerivedArtifact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=500, unique=True, verbose_name='파일 경로')),
+                ('kind', models.CharField(max_length=20, verbose_name='종류')),
+                ('object_id', models.BigIntegerField(verbose_name='객체 ID')),
+                ('size', models.BigIntegerField(default=0, verbose_name='크기')),
+                ('last_accessed_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='마지막 사용 시간')),
+                ('evicted_at', models.DateTimeField(blank=True, null=True, verbose_name='삭제 시간')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='생성 시간')),
+            ],
+            options={
+                'verbose_name': '파생 결과 파일',
+                'verbose_name_plural': '파생 결과 파일들',
+                'indexes': [models.Index(fields=['kind', 'object_id'], name='videos_deri_kind_f7f413_idx'), models.Index(fields=['evicted_at', 'last_accessed_at'], name='videos_deri_evicted_5b77d4_idx')],
+            },
+        ),
+    ]
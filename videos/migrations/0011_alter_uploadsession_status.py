@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('videos', '0010_derivedartifact'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='uploadsession',
+            name='status',
+            field=models.CharField(choices=[('uploading', '업로드 중'), ('finalizing', '마무리 중'), ('completed', '완료'), ('failed', '실패')], default='uploading', max_length=20, verbose_name='상태'),
+        ),
+    ]
@@ -1,6 +1,8 @@
 import re
 import os
+import uuid
 
+from django.conf import settings
 from django.db import models
 from django.utils import timezone
 
@@ -63,6 +65,57 @@ def thumbnail_upload_path(instance, filename):
         new_filename
     )
 
+def proxy_upload_path(instance, filename):
+    """프록시 경로: proxies/YYYY/원본파일명_proxy_MMDDhhmmss.mp4"""
+    now = timezone.now()
+    name, ext = sanitize_filename(filename)
+    new_filename = f"{name}_proxy_{now.strftime('%m%d%H%M%S')}.mp4"
+    
+    return os.path.join(
+        'proxies',
+        str(now.year),
+        new_filename
+    )
+
+def blob_upload_path(instance, filename):
+    """원본 저장 경로: blobs/<해시 앞 2자리>/<SHA-256>.확장자 (같은 내용이면 같은 경로)"""
+    _, ext = sanitize_filename(filename)
+    return os.path.join(
+        'blobs',
+        instance.content_hash[:2],
+        f"{instance.content_hash}{ext}"
+    )
+
+class MediaBlob(models.Model):
+    """
+    내용 주소 원본 파일 (videos.blobs)
+
+    같은 파일을 여러 번 올려도 한 번만 저장하고 Video/Image가 공유한다.
+    ref_count가 0이 되면 파일과 행을 지운다.
+    """
+    content_hash = models.CharField(max_length=64, unique=True, verbose_name='SHA-256')
+    file = models.FileField(upload_to=blob_upload_path, max_length=255, verbose_name='파일')
+    size = models.BigIntegerField(default=0, verbose_name='크기')
+    ref_count = models.IntegerField(default=0, verbose_name='참조 수')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='생성 시간')
+
+    class Meta:
+        verbose_name = '원본 파일'
+        verbose_name_plural = '원본 파일들'
+
+    def __str__(self):
+        return f"{self.content_hash[:12]} ({self.ref_count})"
+
+# 업로드 후 처리(videos.ingest) 상태
+INGEST_STATUS_CHOICES = [
+    ('pending', '처리 전'),
+    ('queued', '대기열'),
+    ('processing', '처리 중'),
+    ('completed', '완료'),
+    ('failed', '실패'),
+    ('cancelled', '취소됨'),
+]
+
 class Video(models.Model):
     title = models.CharField(max_length=200, verbose_name='제목')
     description = models.TextField(blank=True, verbose_name='설명')
@@ -78,11 +131,37 @@ class Video(models.Model):
     )
     file_size = models.BigIntegerField(default=0, verbose_name='파일 크기')
     uploaded_at = models.DateTimeField(auto_now_add=True, verbose_name='업로드 시간')
+    # 공유 원본 (file은 blob.file과 같은 경로, 이전에 올린 행은 비어 있음)
+    blob = models.ForeignKey(
+        MediaBlob,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='videos',
+        verbose_name='원본 파일'
+    )
+
+    # 업로드 후 처리 결과 (videos.ingest)
+    status = models.CharField(max_length=20, choices=INGEST_STATUS_CHOICES, default='pending', verbose_name='처리 상태')
+    error_message = models.TextField(blank=True, verbose_name='오류 메시지')
+    duration = models.FloatField(null=True, blank=True, verbose_name='길이 (초)')
+    width = models.IntegerField(default=0, verbose_name='너비')
+    height = models.IntegerField(default=0, verbose_name='높이')
+    fps = models.FloatField(null=True, blank=True, verbose_name='FPS')
+    codec = models.CharField(max_length=50, blank=True, verbose_name='코덱')
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True, verbose_name='SHA-256')
+    proxy = models.FileField(upload_to=proxy_upload_path, blank=True, null=True, verbose_name='재생용 프록시')
+    preview_vtt = models.CharField(max_length=500, blank=True, verbose_name='미리보기 VTT 경로')
+    ingested_at = models.DateTimeField(null=True, blank=True, verbose_name='처리 완료 시간')
     
     class Meta:
         verbose_name = '동영상'
         verbose_name_plural = '동영상들'
         ordering = ['-uploaded_at']
+        indexes = [
+            # 미디어 목록 키셋 페이지네이션 (videos.listing)
+            models.Index(fields=['uploaded_at', 'id']),
+        ]
     
     def __str__(self):
         return self.title
@@ -95,6 +174,28 @@ class Video(models.Model):
                 return f"{size:.2f} {unit}"
             size /= 1024.0
         return f"{size:.2f} PB"
+
+    def get_preview_vtt_url(self):
+        """스프라이트 미리보기 VTT URL (없으면 빈 문자열)"""
+        if not self.preview_vtt:
+            return ''
+        return f"{settings.MEDIA_URL}{self.preview_vtt}"
+
+    def get_duration_display(self):
+        """길이 표시 (h:mm:ss)"""
+        if self.duration is None:
+            return "-"
+        minutes, seconds = divmod(int(round(self.duration)), 60)
+        hours, minutes = divmod(minutes, 60)
+        if hours:
+            return f"{hours}:{minutes:02d}:{seconds:02d}"
+        return f"{minutes}:{seconds:02d}"
+
+    def get_resolution_display(self):
+        """해상도 표시"""
+        if self.width and self.height:
+            return f"{self.width} × {self.height}"
+        return "-"
     
 class Image(models.Model):
     """이미지 모델"""
@@ -108,11 +209,30 @@ class Image(models.Model):
     width = models.IntegerField(default=0, verbose_name='너비')
     height = models.IntegerField(default=0, verbose_name='높이')
     uploaded_at = models.DateTimeField(auto_now_add=True, verbose_name='업로드 시간')
+    # 공유 원본 (file은 blob.file과 같은 경로, 이전에 올린 행은 비어 있음)
+    blob = models.ForeignKey(
+        MediaBlob,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='images',
+        verbose_name='원본 파일'
+    )
+
+    # 업로드 후 처리 결과 (videos.ingest)
+    status = models.CharField(max_length=20, choices=INGEST_STATUS_CHOICES, default='pending', verbose_name='처리 상태')
+    error_message = models.TextField(blank=True, verbose_name='오류 메시지')
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True, verbose_name='SHA-256')
+    ingested_at = models.DateTimeField(null=True, blank=True, verbose_name='처리 완료 시간')
     
     class Meta:
         verbose_name = '이미지'
         verbose_name_plural = '이미지들'
         ordering = ['-uploaded_at']
+        indexes = [
+            # 미디어 목록 키셋 페이지네이션 (videos.listing)
+            models.Index(fields=['uploaded_at', 'id']),
+        ]
     
     def __str__(self):
         return self.title
@@ -130,4 +250,102 @@ class Image(models.Model):
         """해상도 표시"""
         if self.width and self.height:
             return f"{self.width} × {self.height}"
-        return "-"
\ No newline at end of file
+        return "-"
+
+class UploadSession(models.Model):
+    """이어받기 가능한 분할 업로드 (videos.uploads)"""
+    MEDIA_TYPE_CHOICES = [
+        ('video', '동영상'),
+        ('image', '이미지'),
+    ]
+    STATUS_CHOICES = [
+        ('uploading', '업로드 중'),
+        ('finalizing', '마무리 중'),
+        ('completed', '완료'),
+        ('failed', '실패'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    media_type = models.CharField(max_length=10, choices=MEDIA_TYPE_CHOICES, default='video', verbose_name='종류')
+    title = models.CharField(max_length=200, verbose_name='제목')
+    description = models.TextField(blank=True, verbose_name='설명')
+    filename = models.CharField(max_length=255, verbose_name='원본 파일명')
+    total_size = models.BigIntegerField(verbose_name='전체 크기')
+    offset = models.BigIntegerField(default=0, verbose_name='받은 크기')
+    checksum = models.CharField(max_length=64, blank=True, verbose_name='SHA-256')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='uploading', verbose_name='상태')
+    error_message = models.TextField(blank=True, verbose_name='오류 메시지')
+    video = models.ForeignKey(Video, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    image = models.ForeignKey(Image, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='생성 시간')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='갱신 시간')
+
+    class Meta:
+        verbose_name = '업로드 세션'
+        verbose_name_plural = '업로드 세션들'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.total_size})"
+
+    def get_temp_path(self):
+        """받는 중인 파일 경로 (MEDIA_ROOT/uploads/tmp/<id>.part)"""
+        return os.path.join(settings.MEDIA_ROOT, 'uploads', 'tmp', f'{self.id.hex}.part')
+
+    def get_progress(self):
+        if not self.total_size:
+            return 100
+        return int(self.offset * 100 / self.total_size)
+
+class SearchEntry(models.Model):
+    """
+    전문 검색 문서 (videos.search)
+
+    동영상/이미지/탐지마다 한 행. 실제 검색은 이 테이블에 붙은 FTS 인덱스
+    (SQLite: FTS5 가상 테이블, PostgreSQL: tsvector + GIN)로 하고,
+    인덱스는 마이그레이션에서 만든 트리거가 이 테이블과 맞춰 준다.
+    (SQLite는 테이블을 다시 만드는 필드 변경 시 트리거가 사라지므로 0008과 같이 다시 만들 것)
+    """
+    kind = models.CharField(max_length=20, verbose_name='종류')
+    object_id = models.BigIntegerField(verbose_name='객체 ID')
+    title = models.CharField(max_length=200, blank=True, verbose_name='제목')
+    body = models.TextField(blank=True, verbose_name='본문')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='갱신 시간')
+
+    class Meta:
+        verbose_name = '검색 문서'
+        verbose_name_plural = '검색 문서들'
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='videos_searchentry_kind_object'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id} {self.title}"
+
+
+class DerivedArtifact(models.Model):
+    """
+    다시 만들 수 있는 파생 결과 파일 (videos.retention)
+
+    분석/탐지 결과처럼 입력에서 다시 만들 수 있는 파일의 크기와 마지막 사용 시간.
+    디스크 예산을 넘으면 오래 안 쓴 것부터 파일만 지우고 (evicted_at 기록)
+    다음에 필요할 때 원래 작업을 다시 실행해서 만든다.
+    """
+    name = models.CharField(max_length=500, unique=True, verbose_name='파일 경로')
+    kind = models.CharField(max_length=20, verbose_name='종류')
+    object_id = models.BigIntegerField(verbose_name='객체 ID')
+    size = models.BigIntegerField(default=0, verbose_name='크기')
+    last_accessed_at = models.DateTimeField(default=timezone.now, verbose_name='마지막 사용 시간')
+    evicted_at = models.DateTimeField(null=True, blank=True, verbose_name='삭제 시간')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='생성 시간')
+
+    class Meta:
+        verbose_name = '파생 결과 파일'
+        verbose_name_plural = '파생 결과 파일들'
+        indexes = [
+            models.Index(fields=['kind', 'object_id']),
+            models.Index(fields=['evicted_at', 'last_accessed_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id} {self.name}"
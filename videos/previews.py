@@ -0,0 +1,150 @@
+"""
+동영상 미리보기 (포스터 + 스프라이트 시트 + WebVTT 썸네일 트랙)
+
+ffmpeg 한 번 실행으로 키프레임만 디코딩해서(-skip_frame nokey) 만든다.
+전체 프레임을 디코딩하지 않으므로 긴 영상도 빠르다.
+
+- 키프레임 중 VIDEO_SPRITE_INTERVAL 초 이상 떨어진 것만 고름 (select)
+- showinfo 로그에서 고른 프레임의 실제 시간을 읽어 VTT 구간을 만듦
+- 포스터: 고른 프레임 중 가장 대표적인 것 (thumbnail 필터, 첫 프레임이 검은 화면인 문제 방지)
+- 스프라이트: 작은 타일을 COLUMNS x ROWS 시트로 묶음 (sprite_000.jpg, ...)
+
+결과: MEDIA_ROOT/previews/videos/<id>/{poster.jpg, sprite_NNN.jpg, thumbnails.vtt}
+VTT의 이미지 경로는 상대 경로이므로 VTT와 같은 디렉토리 URL로 내려준다.
+"""
+import os
+import re
+import shutil
+
+from django.conf import settings
+
+from jobs.cancel import run_process
+
+
+# 타일 간격 (초, 키프레임이 더 드물면 키프레임 간격) / 타일 너비 / 시트 한 장의 열·행 수
+DEFAULT_SPRITE_INTERVAL = 10
+DEFAULT_SPRITE_TILE_WIDTH = 160
+DEFAULT_SPRITE_COLUMNS = 10
+DEFAULT_SPRITE_ROWS = 10
+
+# 포스터 너비 / 포스터를 고를 때 비교할 키프레임 수
+POSTER_WIDTH = 640
+POSTER_CANDIDATES = 50
+
+VTT_NAME = 'thumbnails.vtt'
+POSTER_NAME = 'poster.jpg'
+SPRITE_PATTERN = 'sprite_%03d.jpg'
+
+SHOWINFO_RE = re.compile(r'Parsed_showinfo.*\bpts_time:\s*(-?[\d.]+)')
+
+
+def get_preview_dir(video_id):
+    return os.path.join(settings.MEDIA_ROOT, 'previews', 'videos', str(video_id))
+
+
+def get_tile_size(width, height, tile_width=DEFAULT_SPRITE_TILE_WIDTH):
+    """원본 비율을 유지한 타일 크기 (짝수)"""
+    if not width or not height:
+        return tile_width, tile_width * 9 // 16 // 2 * 2
+    return tile_width, max(2, round(tile_width * height / width / 2) * 2)
+
+
+def build_preview_command(path, out_dir, tile_size, interval, columns, rows):
+    tile_width, tile_height = tile_size
+    graph = (
+        f"[0:v]select='isnan(prev_selected_t)+gte(t-prev_selected_t,{interval})',showinfo,split=2[p][s];"
+        f"[p]thumbnail={POSTER_CANDIDATES},scale={POSTER_WIDTH}:-2[poster];"
+        f"[s]scale={tile_width}:{tile_height},tile={columns}x{rows}[sprite]"
+    )
+    return [
+        'ffmpeg', '-hide_banner', '-nostats', '-y',
+        '-skip_frame', 'nokey',
+        '-i', path,
+        '-filter_complex', graph,
+        '-map', '[poster]', '-frames:v', '1', '-q:v', '3', '-fps_mode', 'vfr',
+        os.path.join(out_dir, POSTER_NAME),
+        '-map', '[sprite]', '-q:v', '5', '-fps_mode', 'vfr', '-start_number', '0',
+        os.path.join(out_dir, SPRITE_PATTERN),
+    ]
+
+
+def parse_showinfo_times(stderr):
+    """showinfo 로그 -> 고른 프레임 시간 목록 (첫 프레임 기준 0초)"""
+    times = [float(match.group(1)) for match in SHOWINFO_RE.finditer(stderr)]
+    if not times:
+        return []
+    start = times[0]
+    return [max(0.0, t - start) for t in times]
+
+
+def format_vtt_time(seconds):
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3_600_000)
+    minutes, milliseconds = divmod(milliseconds, 60_000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{milliseconds:03d}"
+
+
+def build_vtt(times, duration, tile_size, columns, rows, interval):
+    """프레임 시간 목록 -> WebVTT (구간마다 시트 이름#xywh=x,y,w,h)"""
+    tile_width, tile_height = tile_size
+    per_sheet = columns * rows
+    lines = ['WEBVTT', '']
+    for index, start in enumerate(times):
+        if index + 1 < len(times):
+            end = times[index + 1]
+        else:
+            end = duration if duration and duration > start else start + interval
+        if end <= start:
+            continue
+
+        sheet, position = divmod(index, per_sheet)
+        row, column = divmod(position, columns)
+        lines.append(f"{format_vtt_time(start)} --> {format_vtt_time(end)}")
+        lines.append(f"{SPRITE_PATTERN % sheet}#xywh={column * tile_width},{row * tile_height},{tile_width},{tile_height}")
+        lines.append('')
+    return '\n'.join(lines)
+
+
+def generate_video_previews(video_id, path, width=0, height=0, duration=None, cancel_check=None):
+    """
+    포스터/스프라이트/VTT 생성
+
+    반환: {'poster': 포스터 파일 경로, 'vtt': MEDIA_ROOT 기준 VTT 상대 경로, 'tiles': 타일 수}
+    """
+    interval = getattr(settings, 'VIDEO_SPRITE_INTERVAL', DEFAULT_SPRITE_INTERVAL)
+    columns = getattr(settings, 'VIDEO_SPRITE_COLUMNS', DEFAULT_SPRITE_COLUMNS)
+    rows = getattr(settings, 'VIDEO_SPRITE_ROWS', DEFAULT_SPRITE_ROWS)
+    tile_size = get_tile_size(width, height, getattr(settings, 'VIDEO_SPRITE_TILE_WIDTH', DEFAULT_SPRITE_TILE_WIDTH))
+
+    # 임시 디렉토리에 만들고 성공하면 교체 (이전 결과를 보던 화면이 깨지지 않게)
+    out_dir = get_preview_dir(video_id)
+    temp_dir = f"{out_dir}.tmp"
+    shutil.rmtree(temp_dir, ignore_errors=True)
+    os.makedirs(temp_dir)
+
+    try:
+        cmd = build_preview_command(path, temp_dir, tile_size, interval, columns, rows)
+        result = run_process(cmd, cancel_check=cancel_check)
+        if result.returncode != 0:
+            raise RuntimeError(f"미리보기 생성 실패: {result.stderr[-500:]}")
+
+        times = parse_showinfo_times(result.stderr)
+        if not times or not os.path.exists(os.path.join(temp_dir, POSTER_NAME)):
+            raise RuntimeError("키프레임을 찾지 못했습니다")
+
+        with open(os.path.join(temp_dir, VTT_NAME), 'w', encoding='utf-8') as f:
+            f.write(build_vtt(times, duration, tile_size, columns, rows, interval))
+
+        shutil.rmtree(out_dir, ignore_errors=True)
+        os.replace(temp_dir, out_dir)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    sheets = -(-len(times) // (columns * rows))
+    print(f"🎞️  미리보기 생성: 키프레임 {len(times)}개, 스프라이트 {sheets}장 ({tile_size[0]}x{tile_size[1]})")
+    return {
+        'poster': os.path.join(out_dir, POSTER_NAME),
+        'vtt': os.path.relpath(os.path.join(out_dir, VTT_NAME), settings.MEDIA_ROOT).replace('\\', '/'),
+        'tiles': len(times),
+    }
@@ -0,0 +1,442 @@
+"""
+파생 결과 보존 / 정리 (디스크 예산, 오래 안 쓴 결과 삭제, 고아·임시 파일 정리)
+
+분석 결과(analysis_results/<id>/)와 탐지 결과(detection_results/<id>/)는 입력과 설정
+(전처리 파이프라인, 모델)에서 언제든 다시 만들 수 있다. 결과 파일마다 DerivedArtifact
+한 행(크기, 마지막 사용 시간)을 두고:
+
+- 작업이 끝나면 register_artifact, 결과를 내려주거나 입력으로 쓰면 touch_artifact
+- 예산(MEDIA_DERIVED_BUDGET, MEDIA_MIN_FREE_SPACE)을 넘으면 오래 안 쓴 결과부터 파일만 삭제
+  (실행 중인 작업의 결과/입력, MEDIA_EVICTION_MIN_IDLE 안에 쓴 결과는 제외)
+- 삭제된 결과가 다시 필요하면 웹 요청은 원래 작업을 대기열에 넣고 (serve_artifact),
+  작업자는 그 자리에서 별도 Job으로 다시 만든다 (restore_artifact, 탐지 입력인 전처리 결과)
+- 분석/탐지/동영상/이미지 행이 지워지면 (동영상 삭제로 함께 지워진 분석 포함) 파일도 삭제
+- 주기 정리 (runworker가 MEDIA_RETENTION_INTERVAL마다, 또는 manage.py prunemedia):
+  행이 없는 객체 폴더, 중단된 작업이 남긴 임시 파일 (temp_*.mp4, *.part, *.tmp, chunks/),
+  신호를 거치지 않고 완료된 결과 기록
+"""
+import os
+import shutil
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.signals import post_delete
+from django.http import Http404, HttpResponse
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from jobs.models import Job
+from .models import DerivedArtifact
+from .storage import delete_media, delete_media_prefix, get_media_store, media_name
+from .streaming import serve_media
+
+
+# 정리 주기 / 임시 파일을 중단된 작업의 잔여물로 볼 나이 / 최근 쓴 결과를 지우지 않는 시간 (초)
+DEFAULT_RETENTION_INTERVAL = 600
+DEFAULT_TEMP_MAX_AGE = 6 * 60 * 60
+DEFAULT_EVICTION_MIN_IDLE = 60 * 60
+
+# 마지막 사용 시간 기록 간격 (초, 같은 파일의 Range 요청마다 쓰지 않게)
+TOUCH_INTERVAL = 60
+TOUCH_CACHE_SIZE = 10000
+
+# 결과를 다시 만드는 동안 브라우저가 다시 요청할 때까지 기다릴 시간 (초)
+REBUILD_RETRY_AFTER = 30
+
+# 다시 만들 수 있는 결과: 종류(= 다시 만드는 작업 종류) -> (모델, 결과 폴더, 작업 등록 함수)
+ARTIFACT_SOURCES = {
+    'analysis': ('analysis.Analysis', 'analysis_results', 'analysis.tasks.start_analysis_task'),
+    'detection': ('vision_engine.Detection', 'detection_results', 'vision_engine.tasks.start_rebuild_task'),
+}
+
+# 객체별 폴더 (<폴더>/<id>/, 행이 지워지면 삭제) -> (모델, 그 폴더에 쓰는 작업 종류)
+OBJECT_DIRS = {
+    'analysis_results': ('analysis.Analysis', ('analysis', 'sweep')),
+    'detection_results': ('vision_engine.Detection', ('detection', 'fused', 'multi', 'chunked')),
+    'previews/videos': ('videos.Video', ('video_ingest',)),
+    'thumbnails/images': ('videos.Image', ('image_ingest',)),
+}
+
+# 중단된 작업이 남기는 임시 파일 / 디렉토리
+TEMP_FILE_PREFIXES = ('temp_',)
+TEMP_FILE_SUFFIXES = ('.part',)
+TEMP_DIR_SUFFIXES = ('.tmp',)
+TEMP_DIR_NAMES = ('chunks',)
+
+# 정리하지 않는 최상위 폴더 (분할 업로드 임시 파일은 videos.uploads가 만료 시간으로 정리)
+SKIP_DIRS = ('uploads',)
+
+BUSY_STATUSES = ('queued', 'processing')
+ACTIVE_JOB_STATUSES = ('queued', 'running')
+
+_touched = {}
+
+
+# ===== 기록 =====
+
+def is_artifact_name(kind, name):
+    """결과 폴더 안의 파일인지 (전처리를 생략해 원본을 그대로 쓰는 분석은 제외)"""
+    return bool(name) and name.startswith(f"{ARTIFACT_SOURCES[kind][1]}/")
+
+
+def register_artifact(kind, object_id, name, keep_mtime=False):
+    """
+    작업이 만든 결과 파일 기록 (다시 만든 결과면 삭제 표시 해제)
+
+    keep_mtime: 기존 파일을 처음 기록할 때 수정 시간을 마지막 사용 시간으로
+    """
+    if not is_artifact_name(kind, name):
+        return None
+    stat = get_media_store().stat(name)
+    if stat is None:
+        return None
+    size, mtime = stat
+    accessed_at = datetime.fromtimestamp(mtime, tz=dt_timezone.utc) if keep_mtime else timezone.now()
+
+    DerivedArtifact.objects.filter(kind=kind, object_id=object_id).exclude(name=name).delete()
+    artifact, _ = DerivedArtifact.objects.update_or_create(
+        name=name,
+        defaults={
+            'kind': kind, 'object_id': object_id, 'size': size,
+            'last_accessed_at': accessed_at, 'evicted_at': None,
+        },
+    )
+    return artifact
+
+
+def touch_artifact(name):
+    """결과 파일 사용 기록 (프로세스마다 TOUCH_INTERVAL에 한 번만 UPDATE)"""
+    now = time.monotonic()
+    if not name or now - _touched.get(name, -TOUCH_INTERVAL) < TOUCH_INTERVAL:
+        return
+    if len(_touched) >= TOUCH_CACHE_SIZE:
+        _touched.clear()
+    _touched[name] = now
+    DerivedArtifact.objects.filter(name=name).update(last_accessed_at=timezone.now())
+
+
+# ===== 다시 만들기 =====
+
+def request_rebuild(kind, obj):
+    """
+    결과 파일이 없을 때 원래 작업을 다시 대기열에 넣음
+
+    반환: 다시 만드는 중이면 True, 다시 만들 수 없는 결과면 False
+    """
+    name = obj.output_video_path
+    if not is_artifact_name(kind, name):
+        return False
+    if obj.status in BUSY_STATUSES:
+        return True
+    if obj.status != 'completed':
+        return False
+
+    DerivedArtifact.objects.filter(name=name, evicted_at__isnull=True).update(evicted_at=timezone.now())
+    print(f"♻️  삭제된 결과 다시 만들기: {kind} {obj.pk} ({name})")
+    import_string(ARTIFACT_SOURCES[kind][2])(obj.pk)
+    return True
+
+
+def restore_artifact(kind, object_id, name):
+    """
+    작업자에서 삭제된 결과를 바로 다시 만듦 (다른 작업의 입력으로 쓸 때)
+
+    기록이 있는데 파일이 없으면 같은 종류의 작업을 별도 Job으로 그 자리에서 실행한다
+    (jobs.queue.run_nested, 진행률/상태는 다시 만드는 작업의 Job 행에 기록).
+    기록이 없는 파일은 건드리지 않는다 (호출한 쪽에서 파일 없음 처리).
+    """
+    from jobs.queue import run_nested
+
+    if not is_artifact_name(kind, name) or get_media_store().exists(name):
+        return False
+    if not DerivedArtifact.objects.filter(name=name).exists():
+        return False
+
+    print(f"♻️  삭제된 입력 다시 만들기: {kind} {object_id} ({name})")
+    if not run_nested(kind, object_id):
+        raise RuntimeError(f"삭제된 결과를 다시 만들지 못했습니다: {name}")
+    return True
+
+
+def serve_artifact(request, kind, obj, content_type=None, not_found_message='파일을 찾을 수 없습니다.'):
+    """
+    결과 파일 응답 (사용 시간 기록)
+
+    파일이 없으면 (예산 초과로 삭제됐거나 사라진 경우) 원래 작업을 다시 대기열에 넣고
+    503 + Retry-After로 응답한다. 작업 상태는 기존 진행률 화면에서 볼 수 있다.
+    """
+    name = obj.output_video_path
+    try:
+        response = serve_media(request, name, content_type, not_found_message)
+    except Http404:
+        if not request_rebuild(kind, obj):
+            raise
+        response = HttpResponse(
+            '결과 파일을 다시 만드는 중입니다. 잠시 후 다시 시도하세요.',
+            status=503, content_type='text/plain; charset=utf-8',
+        )
+        response['Retry-After'] = str(REBUILD_RETRY_AFTER)
+        return response
+    touch_artifact(name)
+    return response
+
+
+# ===== 예산 =====
+
+def get_eviction_target():
+    """예산을 맞추려면 비워야 하는 바이트 수 (0 이하면 예산 안)"""
+    need = 0
+    budget = getattr(settings, 'MEDIA_DERIVED_BUDGET', None)
+    if budget is not None:
+        total = DerivedArtifact.objects.filter(evicted_at__isnull=True).aggregate(total=Sum('size'))['total'] or 0
+        need = max(need, total - budget)
+    min_free = getattr(settings, 'MEDIA_MIN_FREE_SPACE', None)
+    if min_free is not None:
+        need = max(need, min_free - shutil.disk_usage(settings.MEDIA_ROOT).free)
+    return need
+
+
+def _is_in_use(kind, obj):
+    """실행 중인 작업의 결과이거나 입력 (전처리 결과를 입력으로 쓰는 탐지)"""
+    if obj.status in BUSY_STATUSES:
+        return True
+    return kind == 'analysis' and obj.detections.filter(status__in=BUSY_STATUSES).exists()
+
+
+def evict_artifacts(dry_run=False):
+    """
+    예산을 넘으면 오래 안 쓴 결과부터 파일 삭제 (행과 설정은 남겨서 다시 만들 수 있게)
+
+    반환: (삭제한 파일 수, 바이트)
+    """
+    need = get_eviction_target()
+    if need <= 0:
+        return 0, 0
+
+    min_idle = getattr(settings, 'MEDIA_EVICTION_MIN_IDLE', DEFAULT_EVICTION_MIN_IDLE)
+    candidates = (
+        DerivedArtifact.objects
+        .filter(evicted_at__isnull=True, last_accessed_at__lt=timezone.now() - timedelta(seconds=min_idle))
+        .order_by('last_accessed_at')
+    )
+
+    count = freed = 0
+    for artifact in candidates.iterator():
+        if freed >= need:
+            break
+        model = apps.get_model(ARTIFACT_SOURCES[artifact.kind][0])
+        obj = model.objects.filter(pk=artifact.object_id).first()
+        # 행이 없거나 경로가 바뀐 기록은 sweep_orphans가 정리
+        if obj is None or obj.output_video_path != artifact.name or _is_in_use(artifact.kind, obj):
+            continue
+        if not dry_run:
+            # 다른 워커가 먼저 지웠으면 건너뜀
+            if not DerivedArtifact.objects.filter(pk=artifact.pk, evicted_at__isnull=True).update(
+                evicted_at=timezone.now()
+            ):
+                continue
+            delete_media(artifact.name)
+        count += 1
+        freed += artifact.size
+
+    if count:
+        print(f"🧹 디스크 예산 초과: 오래 안 쓴 결과 {count}개 삭제 ({freed:,} bytes)")
+    return count, freed
+
+
+# ===== 고아 / 임시 파일 =====
+
+def _get_owner(name):
+    """MEDIA_ROOT 기준 경로 -> (객체 폴더, 객체 ID), 객체 폴더 밖이면 None"""
+    for root in OBJECT_DIRS:
+        if name.startswith(f"{root}/"):
+            object_id = name[len(root) + 1:].split('/', 1)[0]
+            if object_id.isdigit():
+                return root, int(object_id)
+    return None
+
+
+def _has_active_job(root, object_ids):
+    """object_ids 중 객체 폴더에 쓰는 작업이 대기/실행 중인 ID 집합"""
+    return set(
+        Job.objects
+        .filter(kind__in=OBJECT_DIRS[root][1], object_id__in=object_ids, status__in=ACTIVE_JOB_STATUSES)
+        .values_list('object_id', flat=True)
+    )
+
+
+def _get_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, filename))
+            except OSError:
+                pass
+    return total
+
+
+def _get_newest_mtime(path):
+    newest = os.path.getmtime(path)
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                newest = max(newest, os.path.getmtime(os.path.join(dirpath, filename)))
+            except OSError:
+                pass
+    return newest
+
+
+def _is_abandoned(path, deadline):
+    """임시 파일이 deadline 이후 갱신되지 않았고 쓰는 작업도 없는지"""
+    try:
+        if _get_newest_mtime(path) >= deadline:
+            return False
+    except OSError:
+        return False
+    owner = _get_owner(media_name(path))
+    return owner is None or not _has_active_job(owner[0], [owner[1]])
+
+
+def _remove_local(path, dry_run):
+    size = _get_size(path)
+    if not dry_run:
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+    print(f"🧹 임시 파일 정리: {media_name(path)} ({size:,} bytes)")
+    return size
+
+
+def sweep_orphans(dry_run=False):
+    """
+    행이 없는 객체 폴더, 중단된 작업의 임시 파일, 어긋난 결과 기록 정리
+
+    반환: {'orphan_dirs': 개수, 'temp_files': 개수, 'records': 개수, 'bytes': 지운 로컬 바이트}
+    """
+    stats = {'orphan_dirs': 0, 'temp_files': 0, 'records': 0, 'bytes': 0}
+    store = get_media_store()
+
+    # 1) 행이 없는 객체 폴더 (이 노드의 MEDIA_ROOT + 원격 저장소)
+    for root, (model_label, _) in OBJECT_DIRS.items():
+        model = apps.get_model(model_label)
+        local_root = os.path.join(settings.MEDIA_ROOT, root)
+        names = set(os.listdir(local_root)) if os.path.isdir(local_root) else set()
+        if not store.is_local:
+            names.update(store.listdirs(root))
+        object_ids = {int(name) for name in names if name.isdigit()}
+        if not object_ids:
+            continue
+        alive = set(model.objects.filter(pk__in=object_ids).values_list('pk', flat=True))
+        orphans = object_ids - alive
+        orphans -= _has_active_job(root, orphans) if orphans else set()
+        for object_id in sorted(orphans):
+            prefix = f"{root}/{object_id}"
+            stats['bytes'] += _get_size(os.path.join(local_root, str(object_id)))
+            stats['orphan_dirs'] += 1
+            if not dry_run:
+                delete_media_prefix(prefix)
+            print(f"🧹 고아 폴더 정리: {prefix}")
+
+    # 2) 중단된 작업의 임시 파일 (이 노드의 MEDIA_ROOT)
+    deadline = time.time() - getattr(settings, 'MEDIA_TEMP_MAX_AGE', DEFAULT_TEMP_MAX_AGE)
+    media_root = os.path.abspath(settings.MEDIA_ROOT)
+    for dirpath, dirnames, filenames in os.walk(media_root):
+        if dirpath == media_root:
+            dirnames[:] = [name for name in dirnames if name not in SKIP_DIRS]
+        for dirname in list(dirnames):
+            if not (dirname.endswith(TEMP_DIR_SUFFIXES) or dirname in TEMP_DIR_NAMES):
+                continue
+            dirnames.remove(dirname)
+            path = os.path.join(dirpath, dirname)
+            if _is_abandoned(path, deadline):
+                stats['bytes'] += _remove_local(path, dry_run)
+                stats['temp_files'] += 1
+        for filename in filenames:
+            if not (filename.startswith(TEMP_FILE_PREFIXES) or filename.endswith(TEMP_FILE_SUFFIXES)):
+                continue
+            path = os.path.join(dirpath, filename)
+            if _is_abandoned(path, deadline):
+                stats['bytes'] += _remove_local(path, dry_run)
+                stats['temp_files'] += 1
+
+    # 3) 결과 기록을 행과 맞춤
+    for kind, (model_label, root, _) in ARTIFACT_SOURCES.items():
+        model = apps.get_model(model_label)
+        stale = (
+            DerivedArtifact.objects.filter(kind=kind)
+            .exclude(object_id__in=model.objects.values('pk'))
+        )
+        stats['records'] += stale.count() if dry_run else stale.delete()[0]
+
+        # 신호를 거치지 않고 완료된 결과 (스윕, 전처리 + 탐지의 전처리 결과)와 이전 데이터
+        unrecorded = (
+            model.objects
+            .filter(status='completed', output_video_path__startswith=f"{root}/")
+            .exclude(output_video_path__in=DerivedArtifact.objects.filter(kind=kind).values('name'))
+            .values_list('pk', 'output_video_path')
+        )
+        for object_id, name in unrecorded.iterator():
+            if dry_run:
+                stats['records'] += int(get_media_store().exists(name))
+            elif register_artifact(kind, object_id, name, keep_mtime=True):
+                stats['records'] += 1
+
+    return stats
+
+
+def run_retention(dry_run=False):
+    """주기 정리 한 번 (고아·임시 파일 정리 후 디스크 예산 맞추기)"""
+    stats = sweep_orphans(dry_run=dry_run)
+    stats['evicted'], stats['evicted_bytes'] = evict_artifacts(dry_run=dry_run)
+    return stats
+
+
+# ===== 삭제 신호 =====
+
+def _make_dir_delete_handler(root):
+    def handler(sender, instance, **kwargs):
+        prefix = f"{root}/{instance.pk}"
+        transaction.on_commit(lambda: delete_media_prefix(prefix))
+    return handler
+
+
+def _make_record_delete_handler(kind):
+    def handler(sender, instance, **kwargs):
+        DerivedArtifact.objects.filter(kind=kind, object_id=instance.pk).delete()
+    return handler
+
+
+def _delete_media_files(sender, instance, **kwargs):
+    """동영상/이미지 행 삭제 시 썸네일, 프록시, 원본 (blob 공유 원본은 videos.blobs가 참조 수를 보고 지움)"""
+    names = [
+        getattr(instance, field).name
+        for field in ('thumbnail', 'proxy')
+        if getattr(instance, field, None)
+    ]
+    if not instance.blob_id and instance.file:
+        names.append(instance.file.name)
+    if names:
+        transaction.on_commit(lambda: [delete_media(name) for name in names])
+
+
+def connect_signals():
+    for root, (model_label, _) in OBJECT_DIRS.items():
+        post_delete.connect(_make_dir_delete_handler(root), sender=apps.get_model(model_label),
+                            weak=False, dispatch_uid=f'retention_dir_{root}')
+    for kind, (model_label, _, _) in ARTIFACT_SOURCES.items():
+        post_delete.connect(_make_record_delete_handler(kind), sender=apps.get_model(model_label),
+                            weak=False, dispatch_uid=f'retention_record_{kind}')
+    for model_label in ('videos.Video', 'videos.Image'):
+        post_delete.connect(_delete_media_files, sender=apps.get_model(model_label),
+                            dispatch_uid=f'retention_files_{model_label}')
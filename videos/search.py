@@ -0,0 +1,224 @@
+"""
+전문 검색 (동영상/이미지 제목·설명, 탐지 제목·설명·탐지된 라벨)
+
+검색 대상마다 SearchEntry 한 행(제목 + 본문)을 두고 DB의 전문 검색 인덱스로 찾는다.
+- SQLite: FTS5 가상 테이블 (SearchEntry를 content 테이블로 쓰고 트리거로 동기화),
+  bm25 순위, 2·3글자 접두어 인덱스
+- PostgreSQL: search_vector(tsvector, 제목 가중치 A / 본문 B) + GIN 인덱스, ts_rank 순위
+- 그 밖의 DB: SearchEntry에 icontains (순위 없음)
+
+인덱스 구조는 마이그레이션(0008)에서 만들고, SearchEntry 행은 post_save / post_delete
+신호로 원본과 맞춘다 (VideosConfig.ready에서 연결). 신호를 거치지 않는 변경
+(queryset.update, bulk_create)이나 기존 데이터는 `manage.py rebuildsearch`로 다시 만든다.
+
+검색어는 단어마다 접두어 검색이고 모든 단어가 있어야 한다 ("사람 tru" -> 사람* AND tru*).
+"""
+import re
+
+from django.apps import apps
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, When
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_delete, post_save
+
+from .models import SearchEntry
+
+
+# 검색 대상: 종류 -> (모델, 바뀌면 다시 색인할 필드)
+SEARCH_SOURCES = {
+    'video': ('videos.Video', {'title', 'description'}),
+    'image': ('videos.Image', {'title', 'description'}),
+    'detection': ('vision_engine.Detection', {'title', 'description', 'detection_summary'}),
+}
+
+FTS_TABLE = 'videos_searchentry_fts'
+
+# bm25 열 가중치 (제목, 본문)
+TITLE_WEIGHT = 10.0
+BODY_WEIGHT = 1.0
+
+# 검색어 단어 수 / 순위 검색 결과 수 상한
+MAX_QUERY_TERMS = 8
+DEFAULT_SEARCH_LIMIT = 200
+
+TERM_RE = re.compile(r'\w+')
+
+
+def get_search_backend():
+    """'sqlite' / 'postgresql' / None (전문 검색 인덱스 없음)"""
+    if connection.vendor in ('sqlite', 'postgresql'):
+        return connection.vendor
+    return None
+
+
+def parse_query(query):
+    """검색어 -> 단어 목록 (소문자, 특수문자 제거)"""
+    return [term.lower() for term in TERM_RE.findall(query or '')][:MAX_QUERY_TERMS]
+
+
+def build_match_expression(terms, backend):
+    """단어 목록 -> FTS5 MATCH / to_tsquery 식 (모든 단어 접두어 일치)"""
+    if backend == 'postgresql':
+        return ' & '.join(f"{term}:*" for term in terms)
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def build_document(kind, obj):
+    """객체 -> (제목, 본문)"""
+    body = [obj.description or '']
+    if kind == 'detection':
+        body.extend(str(label) for label in (obj.detection_summary or {}))
+    return obj.title or '', '\n'.join(part for part in body if part)
+
+
+# ===== 색인 =====
+
+def index_object(kind, obj):
+    title, body = build_document(kind, obj)
+    SearchEntry.objects.update_or_create(
+        kind=kind, object_id=obj.pk,
+        defaults={'title': title[:200], 'body': body},
+    )
+
+
+def remove_object(kind, object_id):
+    SearchEntry.objects.filter(kind=kind, object_id=object_id).delete()
+
+
+def rebuild_index(batch_size=500):
+    """모든 검색 문서를 다시 만듦, 종류별 문서 수 반환"""
+    SearchEntry.objects.all().delete()
+    counts = {}
+    for kind, (model_label, fields) in SEARCH_SOURCES.items():
+        model = apps.get_model(model_label)
+        batch = []
+        counts[kind] = 0
+        for obj in model.objects.only('pk', *fields).iterator(chunk_size=batch_size):
+            title, body = build_document(kind, obj)
+            batch.append(SearchEntry(kind=kind, object_id=obj.pk, title=title[:200], body=body))
+            if len(batch) >= batch_size:
+                SearchEntry.objects.bulk_create(batch)
+                counts[kind] += len(batch)
+                batch = []
+        if batch:
+            SearchEntry.objects.bulk_create(batch)
+            counts[kind] += len(batch)
+
+    # 여러 번 나뉘어 쓰인 FTS5 세그먼트를 하나로 합침
+    if get_search_backend() == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+    return counts
+
+
+def _make_save_handler(kind, fields):
+    def handler(sender, instance, raw=False, update_fields=None, **kwargs):
+        # fixture 로드는 건너뛰고, 진행률처럼 검색 필드를 안 건드리는 저장은 다시 색인하지 않음
+        if raw or (update_fields is not None and not fields.intersection(update_fields)):
+            return
+        index_object(kind, instance)
+    return handler
+
+
+def _make_delete_handler(kind):
+    def handler(sender, instance, **kwargs):
+        remove_object(kind, instance.pk)
+    return handler
+
+
+def connect_signals():
+    for kind, (model_label, fields) in SEARCH_SOURCES.items():
+        model = apps.get_model(model_label)
+        post_save.connect(_make_save_handler(kind, fields), sender=model,
+                          weak=False, dispatch_uid=f'search_index_{kind}')
+        post_delete.connect(_make_delete_handler(kind), sender=model,
+                            weak=False, dispatch_uid=f'search_remove_{kind}')
+
+
+# ===== 검색 =====
+
+def search(query, kinds=None, limit=DEFAULT_SEARCH_LIMIT):
+    """
+    순위 검색
+
+    반환: [(종류, 객체 ID, 점수), ...] 관련도 높은 순 (점수가 클수록 관련도 높음)
+    """
+    terms = parse_query(query)
+    if not terms:
+        return []
+
+    backend = get_search_backend()
+    if backend is None:
+        entries = SearchEntry.objects.filter(_fallback_filter(terms))
+        if kinds:
+            entries = entries.filter(kind__in=kinds)
+        return [(kind, object_id, 0.0) for kind, object_id in
+                entries.order_by('-updated_at').values_list('kind', 'object_id')[:limit]]
+
+    params = [build_match_expression(terms, backend)]
+    kind_sql = ''
+    if kinds:
+        kind_sql = f" AND e.kind IN ({', '.join(['%s'] * len(kinds))})"
+        params.extend(kinds)
+    params.append(limit)
+
+    if backend == 'sqlite':
+        sql = (
+            f"SELECT e.kind, e.object_id, -bm25({FTS_TABLE}, {TITLE_WEIGHT}, {BODY_WEIGHT}) AS score "
+            f"FROM {FTS_TABLE} JOIN videos_searchentry e ON e.id = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH %s{kind_sql} ORDER BY score DESC LIMIT %s"
+        )
+    else:
+        sql = (
+            "SELECT e.kind, e.object_id, ts_rank(e.search_vector, q) AS score "
+            "FROM videos_searchentry e, to_tsquery('simple', %s) q "
+            f"WHERE e.search_vector @@ q{kind_sql} ORDER BY score DESC LIMIT %s"
+        )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [(kind, object_id, float(score)) for kind, object_id, score in cursor.fetchall()]
+
+
+def _fallback_filter(terms):
+    condition = Q()
+    for term in terms:
+        condition &= Q(title__icontains=term) | Q(body__icontains=term)
+    return condition
+
+
+def filter_queryset(queryset, kind, query):
+    """
+    검색어와 일치하는 객체만 남김 (정렬은 유지)
+
+    미디어 목록처럼 다른 순서(업로드 시간)로 페이지를 나눌 때 쓴다.
+    """
+    terms = parse_query(query)
+    if not terms:
+        return queryset
+
+    backend = get_search_backend()
+    if backend is None:
+        entries = SearchEntry.objects.filter(_fallback_filter(terms), kind=kind)
+        return queryset.filter(pk__in=entries.values('object_id'))
+
+    if backend == 'sqlite':
+        sql = (
+            "SELECT e.object_id FROM videos_searchentry e WHERE e.kind = %s AND e.id IN "
+            f"(SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s)"
+        )
+    else:
+        sql = (
+            "SELECT e.object_id FROM videos_searchentry e "
+            "WHERE e.kind = %s AND e.search_vector @@ to_tsquery('simple', %s)"
+        )
+    return queryset.filter(pk__in=RawSQL(sql, (kind, build_match_expression(terms, backend))))
+
+
+def rank_queryset(queryset, kind, query, limit=DEFAULT_SEARCH_LIMIT):
+    """검색어와 일치하는 객체를 관련도 순으로 (상위 limit개)"""
+    hits = search(query, kinds=[kind], limit=limit)
+    if not hits:
+        return queryset.none()
+    ids = [object_id for _, object_id, _ in hits]
+    order = Case(*[When(pk=pk, then=position) for position, pk in enumerate(ids)], output_field=IntegerField())
+    return queryset.filter(pk__in=ids).order_by(order)
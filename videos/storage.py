@@ -0,0 +1,510 @@
+"""
+미디어 저장소 (여러 노드의 웹 서버/작업자가 같은 파일을 보기 위한 추상화)
+
+원본(blob), 분석/탐지 결과, 프록시, 포스터, 미리보기의 기준 사본은 MEDIA_STORAGE 백엔드에 있고
+각 노드의 MEDIA_ROOT는 작업 공간, MEDIA_CACHE_ROOT는 내려받은 파일의 읽기 캐시로 쓴다.
+이름(name)은 어디서나 MEDIA_ROOT 기준 상대 경로다 ('blobs/ab/<해시>.mp4', 'analysis_results/3/x.mp4').
+
+- LocalMediaStore (기본): MEDIA_ROOT가 곧 저장소. 한 서버 또는 공유 볼륨에서 쓰며
+  publish/local_path는 아무 일도 하지 않는다 (지금까지와 같은 동작).
+- S3MediaStore: S3 호환 저장소 (AWS S3, MinIO 등, boto3 필요)
+  - local_path: MEDIA_ROOT에 없으면 캐시로 내려받음 (MEDIA_CACHE_MAX_SIZE 넘으면 오래 안 쓴 것부터 삭제)
+  - publish: 로컬에서 만든 파일을 multipart로 스트리밍 업로드하고 캐시로 옮김
+  - read_range: 요청한 범위만 GET (Range 헤더), 웹 서버는 내려받지 않고 바로 중계
+
+작업자: 입력은 local_media_path(name), 결과는 MEDIA_ROOT에 만든 뒤 publish_media(name)
+웹 서버: serve_media(request, name) (videos.streaming)
+"""
+import os
+import shutil
+import threading
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+# 원격 저장소를 쓸 때 로컬 캐시 최대 크기 / multipart 한 조각 크기 (S3 최소 5MB)
+DEFAULT_MEDIA_CACHE_MAX_SIZE = 20 * 1024 * 1024 * 1024
+DEFAULT_MULTIPART_PART_SIZE = 8 * 1024 * 1024
+
+# 범위 읽기 / 파일 복사 단위
+READ_CHUNK_SIZE = 64 * 1024
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# 서명 URL 유효 시간 (초)
+PRESIGNED_URL_EXPIRY = 60 * 60
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def link_file(source, target):
+    """하드링크 (다른 파일 시스템이면 복사)"""
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    temp_path = f"{target}.{os.getpid()}.part"
+    try:
+        try:
+            os.link(source, temp_path)
+        except OSError:
+            shutil.copy2(source, temp_path)
+        os.replace(temp_path, target)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def media_name(path):
+    """MEDIA_ROOT 아래 경로 (절대 또는 'media/...' 상대) -> 저장소 이름"""
+    return os.path.relpath(os.path.abspath(path), settings.MEDIA_ROOT).replace('\\', '/')
+
+
+def get_local_path(name):
+    """MEDIA_ROOT 아래 로컬 경로 (MEDIA_ROOT 밖을 가리키면 ValueError)"""
+    root = os.path.abspath(settings.MEDIA_ROOT)
+    path = os.path.abspath(os.path.join(root, name))
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError(f"잘못된 미디어 경로: {name}")
+    return path
+
+
+class MediaStore:
+    """저장소 공통 인터페이스"""
+
+    is_local = False
+
+    def exists(self, name):
+        raise NotImplementedError
+
+    def stat(self, name):
+        """(크기, 수정 시간 timestamp), 없으면 None"""
+        raise NotImplementedError
+
+    def read_range(self, name, start, end):
+        """[start, end] 구간 (끝 포함) 바이트를 청크 단위로"""
+        raise NotImplementedError
+
+    def open_writer(self, name):
+        """스트리밍 쓰기 (with 블록이 예외 없이 끝나야 저장됨)"""
+        raise NotImplementedError
+
+    def listdir(self, prefix):
+        """prefix 디렉토리 바로 아래 파일 이름 목록"""
+        raise NotImplementedError
+
+    def listdirs(self, prefix):
+        """prefix 디렉토리 바로 아래 하위 디렉토리 이름 목록"""
+        raise NotImplementedError
+
+    def copy(self, source, target):
+        raise NotImplementedError
+
+    def delete(self, name):
+        raise NotImplementedError
+
+    def delete_prefix(self, prefix):
+        raise NotImplementedError
+
+    def local_path(self, name):
+        """읽을 수 있는 로컬 경로 (필요하면 내려받음)"""
+        raise NotImplementedError
+
+    def source(self, name):
+        """ffmpeg/OpenCV가 바로 열 수 있는 경로 또는 URL (헤더만 읽을 때 내려받지 않음)"""
+        return self.local_path(name)
+
+    def publish(self, name):
+        """MEDIA_ROOT에 만든 파일을 저장소에 올림"""
+        raise NotImplementedError
+
+
+class LocalMediaStore(MediaStore):
+    """MEDIA_ROOT 자체가 저장소"""
+
+    is_local = True
+
+    def exists(self, name):
+        return os.path.isfile(get_local_path(name))
+
+    def stat(self, name):
+        try:
+            stat = os.stat(get_local_path(name))
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime
+
+    def read_range(self, name, start, end):
+        with open(get_local_path(name), 'rb') as file:
+            file.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                data = file.read(min(READ_CHUNK_SIZE, remaining))
+                if not data:
+                    break
+                remaining -= len(data)
+                yield data
+
+    def open_writer(self, name):
+        return LocalWriter(get_local_path(name))
+
+    def listdir(self, prefix):
+        try:
+            return sorted(entry.name for entry in os.scandir(get_local_path(prefix)) if entry.is_file())
+        except FileNotFoundError:
+            return []
+
+    def listdirs(self, prefix):
+        try:
+            return sorted(entry.name for entry in os.scandir(get_local_path(prefix)) if entry.is_dir())
+        except FileNotFoundError:
+            return []
+
+    def copy(self, source, target):
+        link_file(get_local_path(source), get_local_path(target))
+
+    def delete(self, name):
+        try:
+            os.remove(get_local_path(name))
+        except FileNotFoundError:
+            pass
+
+    def delete_prefix(self, prefix):
+        shutil.rmtree(get_local_path(prefix), ignore_errors=True)
+
+    def local_path(self, name):
+        return get_local_path(name)
+
+    def publish(self, name):
+        pass
+
+
+class LocalWriter:
+    """임시 파일에 쓰고 끝나면 교체"""
+
+    def __init__(self, path):
+        self.path = path
+        self.temp_path = f"{path}.{os.getpid()}.part"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.file = open(self.temp_path, 'wb')
+
+    def write(self, data):
+        self.file.write(data)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.file.close()
+        if exc_type is None:
+            os.replace(self.temp_path, self.path)
+        elif os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+        return False
+
+
+class S3MediaStore(MediaStore):
+    """
+    S3 호환 저장소
+
+    MEDIA_STORAGE = {
+        'BACKEND': 'videos.storage.S3MediaStore',
+        'OPTIONS': {
+            'bucket': 'videotool',
+            'endpoint_url': 'http://minio:9000',   # AWS면 생략
+            'access_key': '...', 'secret_key': '...',
+            'region': 'us-east-1', 'prefix': 'media/',
+        },
+    }
+    """
+
+    def __init__(self, bucket, endpoint_url=None, access_key=None, secret_key=None,
+                 region=None, prefix='', part_size=None):
+        self.bucket = bucket
+        self.endpoint_url = endpoint_url
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.prefix = prefix
+        self.part_size = max(part_size or DEFAULT_MULTIPART_PART_SIZE, 5 * 1024 * 1024)
+        self.cache_root = getattr(settings, 'MEDIA_CACHE_ROOT', os.path.join(settings.MEDIA_ROOT, '.cache'))
+        self.cache_max_size = getattr(settings, 'MEDIA_CACHE_MAX_SIZE', DEFAULT_MEDIA_CACHE_MAX_SIZE)
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            try:
+                import boto3
+                from botocore.config import Config
+            except ImportError:
+                raise ImportError("S3 저장소에는 boto3 패키지가 필요합니다")
+            self._client = boto3.client(
+                's3',
+                endpoint_url=self.endpoint_url,
+                aws_access_key_id=self.access_key,
+                aws_secret_access_key=self.secret_key,
+                region_name=self.region,
+                config=Config(signature_version='s3v4', retries={'max_attempts': 5, 'mode': 'standard'}),
+            )
+        return self._client
+
+    def key(self, name):
+        return f"{self.prefix}{name}"
+
+    def _is_missing(self, error):
+        return error.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound')
+
+    def stat(self, name):
+        from botocore.exceptions import ClientError
+
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=self.key(name))
+        except ClientError as e:
+            if self._is_missing(e):
+                return None
+            raise
+        return head['ContentLength'], head['LastModified'].timestamp()
+
+    def exists(self, name):
+        return self.stat(name) is not None
+
+    def read_range(self, name, start, end):
+        response = self.client.get_object(Bucket=self.bucket, Key=self.key(name), Range=f'bytes={start}-{end}')
+        body = response['Body']
+        try:
+            yield from body.iter_chunks(READ_CHUNK_SIZE)
+        finally:
+            body.close()
+
+    def open_writer(self, name):
+        return S3MultipartWriter(self, self.key(name))
+
+    def listdir(self, prefix):
+        prefix = self.key(prefix.rstrip('/') + '/')
+        names = []
+        for page in self.client.get_paginator('list_objects_v2').paginate(
+            Bucket=self.bucket, Prefix=prefix, Delimiter='/',
+        ):
+            names.extend(item['Key'][len(prefix):] for item in page.get('Contents', []))
+        return sorted(names)
+
+    def listdirs(self, prefix):
+        prefix = self.key(prefix.rstrip('/') + '/')
+        names = []
+        for page in self.client.get_paginator('list_objects_v2').paginate(
+            Bucket=self.bucket, Prefix=prefix, Delimiter='/',
+        ):
+            names.extend(item['Prefix'][len(prefix):].rstrip('/') for item in page.get('CommonPrefixes', []))
+        return sorted(names)
+
+    def copy(self, source, target):
+        # 서버 쪽 복사 (5GB 넘으면 boto3가 multipart copy로 나눔)
+        self.client.copy({'Bucket': self.bucket, 'Key': self.key(source)}, self.bucket, self.key(target))
+
+    def delete(self, name):
+        self.client.delete_object(Bucket=self.bucket, Key=self.key(name))
+        for path in (get_local_path(name), self._cache_path(name)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def delete_prefix(self, prefix):
+        prefix = prefix.rstrip('/') + '/'
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.key(prefix)):
+            objects = [{'Key': item['Key']} for item in page.get('Contents', [])]
+            if objects:
+                self.client.delete_objects(Bucket=self.bucket, Delete={'Objects': objects, 'Quiet': True})
+        shutil.rmtree(get_local_path(prefix), ignore_errors=True)
+        shutil.rmtree(self._cache_path(prefix), ignore_errors=True)
+
+    def source(self, name):
+        path = get_local_path(name)
+        if os.path.isfile(path):
+            return path
+        cache_path = self._cache_path(name)
+        if os.path.isfile(cache_path):
+            return cache_path
+        # ffmpeg/OpenCV는 HTTP Range로 필요한 부분만 읽음
+        return self.client.generate_presigned_url(
+            'get_object', Params={'Bucket': self.bucket, 'Key': self.key(name)}, ExpiresIn=PRESIGNED_URL_EXPIRY,
+        )
+
+    # ===== 로컬 캐시 =====
+
+    def _cache_path(self, name):
+        root = os.path.abspath(self.cache_root)
+        path = os.path.abspath(os.path.join(root, name))
+        if os.path.commonpath([root, path]) != root:
+            raise ValueError(f"잘못된 미디어 경로: {name}")
+        return path
+
+    def local_path(self, name):
+        # 이 노드에서 만들고 아직 올리지 않은 파일
+        path = get_local_path(name)
+        if os.path.isfile(path):
+            return path
+
+        cache_path = self._cache_path(name)
+        if os.path.isfile(cache_path):
+            os.utime(cache_path)  # 최근 사용 시간 (LRU)
+            return cache_path
+
+        from botocore.exceptions import ClientError
+
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        temp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.part"
+        try:
+            try:
+                response = self.client.get_object(Bucket=self.bucket, Key=self.key(name))
+            except ClientError as e:
+                if self._is_missing(e):
+                    raise FileNotFoundError(f"저장소에 파일이 없습니다: {name}")
+                raise
+            with open(temp_path, 'wb') as f:
+                for chunk in response['Body'].iter_chunks(COPY_CHUNK_SIZE):
+                    f.write(chunk)
+            os.replace(temp_path, cache_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        print(f"⬇️  저장소에서 내려받음: {name}")
+        self.trim_cache(keep=cache_path)
+        return cache_path
+
+    def publish(self, name):
+        path = get_local_path(name)
+        with open(path, 'rb') as source, self.open_writer(name) as writer:
+            while True:
+                data = source.read(COPY_CHUNK_SIZE)
+                if not data:
+                    break
+                writer.write(data)
+
+        # 올린 파일은 캐시로 옮겨 다른 로컬 파일처럼 LRU 정리 대상이 됨
+        cache_path = self._cache_path(name)
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        os.replace(path, cache_path)
+        self.trim_cache(keep=cache_path)
+
+    def trim_cache(self, keep=None):
+        """캐시가 MEDIA_CACHE_MAX_SIZE를 넘으면 최근 사용 시간이 오래된 파일부터 삭제 (keep: 방금 쓴 파일)"""
+        files = []
+        total = 0
+        for dirpath, _, filenames in os.walk(self.cache_root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                if filename.endswith('.part') or path == keep:
+                    continue
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((max(stat.st_atime, stat.st_mtime), stat.st_size, path))
+                total += stat.st_size
+
+        if total <= self.cache_max_size:
+            return
+        for _, size, path in sorted(files):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            total -= size
+            if total <= self.cache_max_size:
+                break
+
+
+class S3MultipartWriter:
+    """
+    multipart 스트리밍 업로드
+
+    part_size만큼 모이면 조각 하나를 올리므로 메모리는 조각 하나 크기만 쓴다.
+    전체가 한 조각보다 작으면 put_object 한 번, 실패하면 올린 조각을 취소(abort)한다.
+    """
+
+    def __init__(self, store, key):
+        self.store = store
+        self.key = key
+        self.buffer = bytearray()
+        self.upload_id = None
+        self.parts = []
+
+    def write(self, data):
+        self.buffer.extend(data)
+        while len(self.buffer) >= self.store.part_size:
+            self._upload_part(bytes(self.buffer[:self.store.part_size]))
+            del self.buffer[:self.store.part_size]
+
+    def _upload_part(self, data):
+        client = self.store.client
+        if self.upload_id is None:
+            self.upload_id = client.create_multipart_upload(Bucket=self.store.bucket, Key=self.key)['UploadId']
+        number = len(self.parts) + 1
+        response = client.upload_part(
+            Bucket=self.store.bucket, Key=self.key, UploadId=self.upload_id, PartNumber=number, Body=data,
+        )
+        self.parts.append({'ETag': response['ETag'], 'PartNumber': number})
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        client = self.store.client
+        if exc_type is not None:
+            if self.upload_id:
+                client.abort_multipart_upload(Bucket=self.store.bucket, Key=self.key, UploadId=self.upload_id)
+            return False
+
+        if self.upload_id is None:
+            client.put_object(Bucket=self.store.bucket, Key=self.key, Body=bytes(self.buffer))
+            return False
+        try:
+            if self.buffer:
+                self._upload_part(bytes(self.buffer))
+            client.complete_multipart_upload(
+                Bucket=self.store.bucket, Key=self.key, UploadId=self.upload_id,
+                MultipartUpload={'Parts': self.parts},
+            )
+        except Exception:
+            client.abort_multipart_upload(Bucket=self.store.bucket, Key=self.key, UploadId=self.upload_id)
+            raise
+        return False
+
+
+def get_media_store():
+    """MEDIA_STORAGE 설정의 저장소 (프로세스당 하나)"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                config = getattr(settings, 'MEDIA_STORAGE', {})
+                backend = import_string(config.get('BACKEND', 'videos.storage.LocalMediaStore'))
+                _store = backend(**config.get('OPTIONS', {}))
+    return _store
+
+
+def local_media_path(name):
+    return get_media_store().local_path(name)
+
+
+def publish_media(name):
+    """MEDIA_ROOT에 만든 파일(디렉토리면 안의 모든 파일)을 저장소에 올림"""
+    store = get_media_store()
+    if store.is_local:
+        return
+    path = get_local_path(name)
+    if os.path.isdir(path):
+        for entry in sorted(os.listdir(path)):
+            publish_media(f"{name}/{entry}")
+    elif os.path.isfile(path):
+        store.publish(name)
+
+
+def delete_media(name):
+    if name:
+        get_media_store().delete(name)
+
+
+def delete_media_prefix(prefix):
+    get_media_store().delete_prefix(prefix)
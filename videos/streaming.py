@@ -0,0 +1,263 @@
+"""
+파일 범위(Range) 전송
+
+원본 동영상, 전처리 결과, 탐지 결과를 모두 serve_media()로 보낸다.
+로컬(MEDIA_ROOT 또는 캐시)에 있으면 serve_file(), 원격 저장소에만 있으면
+요청한 범위만 저장소에서 읽어 그대로 흘려보낸다 (videos.storage).
+
+- 요청 범위를 메모리에 읽지 않고 STREAM_CHUNK_SIZE 단위로 흘려보낸다.
+  단일 범위는 FileResponse로 넘기므로 wsgi.file_wrapper를 지원하는 서버
+  (gunicorn 등)에서는 os.sendfile로 복사 없이 전송된다.
+- bytes=a-b, bytes=a-, bytes=-n(끝에서 n바이트), 여러 범위(multipart/byteranges)
+- ETag / Last-Modified, If-None-Match / If-Modified-Since (304), If-Range
+"""
+import mimetypes
+import os
+import re
+import uuid
+
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+
+# 한 번에 읽는 크기 / 한 요청에서 허용하는 최대 범위 수
+STREAM_CHUNK_SIZE = 64 * 1024
+MAX_RANGES = 16
+
+RANGE_SPEC_RE = re.compile(r'^\s*(\d*)\s*-\s*(\d*)\s*$')
+
+
+def parse_range_header(header, file_size):
+    """
+    Range 헤더 -> [(시작, 끝(포함)), ...]
+
+    None: 헤더가 없거나 형식이 잘못됨 (전체 전송)
+    []: 만족할 수 있는 범위가 없음 (416)
+    """
+    if not header:
+        return None
+    unit, _, specs = header.partition('=')
+    if unit.strip().lower() != 'bytes' or not specs.strip():
+        return None
+
+    ranges = []
+    for spec in specs.split(','):
+        match = RANGE_SPEC_RE.match(spec)
+        if not match:
+            return None
+        first, last = match.groups()
+        if not first and not last:
+            return None
+
+        if not first:
+            # 끝에서 n바이트
+            length = int(last)
+            if length == 0:
+                continue
+            start, end = max(0, file_size - length), file_size - 1
+        else:
+            start = int(first)
+            end = int(last) if last else file_size - 1
+            if last and end < start:
+                return None
+            if start >= file_size:
+                continue
+            end = min(end, file_size - 1)
+        ranges.append((start, end))
+
+    if len(ranges) > MAX_RANGES:
+        return None
+    return ranges
+
+
+class RangeFile:
+    """
+    파일의 [시작, 끝] 구간만 읽는 파일 객체
+
+    fileno()와 현재 위치(시작 지점으로 seek된 상태)를 그대로 노출하므로
+    wsgi.file_wrapper가 Content-Length만큼 sendfile 할 수 있다.
+    """
+
+    def __init__(self, file, start, end):
+        self.file = file
+        self.file.seek(start)
+        self.remaining = end - start + 1
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def _iter_multipart(path, ranges, boundary, headers):
+    """multipart/byteranges 본문 (범위마다 청크 단위로 읽음)"""
+    with open(path, 'rb') as file:
+        for (start, end), header in zip(ranges, headers):
+            yield header
+            part = RangeFile(file, start, end)
+            while True:
+                data = part.read(STREAM_CHUNK_SIZE)
+                if not data:
+                    break
+                yield data
+            yield b'\r\n'
+        yield f'--{boundary}--\r\n'.encode()
+
+
+def get_file_etag(stat):
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def _evaluate_request(request, file_size, etag, last_modified):
+    """조건부 요청/Range 해석 -> (바로 보낼 응답 또는 None, 범위 목록 또는 None)"""
+    # If-None-Match / If-Modified-Since -> 304, If-Match 실패 -> 412
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        response['Accept-Ranges'] = 'bytes'
+        return response, None
+
+    ranges = parse_range_header(request.META.get('HTTP_RANGE', ''), file_size)
+
+    # If-Range: 검증자가 바뀌었으면 범위를 무시하고 전체 전송
+    if_range = request.META.get('HTTP_IF_RANGE', '').strip()
+    if ranges is not None and if_range:
+        if if_range.startswith(('"', 'W/')):
+            matches = if_range == etag
+        else:
+            matches = parse_http_date_safe(if_range) == last_modified
+        if not matches:
+            ranges = None
+
+    if ranges == []:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{file_size}'
+        return response, None
+    return None, ranges
+
+
+def _multipart_headers(ranges, boundary, content_type, file_size):
+    headers = [
+        (f'--{boundary}\r\nContent-Type: {content_type}\r\n'
+         f'Content-Range: bytes {start}-{end}/{file_size}\r\n\r\n').encode()
+        for start, end in ranges
+    ]
+    length = sum(len(header) + end - start + 1 + 2 for header, (start, end) in zip(headers, ranges))
+    length += len(f'--{boundary}--\r\n')
+    return headers, length
+
+
+def _finish_response(response, etag, last_modified):
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def serve_file(request, path, content_type=None, not_found_message='파일을 찾을 수 없습니다.'):
+    """파일 응답 (Range / 조건부 요청 지원)"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        raise Http404(not_found_message)
+
+    file_size = stat.st_size
+    content_type = content_type or mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    etag = get_file_etag(stat)
+    last_modified = int(stat.st_mtime)
+
+    response, ranges = _evaluate_request(request, file_size, etag, last_modified)
+    if response is not None:
+        return response
+
+    if ranges and len(ranges) == 1:
+        start, end = ranges[0]
+        response = FileResponse(RangeFile(open(path, 'rb'), start, end), status=206, content_type=content_type)
+        response.block_size = STREAM_CHUNK_SIZE
+        response['Content-Length'] = str(end - start + 1)
+        response['Content-Range'] = f'bytes {start}-{end}/{file_size}'
+    elif ranges:
+        boundary = uuid.uuid4().hex
+        headers, length = _multipart_headers(ranges, boundary, content_type, file_size)
+        response = StreamingHttpResponse(
+            _iter_multipart(path, ranges, boundary, headers),
+            status=206,
+            content_type=f'multipart/byteranges; boundary={boundary}',
+        )
+        response['Content-Length'] = str(length)
+    else:
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+        response.block_size = STREAM_CHUNK_SIZE
+        response['Content-Length'] = str(file_size)
+
+    return _finish_response(response, etag, last_modified)
+
+
+def _iter_store_multipart(store, name, ranges, boundary, headers):
+    for (start, end), header in zip(ranges, headers):
+        yield header
+        yield from store.read_range(name, start, end)
+        yield b'\r\n'
+    yield f'--{boundary}--\r\n'.encode()
+
+
+def serve_media(request, name, content_type=None, not_found_message='파일을 찾을 수 없습니다.'):
+    """
+    미디어 저장소의 파일 응답 (name: MEDIA_ROOT 기준 상대 경로)
+
+    로컬에 있으면 serve_file (sendfile), 원격 저장소에만 있으면 요청 범위만 읽어서 중계
+    """
+    from .storage import get_local_path, get_media_store
+
+    store = get_media_store()
+    try:
+        path = get_local_path(name)
+    except ValueError:
+        raise Http404(not_found_message)
+    if store.is_local or os.path.isfile(path):
+        return serve_file(request, path, content_type, not_found_message)
+
+    stat = store.stat(name)
+    if stat is None:
+        raise Http404(not_found_message)
+
+    file_size, mtime = stat
+    content_type = content_type or mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    etag = f'"{int(mtime * 1e9):x}-{file_size:x}"'
+    last_modified = int(mtime)
+
+    response, ranges = _evaluate_request(request, file_size, etag, last_modified)
+    if response is not None:
+        return response
+
+    if ranges and len(ranges) == 1:
+        start, end = ranges[0]
+        response = StreamingHttpResponse(store.read_range(name, start, end), status=206, content_type=content_type)
+        response['Content-Length'] = str(end - start + 1)
+        response['Content-Range'] = f'bytes {start}-{end}/{file_size}'
+    elif ranges:
+        boundary = uuid.uuid4().hex
+        headers, length = _multipart_headers(ranges, boundary, content_type, file_size)
+        response = StreamingHttpResponse(
+            _iter_store_multipart(store, name, ranges, boundary, headers),
+            status=206,
+            content_type=f'multipart/byteranges; boundary={boundary}',
+        )
+        response['Content-Length'] = str(length)
+    else:
+        response = StreamingHttpResponse(
+            store.read_range(name, 0, file_size - 1) if file_size else iter([]), content_type=content_type,
+        )
+        response['Content-Length'] = str(file_size)
+
+    return _finish_response(response, etag, last_modified)
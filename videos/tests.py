@@ -1,3 +1,1042 @@
-from django.test import TestCase
+import base64
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from datetime import timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import cv2
+import numpy as np
+from PIL import Image as PILImage
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import Http404
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+
+from jobs.models import Job
+from .blobs import acquire_blob, release_blob, store_upload
+from .ingest import parse_frame_rate, process_image_ingest, process_video_ingest
+from .listing import decode_cursor, encode_cursor, get_media_page
+from .models import DerivedArtifact, Image, MediaBlob, SearchEntry, UploadSession, Video
+from .previews import (
+    POSTER_NAME, VTT_NAME, build_vtt, format_vtt_time, generate_video_previews, get_preview_dir, get_tile_size,
+    parse_showinfo_times,
+)
+from .retention import evict_artifacts, register_artifact, serve_artifact, sweep_orphans
+from .search import FTS_TABLE, filter_queryset, rank_queryset, rebuild_index, search
+from .storage import LocalMediaStore, MediaStore, get_local_path, get_media_store, media_name, publish_media
+from .streaming import RangeFile, get_file_etag, parse_range_header, serve_file, serve_media
+from .thumbnails import THUMBNAIL_CACHE_CONTROL, generate_image_thumbnails, get_thumbnail_path, get_thumbnail_version
+
+
+class MediaRootTestCase(TestCase):
+    """임시 MEDIA_ROOT에서 실행 (저장소 싱글턴도 새로 만듦)"""
+
+    def setUp(self):
+        from . import storage
+
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(
+            MEDIA_ROOT=self.media_root,
+            MEDIA_CACHE_ROOT=os.path.join(self.media_root, '.cache'),
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        storage._store = None
+        self.addCleanup(setattr, storage, '_store', None)
+
+    def write_media(self, name, data=b'data'):
+        path = os.path.join(self.media_root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(data)
+        return path
+
+    def write_video(self, name, frames=20, size=(64, 48), fps=10):
+        """프레임마다 밝기가 바뀌는 작은 MJPG 동영상"""
+        path = os.path.join(self.media_root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), fps, size)
+        for index in range(frames):
+            out.write(np.full((size[1], size[0], 3), index * 10 % 256, dtype=np.uint8))
+        out.release()
+        return path
+
+
+class MediaFileViewTests(MediaRootTestCase):
+    def test_serves_public_file(self):
+        self.write_media('videos/a.txt', b'hello')
+        response = self.client.get('/media/videos/a.txt')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'hello')
+
+    def test_private_prefixes_not_served(self):
+        self.write_media('uploads/tmp/abc.part')
+        self.write_media('.cache/videos/a.txt')
+        for url in (
+            '/media/uploads/tmp/abc.part',
+            '/media/uploads//tmp/abc.part',
+            '/media/./uploads/tmp/abc.part',
+            '/media/uploads/./tmp/abc.part',
+            '/media/videos/../uploads/tmp/abc.part',
+            '/media/.cache/videos/a.txt',
+            '/media/./.cache/videos/a.txt',
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_path_outside_media_root(self):
+        self.assertEqual(self.client.get('/media/../manage.py').status_code, 404)
+
+
+class RangeHeaderTests(SimpleTestCase):
+    def test_single_ranges(self):
+        self.assertEqual(parse_range_header('bytes=0-9', 100), [(0, 9)])
+        self.assertEqual(parse_range_header('bytes=90-', 100), [(90, 99)])
+        self.assertEqual(parse_range_header('bytes=90-200', 100), [(90, 99)])
+
+    def test_suffix_ranges(self):
+        self.assertEqual(parse_range_header('bytes=-10', 100), [(90, 99)])
+        self.assertEqual(parse_range_header('bytes=-500', 100), [(0, 99)])
+        self.assertEqual(parse_range_header('bytes=-0', 100), [])
+
+    def test_multiple_ranges(self):
+        self.assertEqual(parse_range_header('bytes=0-4, 10-14, -5', 100), [(0, 4), (10, 14), (95, 99)])
+        self.assertEqual(parse_range_header('bytes=0-4,200-300', 100), [(0, 4)])
+
+    def test_unsatisfiable_and_invalid(self):
+        self.assertEqual(parse_range_header('bytes=100-', 100), [])
+        for header in ('', 'items=0-1', 'bytes=', 'bytes=-', 'bytes=5-1', 'bytes=a-b',
+                       'bytes=' + ','.join(['0-1'] * 17)):
+            with self.subTest(header=header):
+                self.assertIsNone(parse_range_header(header, 100))
+
+
+class ServeFileTests(SimpleTestCase):
+    DATA = bytes(range(256)) * 4
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        self.path = os.path.join(self.tmp, 'video.mp4')
+        with open(self.path, 'wb') as file:
+            file.write(self.DATA)
+        self.stat = os.stat(self.path)
+        self.etag = get_file_etag(self.stat)
+        self.factory = RequestFactory()
+
+    def serve(self, **headers):
+        response = serve_file(self.factory.get('/video', headers=headers), self.path)
+        if response.streaming:
+            self.addCleanup(response.close)
+        return response
+
+    def test_full_response(self):
+        response = self.serve()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'video/mp4')
+        self.assertEqual(response['Content-Length'], str(len(self.DATA)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['ETag'], self.etag)
+        self.assertEqual(b''.join(response.streaming_content), self.DATA)
+
+    def test_single_range(self):
+        response = self.serve(range='bytes=-10')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 1014-1023/{len(self.DATA)}')
+        self.assertEqual(response['Content-Length'], '10')
+        self.assertEqual(b''.join(response.streaming_content), self.DATA[-10:])
+
+    def test_single_range_is_sendfile_ready(self):
+        # wsgi.file_wrapper는 fileno()의 현재 위치에서 Content-Length만큼 sendfile 한다
+        response = self.serve(range='bytes=100-199')
+        range_file = response.file_to_stream
+        self.assertIsInstance(range_file, RangeFile)
+
+        out_path = os.path.join(self.tmp, 'out')
+        with open(out_path, 'wb') as out:
+            sent = os.sendfile(out.fileno(), range_file.fileno(), None, int(response['Content-Length']))
+        self.assertEqual(sent, 100)
+        with open(out_path, 'rb') as out:
+            self.assertEqual(out.read(), self.DATA[100:200])
+
+    def test_multiple_ranges(self):
+        response = self.serve(range='bytes=0-3,-4')
+        self.assertEqual(response.status_code, 206)
+        content_type = response['Content-Type']
+        self.assertTrue(content_type.startswith('multipart/byteranges; boundary='))
+        boundary = content_type.split('boundary=')[1]
+
+        body = b''.join(response.streaming_content)
+        self.assertEqual(len(body), int(response['Content-Length']))
+        self.assertEqual(body, (
+            f'--{boundary}\r\nContent-Type: video/mp4\r\nContent-Range: bytes 0-3/1024\r\n\r\n'.encode()
+            + self.DATA[:4] + b'\r\n'
+            + f'--{boundary}\r\nContent-Type: video/mp4\r\nContent-Range: bytes 1020-1023/1024\r\n\r\n'.encode()
+            + self.DATA[-4:] + b'\r\n'
+            + f'--{boundary}--\r\n'.encode()
+        ))
+
+    def test_unsatisfiable_range(self):
+        response = self.serve(range='bytes=2000-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */1024')
+
+    def test_not_modified(self):
+        self.assertEqual(self.serve(if_none_match=self.etag).status_code, 304)
+        self.assertEqual(self.serve(if_modified_since=http_date(self.stat.st_mtime + 60)).status_code, 304)
+        self.assertEqual(self.serve(if_none_match='"other"').status_code, 200)
+
+    def test_if_range(self):
+        self.assertEqual(self.serve(range='bytes=0-9', if_range=self.etag).status_code, 206)
+        self.assertEqual(
+            self.serve(range='bytes=0-9', if_range=http_date(int(self.stat.st_mtime))).status_code, 206,
+        )
+
+        # 검증자가 바뀌었으면 전체 전송
+        response = self.serve(range='bytes=0-9', if_range='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.DATA)
+        self.assertEqual(self.serve(range='bytes=0-9', if_range=http_date(0)).status_code, 200)
+
+    def test_missing_file(self):
+        with self.assertRaises(Http404):
+            serve_file(self.factory.get('/video'), os.path.join(self.tmp, 'missing.mp4'))
+
+
+class ChunkedUploadTests(MediaRootTestCase):
+    DATA = bytes(range(256)) * 40
+
+    def create(self, **fields):
+        data = {'type': 'video', 'title': '분할 업로드', 'filename': 'clip.mp4', 'size': len(self.DATA), **fields}
+        response = self.client.post(reverse('upload_create'), data, content_type='application/json')
+        self.assertEqual(response.status_code, 201, response.content)
+        return UploadSession.objects.get(id=response.json()['id']), response
+
+    def patch(self, session, offset, data, checksum=None):
+        headers = {'Upload-Offset': str(offset), 'Tus-Resumable': '1.0.0'}
+        if checksum:
+            headers['Upload-Checksum'] = checksum
+        return self.client.patch(
+            reverse('upload_session', args=[session.id]), data,
+            content_type='application/offset+octet-stream', headers=headers,
+        )
+
+    def finalize(self, session):
+        return self.client.post(reverse('upload_finalize', args=[session.id]))
+
+    def test_create(self):
+        session, response = self.create()
+        self.assertEqual(response['Location'], reverse('upload_session', args=[session.id]))
+        self.assertEqual((response['Upload-Offset'], response['Upload-Length']), ('0', str(len(self.DATA))))
+        self.assertTrue(os.path.isfile(session.get_temp_path()))
+        self.assertEqual(os.path.getsize(session.get_temp_path()), 0)
+
+    def test_create_validation(self):
+        for fields, status in (
+            ({'type': 'audio'}, 400),
+            ({'title': ''}, 400),
+            ({'size': 0}, 400),
+            ({'type': 'image', 'filename': 'a.exe'}, 400),
+            ({'type': 'image', 'filename': 'a.png', 'size': 11 * 1024 * 1024}, 413),
+            ({'checksum': 'not-a-sha256'}, 400),
+        ):
+            with self.subTest(fields=fields):
+                data = {'type': 'video', 'title': 't', 'filename': 'clip.mp4', 'size': 10, **fields}
+                response = self.client.post(reverse('upload_create'), data, content_type='application/json')
+                self.assertEqual(response.status_code, status)
+        self.assertFalse(UploadSession.objects.exists())
+
+    def test_resume_and_finalize(self):
+        checksum = hashlib.sha256(self.DATA).hexdigest()
+        session, _ = self.create(checksum=checksum)
+        half = len(self.DATA) // 2
+
+        response = self.patch(session, 0, self.DATA[:half])
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response['Upload-Offset'], str(half))
+
+        # 이어받기: 현재 offset 확인 후 나머지 전송
+        response = self.client.head(reverse('upload_session', args=[session.id]))
+        self.assertEqual(response['Upload-Offset'], str(half))
+        self.assertEqual(self.finalize(session).status_code, 409)
+        self.assertEqual(self.patch(session, 0, self.DATA[:half]).status_code, 409)
+
+        response = self.patch(session, half, self.DATA[half:])
+        self.assertEqual(response['Upload-Offset'], str(len(self.DATA)))
+
+        response = self.finalize(session)
+        self.assertEqual(response.status_code, 201, response.content)
+        video = Video.objects.get(pk=response.json()['id'])
+        self.assertEqual(video.content_hash, checksum)
+        self.assertEqual(video.file_size, len(self.DATA))
+        with open(os.path.join(self.media_root, video.file.name), 'rb') as file:
+            self.assertEqual(file.read(), self.DATA)
+
+        session.refresh_from_db()
+        self.assertEqual((session.status, session.video_id), ('completed', video.pk))
+        self.assertFalse(os.path.exists(session.get_temp_path()))
+        self.assertTrue(Job.objects.filter(kind='video_ingest', object_id=video.pk, status='queued').exists())
+        self.assertEqual(self.patch(session, len(self.DATA), b'x').status_code, 409)
+
+    def test_chunk_checksum(self):
+        session, _ = self.create()
+        chunk = self.DATA[:100]
+
+        bad = 'sha1 ' + base64.b64encode(hashlib.sha1(b'other').digest()).decode()
+        response = self.patch(session, 0, chunk, checksum=bad)
+        self.assertEqual(response.status_code, 460)
+        session.refresh_from_db()
+        self.assertEqual(session.offset, 0)
+        self.assertEqual(os.path.getsize(session.get_temp_path()), 0)
+
+        good = 'sha1 ' + base64.b64encode(hashlib.sha1(chunk).digest()).decode()
+        self.assertEqual(self.patch(session, 0, chunk, checksum=good).status_code, 204)
+        self.assertEqual(self.patch(session, 100, b'x', checksum='crc32 AAAA').status_code, 400)
+
+    def test_concurrent_patch_rejected(self):
+        from .uploads import _try_lock, _unlock
+
+        session, _ = self.create()
+        with open(session.get_temp_path(), 'r+b') as file:
+            self.assertTrue(_try_lock(file, session.total_size))
+            self.assertEqual(self.patch(session, 0, self.DATA[:10]).status_code, 409)
+            _unlock(file, session.total_size)
+        self.assertEqual(self.patch(session, 0, self.DATA[:10]).status_code, 204)
+
+    def test_chunk_larger_than_file(self):
+        session, _ = self.create(size=10)
+        self.assertEqual(self.patch(session, 0, b'x' * 11).status_code, 413)
+
+    @override_settings(UPLOAD_CHUNK_MAX_SIZE=16)
+    def test_chunk_size_limit(self):
+        session, _ = self.create()
+        self.assertEqual(self.patch(session, 0, self.DATA[:17]).status_code, 413)
+
+    def test_file_checksum_mismatch(self):
+        session, _ = self.create(checksum=hashlib.sha256(b'other').hexdigest())
+        self.patch(session, 0, self.DATA)
+
+        self.assertEqual(self.finalize(session).status_code, 460)
+        session.refresh_from_db()
+        self.assertEqual(session.status, 'failed')
+        self.assertFalse(os.path.exists(session.get_temp_path()))
+        self.assertFalse(Video.objects.exists())
+        self.assertFalse(MediaBlob.objects.exists())
+
+    def test_concurrent_finalize_rejected(self):
+        session, _ = self.create()
+        self.patch(session, 0, self.DATA)
+        UploadSession.objects.filter(pk=session.pk).update(status='finalizing')
+
+        self.assertEqual(self.finalize(session).status_code, 409)
+        session.refresh_from_db()
+        self.assertEqual(session.status, 'finalizing')
+        self.assertTrue(os.path.isfile(session.get_temp_path()))
+        self.assertFalse(Video.objects.exists())
+
+    def test_finalize_error_resets_session(self):
+        session, _ = self.create()
+        self.patch(session, 0, self.DATA)
+
+        with mock.patch('videos.uploads.acquire_blob', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                self.finalize(session)
+        session.refresh_from_db()
+        self.assertEqual(session.status, 'uploading')
+        self.assertTrue(os.path.isfile(session.get_temp_path()))
+
+        self.assertEqual(self.finalize(session).status_code, 201)
+
+    def test_save_error_fails_session(self):
+        session, _ = self.create()
+        self.patch(session, 0, self.DATA)
+
+        with mock.patch('videos.views.save_video', side_effect=RuntimeError('db down')):
+            with self.assertRaises(RuntimeError):
+                self.finalize(session)
+        session.refresh_from_db()
+        self.assertEqual(session.status, 'failed')
+        self.assertIn('db down', session.error_message)
+        self.assertFalse(MediaBlob.objects.exists())
+
+    def test_abort(self):
+        session, _ = self.create()
+        self.patch(session, 0, self.DATA[:10])
+
+        response = self.client.delete(reverse('upload_session', args=[session.id]))
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertFalse(os.path.exists(session.get_temp_path()))
+
+
+class IngestTests(MediaRootTestCase):
+    def test_parse_frame_rate(self):
+        self.assertAlmostEqual(parse_frame_rate('30000/1001'), 29.97, places=2)
+        self.assertEqual(parse_frame_rate('25'), 25.0)
+        for value in ('0/0', '0/1', None, 'abc'):
+            with self.subTest(value=value):
+                self.assertIsNone(parse_frame_rate(value))
+
+    def test_video_ingest(self):
+        path = self.write_video('videos/clip.avi')
+        video = Video.objects.create(title='clip', file='videos/clip.avi', file_size=os.path.getsize(path))
+
+        self.assertTrue(process_video_ingest(video.pk))
+
+        video.refresh_from_db()
+        self.assertEqual(video.status, 'completed')
+        self.assertEqual((video.width, video.height), (64, 48))
+        self.assertAlmostEqual(video.fps, 10, places=1)
+        self.assertAlmostEqual(video.duration, 2, places=1)
+        self.assertIn('jpeg' if shutil.which('ffprobe') else 'mjpg', video.codec)
+        with open(path, 'rb') as file:
+            self.assertEqual(video.content_hash, hashlib.sha256(file.read()).hexdigest())
+        self.assertIsNotNone(video.ingested_at)
+        if shutil.which('ffmpeg'):
+            self.assertTrue(os.path.isfile(video.thumbnail.path))
+
+    def test_duplicate_content_reuses_results(self):
+        path = self.write_video('videos/clip.avi')
+        with open(path, 'rb') as file:
+            content_hash = hashlib.sha256(file.read()).hexdigest()
+        thumbnail = self.write_media('thumbnails/first.jpg', b'jpeg')
+        first = Video.objects.create(
+            title='first', file='videos/clip.avi', content_hash=content_hash, status='completed',
+            width=640, height=360, fps=25, duration=60, codec='h264', thumbnail='thumbnails/first.jpg',
+            ingested_at=timezone.now(),
+        )
+        first.preview_vtt = f'previews/videos/{first.pk}/thumbnails.vtt'
+        self.write_media(first.preview_vtt, b'WEBVTT')
+        first.save(update_fields=['preview_vtt'])
+        second = Video.objects.create(title='second', file='videos/clip.avi', content_hash=content_hash)
+
+        with mock.patch('videos.ingest.probe_video') as probe:
+            self.assertTrue(process_video_ingest(second.pk))
+        probe.assert_not_called()
+
+        second.refresh_from_db()
+        self.assertEqual((second.status, second.width, second.height, second.codec), ('completed', 640, 360, 'h264'))
+        self.assertTrue(os.path.samefile(second.thumbnail.path, thumbnail))
+        self.assertEqual(second.preview_vtt, f'previews/videos/{second.pk}/thumbnails.vtt')
+        self.assertTrue(os.path.samefile(
+            os.path.join(self.media_root, second.preview_vtt),
+            os.path.join(get_preview_dir(first.pk), 'thumbnails.vtt'),
+        ))
+
+    def test_missing_video_fails(self):
+        video = Video.objects.create(title='clip', file='videos/missing.avi')
+
+        self.assertFalse(process_video_ingest(video.pk))
+
+        video.refresh_from_db()
+        self.assertEqual(video.status, 'failed')
+        self.assertIn('missing.avi', video.error_message)
+
+    def test_image_ingest(self):
+        path = os.path.join(self.media_root, 'images', 'a.png')
+        os.makedirs(os.path.dirname(path))
+        PILImage.new('RGB', (30, 20), 'red').save(path)
+        image = Image.objects.create(title='a', file='images/a.png')
+
+        self.assertTrue(process_image_ingest(image.pk))
+
+        image.refresh_from_db()
+        self.assertEqual((image.status, image.width, image.height), ('completed', 30, 20))
+        with open(path, 'rb') as file:
+            self.assertEqual(image.content_hash, hashlib.sha256(file.read()).hexdigest())
+        self.assertTrue(os.path.isfile(get_thumbnail_path(image.pk, 320, 'webp')))
+
+
+class ImageThumbnailTests(MediaRootTestCase):
+    def create_image(self, size):
+        path = os.path.join(self.media_root, 'images', 'a.png')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        PILImage.new('RGBA', size, (255, 0, 0, 128)).save(path)
+        return Image.objects.create(title='a', file='images/a.png')
+
+    def test_all_sizes_and_formats(self):
+        image = self.create_image((1600, 900))
+        generate_image_thumbnails(image)
+
+        for width in (320, 640, 1280):
+            for fmt, pil_format in (('webp', 'WEBP'), ('jpeg', 'JPEG')):
+                with PILImage.open(get_thumbnail_path(image.pk, width, fmt)) as thumb:
+                    self.assertEqual((thumb.format, thumb.size), (pil_format, (width, width * 9 // 16)))
+
+    def test_small_image_not_upscaled(self):
+        image = self.create_image((200, 100))
+        generate_image_thumbnails(image)
+
+        with PILImage.open(get_thumbnail_path(image.pk, 1280, 'jpeg')) as thumb:
+            self.assertEqual(thumb.size, (200, 100))
+
+    def test_view_generates_lazily_by_accept(self):
+        image = self.create_image((800, 600))
+        url = reverse('image_thumbnail', args=[image.pk, 320])
+
+        response = self.client.get(url, headers={'accept': 'image/avif,image/webp,*/*'})
+        self.assertEqual((response.status_code, response['Content-Type']), (200, 'image/webp'))
+        self.assertEqual(response['Vary'], 'Accept')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        self.assertTrue(os.path.isfile(get_thumbnail_path(image.pk, 320, 'webp')))
+        self.assertFalse(os.path.exists(get_thumbnail_path(image.pk, 640, 'webp')))
+
+        response = self.client.get(url, {'v': get_thumbnail_version(image)}, headers={'accept': 'image/*'})
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response['Cache-Control'], THUMBNAIL_CACHE_CONTROL)
+
+        self.assertEqual(self.client.get(reverse('image_thumbnail', args=[image.pk, 100])).status_code, 404)
+
+
+class VideoPreviewTests(MediaRootTestCase):
+    SHOWINFO = (
+        "[Parsed_showinfo_1 @ 0x1] n:   0 pts:  512 pts_time:0.5   duration: 512\n"
+        "frame=    1 fps=0.0 q=0.0 size=N/A\n"
+        "[Parsed_showinfo_1 @ 0x1] n:   1 pts: 1536 pts_time:1.5   duration: 512\n"
+        "[Parsed_showinfo_1 @ 0x1] n:   2 pts: 2560 pts_time:2.5   duration: 512\n"
+    )
+
+    def fake_ffmpeg(self, cmd, cancel_check=None):
+        """ffmpeg 대신 포스터/시트 파일만 만들고 showinfo 로그를 돌려줌"""
+        poster = next(arg for arg in cmd if arg.endswith(POSTER_NAME))
+        for path in (poster, os.path.join(os.path.dirname(poster), 'sprite_000.jpg')):
+            PILImage.new('RGB', (16, 12)).save(path)
+        return subprocess.CompletedProcess(cmd, 0, '', self.SHOWINFO)
+
+    def test_vtt_helpers(self):
+        self.assertEqual(get_tile_size(1920, 1080), (160, 90))
+        self.assertEqual(get_tile_size(64, 48, tile_width=100), (100, 76))
+        self.assertEqual(get_tile_size(0, 0), (160, 90))
+        self.assertEqual(format_vtt_time(3723.4567), '01:02:03.457')
+        self.assertEqual(parse_showinfo_times(self.SHOWINFO), [0.0, 1.0, 2.0])
+        self.assertEqual(parse_showinfo_times('no frames'), [])
+
+    def test_vtt_cues_span_sheets(self):
+        vtt = build_vtt([0.0, 1.0, 2.0], 2.5, (20, 10), columns=2, rows=1, interval=1)
+        self.assertEqual(vtt.split('\n'), [
+            'WEBVTT', '',
+            '00:00:00.000 --> 00:00:01.000', 'sprite_000.jpg#xywh=0,0,20,10', '',
+            '00:00:01.000 --> 00:00:02.000', 'sprite_000.jpg#xywh=20,0,20,10', '',
+            '00:00:02.000 --> 00:00:02.500', 'sprite_001.jpg#xywh=0,0,20,10', '',
+        ])
+        # 길이를 모르면 마지막 구간은 interval만큼
+        self.assertIn('00:00:02.000 --> 00:00:03.000', build_vtt([0.0, 2.0], None, (20, 10), 2, 1, 1))
+
+    def test_ingest_uses_poster_and_track(self):
+        self.write_video('videos/clip.avi')
+        video = Video.objects.create(title='clip', file='videos/clip.avi')
+
+        with mock.patch('videos.previews.run_process', side_effect=self.fake_ffmpeg):
+            self.assertTrue(process_video_ingest(video.pk))
+
+        video.refresh_from_db()
+        self.assertEqual(video.preview_vtt, f'previews/videos/{video.pk}/{VTT_NAME}')
+        self.assertTrue(os.path.isfile(video.thumbnail.path))
+        with open(os.path.join(self.media_root, video.preview_vtt), encoding='utf-8') as f:
+            self.assertEqual(f.read().count('sprite_000.jpg#xywh='), 3)
+        self.assertFalse(os.path.exists(get_preview_dir(video.pk) + '.tmp'))
+
+    def test_failed_pass_falls_back(self):
+        self.write_video('videos/clip.avi')
+        video = Video.objects.create(title='clip', file='videos/clip.avi')
+        failed = subprocess.CompletedProcess([], 1, '', 'Invalid data found when processing input')
+
+        with mock.patch('videos.previews.run_process', return_value=failed), \
+                mock.patch('videos.ingest.generate_thumbnail', return_value=None) as fallback:
+            self.assertTrue(process_video_ingest(video.pk))
+
+        fallback.assert_called_once()
+        video.refresh_from_db()
+        self.assertEqual((video.status, video.preview_vtt), ('completed', ''))
+        self.assertFalse(os.path.exists(get_preview_dir(video.pk)))
+        self.assertFalse(os.path.exists(get_preview_dir(video.pk) + '.tmp'))
+
+    @skipUnless(shutil.which('ffmpeg'), 'ffmpeg가 없습니다')
+    @override_settings(VIDEO_SPRITE_INTERVAL=0.5, VIDEO_SPRITE_COLUMNS=2, VIDEO_SPRITE_ROWS=2)
+    def test_ffmpeg_pass(self):
+        path = self.write_video('videos/clip.avi', frames=30)
+
+        previews = generate_video_previews(1, path, 64, 48, 3.0)
+
+        out_dir = get_preview_dir(1)
+        self.assertTrue(os.path.isfile(previews['poster']))
+        self.assertGreaterEqual(previews['tiles'], 5)
+        self.assertTrue(os.path.isfile(os.path.join(out_dir, 'sprite_001.jpg')))
+        with open(os.path.join(self.media_root, previews['vtt']), encoding='utf-8') as f:
+            self.assertEqual(f.read().count('#xywh='), previews['tiles'])
+
+
+class MediaPageTests(TestCase):
+    def setUp(self):
+        # 같은 업로드 시간이 여러 개 (id, 종류 순으로 정렬되어야 함)
+        base = timezone.now().replace(microsecond=0) - timedelta(days=1)
+        self.keys = []
+        for model, media_type, minutes in (
+            (Video, 'video', [0, 1, 1, 2, 3]),
+            (Image, 'image', [1, 2, 2, 3]),
+        ):
+            for minute in minutes:
+                obj = model.objects.create(title=f'{media_type} {minute}', file=f'{media_type}s/{minute}.bin')
+                uploaded_at = base + timedelta(minutes=minute)
+                model.objects.filter(pk=obj.pk).update(uploaded_at=uploaded_at)
+                self.keys.append((uploaded_at, obj.pk, media_type))
+        self.keys.sort(reverse=True)
+
+    @staticmethod
+    def keys_of(page):
+        return [(obj.uploaded_at, obj.pk, 'video' if isinstance(obj, Video) else 'image') for obj in page.items]
+
+    def test_forward_and_backward(self):
+        pages = []
+        page = get_media_page(page_size=4)
+        self.assertIsNone(page.prev_cursor)
+        while True:
+            pages.append(self.keys_of(page))
+            if not page.next_cursor:
+                break
+            page = get_media_page(after=page.next_cursor, page_size=4)
+
+        self.assertEqual([len(keys) for keys in pages], [4, 4, 1])
+        self.assertEqual(sum(pages, []), self.keys)
+
+        # 마지막 페이지에서 이전 페이지로 되돌아가기
+        for expected in reversed(pages[:-1]):
+            self.assertIsNotNone(page.prev_cursor)
+            page = get_media_page(before=page.prev_cursor, page_size=4)
+            self.assertEqual(self.keys_of(page), expected)
+            self.assertIsNotNone(page.next_cursor)
+        self.assertIsNone(page.prev_cursor)
+
+    def test_tab_filter(self):
+        page = get_media_page(tab='image', page_size=10)
+        self.assertEqual(self.keys_of(page), [key for key in self.keys if key[2] == 'image'])
+        self.assertFalse(page.has_other_pages())
+
+    def test_cursor_roundtrip_and_invalid(self):
+        self.assertEqual(decode_cursor(encode_cursor(*self.keys[0])), self.keys[0])
+        for cursor in ('', 'not base64!', encode_cursor(self.keys[0][0], 1, 'video').replace('A', '_'),
+                       base64.urlsafe_b64encode(b'1:2:audio').decode()):
+            with self.subTest(cursor=cursor):
+                self.assertIsNone(decode_cursor(cursor))
+        # 잘못된 커서는 첫 페이지
+        self.assertEqual(self.keys_of(get_media_page(after='garbage', page_size=4)), self.keys[:4])
+
+    def test_list_view_queryset(self):
+        from .views import MediaListView
+
+        view = MediaListView()
+        view.setup(RequestFactory().get(reverse('media_list'), {'after': encode_cursor(*self.keys[3])}))
+        self.assertEqual(
+            [(item['id'], item['type']) for item in view.get_queryset()],
+            [(media_id, media_type) for _, media_id, media_type in self.keys[4:]],
+        )
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.truck = Video.objects.create(title='Truck convoy', description='highway at night', file='videos/1.mp4')
+        self.street = Video.objects.create(title='Street', description='a truck passes by', file='videos/2.mp4')
+        self.photo = Image.objects.create(title='트럭 사진', description='주차장', file='images/1.png')
+
+    def ids(self, hits):
+        return [(kind, object_id) for kind, object_id, _ in hits]
+
+    def test_title_ranks_above_body(self):
+        hits = search('truck')
+        self.assertEqual(self.ids(hits), [('video', self.truck.pk), ('video', self.street.pk)])
+        self.assertGreater(hits[0][2], hits[1][2])
+
+    def test_prefix_terms_all_required(self):
+        self.assertEqual(self.ids(search('tru hig')), [('video', self.truck.pk)])
+        self.assertEqual(self.ids(search('트럭')), [('image', self.photo.pk)])
+        self.assertEqual(search('truck 주차장'), [])
+        self.assertEqual(search('  !!  '), [])
+        self.assertEqual(self.ids(search('truck', kinds=['image'])), [])
+
+    def test_detection_labels_indexed(self):
+        from analysis.models import Analysis
+        from vision_engine.models import Detection
+
+        analysis = Analysis.objects.create(image=self.photo, status='completed')
+        detection = Detection.objects.create(analysis=analysis, title='주차장 탐지', detection_summary={'person': 2})
+
+        self.assertEqual(self.ids(search('person')), [('detection', detection.pk)])
+        self.assertEqual(self.ids(search('주차장', kinds=['detection'])), [('detection', detection.pk)])
+
+    def test_signals_keep_index_in_sync(self):
+        self.street.title = 'Parked car'
+        self.street.description = ''
+        self.street.save()
+        self.assertEqual(self.ids(search('truck')), [('video', self.truck.pk)])
+        self.assertEqual(self.ids(search('parked')), [('video', self.street.pk)])
+
+        self.truck.delete()
+        self.assertEqual(search('truck'), [])
+        self.assertFalse(SearchEntry.objects.filter(kind='video', object_id=self.truck.pk).exists())
+
+    def test_save_without_indexed_fields_skips_reindex(self):
+        with mock.patch('videos.search.index_object') as index_object:
+            self.truck.file_size = 10
+            self.truck.save(update_fields=['file_size'])
+            index_object.assert_not_called()
+            self.truck.save(update_fields=['title'])
+            index_object.assert_called_once()
+
+    def test_triggers_follow_raw_changes(self):
+        from django.db import connection
+
+        # 신호를 거치지 않는 변경도 FTS 인덱스는 트리거가 맞춤
+        SearchEntry.objects.filter(kind='video', object_id=self.truck.pk).update(title='Bus')
+        self.assertEqual(self.ids(search('bus')), [('video', self.truck.pk)])
+        SearchEntry.objects.filter(kind='image').delete()
+        self.assertEqual(search('트럭'), [])
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('integrity-check', 1)")
+
+    def test_rebuild_index(self):
+        Video.objects.filter(pk=self.street.pk).update(title='Lorry')
+        self.assertEqual(rebuild_index(batch_size=1), {'video': 2, 'image': 1, 'detection': 0})
+        self.assertEqual(self.ids(search('lorry')), [('video', self.street.pk)])
+
+    def test_querysets(self):
+        videos = Video.objects.order_by('pk')
+        self.assertEqual(list(filter_queryset(videos, 'video', 'truck')), [self.truck, self.street])
+        self.assertEqual(list(rank_queryset(videos, 'video', 'truck')), [self.truck, self.street])
+        self.assertEqual(list(rank_queryset(videos, 'video', 'nothing')), [])
+        self.assertEqual([item.pk for item in get_media_page(search='트럭').items], [self.photo.pk])
+
+    @mock.patch('videos.search.get_search_backend', return_value=None)
+    def test_fallback_without_index(self, backend):
+        self.assertEqual(sorted(search('truck')), [('video', self.truck.pk, 0.0), ('video', self.street.pk, 0.0)])
+        self.assertEqual(self.ids(search('convoy high')), [('video', self.truck.pk)])
+        self.assertEqual(list(filter_queryset(Image.objects.all(), 'image', '트럭')), [self.photo])
+
+
+class MediaBlobTests(MediaRootTestCase):
+    DATA = b'blob content' * 100
+    HASH = hashlib.sha256(DATA).hexdigest()
+
+    def blob_path(self, blob):
+        return os.path.join(self.media_root, blob.file.name)
+
+    def test_acquire_shares_existing_content(self):
+        blob, created = acquire_blob(self.HASH, 'a.mp4', len(self.DATA), content=ContentFile(self.DATA))
+        self.assertTrue(created)
+        self.assertEqual(blob.ref_count, 1)
+        self.assertTrue(blob.file.name.startswith(f'blobs/{self.HASH[:2]}/{self.HASH}'))
+        with open(self.blob_path(blob), 'rb') as file:
+            self.assertEqual(file.read(), self.DATA)
+
+        # 같은 내용의 분할 업로드: 임시 파일은 지우고 기존 원본 공유
+        source = self.write_media('uploads/tmp/x.part', self.DATA)
+        same, created = acquire_blob(self.HASH, 'b.mp4', len(self.DATA), source_path=source)
+        self.assertFalse(created)
+        self.assertEqual((same.pk, same.ref_count), (blob.pk, 2))
+        self.assertFalse(os.path.exists(source))
+        self.assertEqual(MediaBlob.objects.count(), 1)
+
+    def test_acquire_restores_missing_file(self):
+        blob, _ = acquire_blob(self.HASH, 'a.mp4', len(self.DATA), content=ContentFile(self.DATA))
+        os.remove(self.blob_path(blob))
+
+        source = self.write_media('uploads/tmp/x.part', self.DATA)
+        blob, created = acquire_blob(self.HASH, 'a.mp4', len(self.DATA), source_path=source)
+        self.assertFalse(created)
+        self.assertTrue(os.path.isfile(self.blob_path(blob)))
+
+    def test_concurrent_insert_shares_winner(self):
+        from django.db.models import QuerySet
+
+        winner, _ = acquire_blob(self.HASH, 'other.mov', len(self.DATA), content=ContentFile(self.DATA))
+        source = self.write_media('uploads/tmp/x.part', self.DATA)
+        update = QuerySet.update
+        calls = []
+
+        def update_after_race(queryset, **kwargs):
+            # 첫 확인 때는 아직 다른 요청의 행이 없었던 것처럼 (INSERT에서 IntegrityError)
+            calls.append(kwargs)
+            return 0 if len(calls) == 1 else update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, 'update', update_after_race):
+            blob, created = acquire_blob(self.HASH, 'a.mp4', len(self.DATA), source_path=source)
+
+        self.assertEqual(len(calls), 2)
+        self.assertFalse(created)
+        self.assertEqual((blob.pk, blob.ref_count), (winner.pk, 2))
+        self.assertEqual(MediaBlob.objects.count(), 1)
+        self.assertFalse(os.path.exists(source))
+        self.assertEqual(os.listdir(os.path.dirname(self.blob_path(winner))), [f'{self.HASH}.mov'])
+
+    def test_release_deletes_at_zero(self):
+        blob, _ = acquire_blob(self.HASH, 'a.mp4', len(self.DATA), content=ContentFile(self.DATA))
+        acquire_blob(self.HASH, 'a.mp4', len(self.DATA), content=ContentFile(self.DATA))
+
+        self.assertFalse(release_blob(blob.pk))
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 1)
+        self.assertTrue(os.path.isfile(self.blob_path(blob)))
+
+        self.assertTrue(release_blob(blob.pk))
+        self.assertFalse(MediaBlob.objects.exists())
+        self.assertFalse(os.path.exists(self.blob_path(blob)))
+
+    def test_release_keeps_blob_still_in_use(self):
+        blob, _ = acquire_blob(self.HASH, 'a.mp4', len(self.DATA), content=ContentFile(self.DATA))
+        Video.objects.create(title='v', file=blob.file.name, blob=blob)
+
+        self.assertFalse(release_blob(blob.pk))
+        self.assertTrue(MediaBlob.objects.filter(pk=blob.pk).exists())
+
+    def test_form_uploads_dedup_and_delete_releases(self):
+        videos = []
+        for name in ('a.mp4', 'b.mp4'):
+            video = Video(title=name, file=SimpleUploadedFile(name, self.DATA))
+            store_upload(video)
+            video.save()
+            videos.append(video)
+
+        self.assertEqual(videos[0].blob_id, videos[1].blob_id)
+        self.assertEqual(videos[0].content_hash, self.HASH)
+        blob = MediaBlob.objects.get()
+        self.assertEqual(blob.ref_count, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            videos[0].delete()
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            videos[1].delete()
+        self.assertFalse(MediaBlob.objects.exists())
+        self.assertFalse(os.path.exists(self.blob_path(blob)))
+
+
+class MemoryMediaStore(MediaStore):
+    """원격 저장소 대용 (읽은 범위를 기록)"""
+
+    files = {}
+    reads = []
+
+    def stat(self, name):
+        return (len(self.files[name]), 1700000000.0) if name in self.files else None
+
+    def read_range(self, name, start, end):
+        self.reads.append((name, start, end))
+        yield self.files[name][start:end + 1]
+
+
+class MediaStoreTests(MediaRootTestCase):
+    def test_names_are_normalized_under_media_root(self):
+        self.assertEqual(get_local_path('videos/../uploads//tmp/./a.part'),
+                         os.path.join(self.media_root, 'uploads', 'tmp', 'a.part'))
+        self.assertEqual(media_name(get_local_path('./videos//a.mp4')), 'videos/a.mp4')
+        self.assertEqual(media_name(os.path.join(self.media_root, 'blobs', 'ab', 'x.mp4')), 'blobs/ab/x.mp4')
+        for name in ('../manage.py', 'videos/../../x', '/etc/passwd'):
+            with self.subTest(name=name):
+                with self.assertRaises(ValueError):
+                    get_local_path(name)
+
+    def test_local_store(self):
+        store = get_media_store()
+        self.assertIsInstance(store, LocalMediaStore)
+        self.assertIs(get_media_store(), store)
+
+        with store.open_writer('results/1/out.bin') as writer:
+            writer.write(b'0123')
+            writer.write(b'456789')
+        self.assertTrue(store.exists('results/1/out.bin'))
+        self.assertEqual(store.stat('results/1/out.bin')[0], 10)
+        self.assertIsNone(store.stat('results/1/missing.bin'))
+        self.assertEqual(b''.join(store.read_range('results/1/out.bin', 2, 5)), b'2345')
+        self.assertEqual(store.listdir('results/1'), ['out.bin'])
+        self.assertEqual(store.listdir('results/2'), [])
+
+        store.copy('results/1/out.bin', 'results/2/out.bin')
+        self.assertTrue(os.path.samefile(store.local_path('results/1/out.bin'), store.local_path('results/2/out.bin')))
+        publish_media('results/2')
+        store.delete('results/2/out.bin')
+        store.delete('results/2/out.bin')
+        self.assertFalse(store.exists('results/2/out.bin'))
+        store.delete_prefix('results')
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, 'results')))
+
+    def test_failed_write_leaves_nothing(self):
+        store = get_media_store()
+        with self.assertRaises(RuntimeError):
+            with store.open_writer('results/out.bin') as writer:
+                writer.write(b'partial')
+                raise RuntimeError('boom')
+        self.assertEqual(os.listdir(os.path.join(self.media_root, 'results')), [])
+
+    @override_settings(MEDIA_STORAGE={'BACKEND': 'videos.tests.MemoryMediaStore'})
+    def test_remote_file_relays_requested_ranges(self):
+        MemoryMediaStore.files = {'blobs/ab/x.mp4': bytes(range(100))}
+        MemoryMediaStore.reads = []
+        request = RequestFactory().get('/media/blobs/ab/x.mp4', headers={'range': 'bytes=10-19'})
+
+        response = serve_media(request, 'blobs/ab/x.mp4')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), bytes(range(10, 20)))
+        self.assertEqual(MemoryMediaStore.reads, [('blobs/ab/x.mp4', 10, 19)])
+        self.assertEqual(response['Content-Type'], 'video/mp4')
+
+        # 로컬에 있는 파일은 저장소를 거치지 않음
+        self.write_media('blobs/ab/y.mp4', b'local')
+        response = serve_media(RequestFactory().get('/'), 'blobs/ab/y.mp4')
+        self.assertEqual(b''.join(response.streaming_content), b'local')
+        self.assertEqual(len(MemoryMediaStore.reads), 1)
+
+        with self.assertRaises(Http404):
+            serve_media(RequestFactory().get('/'), 'blobs/ab/missing.mp4')
+
+
+@override_settings(MEDIA_DERIVED_BUDGET=None, MEDIA_MIN_FREE_SPACE=None, MEDIA_EVICTION_MIN_IDLE=3600,
+                   MEDIA_TEMP_MAX_AGE=3600)
+class RetentionTests(MediaRootTestCase):
+    def setUp(self):
+        super().setUp()
+        self.video = Video.objects.create(title='retention', file='videos/retention.mp4')
+
+    def make_analysis(self, size=100, idle=7200):
+        """완료된 분석 + 결과 파일 + 기록 (idle: 마지막 사용 후 지난 시간, 초)"""
+        from analysis.models import Analysis
+
+        analysis = Analysis.objects.create(video=self.video, status='completed')
+        analysis.output_video_path = f'analysis_results/{analysis.id}/out.mp4'
+        analysis.save(update_fields=['output_video_path'])
+        self.write_media(analysis.output_video_path, b'x' * size)
+        register_artifact('analysis', analysis.id, analysis.output_video_path)
+        DerivedArtifact.objects.filter(name=analysis.output_video_path).update(
+            last_accessed_at=timezone.now() - timedelta(seconds=idle),
+        )
+        return analysis
+
+    def exists(self, name):
+        return os.path.exists(os.path.join(self.media_root, name))
+
+    def make_old(self, name, age=7200):
+        past = time.time() - age
+        os.utime(os.path.join(self.media_root, name), (past, past))
+
+    # ----- 예산 -----
+    def test_under_budget_keeps_everything(self):
+        self.make_analysis()
+        self.assertEqual(evict_artifacts(), (0, 0))
+        with self.settings(MEDIA_DERIVED_BUDGET=100):
+            self.assertEqual(evict_artifacts(), (0, 0))
+
+    @override_settings(MEDIA_DERIVED_BUDGET=150)
+    def test_evicts_least_recently_used(self):
+        older = self.make_analysis(idle=9000)
+        newer = self.make_analysis(idle=7200)
+
+        self.assertEqual(evict_artifacts(dry_run=True), (1, 100))
+        self.assertTrue(self.exists(older.output_video_path))
+
+        self.assertEqual(evict_artifacts(), (1, 100))
+        self.assertFalse(self.exists(older.output_video_path))
+        self.assertTrue(self.exists(newer.output_video_path))
+        artifact = DerivedArtifact.objects.get(name=older.output_video_path)
+        self.assertIsNotNone(artifact.evicted_at)
+
+        # 삭제된 기록은 예산에서 빠짐
+        self.assertEqual(evict_artifacts(), (0, 0))
+
+    @override_settings(MEDIA_DERIVED_BUDGET=0)
+    def test_recent_and_busy_results_are_kept(self):
+        from vision_engine.models import Detection
+
+        recent = self.make_analysis(idle=60)
+        busy = self.make_analysis()
+        Detection.objects.create(analysis=busy, title='busy', status='processing')
+
+        self.assertEqual(evict_artifacts(), (0, 0))
+        self.assertTrue(self.exists(recent.output_video_path))
+        self.assertTrue(self.exists(busy.output_video_path))
+
+    @override_settings(MEDIA_DERIVED_BUDGET=0)
+    def test_evicted_result_is_rebuilt_on_request(self):
+        from jobs.models import Job
+
+        analysis = self.make_analysis()
+        evict_artifacts()
+
+        response = serve_artifact(RequestFactory().get('/'), 'analysis', analysis, 'video/mp4')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '30')
+        self.assertTrue(Job.objects.filter(kind='analysis', object_id=analysis.id, status='queued').exists())
+
+        # 다시 만들어지면 삭제 표시 해제
+        self.write_media(analysis.output_video_path, b'y' * 50)
+        register_artifact('analysis', analysis.id, analysis.output_video_path)
+        artifact = DerivedArtifact.objects.get(name=analysis.output_video_path)
+        self.assertEqual((artifact.evicted_at, artifact.size), (None, 50))
+
+    # ----- 고아 / 임시 파일 -----
+    def test_orphan_dirs(self):
+        analysis = self.make_analysis()
+        self.write_media('analysis_results/9999/out.mp4')
+        self.write_media('analysis_results/9998/out.mp4')
+        Job.objects.create(kind='analysis', object_id=9998)
+
+        stats = sweep_orphans(dry_run=True)
+        self.assertEqual(stats['orphan_dirs'], 1)
+        self.assertTrue(self.exists('analysis_results/9999'))
+
+        stats = sweep_orphans()
+        self.assertEqual(stats['orphan_dirs'], 1)
+        self.assertFalse(self.exists('analysis_results/9999'))
+        self.assertTrue(self.exists('analysis_results/9998/out.mp4'))
+        self.assertTrue(self.exists(analysis.output_video_path))
+
+    def test_abandoned_temp_files(self):
+        analysis = self.make_analysis()
+        folder = f'analysis_results/{analysis.id}'
+        for name in ('temp_old.mp4', 'temp_new.mp4', 'chunks/segment_0000.mp4'):
+            self.write_media(f'{folder}/{name}')
+        self.write_media('uploads/tmp/abc.part')
+        self.make_old(f'{folder}/temp_old.mp4')
+        self.make_old(f'{folder}/chunks/segment_0000.mp4')
+        self.make_old(f'{folder}/chunks')
+        self.make_old('uploads/tmp/abc.part')
+
+        stats = sweep_orphans()
+        self.assertEqual(stats['temp_files'], 2)
+        self.assertFalse(self.exists(f'{folder}/temp_old.mp4'))
+        self.assertFalse(self.exists(f'{folder}/chunks'))
+        self.assertTrue(self.exists(f'{folder}/temp_new.mp4'))
+        self.assertTrue(self.exists('uploads/tmp/abc.part'))
+
+    def test_temp_files_of_running_job_are_kept(self):
+        analysis = self.make_analysis()
+        name = f'analysis_results/{analysis.id}/temp_out.mp4'
+        self.write_media(name)
+        self.make_old(name)
+        Job.objects.create(kind='analysis', object_id=analysis.id, status='running')
+
+        self.assertEqual(sweep_orphans()['temp_files'], 0)
+        self.assertTrue(self.exists(name))
+
+    def test_records_follow_rows(self):
+        from analysis.models import Analysis
+
+        stale = self.make_analysis()
+        Analysis.objects.filter(pk=stale.pk).delete()  # QuerySet.delete도 신호를 보내므로 기록을 직접 남김
+        DerivedArtifact.objects.create(kind='analysis', object_id=stale.pk, name='analysis_results/x/out.mp4')
+
+        unrecorded = self.make_analysis()
+        DerivedArtifact.objects.filter(name=unrecorded.output_video_path).delete()
+
+        stats = sweep_orphans()
+        self.assertEqual(stats['records'], 2)
+        self.assertFalse(DerivedArtifact.objects.filter(object_id=stale.pk).exists())
+        self.assertTrue(DerivedArtifact.objects.filter(name=unrecorded.output_video_path).exists())
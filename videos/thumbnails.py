@@ -0,0 +1,93 @@
+"""
+이미지 썸네일 (여러 크기, WebP/JPEG)
+
+미디어 목록과 상세 화면이 원본(최대 10MB)을 그대로 내려받지 않도록
+THUMBNAIL_WIDTHS 너비의 썸네일을 만든다. 업로드 후 처리(image_ingest)에서
+모두 만들고, 그 전에 올라온 이미지는 처음 요청될 때 해당 크기만 만든다.
+
+경로: MEDIA_ROOT/thumbnails/images/<id>/<너비>.<webp|jpg>
+URL에는 버전(content_hash 또는 파일 수정 시간)을 붙이므로 응답은 오래 캐시해도 된다.
+"""
+import os
+
+from PIL import Image as PILImage, ImageOps
+from django.conf import settings
+
+from .storage import get_media_store, local_media_path
+
+
+# 썸네일 너비 (원본보다 크게 늘리지 않음) / 포맷별 확장자와 품질
+THUMBNAIL_WIDTHS = (320, 640, 1280)
+THUMBNAIL_FORMATS = {
+    'webp': {'ext': 'webp', 'format': 'WEBP', 'content_type': 'image/webp', 'options': {'quality': 80, 'method': 4}},
+    'jpeg': {'ext': 'jpg', 'format': 'JPEG', 'content_type': 'image/jpeg', 'options': {'quality': 85, 'progressive': True}},
+}
+
+# 버전이 붙은 URL의 Cache-Control (1년)
+THUMBNAIL_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def get_thumbnail_dir(image_id):
+    return os.path.join(settings.MEDIA_ROOT, 'thumbnails', 'images', str(image_id))
+
+
+def get_thumbnail_path(image_id, width, fmt):
+    return os.path.join(get_thumbnail_dir(image_id), f"{width}.{THUMBNAIL_FORMATS[fmt]['ext']}")
+
+
+def get_thumbnail_version(image):
+    """캐시 무효화용 버전 (파일이 바뀌면 달라짐)"""
+    if image.content_hash:
+        return image.content_hash[:12]
+    stat = get_media_store().stat(image.file.name)
+    return format(int(stat[1]), 'x') if stat else '0'
+
+
+def choose_format(accept):
+    """Accept 헤더가 WebP를 받으면 WebP, 아니면 JPEG"""
+    return 'webp' if 'image/webp' in (accept or '') else 'jpeg'
+
+
+def _save_thumbnail(source, width, fmt, path):
+    """source를 width 이하로 줄여 path에 원자적으로 저장"""
+    spec = THUMBNAIL_FORMATS[fmt]
+    image = source.copy()
+    if image.width > width:
+        image.thumbnail((width, image.height), PILImage.Resampling.LANCZOS)
+    if fmt == 'jpeg' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    elif fmt == 'webp' and image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.part"
+    try:
+        image.save(temp_path, format=spec['format'], **spec['options'])
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def _open_source(image):
+    source = PILImage.open(local_media_path(image.file.name))
+    source.draft('RGB', (max(THUMBNAIL_WIDTHS), max(THUMBNAIL_WIDTHS)))  # JPEG은 축소 디코딩
+    return ImageOps.exif_transpose(source)
+
+
+def generate_image_thumbnails(image):
+    """모든 크기/포맷 썸네일 생성 (원본을 한 번만 디코딩)"""
+    with _open_source(image) as source:
+        for width in THUMBNAIL_WIDTHS:
+            for fmt in THUMBNAIL_FORMATS:
+                _save_thumbnail(source, width, fmt, get_thumbnail_path(image.pk, width, fmt))
+    print(f"🖼️  썸네일 생성: {image.title} ({', '.join(map(str, THUMBNAIL_WIDTHS))}px)")
+
+
+def ensure_image_thumbnail(image, width, fmt):
+    """썸네일 경로 반환 (없으면 이 크기만 생성)"""
+    path = get_thumbnail_path(image.pk, width, fmt)
+    if not os.path.exists(path):
+        with _open_source(image) as source:
+            _save_thumbnail(source, width, fmt, path)
+    return path
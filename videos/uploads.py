@@ -0,0 +1,354 @@
+"""
+분할 업로드 (tus 방식, 이어받기 가능)
+
+폼 업로드는 요청 하나로 파일 전체를 받으므로 연결이 끊기면 처음부터 다시
+보내야 한다. 분할 업로드는 세 단계로 나눈다.
+
+1. 생성: POST uploads/ (title, description, type, filename, size, checksum)
+   -> UploadSession + 빈 임시 파일 (MEDIA_ROOT/uploads/tmp/<id>.part)
+2. 전송: PATCH uploads/<id>/ (Upload-Offset 헤더 + 본문)
+   요청 본문을 UPLOAD_COPY_SIZE 단위로 읽어 임시 파일의 offset 위치에 쓴다.
+   본문 전체를 메모리에 올리지 않으므로 동시 업로드가 많아도 요청당
+   메모리는 일정하다. 연결이 끊기면 HEAD로 받은 크기를 확인하고 이어서 보낸다.
+   Upload-Checksum: <알고리즘> <base64> 헤더가 있으면 청크마다 검증한다.
+3. 완료: POST uploads/<id>/finalize/
+   크기와 SHA-256(생성 시 checksum을 준 경우)을 확인하고 임시 파일을
+   내용 주소 원본(videos.blobs)으로 옮긴다 (같은 파일 시스템이므로 복사 없음,
+   같은 내용이 이미 있으면 임시 파일은 지우고 기존 원본을 공유).
+   이후 Video/Image 저장은 폼 업로드와 같은 경로(save_video / save_image)를 탄다.
+
+폼 업로드는 HashingMemoryFileUploadHandler / HashingTemporaryFileUploadHandler가
+파일을 받으면서 SHA-256을 계산한다 (FILE_UPLOAD_HANDLERS).
+"""
+import base64
+import binascii
+import hashlib
+import os
+from datetime import timedelta
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from django.conf import settings
+from django.core.files.uploadhandler import MemoryFileUploadHandler, TemporaryFileUploadHandler
+from django.utils import timezone
+
+from .blobs import acquire_blob, attach_blob
+from .forms import IMAGE_EXTENSIONS, MAX_IMAGE_SIZE, MAX_VIDEO_SIZE
+from .models import Image, UploadSession, Video
+
+
+# PATCH 1회 최대 본문 크기 / 완료되지 않은 세션 보관 시간 (초)
+DEFAULT_UPLOAD_CHUNK_MAX_SIZE = 16 * 1024 * 1024
+DEFAULT_UPLOAD_SESSION_EXPIRY = 24 * 60 * 60
+
+# 요청 본문을 읽어 파일에 쓰는 단위
+UPLOAD_COPY_SIZE = 64 * 1024
+
+CHECKSUM_ALGORITHMS = ('sha256', 'sha1', 'md5')
+
+
+class UploadError(Exception):
+    """업로드 요청 오류 (status: 응답 상태 코드)"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class HashingUploadHandlerMixin:
+    """받는 청크로 SHA-256을 계산해 완성된 파일의 sha256 속성에 붙임"""
+
+    def new_file(self, *args, **kwargs):
+        self.digest = hashlib.sha256()
+        return super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        result = super().receive_data_chunk(raw_data, start)
+        # None이면 이 핸들러가 청크를 가져간 것 (아니면 다음 핸들러가 받음)
+        if result is None:
+            self.digest.update(raw_data)
+        return result
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.sha256 = self.digest.hexdigest()
+        return file
+
+
+class HashingMemoryFileUploadHandler(HashingUploadHandlerMixin, MemoryFileUploadHandler):
+    pass
+
+
+class HashingTemporaryFileUploadHandler(HashingUploadHandlerMixin, TemporaryFileUploadHandler):
+    pass
+
+
+def get_chunk_max_size():
+    return getattr(settings, 'UPLOAD_CHUNK_MAX_SIZE', DEFAULT_UPLOAD_CHUNK_MAX_SIZE)
+
+
+def parse_checksum_header(header):
+    """Upload-Checksum 헤더 -> (알고리즘, digest bytes), 없으면 None"""
+    if not header:
+        return None
+    algorithm, _, value = header.strip().partition(' ')
+    algorithm = algorithm.lower()
+    if algorithm not in CHECKSUM_ALGORITHMS:
+        raise UploadError(f"지원하지 않는 체크섬 알고리즘입니다: {algorithm}")
+    try:
+        return algorithm, base64.b64decode(value.strip(), validate=True)
+    except (binascii.Error, ValueError):
+        raise UploadError("Upload-Checksum 값이 올바른 base64가 아닙니다")
+
+
+def create_upload(media_type, title, filename, size, description='', checksum=''):
+    """업로드 세션 생성 (크기/형식 검사 후 빈 임시 파일 생성)"""
+    cleanup_expired_uploads()
+
+    if media_type not in ('video', 'image'):
+        raise UploadError(f"알 수 없는 업로드 종류입니다: {media_type}")
+    if not title:
+        raise UploadError("제목을 입력해주세요")
+    if not filename:
+        raise UploadError("파일명이 없습니다")
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise UploadError("파일 크기가 올바르지 않습니다")
+    if size <= 0:
+        raise UploadError("빈 파일은 업로드할 수 없습니다")
+
+    if media_type == 'video':
+        if size > MAX_VIDEO_SIZE:
+            raise UploadError('파일 크기는 1GB를 초과할 수 없습니다.', status=413)
+    else:
+        if size > MAX_IMAGE_SIZE:
+            raise UploadError('이미지 크기는 10MB를 초과할 수 없습니다.', status=413)
+        if os.path.splitext(filename)[1].lower() not in IMAGE_EXTENSIONS:
+            raise UploadError(f'허용되지 않는 파일 형식입니다. 허용 형식: {", ".join(IMAGE_EXTENSIONS)}')
+
+    checksum = (checksum or '').strip().lower()
+    if checksum and (len(checksum) != 64 or any(c not in '0123456789abcdef' for c in checksum)):
+        raise UploadError("checksum은 SHA-256 16진수 문자열이어야 합니다")
+
+    session = UploadSession.objects.create(
+        media_type=media_type,
+        title=title[:200],
+        description=description or '',
+        filename=os.path.basename(filename)[:255],
+        total_size=size,
+        checksum=checksum,
+    )
+    path = session.get_temp_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'wb').close()
+
+    print(f"📤 분할 업로드 시작: {session.filename} ({size} bytes, {session.id})")
+    return session
+
+
+def _try_lock(file, position):
+    """
+    임시 파일 배타 잠금 (다른 요청이 잡고 있으면 False)
+
+    POSIX는 flock, Windows는 msvcrt로 position 위치 1바이트를 잠근다.
+    Windows 잠금은 강제 잠금이므로 파일 끝(total_size) 뒤를 잠가 읽기/쓰기를 막지 않는다.
+    """
+    if fcntl is not None:
+        try:
+            fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        return True
+
+    file.seek(position)
+    try:
+        msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+def _unlock(file, position):
+    if fcntl is not None:
+        return  # flock은 파일을 닫으면 풀림
+    file.seek(position)
+    msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def append_chunk(session, offset, stream, length, checksum=None):
+    """
+    요청 본문을 임시 파일의 offset 위치에 기록하고 새 offset 반환
+
+    같은 세션에 동시에 들어온 PATCH는 파일 잠금으로 하나만 받고 나머지는
+    409로 돌려보낸다 (클라이언트는 HEAD로 offset을 다시 확인).
+    """
+    if session.status != 'uploading':
+        raise UploadError("이미 끝난 업로드입니다", status=409)
+    if length is None:
+        raise UploadError("Content-Length 헤더가 필요합니다", status=411)
+    if length > get_chunk_max_size():
+        raise UploadError(f"청크 크기는 {get_chunk_max_size()} bytes를 넘을 수 없습니다", status=413)
+
+    path = session.get_temp_path()
+    try:
+        file = open(path, 'r+b')
+    except FileNotFoundError:
+        raise UploadError("업로드 임시 파일이 없습니다. 처음부터 다시 업로드해주세요", status=410)
+
+    with file:
+        if not _try_lock(file, session.total_size):
+            raise UploadError("같은 업로드에 대한 다른 요청이 진행 중입니다", status=409)
+        try:
+            session.refresh_from_db(fields=['offset', 'status'])
+            if session.status != 'uploading':
+                raise UploadError("이미 끝난 업로드입니다", status=409)
+            if offset != session.offset:
+                raise UploadError(f"Upload-Offset이 맞지 않습니다 (서버: {session.offset})", status=409)
+            if offset + length > session.total_size:
+                raise UploadError("파일 크기를 넘는 데이터입니다", status=413)
+
+            digest = hashlib.new(checksum[0]) if checksum else None
+            file.seek(offset)
+            written = 0
+            while written < length:
+                data = stream.read(min(UPLOAD_COPY_SIZE, length - written))
+                if not data:
+                    break
+                file.write(data)
+                if digest is not None:
+                    digest.update(data)
+                written += len(data)
+
+            if digest is not None and (written < length or digest.digest() != checksum[1]):
+                # tus checksum 확장: 460 Checksum Mismatch, 받은 청크는 버림
+                file.truncate(offset)
+                raise UploadError("청크 체크섬이 일치하지 않습니다", status=460)
+
+            # 끊긴 요청은 받은 만큼만 반영 (이어받기)
+            file.flush()
+            new_offset = offset + written
+            UploadSession.objects.filter(pk=session.pk).update(offset=new_offset, updated_at=timezone.now())
+            session.offset = new_offset
+        finally:
+            _unlock(file, session.total_size)
+
+    if written < length:
+        raise UploadError(f"본문이 Content-Length보다 짧습니다 ({written}/{length})")
+    return new_offset
+
+
+def compute_file_sha256(path):
+    """파일 SHA-256 (UPLOAD_COPY_SIZE 단위로 읽음)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        while True:
+            data = file.read(UPLOAD_COPY_SIZE)
+            if not data:
+                break
+            digest.update(data)
+    return digest.hexdigest()
+
+
+def finalize_upload(session):
+    """
+    크기/체크섬 확인 후 임시 파일을 원본(blob)으로 옮기고 저장 전 Video/Image 반환
+
+    반환된 객체는 save_video / save_image로 저장한 뒤 complete_upload로 세션에 연결한다.
+    같은 세션의 마무리 요청이 동시에 오면 세션을 'finalizing'으로 먼저 바꾼 요청만
+    진행하고 나머지는 409. 임시 파일을 옮기기 전에 실패하면 다시 마무리할 수 있도록
+    'uploading'으로 되돌린다.
+    """
+    if not UploadSession.objects.filter(pk=session.pk, status='uploading').update(
+        status='finalizing', updated_at=timezone.now(),
+    ):
+        raise UploadError("이미 끝났거나 마무리 중인 업로드입니다", status=409)
+    session.refresh_from_db(fields=['status', 'offset'])
+
+    try:
+        return _finalize_upload(session)
+    except Exception:
+        # 체크섬 불일치는 이미 실패 처리됨
+        if session.status == 'finalizing':
+            reset_upload(session)
+        raise
+
+
+def _finalize_upload(session):
+    if session.offset != session.total_size:
+        raise UploadError(f"아직 다 받지 못했습니다 ({session.offset}/{session.total_size})", status=409)
+
+    path = session.get_temp_path()
+    if not os.path.isfile(path):
+        raise UploadError("업로드 임시 파일이 없습니다. 처음부터 다시 업로드해주세요", status=410)
+
+    actual = compute_file_sha256(path)
+    if session.checksum and actual != session.checksum:
+        fail_upload(session, f"SHA-256 불일치 (기대 {session.checksum}, 실제 {actual})")
+        raise UploadError("파일 체크섬이 일치하지 않습니다. 다시 업로드해주세요", status=460)
+
+    if session.media_type == 'image':
+        media = Image(title=session.title, description=session.description)
+    else:
+        media = Video(title=session.title, description=session.description)
+
+    # 내용 주소 원본으로 옮기기만 함 (같은 내용이 있으면 임시 파일은 지움)
+    blob, _ = acquire_blob(actual, session.filename, session.total_size, source_path=path)
+    attach_blob(media, blob)
+    return media
+
+
+def complete_upload(session, media):
+    """저장된 Video/Image를 세션에 연결"""
+    session.status = 'completed'
+    if isinstance(media, Video):
+        session.video = media
+    else:
+        session.image = media
+    session.save(update_fields=['status', 'video', 'image', 'updated_at'])
+    print(f"✅ 분할 업로드 완료: {session.filename} -> {session.media_type} {media.pk}")
+
+
+def reset_upload(session):
+    """마무리하다 멈춘 세션을 다시 업로드 중으로"""
+    UploadSession.objects.filter(pk=session.pk, status='finalizing').update(
+        status='uploading', updated_at=timezone.now(),
+    )
+    session.status = 'uploading'
+
+
+def fail_upload(session, message):
+    session.status = 'failed'
+    session.error_message = message
+    session.save(update_fields=['status', 'error_message', 'updated_at'])
+    remove_temp_file(session)
+    print(f"❌ 분할 업로드 실패: {session.filename} - {message}")
+
+
+def remove_temp_file(session):
+    try:
+        os.remove(session.get_temp_path())
+    except FileNotFoundError:
+        pass
+
+
+def abort_upload(session):
+    """업로드 취소 (임시 파일과 세션 삭제)"""
+    remove_temp_file(session)
+    session.delete()
+
+
+def cleanup_expired_uploads():
+    """UPLOAD_SESSION_EXPIRY가 지난 미완료 세션 정리"""
+    expiry = getattr(settings, 'UPLOAD_SESSION_EXPIRY', DEFAULT_UPLOAD_SESSION_EXPIRY)
+    cutoff = timezone.now() - timedelta(seconds=expiry)
+    expired = list(UploadSession.objects.filter(status__in=('uploading', 'finalizing', 'failed'), updated_at__lt=cutoff))
+    for session in expired:
+        abort_upload(session)
+    if expired:
+        print(f"🧹 만료된 업로드 {len(expired)}개 정리")
@@ -9,6 +9,11 @@ urlpatterns = [
     # 통합 업로드
     path('upload/', views.MediaUploadView.as_view(), name='upload_media'),
     
+    # 분할 업로드 (이어받기)
+    path('uploads/', views.UploadCreateView.as_view(), name='upload_create'),
+    path('uploads/<uuid:upload_id>/', views.UploadSessionView.as_view(), name='upload_session'),
+    path('uploads/<uuid:upload_id>/finalize/', views.UploadFinalizeView.as_view(), name='upload_finalize'),
+    
     # 동영상 관련
     path('video/<int:pk>/', views.VideoDetailView.as_view(), name='video_detail'),
     path('video/<int:pk>/delete/', views.VideoDeleteView.as_view(), name='video_delete'),
@@ -17,4 +22,5 @@ urlpatterns = [
     # 이미지 관련
     path('image/<int:pk>/', views.ImageDetailView.as_view(), name='image_detail'),
     path('image/<int:pk>/delete/', views.ImageDeleteView.as_view(), name='image_delete'),
+    path('image/<int:pk>/thumb/<int:width>/', views.ImageThumbnailView.as_view(), name='image_thumbnail'),
 ]
\ No newline at end of file
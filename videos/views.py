@@ -1,83 +1,87 @@
-import os
-import re
-import ffmpeg
+import json
 import mimetypes
-
-from PIL import Image
-from io import BytesIO
+import os
 
 from django.contrib import messages
-from django.core.files.base import ContentFile
-from django.http import FileResponse, Http404, HttpResponse
+from django.http import Http404, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse, reverse_lazy
 from django.views import View
 from django.views.generic import CreateView, DeleteView, DetailView, ListView
 
+from .blobs import release_blob, store_upload
 from .forms import VideoUploadForm, ImageUploadForm
-from .models import Video, Image as ImageModel
+from .ingest import start_ingest_task
+from .listing import get_media_page
+from .models import Video, Image as ImageModel, UploadSession
+from .storage import get_local_path, media_name
+from .streaming import serve_file, serve_media
+from .thumbnails import (
+    THUMBNAIL_CACHE_CONTROL, THUMBNAIL_FORMATS, THUMBNAIL_WIDTHS, choose_format,
+    ensure_image_thumbnail, get_thumbnail_version,
+)
+from .uploads import (
+    UploadError, abort_upload, append_chunk, complete_upload, create_upload,
+    fail_upload, finalize_upload, get_chunk_max_size, parse_checksum_header,
+)
+
+TUS_VERSION = '1.0.0'
 
 # ============ 통합 미디어 목록 ============
 class MediaListView(ListView):
-    """동영상과 이미지 통합 목록"""
+    """동영상과 이미지 통합 목록 (DB에서 합쳐 키셋 페이지네이션, videos.listing)"""
     template_name = 'videos/media_list.html'
     context_object_name = 'media_items'
-    paginate_by = 12
 
     def get_queryset(self):
         tab = self.request.GET.get('tab', 'all')
         search = self.request.GET.get('search', '')
         
-        media_items = []
+        self.page = get_media_page(
+            tab,
+            search,
+            after=self.request.GET.get('after'),
+            before=self.request.GET.get('before'),
+        )
         
-        # 동영상 가져오기
-        if tab in ['all', 'video']:
-            videos = Video.objects.all()
-            if search:
-                videos = videos.filter(title__icontains=search)
-            
-            for video in videos:
+        media_items = []
+        for obj in self.page.items:
+            if isinstance(obj, Video):
                 media_items.append({
                     'type': 'video',
-                    'id': video.id,
-                    'title': video.title,
-                    'description': video.description,
-                    'file': video.file,
-                    'thumbnail': video.thumbnail,
-                    'file_size': video.get_file_size_display(),
-                    'uploaded_at': video.uploaded_at,
-                    'obj': video,
+                    'id': obj.id,
+                    'title': obj.title,
+                    'description': obj.description,
+                    'file': obj.file,
+                    'thumbnail': obj.thumbnail,
+                    'file_size': obj.get_file_size_display(),
+                    'status': obj.status,
+                    'uploaded_at': obj.uploaded_at,
+                    'obj': obj,
                 })
-        
-        # 이미지 가져오기
-        if tab in ['all', 'image']:
-            images = ImageModel.objects.all()
-            if search:
-                images = images.filter(title__icontains=search)
-            
-            for image in images:
+            else:
                 media_items.append({
                     'type': 'image',
-                    'id': image.id,
-                    'title': image.title,
-                    'description': image.description,
-                    'file': image.file,
-                    'thumbnail': image.file,
-                    'file_size': image.get_file_size_display(),
-                    'uploaded_at': image.uploaded_at,
-                    'resolution': image.get_resolution_display(),
-                    'obj': image,
+                    'id': obj.id,
+                    'title': obj.title,
+                    'description': obj.description,
+                    'file': obj.file,
+                    'thumbnail': obj.file,
+                    'thumbnail_version': get_thumbnail_version(obj),
+                    'file_size': obj.get_file_size_display(),
+                    'status': obj.status,
+                    'uploaded_at': obj.uploaded_at,
+                    'resolution': obj.get_resolution_display(),
+                    'obj': obj,
                 })
         
-        # 최신순 정렬
-        media_items.sort(key=lambda x: x['uploaded_at'], reverse=True)
-        
         return media_items
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['tab'] = self.request.GET.get('tab', 'all')
         context['search'] = self.request.GET.get('search', '')
+        context['page'] = self.page
         context['video_count'] = Video.objects.count()
         context['image_count'] = ImageModel.objects.count()
         return context
@@ -94,21 +98,7 @@ class VideoCreateView(CreateView):
     template_name = 'videos/video_upload.html'
 
     def form_valid(self, form):
-        self.object = form.save(commit=False)
-
-        if self.object.file:
-            self.object.file_size = self.object.file.size
-
-        self.object.save()
-
-        if self.object.file:
-            thumbnail_content = generate_thumbnail(self.object.file.path)
-            if thumbnail_content:
-                original_name = os.path.splitext(os.path.basename(self.object.file.name))[0]
-                thumbnail_name = f"{original_name}_thumb.jpg"
-                self.object.thumbnail.save(thumbnail_name, thumbnail_content, save=False)
-
-        self.object.save()
+        self.object = save_video(form.save(commit=False))
 
         messages.success(self.request, '동영상이 성공적으로 업로드되었습니다!')
         return redirect(self.get_success_url())
@@ -140,59 +130,37 @@ class VideoDeleteView(DeleteView):
     context_object_name = 'video'
     success_url = reverse_lazy('media_list')
 
-    def delete(self, request, *args, **kwargs):
-        self.object = self.get_object()
-
-        if self.object.file and os.path.isfile(self.object.file.path):
-            os.remove(self.object.file.path)
-
-        if self.object.thumbnail and os.path.isfile(self.object.thumbnail.path):
-            os.remove(self.object.thumbnail.path)
-
-        messages.success(request, '동영상이 삭제되었습니다.')
-        return super().delete(request, *args, **kwargs)
+    def form_valid(self, form):
+        # 파일(원본, 썸네일, 프록시, 미리보기, 분석/탐지 결과)은 post_delete 신호에서 정리
+        # (videos.blobs, videos.retention)
+        messages.success(self.request, '동영상이 삭제되었습니다.')
+        return super().form_valid(form)
 
 class VideoStreamView(View):
     def get(self, request, pk):
         video = get_object_or_404(Video, pk=pk)
-        video_path = video.file.path
-
-        if not os.path.exists(video_path):
-            raise Http404('동영상 파일을 찾을 수 없습니다.')
-
-        file_size = os.path.getsize(video_path)
-        content_type, _ = mimetypes.guess_type(video_path)
-        if not content_type:
-            content_type = 'video/mp4'
-
-        range_header = request.META.get('HTTP_RANGE', '').strip()
-        range_re = re.compile(r'bytes\s*=\s*(\d+)\s*-\s*(\d*)', re.I)
-        range_match = range_re.match(range_header)
-
-        if range_match:
-            first_byte, last_byte = range_match.groups()
-            first_byte = int(first_byte) if first_byte else 0
-            last_byte = int(last_byte) if last_byte else file_size - 1
-
-            if last_byte >= file_size:
-                last_byte = file_size - 1
-
-            length = last_byte - first_byte + 1
-
-            with open(video_path, 'rb') as file:
-                file.seek(first_byte)
-                data = file.read(length)
-
-            response = HttpResponse(data, status=206, content_type=content_type)
-            response['Content-Length'] = str(length)
-            response['Content-Range'] = f'bytes {first_byte}-{last_byte}/{file_size}'
-            response['Accept-Ranges'] = 'bytes'
-            return response
-
-        response = FileResponse(open(video_path, 'rb'), content_type=content_type)
-        response['Content-Length'] = str(file_size)
-        response['Accept-Ranges'] = 'bytes'
-        return response
+        # ?proxy=1: 업로드 후 처리에서 만든 재생용 프록시 (없으면 원본)
+        if request.GET.get('proxy') and video.proxy:
+            return serve_media(request, video.proxy.name, 'video/mp4', '동영상 파일을 찾을 수 없습니다.')
+        content_type = mimetypes.guess_type(video.file.name)[0] or 'video/mp4'
+        return serve_media(request, video.file.name, content_type, '동영상 파일을 찾을 수 없습니다.')
+
+class MediaFileView(View):
+    """MEDIA_URL 파일 (로컬에 없으면 미디어 저장소에서 요청 범위만 읽어 전송)"""
+
+    # 받는 중인 업로드 / 저장소 캐시는 내보내지 않음
+    PRIVATE_PREFIXES = ('uploads/tmp/', '.cache/')
+
+    def get(self, request, name):
+        # 'uploads//tmp/', './uploads/tmp/' 같은 경로도 막도록 정규화한 이름으로 확인
+        # (Windows는 대소문자를 구분하지 않으므로 normcase로 비교)
+        try:
+            name = media_name(get_local_path(name))
+        except ValueError:
+            raise Http404('파일을 찾을 수 없습니다.')
+        if os.path.normcase(name + '/').startswith(tuple(map(os.path.normcase, self.PRIVATE_PREFIXES))):
+            raise Http404('파일을 찾을 수 없습니다.')
+        return serve_media(request, name)
 
 # ============ 이미지 뷰 ============
 class ImageCreateView(CreateView):
@@ -201,20 +169,7 @@ class ImageCreateView(CreateView):
     template_name = 'videos/image_upload.html'
 
     def form_valid(self, form):
-        self.object = form.save(commit=False)
-
-        if self.object.file:
-            self.object.file_size = self.object.file.size
-            
-            # 이미지 해상도 저장
-            try:
-                from PIL import Image as PILImage
-                img = PILImage.open(self.object.file)
-                self.object.width, self.object.height = img.size
-            except Exception as e:
-                print(f"이미지 해상도 추출 실패: {e}")
-
-        self.object.save()
+        self.object = save_image(form.save(commit=False))
         messages.success(self.request, '이미지가 성공적으로 업로드되었습니다!')
         return redirect(self.get_success_url())
 
@@ -225,25 +180,49 @@ class ImageCreateView(CreateView):
     def get_success_url(self):
         return reverse('image_detail', kwargs={'pk': self.object.pk})
 
+class ImageThumbnailView(View):
+    """이미지 썸네일 (없으면 생성, WebP를 받는 브라우저에는 WebP)"""
+
+    def get(self, request, pk, width):
+        if width not in THUMBNAIL_WIDTHS:
+            raise Http404('지원하지 않는 썸네일 크기입니다.')
+        image = get_object_or_404(ImageModel, pk=pk)
+        fmt = choose_format(request.META.get('HTTP_ACCEPT'))
+        try:
+            path = ensure_image_thumbnail(image, width, fmt)
+        except (OSError, ValueError) as e:
+            print(f"이미지 썸네일 생성 실패: {e}")
+            raise Http404('이미지 파일을 찾을 수 없습니다.')
+
+        response = serve_file(request, path, THUMBNAIL_FORMATS[fmt]['content_type'])
+        # URL에 현재 버전이 붙어 있을 때만 오래 캐시 (파일이 바뀌면 URL도 바뀜)
+        if request.GET.get('v') == get_thumbnail_version(image):
+            response['Cache-Control'] = THUMBNAIL_CACHE_CONTROL
+        else:
+            response['Cache-Control'] = 'no-cache'
+        response['Vary'] = 'Accept'
+        return response
+
 class ImageDetailView(DetailView):
     model = ImageModel
     template_name = 'videos/image_detail.html'
     context_object_name = 'image'
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['thumbnail_version'] = get_thumbnail_version(self.object)
+        return context
+
 class ImageDeleteView(DeleteView):
     model = ImageModel
     template_name = 'videos/image_delete.html'
     context_object_name = 'image'
     success_url = reverse_lazy('media_list')
 
-    def delete(self, request, *args, **kwargs):
-        self.object = self.get_object()
-
-        if self.object.file and os.path.isfile(self.object.file.path):
-            os.remove(self.object.file.path)
-
-        messages.success(request, '이미지가 삭제되었습니다.')
-        return super().delete(request, *args, **kwargs)
+    def form_valid(self, form):
+        # 파일(원본, 썸네일, 분석 결과)은 post_delete 신호에서 정리 (videos.blobs, videos.retention)
+        messages.success(self.request, '이미지가 삭제되었습니다.')
+        return super().form_valid(form)
 
 # ============ 통합 업로드 뷰 ============
 class MediaUploadView(View):
@@ -265,23 +244,151 @@ class MediaUploadView(View):
         else:
             return VideoCreateView.as_view()(request)
 
-# ============ 헬퍼 함수 ============
-def generate_thumbnail(video_path):
-    try:
-        out, _ = (
-            ffmpeg.input(video_path, ss=0)
-            .output('pipe:', vframes=1, format='image2', vcodec='mjpeg')
-            .run(capture_stdout=True, capture_stderr=True)
-        )
+# ============ 분할 업로드 (videos.uploads) ============
+def get_upload_headers(session):
+    return {
+        'Tus-Resumable': TUS_VERSION,
+        'Upload-Offset': str(session.offset),
+        'Upload-Length': str(session.total_size),
+        'Cache-Control': 'no-store',
+    }
 
-        image = Image.open(BytesIO(out))
-        image.thumbnail((640, 360), Image.Resampling.LANCZOS)
+def upload_error_response(error):
+    response = JsonResponse({'error': str(error)}, status=error.status)
+    response['Tus-Resumable'] = TUS_VERSION
+    return response
 
-        thumb_io = BytesIO()
-        image.save(thumb_io, format='JPEG', quality=85)
-        thumb_io.seek(0)
+class UploadCreateView(View):
+    """업로드 세션 생성 (JSON 또는 폼 데이터)"""
 
-        return ContentFile(thumb_io.read())
-    except Exception as exc:
-        print(f"썸네일 생성 오류: {exc}")
-        return None
\ No newline at end of file
+    def post(self, request):
+        if request.content_type == 'application/json':
+            try:
+                data = json.loads(request.body or '{}')
+            except ValueError:
+                return JsonResponse({'error': '요청 형식이 올바르지 않습니다.'}, status=400)
+        else:
+            data = request.POST
+
+        try:
+            session = create_upload(
+                media_type=data.get('type', 'video'),
+                title=data.get('title', ''),
+                filename=data.get('filename', ''),
+                size=data.get('size') or request.META.get('HTTP_UPLOAD_LENGTH'),
+                description=data.get('description', ''),
+                checksum=data.get('checksum', ''),
+            )
+        except UploadError as e:
+            return upload_error_response(e)
+
+        location = reverse('upload_session', kwargs={'upload_id': session.id})
+        response = JsonResponse({
+            'id': str(session.id),
+            'url': location,
+            'finalize_url': reverse('upload_finalize', kwargs={'upload_id': session.id}),
+            'offset': 0,
+            'chunk_size': get_chunk_max_size(),
+        }, status=201)
+        response['Location'] = location
+        for header, value in get_upload_headers(session).items():
+            response[header] = value
+        return response
+
+class UploadSessionView(View):
+    """업로드 상태 조회(HEAD/GET), 청크 전송(PATCH), 취소(DELETE)"""
+
+    def get(self, request, upload_id):
+        session = get_object_or_404(UploadSession, id=upload_id)
+        response = JsonResponse({
+            'id': str(session.id),
+            'status': session.status,
+            'offset': session.offset,
+            'size': session.total_size,
+            'progress': session.get_progress(),
+            'error': session.error_message,
+        })
+        for header, value in get_upload_headers(session).items():
+            response[header] = value
+        return response
+
+    def patch(self, request, upload_id):
+        session = get_object_or_404(UploadSession, id=upload_id)
+        try:
+            offset = int(request.META.get('HTTP_UPLOAD_OFFSET', ''))
+        except ValueError:
+            return upload_error_response(UploadError('Upload-Offset 헤더가 필요합니다.'))
+        length = request.META.get('CONTENT_LENGTH')
+
+        try:
+            append_chunk(
+                session,
+                offset,
+                request,
+                int(length) if length else None,
+                checksum=parse_checksum_header(request.META.get('HTTP_UPLOAD_CHECKSUM')),
+            )
+        except UploadError as e:
+            return upload_error_response(e)
+
+        response = HttpResponse(status=204)
+        for header, value in get_upload_headers(session).items():
+            response[header] = value
+        return response
+
+    def delete(self, request, upload_id):
+        session = get_object_or_404(UploadSession, id=upload_id)
+        abort_upload(session)
+        response = HttpResponse(status=204)
+        response['Tus-Resumable'] = TUS_VERSION
+        return response
+
+class UploadFinalizeView(View):
+    """업로드 완료: 검증 후 폼 업로드와 같은 경로로 Video/Image 저장"""
+
+    def post(self, request, upload_id):
+        session = get_object_or_404(UploadSession, id=upload_id)
+        try:
+            media = finalize_upload(session)
+        except UploadError as e:
+            return upload_error_response(e)
+
+        try:
+            if session.media_type == 'image':
+                media = save_image(media)
+                url = reverse('image_detail', kwargs={'pk': media.pk})
+            else:
+                media = save_video(media)
+                url = reverse('video_detail', kwargs={'pk': media.pk})
+        except Exception as e:
+            # 임시 파일은 이미 원본(blob)으로 옮겨졌으므로 다시 마무리할 수 없음
+            if media.pk is None:
+                release_blob(media.blob_id)
+            fail_upload(session, f"저장 실패: {e}")
+            raise
+        complete_upload(session, media)
+
+        return JsonResponse({'type': session.media_type, 'id': media.pk, 'url': url}, status=201)
+
+# ============ 헬퍼 함수 ============
+def save_video(video):
+    """업로드된 동영상 저장 (썸네일, 메타데이터는 업로드 후 처리 작업에서)"""
+    store_upload(video)
+    if video.file and not video.file_size:
+        video.file_size = video.file.size
+
+    video.status = 'pending'
+    video.save()
+    start_ingest_task(video)
+    return video
+
+def save_image(image):
+    """업로드된 이미지 저장 (해상도는 업로드 후 처리 작업에서)"""
+    store_upload(image)
+    if image.file and not image.file_size:
+        image.file_size = image.file.size
+
+    image.status = 'pending'
+    image.save()
+    start_ingest_task(image)
+    return image
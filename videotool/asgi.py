@@ -5,6 +5,10 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+진행률 SSE 스트림(/analysis/<id>/events/, /vision/<id>/events/)은 async 뷰라서
+ASGI 서버로 실행해야 연결마다 스레드를 점유하지 않는다.
+    예) uvicorn videotool.asgi:application
 """
 
 import os
@@ -19,6 +19,30 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# 미디어 저장소 (videos.storage, 여러 서버가 같은 파일을 볼 때 S3 호환 저장소 사용)
+MEDIA_STORAGE = {
+    'BACKEND': 'videos.storage.LocalMediaStore',    # MEDIA_ROOT 자체가 저장소
+    'OPTIONS': {},
+}
+# MEDIA_STORAGE = {                                 # S3 / MinIO (boto3 필요)
+#     'BACKEND': 'videos.storage.S3MediaStore',
+#     'OPTIONS': {
+#         'bucket': 'videotool',
+#         'endpoint_url': 'http://minio:9000',      # AWS S3면 생략
+#         'access_key': '...', 'secret_key': '...',
+#         'prefix': 'media/',
+#     },
+# }
+MEDIA_CACHE_ROOT = os.path.join(MEDIA_ROOT, '.cache')  # 원격 저장소에서 내려받은 파일 캐시
+MEDIA_CACHE_MAX_SIZE = 20 * 1024 * 1024 * 1024      # 캐시 최대 크기 (넘으면 오래 안 쓴 파일부터 삭제)
+
+# 파생 결과 보존 (videos.retention, runworker가 주기적으로 정리 / python manage.py prunemedia)
+MEDIA_DERIVED_BUDGET = None        # 분석/탐지 결과 파일 총 크기 상한 (바이트, 넘으면 오래 안 쓴 결과부터 삭제, None이면 제한 없음)
+MEDIA_MIN_FREE_SPACE = None        # MEDIA_ROOT 디스크 최소 여유 공간 (바이트, 모자라면 오래 안 쓴 결과부터 삭제)
+MEDIA_EVICTION_MIN_IDLE = 60 * 60  # 이 시간 안에 쓴 결과는 삭제하지 않음 (초)
+MEDIA_RETENTION_INTERVAL = 600     # 정리 주기 (초, None이면 runworker에서 정리하지 않음)
+MEDIA_TEMP_MAX_AGE = 6 * 60 * 60   # 이 시간 동안 갱신되지 않은 임시 파일(temp_*, *.part)은 중단된 작업의 잔여물로 보고 삭제 (초)
+
 # 모델 파일
 MODELS_ROOT = BASE_DIR / 'models'
 
@@ -34,10 +58,66 @@ os.makedirs(CUSTOM_MODELS_DIR, exist_ok=True)
 os.environ['TORCH_HOME'] = str(MODELS_ROOT)
 
 # 파일 업로드 설정
-FILE_UPLOAD_MAX_MEMORY_SIZE = 1024 * 1024 * 1024  # 1GB
-DATA_UPLOAD_MAX_MEMORY_SIZE = 1024 * 1024 * 1024
+FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024   # 10MB (넘으면 임시 파일에 기록, 메모리에 올리지 않음)
+DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024   # 파일을 제외한 요청 본문 최대 크기
 FILE_UPLOAD_PERMISSIONS = 0o644
 FILE_UPLOAD_DIRECTORY_PERMISSIONS = 0o755
+FILE_UPLOAD_HANDLERS = [                         # 받으면서 SHA-256 계산 (같은 내용은 원본 공유, videos.blobs)
+    "videos.uploads.HashingMemoryFileUploadHandler",
+    "videos.uploads.HashingTemporaryFileUploadHandler",
+]
+
+# 분할 업로드 (videos/uploads/, 끊겨도 이어서 전송)
+UPLOAD_CHUNK_MAX_SIZE = 16 * 1024 * 1024  # PATCH 1회 최대 본문 크기
+UPLOAD_SESSION_EXPIRY = 24 * 60 * 60      # 완료되지 않은 업로드 보관 시간 (초)
+
+# 업로드 후 처리 (작업 종류 'video_ingest' / 'image_ingest', 메타데이터·썸네일·해시)
+VIDEO_INGEST_PROXY = False   # 브라우저 재생용 H.264 프록시 생성
+VIDEO_PROXY_HEIGHT = 720     # 프록시 최대 높이
+VIDEO_SPRITE_INTERVAL = 10   # 스프라이트 타일 간격 (초, 키프레임만 사용)
+VIDEO_SPRITE_TILE_WIDTH = 160
+VIDEO_SPRITE_COLUMNS = 10    # 스프라이트 시트 한 장 = 10 x 10 타일
+VIDEO_SPRITE_ROWS = 10
+
+# 작업 큐 설정 (python manage.py runworker)
+JOB_WORKER_PROCESSES = None      # None이면 작업 종류별 최대 동시 실행 수
+JOB_CPU_BUDGET = None            # 작업들이 나눠 쓸 전체 스레드 수 (None이면 CPU 코어 수)
+JOB_CONCURRENCY = {              # 작업 1건당 스레드 예산 (max_concurrent로 상한 지정 가능)
+    'analysis': {'threads': 2},
+    'detection': {'threads': 4},
+}
+JOB_POLL_INTERVAL = 2.0          # 대기열 조회 간격 (초)
+JOB_HEARTBEAT_INTERVAL = 15.0    # 실행 중 작업 heartbeat 기록 간격 (초)
+JOB_HEARTBEAT_TIMEOUT = 120      # heartbeat가 끊긴 작업을 재시도하기까지 대기 시간 (초)
+JOB_MAX_ATTEMPTS = 3
+JOB_AGING_HALF_LIFE = 300        # 대기 300초마다 예상 비용을 절반으로 (긴 작업 기아 방지)
+JOB_STARVATION_TIMEOUT = 1800    # 이 시간 이상 기다린 작업이 있으면 작은 작업 끼워 넣기 중단 (초)
+JOB_PREEMPTION = True            # 급한 작업이 기다리면 낮은 우선순위 작업을 중단하고 다시 대기열로
+JOB_CANCEL_CHECK_INTERVAL = 0.5  # 실행 중 작업이 취소 요청을 확인하는 간격 (초)
+JOB_PROGRESS_INTERVAL = 0.25     # 진행률 기록 최소 간격 (초, 최대 4Hz)
+JOB_EVENTS_INTERVAL = 0.5        # 진행률 SSE가 변경 여부를 확인하는 간격 (초)
+JOB_EVENTS_MAX_DURATION = 300    # SSE 연결 최대 시간 (초, 이후 브라우저가 자동 재연결)
+
+# 구간 분할 병렬 탐지 (작업 종류 'chunked')
+DETECTION_CHUNK_SECONDS = 120    # 구간 길이 (초)
+DETECTION_CHUNK_THREADS = 2      # 워커 프로세스 1개의 torch / OpenCV 스레드 수
+DETECTION_CHUNK_WORKERS = None   # 워커 수 상한 (None이면 'chunked' 스레드 예산 / 워커당 스레드)
+DETECTION_CHUNK_BATCH = 8        # 워커가 한 번에 추론할 프레임 수 (YOLO 배치 추론)
+
+# 중앙 추론 서버 (python manage.py runinference)
+INFERENCE_SERVER_ADDRESS = None  # Unix 소켓 경로 (예: '/tmp/videotool-inference.sock', None이면 작업마다 모델 로드)
+INFERENCE_MAX_BATCH = 8          # 한 번에 추론할 최대 프레임 수
+INFERENCE_MAX_WAIT = 0.01        # 첫 프레임 이후 배치를 모으는 최대 대기 시간 (초)
+
+# 모션 게이트 (탐지 실행 시 선택, 움직임이 없는 프레임은 추론 생략)
+DETECTION_MOTION_THRESHOLD = 0.002  # 움직이는 영역 비율이 이 값 미만이면 생략 (0~1)
+DETECTION_MOTION_REFRESH = 150      # 움직임이 없어도 이 프레임 수마다 한 번은 추론
+DETECTION_MOTION_REUSE = True       # 생략한 프레임에 직전 탐지 결과 사용 (False면 빈 결과)
+
+# 프레임 결과 캐시 (pHash가 비슷한 프레임은 이전 탐지 결과 재사용, 작업 간 공유)
+DETECTION_FRAME_CACHE = False             # 사용 여부
+DETECTION_FRAME_CACHE_DISTANCE = 2        # 재사용을 허용하는 최대 해밍 거리 (64비트 중)
+DETECTION_FRAME_CACHE_MAX_ENTRIES = 50000 # 모델별 최대 항목 수 (넘으면 오래 안 쓴 항목부터 삭제)
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -69,6 +149,7 @@ INSTALLED_APPS = [
     "dashboard",
     "modelhub",
     "vision_engine",
+    "jobs",
 
 
     # 추후 추가 예정
@@ -105,6 +186,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "videotool.wsgi.application"
+ASGI_APPLICATION = "videotool.asgi.application"
 
 
 # Database
@@ -114,6 +196,12 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # 웹 프로세스와 워커 프로세스가 동시에 쓰므로 WAL + 잠금 대기
+        "OPTIONS": {
+            "timeout": 20,
+            "transaction_mode": "IMMEDIATE",
+            "init_command": "PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;",
+        },
     }
 }
 
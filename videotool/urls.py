@@ -15,10 +15,13 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
+import re
+
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
+
+from videos.views import MediaFileView
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -28,5 +31,7 @@ urlpatterns = [
     path('vision/', include('vision_engine.urls')),
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+# 미디어 파일: 로컬에 없으면 미디어 저장소(MEDIA_STORAGE)에서 읽으므로 DEBUG가 아니어도 연결
+urlpatterns += [
+    re_path(rf'^{re.escape(settings.MEDIA_URL.lstrip("/"))}(?P<name>.+)$', MediaFileView.as_view(), name='media_file'),
+]
\ No newline at end of file
@@ -1,3 +1,10 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import RegionOfInterest
+
+
+@admin.register(RegionOfInterest)
+class RegionOfInterestAdmin(admin.ModelAdmin):
+    list_display = ['name', 'video', 'camera_pattern', 'is_active', 'created_at']
+    list_filter = ['is_active']
+    search_fields = ['name', 'camera_pattern']
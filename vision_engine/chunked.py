@@ -0,0 +1,360 @@
+"""
+구간 분할 병렬 탐지
+
+긴 동영상은 한 프로세스에서 프레임을 차례로 추론하면 너무 오래 걸린다.
+ChunkedVideoDetector는 입력을 시간 구간으로 나누고 구간마다 별도 워커
+프로세스(각자 모델 인스턴스, torch 스레드 수 제한)에서 탐지한 뒤 결과를
+프레임 순서로 합친다. 워커는 프레임을 batch_size장씩 모아 배치로 추론하고
+(VideoDetector.detect_batch), 구간별 결과 영상은 워커에서 각각 인코딩한 뒤
+ffmpeg concat(-c copy)으로 재인코딩 없이 이어 붙인다.
+"""
+import multiprocessing
+import os
+import shutil
+import time
+from concurrent.futures import FIRST_EXCEPTION, ProcessPoolExecutor, wait
+from pathlib import Path
+
+import cv2
+
+from jobs.cancel import JobCancelled, run_process
+
+
+# 구간 길이 (초) / 워커 1개의 torch·OpenCV 스레드 수 / 한 번에 추론할 프레임 수
+DEFAULT_CHUNK_SECONDS = 120
+DEFAULT_CHUNK_THREADS = 2
+DEFAULT_CHUNK_BATCH = 8
+
+# 워커 프로세스 전역 상태 (initializer에서 설정)
+_worker = {}
+
+
+def plan_chunks(total_frames, fps, chunk_seconds=DEFAULT_CHUNK_SECONDS, min_chunks=1):
+    """
+    [(시작 프레임, 끝 프레임(미포함)), ...]
+
+    chunk_seconds 길이로 나누되 워커 수(min_chunks)보다 구간이 적으면
+    워커를 모두 쓸 수 있도록 더 잘게 나눈다.
+    """
+    if total_frames <= 0:
+        return []
+
+    chunk_frames = max(1, int(chunk_seconds * (fps or 30)))
+    count = max(min_chunks, -(-total_frames // chunk_frames))
+    count = min(count, total_frames)
+    size = -(-total_frames // count)
+    return [(start, min(start + size, total_frames)) for start in range(0, total_frames, size)]
+
+
+def _init_worker(threads, counters, stop_event):
+    """워커 프로세스 초기화 (spawn으로 시작되므로 Django 설정부터)"""
+    import django
+    django.setup()
+
+    from jobs.scheduler import apply_thread_budget
+    apply_thread_budget(threads)
+
+    _worker.update(counters=counters, stop_event=stop_event, detectors={})
+
+
+def _get_detector(model_label, model_pk):
+    """워커마다 모델을 한 번만 로드"""
+    key = (model_label, model_pk)
+    if key not in _worker['detectors']:
+        from django.apps import apps
+        from .inference import get_detector
+
+        model = apps.get_model(model_label).objects.get(pk=model_pk)
+        _worker['detectors'][key] = get_detector(model)
+    return _worker['detectors'][key]
+
+
+def _detect_chunk(index, model_label, model_pk, input_path, start, end, segment_path,
+                  gate_params=None, regions=None, batch_size=1):
+    """
+    구간 하나 탐지 (워커 프로세스에서 실행)
+
+    gate_params: MotionGate 설정, regions: ROI 다각형
+    batch_size: 프레임을 이만큼 모아서 배치 추론 (게이트에 걸린 프레임도 순서 유지를 위해 같이 보관)
+    """
+    from .motion import MotionGate
+    from .roi import RegionMask
+
+    detector = _get_detector(model_label, model_pk)
+    motion_gate = MotionGate(**gate_params) if gate_params else None
+    counters = _worker['counters']
+    stop_event = _worker['stop_event']
+
+    cap = cv2.VideoCapture(input_path)
+    if not cap.isOpened():
+        raise ValueError(f"파일을 열 수 없습니다: {input_path}")
+
+    fps = int(cap.get(cv2.CAP_PROP_FPS)) or 30
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    roi_mask = RegionMask(regions, width, height) if regions else None
+
+    # 구간 시작으로 이동 (코덱에 따라 키프레임으로만 이동되면 읽어서 맞춤)
+    cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+    position = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+    if position != start:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        position = 0
+    while position < start and cap.grab():
+        position += 1
+
+    out = None
+    if segment_path:
+        temp_output = str(Path(segment_path).parent / f'temp_{Path(segment_path).name}')
+        out = cv2.VideoWriter(temp_output, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+
+    detections = []
+    summary = {}
+    total = 0
+    frame_number = start
+    frame_detections = []
+    pending = []  # (프레임 번호, 프레임, 추론 여부)
+
+    def flush():
+        """모아 둔 프레임 중 추론할 프레임만 배치로 추론하고 프레임 순서대로 기록"""
+        nonlocal frame_detections, total
+        frames = [frame for _, frame, infer in pending if infer]
+        if not frames:
+            batch_results = iter(())
+        elif roi_mask:
+            batch_results = iter(roi_mask.detect_batch(detector, frames))
+        else:
+            batch_results = iter(detector.detect_batch(frames))
+
+        for number, frame, infer in pending:
+            if infer:
+                frame_detections = next(batch_results)
+            elif not motion_gate.reuse:
+                frame_detections = []
+            if out:
+                annotated = detector.draw_detections(frame, frame_detections)
+                out.write(roi_mask.draw(annotated) if roi_mask else annotated)
+
+            if frame_detections:
+                detections.append({'frame': number, 'detections': frame_detections})
+                total += len(frame_detections)
+                for det in frame_detections:
+                    summary[det['label']] = summary.get(det['label'], 0) + 1
+        pending.clear()
+
+    try:
+        while frame_number < end:
+            if stop_event.is_set():
+                raise JobCancelled(f"구간 {index} 중단")
+
+            ret, frame = cap.read()
+            if not ret:
+                break
+
+            infer = motion_gate is None or motion_gate.check(roi_mask.crop(frame) if roi_mask else frame)
+            pending.append((frame_number, frame, infer))
+            if len(pending) >= batch_size:
+                flush()
+
+            frame_number += 1
+            if frame_number % 10 == 0:
+                counters[index] = frame_number - start
+        flush()
+        counters[index] = frame_number - start
+    finally:
+        cap.release()
+        if out:
+            out.release()
+
+    # 구간 인코딩 (워커마다 병렬로, 실패하면 OpenCV 출력 그대로)
+    if segment_path:
+        if not detector.reencode_with_ffmpeg(temp_output, segment_path):
+            os.replace(temp_output, segment_path)
+        elif os.path.exists(temp_output):
+            os.remove(temp_output)
+
+    result = {
+        'index': index,
+        'detections': detections,
+        'total_detections': total,
+        'summary': summary,
+        'gated_frames': motion_gate.gated if motion_gate else 0,
+    }
+    if hasattr(detector, 'save_cache'):
+        result.update(detector.save_cache())
+    return result
+
+
+class ChunkedVideoDetector:
+    """구간 분할 병렬 탐지 (VideoDetector.process_video와 같은 결과 형식)"""
+
+    def __init__(self, model, workers=2, threads_per_worker=DEFAULT_CHUNK_THREADS,
+                 chunk_seconds=DEFAULT_CHUNK_SECONDS, batch_size=DEFAULT_CHUNK_BATCH):
+        """
+        model: modelhub.BaseModel 또는 modelhub.CustomModel (워커가 pk로 다시 읽음)
+        """
+        self.model = model
+        self.workers = max(1, workers)
+        self.threads_per_worker = max(1, threads_per_worker)
+        self.chunk_seconds = chunk_seconds
+        self.batch_size = max(1, batch_size)
+
+    def process_video(self, input_path, output_path, progress_callback=None, cancel_check=None,
+                      motion_gate=None, regions=None):
+        """
+        motion_gate: MotionGate (설정만 워커로 넘기고 구간마다 새로 만듦)
+        regions: ROI 다각형 목록
+        """
+        print(f"\n{'='*60}\n🔍 구간 분할 탐지 시작 (워커 {self.workers}개)\n{'='*60}")
+
+        cap = cv2.VideoCapture(input_path)
+        if not cap.isOpened():
+            raise ValueError(f"파일을 열 수 없습니다: {input_path}")
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+
+        chunks = plan_chunks(total_frames, fps, self.chunk_seconds, self.workers)
+        if not chunks:
+            raise ValueError("프레임 수를 알 수 없어 구간을 나눌 수 없습니다")
+
+        print(f"🧩 구간 {len(chunks)}개 ({', '.join(f'{start}-{end}' for start, end in chunks)})")
+
+        segment_dir = Path(output_path).parent / 'chunks' if output_path else None
+        if segment_dir:
+            segment_dir.mkdir(parents=True, exist_ok=True)
+
+        # 워커와 공유하는 구간별 처리 프레임 수 / 중단 신호
+        context = multiprocessing.get_context('spawn')
+        counters = context.Array('i', len(chunks), lock=False)
+        stop_event = context.Event()
+
+        model_label = self.model._meta.label
+        results = []
+        finished = False
+
+        executor = ProcessPoolExecutor(
+            max_workers=min(self.workers, len(chunks)),
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self.threads_per_worker, counters, stop_event),
+        )
+        try:
+            futures = [
+                executor.submit(
+                    _detect_chunk, index, model_label, self.model.pk, input_path, start, end,
+                    str(segment_dir / f'segment_{index:04d}.mp4') if segment_dir else None,
+                    motion_gate.params if motion_gate else None,
+                    regions,
+                    self.batch_size,
+                )
+                for index, (start, end) in enumerate(chunks)
+            ]
+
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=0.5, return_when=FIRST_EXCEPTION)
+                for future in done:
+                    future.result()  # 워커 예외를 그대로 전달
+
+                if cancel_check:
+                    cancel_check()
+
+                # 구간별 진행률을 합쳐서 보고 (0-80%)
+                if progress_callback:
+                    processed = sum(counters)
+                    progress_callback(processed, total_frames, int(processed / total_frames * 80))
+
+            results = sorted((future.result() for future in futures), key=lambda result: result['index'])
+            finished = True
+        finally:
+            if not finished:
+                # 취소/에러: 워커 중단 후 구간 파일 정리
+                stop_event.set()
+                executor.shutdown(wait=True, cancel_futures=True)
+                if segment_dir:
+                    shutil.rmtree(segment_dir, ignore_errors=True)
+            else:
+                executor.shutdown(wait=True)
+
+        # 구간 결과 합치기 (구간 순서 = 프레임 순서)
+        all_detections = []
+        summary = {}
+        total_detections = 0
+        gated_frames = 0
+        cache_stats = {}
+        for result in results:
+            all_detections.extend(result['detections'])
+            total_detections += result['total_detections']
+            gated_frames += result['gated_frames']
+            for key in ('cache_lookups', 'cache_hits'):
+                if key in result:
+                    cache_stats[key] = cache_stats.get(key, 0) + result[key]
+            for label, count in result['summary'].items():
+                summary[label] = summary.get(label, 0) + count
+
+        if segment_dir:
+            if progress_callback:
+                progress_callback(sum(counters), total_frames, 90)
+            segments = [segment_dir / f'segment_{index:04d}.mp4' for index in range(len(chunks))]
+            try:
+                self.concat_segments(segments, output_path, cancel_check)
+            finally:
+                shutil.rmtree(segment_dir, ignore_errors=True)
+
+        if motion_gate:
+            print(f"🚦 모션 게이트: {total_frames}프레임 중 {gated_frames}프레임 추론 생략")
+
+        if progress_callback:
+            progress_callback(sum(counters), total_frames, 100)
+
+        return {
+            'detections': all_detections,
+            'total_detections': total_detections,
+            'summary': summary,
+            'gated_frames': gated_frames,
+            **cache_stats,
+        }
+
+    def concat_segments(self, segments, output_path, cancel_check=None):
+        """구간 영상을 재인코딩 없이 이어 붙이기 (ffmpeg가 없으면 OpenCV로 다시 씀)"""
+        ffmpeg_path = shutil.which('ffmpeg')
+        if ffmpeg_path:
+            list_path = Path(segments[0]).parent / 'segments.txt'
+            list_path.write_text(''.join(f"file '{Path(segment).resolve()}'\n" for segment in segments))
+            cmd = [
+                ffmpeg_path, '-f', 'concat', '-safe', '0', '-i', str(list_path),
+                '-c', 'copy', '-movflags', '+faststart', '-y', str(output_path),
+            ]
+            result = run_process(cmd, cancel_check=cancel_check, timeout=1800)
+            if result.returncode == 0 and os.path.exists(output_path):
+                print(f"✅ 구간 {len(segments)}개 연결 완료 (재인코딩 없음)")
+                return output_path
+            print(f"⚠️  ffmpeg concat 실패 - OpenCV로 연결")
+
+        started = time.monotonic()
+        writer = None
+        finished = False
+        try:
+            for segment in segments:
+                cap = cv2.VideoCapture(str(segment))
+                if writer is None:
+                    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+                    size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+                    writer = cv2.VideoWriter(str(output_path), cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+                while True:
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+                    writer.write(frame)
+                cap.release()
+                if cancel_check:
+                    cancel_check()
+            finished = True
+        finally:
+            if writer:
+                writer.release()
+            if not finished and os.path.exists(output_path):
+                os.remove(output_path)
+        print(f"✅ 구간 {len(segments)}개 연결 완료 ({time.monotonic() - started:.1f}초)")
+        return output_path
@@ -2,7 +2,8 @@ import cv2
 import numpy as np
 from pathlib import Path
 import os
-import subprocess
+
+from jobs.cancel import JobCancelled, run_process
 
 
 class VideoDetector:
@@ -45,43 +46,55 @@ class VideoDetector:
             return self.detect_custom(frame)
         return []
     
+    def detect_batch(self, frames):
+        """여러 프레임 한 번에 감지 (YOLO는 배치 추론, 반환: 프레임별 감지 목록)"""
+        if self.model_type == 'yolo':
+            return self.detect_yolo_batch(frames)
+        return [self.detect_frame(frame) for frame in frames]
+    
     def detect_yolo(self, frame):
         """YOLO 객체 감지"""
+        return self.detect_yolo_batch([frame])[0]
+    
+    def detect_yolo_batch(self, frames):
+        """YOLO 배치 감지"""
         if not self.yolo_model:
-            return []
+            return [[] for _ in frames]
         
         try:
             # 4채널(RGBA) -> 3채널(BGR) 변환
-            if len(frame.shape) == 3 and frame.shape[2] == 4:
-                frame = cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR)
+            frames = [
+                cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR) if len(frame.shape) == 3 and frame.shape[2] == 4 else frame
+                for frame in frames
+            ]
             
-            results = self.yolo_model(frame, verbose=False)
-            detections = []
+            # confidence threshold
+            conf_threshold = 0.25
+            if hasattr(self.model, 'config') and isinstance(self.model.config, dict):
+                conf_threshold = self.model.config.get('conf_threshold', 0.25)
             
-            for result in results:
+            batch_detections = []
+            for result in self.yolo_model(frames, verbose=False):
+                detections = []
                 for box in result.boxes:
                     x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
                     confidence = float(box.conf[0])
                     class_id = int(box.cls[0])
                     label = self.yolo_model.names[class_id]
                     
-                    # confidence threshold
-                    conf_threshold = 0.25
-                    if hasattr(self.model, 'config') and isinstance(self.model.config, dict):
-                        conf_threshold = self.model.config.get('conf_threshold', 0.25)
-                    
                     if confidence >= conf_threshold:
                         detections.append({
                             'label': label,
                             'confidence': confidence,
                             'bbox': [int(x1), int(y1), int(x2-x1), int(y2-y1)],
                         })
+                batch_detections.append(detections)
             
-            return detections
+            return batch_detections
             
         except Exception as e:
             print(f"⚠️  YOLO 감지 오류: {e}")
-            return []
+            return [[] for _ in frames]
     
     def detect_custom(self, frame):
         """커스텀 모델 감지 (확장 포인트)"""
@@ -89,9 +102,109 @@ class VideoDetector:
         print("⚠️  커스텀 모델 감지는 아직 구현되지 않았습니다")
         return []
     
-    def process_video(self, input_path, output_path, progress_callback=None):
-        """동영상/이미지 탐지 처리"""
-        print(f"\n{'='*60}\n🔍 탐지 처리 시작\n{'='*60}")
+    def process_video(self, input_path, output_path, progress_callback=None, cancel_check=None,
+                      transform=None, preprocessed_path=None, motion_gate=None, regions=None):
+        """
+        동영상/이미지 탐지 처리
+
+        cancel_check: 매 프레임 호출되는 취소 확인 함수. JobCancelled가 발생하면
+        캡처/라이터를 닫고 임시 파일을 지운 뒤 다시 던진다.
+        transform: 탐지 전에 프레임에 적용할 함수 (VideoPreprocessor.compile_pipeline).
+        원본을 한 번만 디코딩해서 전처리와 탐지를 함께 할 때 사용한다.
+        output_path / preprocessed_path: 탐지 결과 / 전처리 결과 저장 경로
+        (None이면 해당 출력은 인코딩하지 않음)
+        motion_gate: MotionGate (움직임이 없는 프레임은 추론 생략, vision_engine.motion)
+        regions: ROI 다각형 목록 (영역만 잘라서 추론, vision_engine.roi)
+        """
+        results = MultiModelDetector([self]).process_video(
+            input_path,
+            [output_path],
+            progress_callback,
+            cancel_check,
+            transform=transform,
+            preprocessed_path=preprocessed_path,
+            motion_gate=motion_gate,
+            regions=regions,
+        )
+        return results[0]
+    
+    def draw_detections(self, frame, detections):
+        """감지 결과를 프레임에 그리기"""
+        result = frame.copy()
+        for det in detections:
+            x, y, w, h = det['bbox']
+            label = det['label']
+            conf = det['confidence']
+            color = self.get_color_for_label(label)
+            
+            cv2.rectangle(result, (x, y), (x+w, y+h), color, 2)
+            text = f"{label} {conf:.2f}"
+            cv2.putText(result, text, (x, y-10), 
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+        return result
+    
+    def get_color_for_label(self, label):
+        """라벨별 색상"""
+        hash_val = hash(label)
+        return (
+            hash_val & 0xFF,
+            (hash_val >> 8) & 0xFF,
+            (hash_val >> 16) & 0xFF
+        )
+    
+    def reencode_with_ffmpeg(self, input_path, output_path, cancel_check=None):
+        """ffmpeg 재인코딩 (취소 요청 시 프로세스 종료)"""
+        import shutil
+        ffmpeg_path = shutil.which('ffmpeg') or r'C:\ffmpeg\bin\ffmpeg.exe'
+        if not os.path.exists(ffmpeg_path):
+            return False
+        
+        try:
+            cmd = [
+                ffmpeg_path,
+                '-i', str(input_path),
+                '-c:v', 'libx264',
+                '-preset', 'fast',
+                '-y', str(output_path)
+            ]
+            run_process(cmd, cancel_check=cancel_check, timeout=1800)
+            return os.path.exists(output_path)
+        except JobCancelled:
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            raise
+        except:
+            return False
+
+
+
+class MultiModelDetector:
+    """
+    여러 모델로 한 번에 탐지 (프레임은 한 번만 디코딩)
+
+    각 프레임을 모든 모델에 넘기고, max_workers > 1이면 모델별 추론을
+    스레드 풀에서 병렬로 실행한다 (OpenCV / torch 추론은 GIL을 놓는다).
+    결과와 탐지 결과 영상은 모델마다 따로 만든다.
+    """
+    
+    def __init__(self, detectors, max_workers=1):
+        """
+        detectors: VideoDetector 목록
+        """
+        self.detectors = list(detectors)
+        self.max_workers = max(1, min(max_workers, len(self.detectors)))
+    
+    def process_video(self, input_path, output_paths, progress_callback=None, cancel_check=None,
+                      transform=None, preprocessed_path=None, motion_gate=None, regions=None):
+        """
+        output_paths: 모델별 탐지 결과 저장 경로 (None이면 인코딩하지 않음)
+        motion_gate: MotionGate (동영상만, 게이트에 걸린 프레임은 모든 모델의 추론 생략)
+        regions: ROI 다각형 목록 (ROI를 감싸는 영역만 추론하고 ROI 밖 탐지는 버림)
+        반환: 모델별 결과 dict 목록 (detectors 순서, 'gated_frames' / 캐시 통계 포함)
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        
+        print(f"\n{'='*60}\n🔍 탐지 처리 시작 (모델 {len(self.detectors)}개)\n{'='*60}")
         
         # 미디어 타입 판별
         is_image = input_path.lower().endswith(('.png', '.jpg', '.jpeg', '.webp'))
@@ -113,127 +226,164 @@ class VideoDetector:
         
         print(f"🖼️  해상도: {width}x{height} | FPS: {fps} | 총 프레임: {total_frames}")
         
-        # 출력 설정
-        out = None
-        temp_output = output_path
-        annotated_frame = None
-        
-        if not is_image:
-            temp_output = str(Path(output_path).parent / f'temp_{Path(output_path).name}')
+        # 출력 설정: 키(모델 순번 또는 'preprocessed') -> (최종 경로, 임시 경로, VideoWriter)
+        outputs = {}
+        targets = list(enumerate(output_paths)) + [('preprocessed', preprocessed_path)]
+        for key, path in targets:
+            if not path:
+                continue
+            path = str(path)
+            if is_image:
+                outputs[key] = (path, None, None)
+                continue
+            
+            temp_output = str(Path(path).parent / f'temp_{Path(path).name}')
             fourcc = cv2.VideoWriter_fourcc(*'mp4v')
             out = cv2.VideoWriter(temp_output, fourcc, fps, (width, height))
+            outputs[key] = (path, temp_output, out)
             if not out.isOpened():
                 cap.release()
+                self._discard_outputs(outputs)
                 raise ValueError("출력 VideoWriter 생성 실패")
         
-        all_detections = []
-        detection_summary = {}
-        total_detections_count = 0
+        if is_image:
+            motion_gate = None
+        
+        roi_mask = None
+        if regions:
+            from .roi import RegionMask
+            roi_mask = RegionMask(regions, width, height)
+            print(f"🎯 ROI {len(regions)}개 - 프레임의 {roi_mask.get_area_ratio() * 100:.0f}% 영역만 추론")
+        
+        def detect(detector, frame):
+            if roi_mask:
+                return roi_mask.detect(detector, frame)
+            return detector.detect_frame(frame)
+        
+        results = [
+            {'detections': [], 'total_detections': 0, 'summary': {}, 'gated_frames': 0}
+            for _ in self.detectors
+        ]
         frame_count = 0
+        last_frames = {}
+        previous_detections = [[] for _ in self.detectors]
+        finished = False
+        pool = ThreadPoolExecutor(self.max_workers) if self.max_workers > 1 else None
         
         try:
             print(f"🔄 처리 중...")
             while True:
+                if cancel_check:
+                    cancel_check()
+                
                 ret, frame = cap.read()
                 if not ret:
                     break
                 
-                # 감지 수행
-                detections = self.detect_frame(frame)
-                annotated_frame = self.draw_detections(frame, detections)
+                # 모션 게이트 (디코딩한 프레임 기준, 전처리 전)
+                run_inference = motion_gate is None or motion_gate.check(roi_mask.crop(frame) if roi_mask else frame)
+                
+                # 전처리 (fused 실행)
+                if transform:
+                    frame = transform(frame)
+                
+                # 감지 수행 (모델별)
+                if not run_inference:
+                    frame_detections = previous_detections if motion_gate.reuse else [[] for _ in self.detectors]
+                elif pool:
+                    frame_detections = list(pool.map(lambda detector: detect(detector, frame), self.detectors))
+                else:
+                    frame_detections = [detect(detector, frame) for detector in self.detectors]
+                previous_detections = frame_detections
+                
+                last_frames = {}
+                if 'preprocessed' in outputs:
+                    last_frames['preprocessed'] = frame
                 
-                if not is_image and out:
-                    out.write(annotated_frame)
+                for index, detections in enumerate(frame_detections):
+                    if index in outputs:
+                        last_frames[index] = self.detectors[index].draw_detections(frame, detections)
+                        if roi_mask:
+                            roi_mask.draw(last_frames[index])
+                    
+                    if detections:
+                        result = results[index]
+                        result['detections'].append({
+                            'frame': frame_count,
+                            'detections': detections
+                        })
+                        result['total_detections'] += len(detections)
+                        for det in detections:
+                            label = det['label']
+                            result['summary'][label] = result['summary'].get(label, 0) + 1
                 
-                if detections:
-                    all_detections.append({
-                        'frame': frame_count,
-                        'detections': detections
-                    })
-                    total_detections_count += len(detections)
-                    for det in detections:
-                        label = det['label']
-                        detection_summary[label] = detection_summary.get(label, 0) + 1
+                for key, out_frame in last_frames.items():
+                    out = outputs[key][2]
+                    if out:
+                        out.write(out_frame)
                 
                 frame_count += 1
                 if progress_callback and frame_count % 10 == 0:
                     progress = int((frame_count / total_frames) * 80)
                     progress_callback(frame_count, total_frames, progress)
+            
+            finished = True
         
         finally:
+            if pool:
+                pool.shutdown()
             cap.release()
-            if out:
-                out.release()
+            for _, _, out in outputs.values():
+                if out:
+                    out.release()
+            if not finished:
+                # 취소/에러: 임시 파일 정리
+                self._discard_outputs(outputs)
+        
+        if motion_gate:
+            motion_gate.print_stats()
+            for result in results:
+                result['gated_frames'] = motion_gate.gated
+        
+        # 프레임 결과 캐시 저장 (CachedDetector, vision_engine.framecache)
+        for detector, result in zip(self.detectors, results):
+            if hasattr(detector, 'save_cache'):
+                result.update(detector.save_cache())
         
         # 최종 저장
         if is_image:
-            if annotated_frame is not None:
-                cv2.imwrite(output_path, annotated_frame)
-                print(f"✅ 이미지 결과 저장: {output_path}")
-            ffmpeg_success = True
-        else:
+            for key, (path, _, _) in outputs.items():
+                if key in last_frames:
+                    cv2.imwrite(path, last_frames[key])
+                    print(f"✅ 이미지 결과 저장: {path}")
+        elif outputs:
             print(f"\n🎬 동영상 재인코딩 중...")
             if progress_callback:
                 progress_callback(frame_count, total_frames, 85)
-            ffmpeg_success = self.reencode_with_ffmpeg(temp_output, output_path)
             
-            if ffmpeg_success and os.path.exists(temp_output):
-                os.remove(temp_output)
-            elif not ffmpeg_success:
-                print(f"⚠️  ffmpeg 실패 - 원본 파일 사용")
-                if os.path.exists(output_path):
-                    os.remove(output_path)
-                os.rename(temp_output, output_path)
+            for key, (path, temp_output, _) in outputs.items():
+                try:
+                    ffmpeg_success = self.detectors[0].reencode_with_ffmpeg(temp_output, path, cancel_check)
+                except JobCancelled:
+                    self._discard_outputs(outputs)
+                    raise
+                
+                if ffmpeg_success and os.path.exists(temp_output):
+                    os.remove(temp_output)
+                elif not ffmpeg_success:
+                    print(f"⚠️  ffmpeg 실패 - 원본 파일 사용")
+                    if os.path.exists(path):
+                        os.remove(path)
+                    os.rename(temp_output, path)
         
         if progress_callback:
             progress_callback(frame_count, total_frames, 100)
         
-        return {
-            'detections': all_detections,
-            'total_detections': total_detections_count,
-            'summary': detection_summary,
-        }
-    
-    def draw_detections(self, frame, detections):
-        """감지 결과를 프레임에 그리기"""
-        result = frame.copy()
-        for det in detections:
-            x, y, w, h = det['bbox']
-            label = det['label']
-            conf = det['confidence']
-            color = self.get_color_for_label(label)
-            
-            cv2.rectangle(result, (x, y), (x+w, y+h), color, 2)
-            text = f"{label} {conf:.2f}"
-            cv2.putText(result, text, (x, y-10), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
-        return result
-    
-    def get_color_for_label(self, label):
-        """라벨별 색상"""
-        hash_val = hash(label)
-        return (
-            hash_val & 0xFF,
-            (hash_val >> 8) & 0xFF,
-            (hash_val >> 16) & 0xFF
-        )
+        return results
     
-    def reencode_with_ffmpeg(self, input_path, output_path):
-        """ffmpeg 재인코딩"""
-        import shutil
-        ffmpeg_path = shutil.which('ffmpeg') or r'C:\ffmpeg\bin\ffmpeg.exe'
-        if not os.path.exists(ffmpeg_path):
-            return False
-        
-        try:
-            cmd = [
-                ffmpeg_path,
-                '-i', str(input_path),
-                '-c:v', 'libx264',
-                '-preset', 'fast',
-                '-y', str(output_path)
-            ]
-            subprocess.run(cmd, capture_output=True, text=True, timeout=1800)
-            return os.path.exists(output_path)
-        except:
-            return False
+    @staticmethod
+    def _discard_outputs(outputs):
+        """남아 있는 임시 출력 파일 삭제"""
+        for _, temp_output, _ in outputs.values():
+            if temp_output and os.path.exists(temp_output):
+                os.remove(temp_output)
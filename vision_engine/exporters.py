@@ -0,0 +1,299 @@
+import csv
+import json
+import zipfile
+
+from videos.storage import get_media_store
+
+
+class _ChunkBuffer:
+    """쓰기 전용 버퍼 (쓴 만큼 꺼내서 응답으로 흘려보냄)"""
+
+    closed = False
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class DetectionExporter:
+    """
+    탐지 결과 내보내기 (CSV / Parquet / COCO JSON / YOLO txt)
+
+    Detection.iter_detection_frames()로 프레임을 순회하며 조각 단위로
+    바이트를 만들어 내므로 동영상 길이와 관계없이 메모리 사용량이 일정하다.
+    """
+
+    FORMATS = {
+        'csv': ('text/csv; charset=utf-8', 'csv'),
+        'parquet': ('application/vnd.apache.parquet', 'parquet'),
+        'coco': ('application/json', 'json'),
+        'yolo': ('application/zip', 'zip'),
+    }
+
+    # 한 번에 응답으로 내보낼 프레임 수
+    FRAMES_PER_CHUNK = 500
+
+    def __init__(self, detection, start_frame=None, end_frame=None, labels=None):
+        self.detection = detection
+        self.start_frame = start_frame
+        self.end_frame = end_frame
+        self.labels = set(labels) if labels else None
+        self._geometry = None
+
+    # ------------------------------------------------------------
+    # 공통
+    # ------------------------------------------------------------
+    def get_filename(self, export_format):
+        _, ext = self.FORMATS[export_format]
+        return f'detection_{self.detection.id}.{ext}'
+
+    def get_content_type(self, export_format):
+        content_type, _ = self.FORMATS[export_format]
+        return content_type
+
+    def stream(self, export_format):
+        """형식에 맞는 바이트 스트림 반환"""
+        if export_format not in self.FORMATS:
+            raise ValueError(f"지원하지 않는 형식입니다: {export_format}")
+        return getattr(self, f'stream_{export_format}')()
+
+    def get_label_names(self):
+        """클래스 목록 (탐지 요약 기준, 이름순)"""
+        labels = sorted((self.detection.detection_summary or {}).keys())
+        if self.labels is not None:
+            labels = [label for label in labels if label in self.labels]
+        return labels
+
+    def get_geometry(self):
+        """입력 파일의 (width, height, fps)"""
+        if self._geometry is None:
+            import cv2
+
+            width = height = 0
+            fps = 0.0
+            analysis = self.detection.analysis
+            media = analysis.get_media()
+            if analysis.output_video_path:
+                input_path = get_media_store().source(analysis.output_video_path)
+            elif media and media.file:
+                # 전처리 결과 없이 전처리 + 탐지(fused)로 실행한 경우
+                input_path = get_media_store().source(media.file.name)
+            else:
+                input_path = None
+            if input_path:
+                cap = cv2.VideoCapture(input_path)
+                if cap.isOpened():
+                    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+                    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+                    if analysis.video:
+                        fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+                cap.release()
+
+            if (not width or not height) and analysis.image:
+                width, height = analysis.image.width, analysis.image.height
+
+            self._geometry = (width, height, fps)
+        return self._geometry
+
+    def iter_frames(self):
+        """프레임별 (frame, detections) 순회 (라벨 필터 적용)"""
+        for item in self.detection.iter_detection_frames(self.start_frame, self.end_frame):
+            detections = item.get('detections', [])
+            if self.labels is not None:
+                detections = [det for det in detections if det.get('label') in self.labels]
+            if detections:
+                yield item.get('frame', 0), detections
+
+    def iter_frame_chunks(self):
+        """FRAMES_PER_CHUNK 단위로 묶어서 순회"""
+        chunk = []
+        for frame in self.iter_frames():
+            chunk.append(frame)
+            if len(chunk) >= self.FRAMES_PER_CHUNK:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    # ------------------------------------------------------------
+    # CSV
+    # ------------------------------------------------------------
+    def stream_csv(self):
+        _, _, fps = self.get_geometry()
+        buffer = _ChunkBuffer()
+        writer = csv.writer(buffer)
+
+        writer.writerow(['frame', 'time_sec', 'label', 'confidence', 'x', 'y', 'width', 'height'])
+        yield buffer.drain()
+
+        for chunk in self.iter_frame_chunks():
+            for frame, detections in chunk:
+                time_sec = round(frame / fps, 3) if fps else ''
+                for det in detections:
+                    x, y, w, h = det['bbox']
+                    writer.writerow([frame, time_sec, det['label'], round(det['confidence'], 4), x, y, w, h])
+            yield buffer.drain()
+
+    # ------------------------------------------------------------
+    # Parquet
+    # ------------------------------------------------------------
+    def stream_parquet(self):
+        """프레임 묶음마다 row group 하나씩 기록"""
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet 내보내기에는 pyarrow 패키지가 필요합니다")
+
+        _, _, fps = self.get_geometry()
+        schema = pa.schema([
+            ('frame', pa.int64()),
+            ('time_sec', pa.float64()),
+            ('label', pa.string()),
+            ('confidence', pa.float64()),
+            ('x', pa.int64()),
+            ('y', pa.int64()),
+            ('width', pa.int64()),
+            ('height', pa.int64()),
+        ])
+
+        buffer = _ChunkBuffer()
+        writer = pq.ParquetWriter(buffer, schema)
+        try:
+            for chunk in self.iter_frame_chunks():
+                columns = {name: [] for name in schema.names}
+                for frame, detections in chunk:
+                    for det in detections:
+                        x, y, w, h = det['bbox']
+                        columns['frame'].append(frame)
+                        columns['time_sec'].append(frame / fps if fps else None)
+                        columns['label'].append(det['label'])
+                        columns['confidence'].append(det['confidence'])
+                        columns['x'].append(x)
+                        columns['y'].append(y)
+                        columns['width'].append(w)
+                        columns['height'].append(h)
+                writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+                yield buffer.drain()
+        finally:
+            writer.close()
+        yield buffer.drain()
+
+    # ------------------------------------------------------------
+    # COCO JSON
+    # ------------------------------------------------------------
+    def stream_coco(self):
+        """images와 annotations 배열을 각각 한 번씩 순회하며 기록"""
+        width, height, fps = self.get_geometry()
+        labels = self.get_label_names()
+        category_ids = {label: idx + 1 for idx, label in enumerate(labels)}
+        categories = [{'id': cid, 'name': label} for label, cid in category_ids.items()]
+
+        header = {
+            'info': {
+                'description': self.detection.title,
+                'model': self.detection.get_model_name(),
+                'detection_id': self.detection.id,
+                'fps': fps,
+            },
+            'categories': categories,
+        }
+        yield json.dumps(header, ensure_ascii=False)[:-1].encode('utf-8')
+
+        # images
+        yield b', "images": ['
+        first = True
+        for chunk in self.iter_frame_chunks():
+            parts = []
+            for frame, _ in chunk:
+                image = {
+                    'id': frame + 1,
+                    'file_name': f'frame_{frame:06d}.jpg',
+                    'width': width,
+                    'height': height,
+                    'frame_index': frame,
+                }
+                parts.append(('' if first else ', ') + json.dumps(image))
+                first = False
+            yield ''.join(parts).encode('utf-8')
+
+        # annotations
+        yield b'], "annotations": ['
+        first = True
+        annotation_id = 0
+        for chunk in self.iter_frame_chunks():
+            parts = []
+            for frame, detections in chunk:
+                for det in detections:
+                    if det['label'] not in category_ids:
+                        continue
+                    annotation_id += 1
+                    x, y, w, h = det['bbox']
+                    annotation = {
+                        'id': annotation_id,
+                        'image_id': frame + 1,
+                        'category_id': category_ids[det['label']],
+                        'bbox': [x, y, w, h],
+                        'area': w * h,
+                        'iscrowd': 0,
+                        'score': round(det['confidence'], 4),
+                    }
+                    parts.append(('' if first else ', ') + json.dumps(annotation))
+                    first = False
+            yield ''.join(parts).encode('utf-8')
+        yield b']}'
+
+    # ------------------------------------------------------------
+    # YOLO txt (zip)
+    # ------------------------------------------------------------
+    def stream_yolo(self):
+        """프레임마다 labels/frame_XXXXXX.txt 하나 (class cx cy w h conf, 정규화 좌표)"""
+        width, height, _ = self.get_geometry()
+        if not width or not height:
+            raise ValueError("입력 해상도를 알 수 없어 YOLO 좌표를 정규화할 수 없습니다")
+
+        labels = self.get_label_names()
+        class_ids = {label: idx for idx, label in enumerate(labels)}
+
+        buffer = _ChunkBuffer()
+        with zipfile.ZipFile(buffer, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr('classes.txt', '\n'.join(labels) + '\n')
+            yield buffer.drain()
+
+            for chunk in self.iter_frame_chunks():
+                for frame, detections in chunk:
+                    lines = []
+                    for det in detections:
+                        if det['label'] not in class_ids:
+                            continue
+                        x, y, w, h = det['bbox']
+                        cx = (x + w / 2) / width
+                        cy = (y + h / 2) / height
+                        lines.append(
+                            f"{class_ids[det['label']]} {cx:.6f} {cy:.6f} "
+                            f"{w / width:.6f} {h / height:.6f} {det['confidence']:.4f}"
+                        )
+                    archive.writestr(f'labels/frame_{frame:06d}.txt', '\n'.join(lines) + '\n')
+                yield buffer.drain()
+        yield buffer.drain()
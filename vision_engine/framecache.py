@@ -0,0 +1,213 @@
+"""
+프레임 탐지 결과 캐시 (perceptual hash)
+
+정지 장면, 반복 녹화, 같은 영상의 재업로드는 거의 같은 프레임을 계속
+추론한다. CachedDetector는 축소한 프레임의 pHash(64비트)를 키로 탐지 결과를
+FrameResultCache 테이블에 저장하고, 같은 모델·설정에서 해밍 거리가
+DETECTION_FRAME_CACHE_DISTANCE 이하인 프레임은 추론 없이 결과를 재사용한다.
+
+모델별 항목 수는 DETECTION_FRAME_CACHE_MAX_ENTRIES로 제한하고, 넘치면 가장
+오래 사용되지 않은 항목부터 지운다 (LRU).
+"""
+import hashlib
+import json
+from collections import Counter
+
+import cv2
+import numpy as np
+from django.db.models import F
+from django.utils import timezone
+
+
+# 재사용을 허용하는 최대 해밍 거리 (64비트 중) / 모델별 최대 항목 수
+DEFAULT_FRAME_CACHE_DISTANCE = 2
+DEFAULT_FRAME_CACHE_MAX_ENTRIES = 50000
+
+
+def compute_phash(frame):
+    """DCT 기반 pHash (32x32 흑백 -> 저주파 8x8 계수의 중앙값 비교, 64비트 정수)"""
+    if frame.ndim == 3:
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGRA2GRAY if frame.shape[2] == 4 else cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(frame, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:8, :8].flatten()
+    bits = low > np.median(low[1:])
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def to_signed(value):
+    """uint64 -> DB BigIntegerField(int64) 저장값"""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def to_unsigned(value):
+    return value + (1 << 64) if value < 0 else value
+
+
+def get_model_cache_key(model):
+    """모델 식별 + 설정 해시 (모델 파일이나 설정이 바뀌면 다른 키)"""
+    identity = [
+        model._meta.label,
+        model.pk,
+        getattr(model, 'model_type', ''),
+        model.get_model_path(),
+        getattr(model, 'file_size', None),
+        getattr(model, 'yolo_version', ''),
+        getattr(model, 'config', None),
+    ]
+    return hashlib.sha1(json.dumps(identity, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class FrameCache:
+    """모델 하나의 pHash 캐시 (DB 항목 + 이번 작업에서 추가한 항목)"""
+
+    def __init__(self, model_key, max_distance=DEFAULT_FRAME_CACHE_DISTANCE,
+                 max_entries=DEFAULT_FRAME_CACHE_MAX_ENTRIES):
+        from .models import FrameResultCache
+
+        self.model_key = model_key
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+
+        # 최근 사용 순으로 해시만 읽고 결과는 적중할 때 읽음
+        rows = list(
+            FrameResultCache.objects.filter(model_key=model_key)
+            .order_by('-last_used_at')
+            .values_list('id', 'phash')[:max_entries]
+        )
+        self.entry_ids = [entry_id for entry_id, _ in rows]
+        self.size = len(rows)
+        self.hashes = np.zeros(max(1024, self.size * 2), dtype=np.uint64)
+        self.hashes[:self.size] = [to_unsigned(phash) for _, phash in rows]
+        self.results = {}   # 인덱스 -> 탐지 결과
+        self.pending = []   # 저장할 새 항목 인덱스
+        self.hit_counts = Counter()
+
+        self.lookups = 0
+        self.hits = 0
+
+    def lookup(self, phash):
+        """가장 가까운 항목의 탐지 결과 (거리 초과면 None)"""
+        self.lookups += 1
+        if not self.size:
+            return None
+
+        distances = np.bitwise_count(self.hashes[:self.size] ^ np.uint64(phash))
+        index = int(np.argmin(distances))
+        if distances[index] > self.max_distance:
+            return None
+
+        if index not in self.results:
+            from .models import FrameResultCache
+            detections = FrameResultCache.objects.filter(
+                id=self.entry_ids[index]
+            ).values_list('detections', flat=True).first()
+            if detections is None:
+                # 다른 작업이 정리한 항목: 더 이상 맞지 않도록 해시를 비움
+                self.hashes[index] = np.uint64(phash) ^ np.uint64(0xFFFFFFFFFFFFFFFF)
+                return None
+            self.results[index] = detections
+
+        self.hits += 1
+        if self.entry_ids[index] is not None:
+            self.hit_counts[self.entry_ids[index]] += 1
+        return [dict(det) for det in self.results[index]]
+
+    def add(self, phash, detections):
+        index = self.size
+        if index == len(self.hashes):
+            self.hashes = np.concatenate([self.hashes, np.zeros(len(self.hashes), dtype=np.uint64)])
+        self.hashes[index] = np.uint64(phash)
+        self.entry_ids.append(None)
+        self.size += 1
+        self.results[index] = [dict(det) for det in detections]
+        self.pending.append(index)
+
+    def save(self):
+        """새 항목 저장, 적중 항목 사용 시간 갱신, 한도를 넘으면 LRU 삭제"""
+        from .models import FrameResultCache
+
+        now = timezone.now()
+        if self.pending:
+            created = FrameResultCache.objects.bulk_create([
+                FrameResultCache(
+                    model_key=self.model_key,
+                    phash=to_signed(int(self.hashes[index])),
+                    detections=self.results[index],
+                    last_used_at=now,
+                )
+                for index in self.pending
+            ], batch_size=500)
+            for index, entry in zip(self.pending, created):
+                self.entry_ids[index] = entry.id
+            self.pending = []
+
+        # 적중 횟수가 같은 항목끼리 한 번에 갱신
+        by_count = {}
+        for entry_id, count in self.hit_counts.items():
+            by_count.setdefault(count, []).append(entry_id)
+        for count, entry_ids in by_count.items():
+            FrameResultCache.objects.filter(id__in=entry_ids).update(hits=F('hits') + count, last_used_at=now)
+        self.hit_counts.clear()
+
+        stale = list(
+            FrameResultCache.objects.filter(model_key=self.model_key)
+            .order_by('-last_used_at', '-id')
+            .values_list('id', flat=True)[self.max_entries:]
+        )
+        for start in range(0, len(stale), 500):
+            FrameResultCache.objects.filter(id__in=stale[start:start + 500]).delete()
+        if stale:
+            print(f"🧹 프레임 캐시 {len(stale)}개 정리 (한도 {self.max_entries})")
+
+    def get_hit_rate(self):
+        return self.hits / self.lookups if self.lookups else 0.0
+
+
+class CachedDetector:
+    """
+    VideoDetector + 프레임 결과 캐시
+
+    detect_frame / detect_batch만 가로채고 나머지(그리기, 재인코딩 등)는 감싼 탐지기에 위임한다.
+    ROI를 쓰면 잘라낸 영역이 들어오므로 캐시도 잘라낸 영역 기준이다.
+    """
+
+    def __init__(self, detector, cache):
+        self.detector = detector
+        self.cache = cache
+
+    def __getattr__(self, name):
+        return getattr(self.detector, name)
+
+    def process_video(self, *args, **kwargs):
+        """VideoDetector.process_video (프레임 추론은 이 객체의 detect_frame을 거침)"""
+        from .detector import VideoDetector
+        return VideoDetector.process_video(self, *args, **kwargs)
+
+    def detect_frame(self, frame):
+        phash = compute_phash(frame)
+        detections = self.cache.lookup(phash)
+        if detections is None:
+            detections = self.detector.detect_frame(frame)
+            self.cache.add(phash, detections)
+        return detections
+
+    def detect_batch(self, frames):
+        """캐시에 없는 프레임만 모아서 배치 추론"""
+        phashes = [compute_phash(frame) for frame in frames]
+        results = [self.cache.lookup(phash) for phash in phashes]
+        misses = [index for index, detections in enumerate(results) if detections is None]
+        if misses:
+            for index, detections in zip(misses, self.detector.detect_batch([frames[i] for i in misses])):
+                results[index] = detections
+                self.cache.add(phashes[index], detections)
+        return results
+
+    def save_cache(self):
+        """캐시 저장 후 통계 반환 {'cache_lookups', 'cache_hits'}"""
+        self.cache.save()
+        stats = {'cache_lookups': self.cache.lookups, 'cache_hits': self.cache.hits}
+        if self.cache.lookups:
+            print(f"🧊 프레임 캐시: {self.cache.lookups}회 조회, {self.cache.hits}회 적중 "
+                  f"({self.cache.get_hit_rate() * 100:.1f}%)")
+        self.cache.lookups = self.cache.hits = 0
+        return stats
@@ -0,0 +1,267 @@
+"""
+중앙 추론 서버 (선택 사항)
+
+탐지 작업이 여러 개 동시에 돌면 작업마다 같은 모델을 따로 로드하고
+프레임을 한 장씩(batch 1) 추론해서 메모리와 CPU를 낭비한다.
+runinference 명령으로 InferenceServer를 띄우면 모델은 서버에 한 번만
+로드되고, 모든 클라이언트(RemoteVideoDetector)의 프레임을 지연 한도
+(INFERENCE_MAX_WAIT) 안에서 모아 배치로 추론한다.
+
+- 제어 메시지: Unix 소켓 (multiprocessing.connection, SECRET_KEY로 인증)
+- 프레임: 클라이언트가 만든 공유 메모리에 쓰고 이름/shape만 전달 (pickle 없음,
+  서버는 받은 프레임을 한 번 복사해서 배치에 넣음)
+
+INFERENCE_SERVER_ADDRESS가 없거나 서버에 연결할 수 없으면 get_detector는
+지금처럼 작업 프로세스 안에서 모델을 로드한다.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import resource_tracker
+from multiprocessing.connection import Client, Listener
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+from django.conf import settings
+
+from .detector import VideoDetector
+
+
+# 배치 최대 크기 / 첫 프레임 이후 배치를 모으는 최대 대기 시간 (초)
+DEFAULT_INFERENCE_MAX_BATCH = 8
+DEFAULT_INFERENCE_MAX_WAIT = 0.01
+
+
+def get_authkey():
+    return settings.SECRET_KEY.encode()
+
+
+def get_detector(model):
+    """
+    탐지기 생성 (추론 서버가 있으면 원격, 없으면 로컬 모델)
+
+    INFERENCE_SERVER_ADDRESS: 추론 서버 Unix 소켓 경로 (None이면 사용 안 함)
+    DETECTION_FRAME_CACHE: 프레임 pHash 결과 캐시 사용 (vision_engine.framecache)
+    """
+    detector = None
+    address = getattr(settings, 'INFERENCE_SERVER_ADDRESS', None)
+    if address:
+        try:
+            detector = RemoteVideoDetector(model, address)
+        except (OSError, EOFError, RuntimeError) as e:
+            print(f"⚠️  추론 서버 연결 실패 - 로컬 모델 사용: {e}")
+    if detector is None:
+        detector = VideoDetector(model)
+
+    if getattr(settings, 'DETECTION_FRAME_CACHE', False):
+        from .framecache import (
+            DEFAULT_FRAME_CACHE_DISTANCE, DEFAULT_FRAME_CACHE_MAX_ENTRIES,
+            CachedDetector, FrameCache, get_model_cache_key,
+        )
+        cache = FrameCache(
+            get_model_cache_key(model),
+            max_distance=getattr(settings, 'DETECTION_FRAME_CACHE_DISTANCE', DEFAULT_FRAME_CACHE_DISTANCE),
+            max_entries=getattr(settings, 'DETECTION_FRAME_CACHE_MAX_ENTRIES', DEFAULT_FRAME_CACHE_MAX_ENTRIES),
+        )
+        detector = CachedDetector(detector, cache)
+    return detector
+
+
+class RemoteVideoDetector(VideoDetector):
+    """추론 서버를 쓰는 VideoDetector (그리기/인코딩은 그대로, 추론만 원격)"""
+
+    def __init__(self, model, address):
+        self.model = model
+        self.yolo_model = None
+        self.model_type = getattr(model, 'model_type', 'yolo')
+        self.shm = None
+        self.conn = Client(address, family='AF_UNIX', authkey=get_authkey())
+        try:
+            self._call(('load', model._meta.label, model.pk))
+        except Exception:
+            self.close()
+            raise
+        print(f"🔌 추론 서버 사용: {model} ({address})")
+
+    def _call(self, message):
+        self.conn.send(message)
+        status, payload = self.conn.recv()
+        if status != 'ok':
+            raise RuntimeError(f"추론 서버 오류: {payload}")
+        return payload
+
+    def detect_frame(self, frame):
+        """프레임을 공유 메모리에 복사하고 서버의 배치 추론 결과를 받음"""
+        frame = np.ascontiguousarray(frame)
+        if self.shm is None or self.shm.size < frame.nbytes:
+            self._release_shm()
+            self.shm = SharedMemory(create=True, size=frame.nbytes)
+
+        np.ndarray(frame.shape, dtype=frame.dtype, buffer=self.shm.buf)[...] = frame
+        return self._call(('detect', self.shm.name, frame.shape, frame.dtype.str))
+
+    def detect_batch(self, frames):
+        return [self.detect_frame(frame) for frame in frames]
+
+    def _release_shm(self):
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    def close(self):
+        self._release_shm()
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ModelBatcher:
+    """모델 하나의 요청을 모아서 배치로 추론 (전용 스레드)"""
+
+    def __init__(self, detector, max_batch, max_wait):
+        self.detector = detector
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait
+        self.requests = queue.Queue()
+        self.batches = 0
+        self.frames = 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, frame):
+        future = Future()
+        self.requests.put((frame, future))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self.requests.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.requests.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                results = self.detector.detect_batch([frame for frame, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.frames += len(batch)
+            for (_, future), detections in zip(batch, results):
+                future.set_result(detections)
+
+
+class InferenceServer:
+    """모델을 한 번씩만 로드하고 클라이언트 요청을 모아서 추론"""
+
+    def __init__(self, address, max_batch=DEFAULT_INFERENCE_MAX_BATCH, max_wait=DEFAULT_INFERENCE_MAX_WAIT):
+        self.address = address
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.batchers = {}
+        self._lock = threading.Lock()
+        self._listener = None
+
+    def get_batcher(self, model_label, model_pk):
+        """모델별 배처 (처음 요청될 때 로드)"""
+        key = (model_label, model_pk)
+        with self._lock:
+            if key not in self.batchers:
+                from django.apps import apps
+
+                model = apps.get_model(model_label).objects.get(pk=model_pk)
+                self.batchers[key] = ModelBatcher(VideoDetector(model), self.max_batch, self.max_wait)
+                print(f"📦 모델 로드: {model} ({model_label}:{model_pk})")
+            return self.batchers[key]
+
+    def serve_forever(self):
+        # 이전 실행이 남긴 소켓 파일 정리
+        if os.path.exists(self.address):
+            os.remove(self.address)
+
+        self._listener = Listener(self.address, family='AF_UNIX', authkey=get_authkey())
+        print(f"🧠 추론 서버 시작: {self.address} (배치 최대 {self.max_batch}, 대기 {self.max_wait * 1000:.0f}ms)")
+        try:
+            while True:
+                try:
+                    conn = self._listener.accept()
+                except OSError:
+                    break  # close()로 종료
+                except Exception as e:
+                    print(f"⚠️  연결 거부: {e}")
+                    continue
+                threading.Thread(target=self._handle_client, args=(conn,), daemon=True).start()
+        finally:
+            self.close()
+
+    def close(self):
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+            for (label, pk), batcher in self.batchers.items():
+                if batcher.batches:
+                    print(f"📊 {label}:{pk} - 프레임 {batcher.frames}개, 배치 {batcher.batches}회 "
+                          f"(평균 {batcher.frames / batcher.batches:.1f})")
+
+    def _handle_client(self, conn):
+        """클라이언트 하나의 요청 처리 (요청-응답 순서대로)"""
+        batcher = None
+        shm = None
+        try:
+            while True:
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    break
+
+                try:
+                    if message[0] == 'load':
+                        batcher = self.get_batcher(message[1], message[2])
+                        conn.send(('ok', None))
+                    elif message[0] == 'detect':
+                        if batcher is None:
+                            raise RuntimeError("모델이 로드되지 않았습니다")
+                        _, shm_name, shape, dtype = message
+                        if shm is None or shm.name != shm_name:
+                            shm = self._attach(shm_name, shm)
+
+                        # 배처/모델이 프레임 참조를 계속 들고 있을 수 있으므로 공유 메모리 뷰는
+                        # 복사 후 바로 버린다 (뷰가 남아 있으면 shm.close()가 BufferError)
+                        frame = np.array(np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf))
+                        conn.send(('ok', batcher.submit(frame).result()))
+                    else:
+                        raise RuntimeError(f"알 수 없는 요청: {message[0]}")
+                except (EOFError, OSError):
+                    break
+                except Exception as e:
+                    conn.send(('error', str(e)))
+        finally:
+            if shm is not None:
+                shm.close()
+            conn.close()
+
+    @staticmethod
+    def _attach(name, previous=None):
+        """클라이언트 공유 메모리 연결 (해제는 만든 쪽이 하므로 resource tracker에서 제외)"""
+        if previous is not None:
+            previous.close()
+        shm = SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, 'shared_memory')
+        return shm
@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs.scheduler import apply_thread_budget, get_cpu_budget
+from vision_engine.inference import DEFAULT_INFERENCE_MAX_BATCH, DEFAULT_INFERENCE_MAX_WAIT, InferenceServer
+
+
+class Command(BaseCommand):
+    help = '중앙 추론 서버 실행 (모델을 한 번만 로드하고 탐지 작업들의 프레임을 배치로 추론)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--address',
+            default=getattr(settings, 'INFERENCE_SERVER_ADDRESS', None),
+            help='Unix 소켓 경로 (기본: INFERENCE_SERVER_ADDRESS)',
+        )
+        parser.add_argument(
+            '--max-batch',
+            type=int,
+            default=getattr(settings, 'INFERENCE_MAX_BATCH', DEFAULT_INFERENCE_MAX_BATCH),
+            help='한 번에 추론할 최대 프레임 수',
+        )
+        parser.add_argument(
+            '--max-wait',
+            type=float,
+            default=getattr(settings, 'INFERENCE_MAX_WAIT', DEFAULT_INFERENCE_MAX_WAIT),
+            help='첫 프레임 이후 배치를 모으는 최대 대기 시간 (초)',
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=None,
+            help='torch / OpenCV 스레드 수 (기본: 전체 스레드 예산)',
+        )
+
+    def handle(self, *args, **options):
+        if not options['address']:
+            raise CommandError('INFERENCE_SERVER_ADDRESS 설정 또는 --address 옵션이 필요합니다')
+
+        apply_thread_budget(options['threads'] or get_cpu_budget())
+
+        server = InferenceServer(options['address'], options['max_batch'], options['max_wait'])
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.close()
+        self.stdout.write('추론 서버 종료 완료')
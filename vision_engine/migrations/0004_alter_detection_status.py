@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vision_engine', '0003_detection_priority'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='detection',
+            name='status',
+            field=models.CharField(choices=[('ready', '대기'), ('queued', '대기열'), ('processing', '처리 중'), ('completed', '완료'), ('failed', '실패'), ('cancelled', '취소됨')], default='ready', max_length=20, verbose_name='상태'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vision_engine', '0004_alter_detection_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='detection',
+            name='batch_lead',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='batch_members', to='vision_engine.detection', verbose_name='대표 탐지'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vision_engine', '0005_detection_batch_lead'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='detection',
+            name='gated_frames',
+            field=models.IntegerField(default=0, verbose_name='추론 생략 프레임'),
+        ),
+        migrations.AddField(
+            model_name='detection',
+            name='motion_gate',
+            field=models.BooleanField(default=False, verbose_name='모션 게이트'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('videos', '0003_image'),
+        ('vision_engine', '0006_detection_gated_frames_detection_motion_gate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegionOfInterest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='이름')),
+                ('camera_pattern', models.CharField(blank=True, help_text='예: PORT01_LX3C_* (동영상 제목 또는 파일명과 비교)', max_length=200, verbose_name='카메라 이름 패턴')),
+                ('polygons', models.JSONField(default=list, verbose_name='다각형')),
+                ('is_active', models.BooleanField(default=True, verbose_name='사용')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='생성일')),
+                ('video', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='regions', to='videos.video', verbose_name='동영상')),
+            ],
+            options={
+                'verbose_name': '관심 영역',
+                'verbose_name_plural': '관심 영역들',
+                'ordering': ['name'],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:29
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vision_engine', '0007_regionofinterest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='detection',
+            name='cache_hits',
+            field=models.IntegerField(default=0, verbose_name='프레임 캐시 적중'),
+        ),
+        migrations.AddField(
+            model_name='detection',
+            name='cache_lookups',
+            field=models.IntegerField(default=0, verbose_name='프레임 캐시 조회'),
+        ),
+        migrations.CreateModel(
+            name='FrameResultCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_key', models.CharField(max_length=40, verbose_name='모델 키')),
+                ('phash', models.BigIntegerField(verbose_name='pHash')),
+                ('detections', models.JSONField(default=list, verbose_name='탐지 결과')),
+                ('hits', models.IntegerField(default=0, verbose_name='적중 횟수')),
+                ('last_used_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='마지막 사용')),
+            ],
+            options={
+                'verbose_name': '프레임 결과 캐시',
+                'verbose_name_plural': '프레임 결과 캐시들',
+                'indexes': [models.Index(fields=['model_key', 'last_used_at'], name='vision_engi_model_k_a781f8_idx')],
+            },
+        ),
+    ]
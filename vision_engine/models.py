@@ -9,11 +9,22 @@ class Detection(models.Model):
     
     STATUS_CHOICES = [
         ('ready', '대기'),
+        ('queued', '대기열'),
         ('processing', '처리 중'),
         ('completed', '완료'),
         ('failed', '실패'),
+        ('cancelled', '취소됨'),
     ]
     
+    PRIORITY_CHOICES = [
+        (0, '보통'),
+        (1, '높음'),
+        (2, '긴급'),
+    ]
+    
+    # 이 탐지를 대상으로 하는 작업 종류 (jobs.queue.JOB_HANDLERS)
+    JOB_KINDS = ('detection', 'fused', 'multi', 'chunked')
+    
     # 연결
     analysis = models.ForeignKey(
         Analysis,
@@ -38,6 +49,16 @@ class Detection(models.Model):
         verbose_name='커스텀 모델'
     )
     
+    # 여러 모델을 한 번에 실행할 때 작업을 대표하는 탐지 (대표 탐지의 작업이 함께 처리)
+    batch_lead = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='batch_members',
+        verbose_name='대표 탐지'
+    )
+    
     # 기본 정보
     title = models.CharField(max_length=200, verbose_name='제목')
     description = models.TextField(blank=True, verbose_name='설명')
@@ -50,6 +71,16 @@ class Detection(models.Model):
         verbose_name='상태'
     )
     
+    # 우선순위 (높을수록 먼저 실행)
+    priority = models.IntegerField(
+        choices=PRIORITY_CHOICES,
+        default=0,
+        verbose_name='우선순위'
+    )
+    
+    # 움직임이 없는 프레임은 추론 생략 (vision_engine.motion)
+    motion_gate = models.BooleanField(default=False, verbose_name='모션 게이트')
+    
     # 진행률
     total_frames = models.IntegerField(default=0, verbose_name='총 프레임')
     processed_frames = models.IntegerField(default=0, verbose_name='처리된 프레임')
@@ -67,6 +98,9 @@ class Detection(models.Model):
         verbose_name='탐지 데이터'
     )
     total_detections = models.IntegerField(default=0, verbose_name='총 탐지 수')
+    gated_frames = models.IntegerField(default=0, verbose_name='추론 생략 프레임')
+    cache_lookups = models.IntegerField(default=0, verbose_name='프레임 캐시 조회')
+    cache_hits = models.IntegerField(default=0, verbose_name='프레임 캐시 적중')
     detection_summary = models.JSONField(
         default=dict,
         blank=True,
@@ -95,6 +129,17 @@ class Detection(models.Model):
             return self.base_model
         return self.custom_model
     
+    def get_job_object_id(self):
+        """작업 큐에서 이 탐지를 처리하는 작업의 대상 ID (여러 모델 실행이면 대표 탐지)"""
+        return self.batch_lead_id or self.id
+    
+    def get_batch(self):
+        """같은 작업으로 처리되는 탐지 목록 (대표 탐지 포함, 생성 순)"""
+        lead_id = self.get_job_object_id()
+        return Detection.objects.filter(
+            models.Q(id=lead_id) | models.Q(batch_lead_id=lead_id)
+        ).order_by('id')
+    
     def get_model_name(self):
         """모델 이름 반환"""
         model = self.get_model()
@@ -108,6 +153,68 @@ class Detection(models.Model):
         """탐지 결과 저장"""
         self.detection_data = detections
         self.save()
+
+    def iter_detection_frames(self, start_frame=None, end_frame=None, chunk_size=500):
+        """
+        탐지 결과를 프레임 단위로 순회
+
+        detection_data 전체를 파이썬 객체로 올리지 않고 DB의 JSON 함수로
+        배열 원소를 하나씩 꺼내 chunk_size 단위로 읽는다.
+        """
+        from django.db import connection
+
+        table = connection.ops.quote_name(self._meta.db_table)
+        params = [self.pk]
+
+        if connection.vendor == 'sqlite':
+            sql = (
+                f"SELECT je.value FROM {table} d, json_each(d.detection_data) je "
+                f"WHERE d.id = %s"
+            )
+            frame_expr = "json_extract(je.value, '$.frame')"
+            order = "je.key"
+        elif connection.vendor == 'postgresql':
+            sql = (
+                f"SELECT je.value FROM {table} d, "
+                f"jsonb_array_elements(d.detection_data) WITH ORDINALITY je(value, idx) "
+                f"WHERE d.id = %s"
+            )
+            frame_expr = "(je.value->>'frame')::int"
+            order = "je.idx"
+        else:
+            # JSON 함수를 지원하지 않는 DB는 필드를 그대로 읽어서 순회
+            data = type(self).objects.filter(pk=self.pk).values_list('detection_data', flat=True).first() or []
+            for item in data:
+                frame = item.get('frame', 0)
+                if start_frame is not None and frame < start_frame:
+                    continue
+                if end_frame is not None and frame > end_frame:
+                    continue
+                yield item
+            return
+
+        if start_frame is not None:
+            sql += f" AND {frame_expr} >= %s"
+            params.append(start_frame)
+        if end_frame is not None:
+            sql += f" AND {frame_expr} <= %s"
+            params.append(end_frame)
+        sql += f" ORDER BY {order}"
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                for (value,) in rows:
+                    yield json.loads(value) if isinstance(value, str) else value
+
+    def get_cache_hit_rate(self):
+        """프레임 캐시 적중률 (%)"""
+        if not self.cache_lookups:
+            return 0
+        return round(self.cache_hits / self.cache_lookups * 100, 1)
     
     def get_duration(self):
         """실행 시간 계산"""
@@ -128,3 +235,97 @@ class Detection(models.Model):
         if minutes > 0:
             return f"{minutes}분 {seconds}초"
         return f"{seconds}초"
+
+
+class RegionOfInterest(models.Model):
+    """
+    탐지 관심 영역 (ROI)
+
+    특정 동영상에 지정하거나, 카메라 이름 패턴(예: PORT01_LX3C_*)으로
+    제목/파일명이 맞는 모든 동영상에 적용한다.
+    polygons: [[[x, y], ...], ...] (값이 모두 1 이하이면 프레임 크기 대비 비율)
+    """
+    
+    name = models.CharField(max_length=100, verbose_name='이름')
+    video = models.ForeignKey(
+        'videos.Video',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='regions',
+        verbose_name='동영상'
+    )
+    camera_pattern = models.CharField(
+        max_length=200,
+        blank=True,
+        verbose_name='카메라 이름 패턴',
+        help_text='예: PORT01_LX3C_* (동영상 제목 또는 파일명과 비교)'
+    )
+    polygons = models.JSONField(default=list, verbose_name='다각형')
+    is_active = models.BooleanField(default=True, verbose_name='사용')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='생성일')
+    
+    class Meta:
+        verbose_name = '관심 영역'
+        verbose_name_plural = '관심 영역들'
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.name
+    
+    def clean(self):
+        from django.core.exceptions import ValidationError
+        from .roi import validate_polygons
+        
+        if not self.video_id and not self.camera_pattern:
+            raise ValidationError('동영상 또는 카메라 이름 패턴을 지정해야 합니다')
+        try:
+            validate_polygons(self.polygons)
+        except ValueError as e:
+            raise ValidationError({'polygons': str(e)})
+    
+    def matches(self, video):
+        """동영상에 적용되는 ROI인지"""
+        import fnmatch
+        import os
+        
+        if self.video_id:
+            return self.video_id == video.id
+        names = [video.title]
+        if video.file:
+            names.append(os.path.basename(video.file.name))
+        return any(fnmatch.fnmatchcase(name, self.camera_pattern) for name in names)
+    
+    @classmethod
+    def get_polygons_for(cls, video):
+        """동영상에 적용되는 ROI 다각형 전체 (없으면 빈 목록)"""
+        if video is None:
+            return []
+        candidates = cls.objects.filter(is_active=True).filter(
+            models.Q(video=video) | (models.Q(video__isnull=True) & ~models.Q(camera_pattern=''))
+        )
+        polygons = []
+        for region in candidates:
+            if region.matches(video):
+                polygons.extend(region.polygons)
+        return polygons
+
+
+class FrameResultCache(models.Model):
+    """프레임 pHash별 탐지 결과 캐시 (vision_engine.framecache)"""
+    
+    model_key = models.CharField(max_length=40, verbose_name='모델 키')
+    phash = models.BigIntegerField(verbose_name='pHash')
+    detections = models.JSONField(default=list, verbose_name='탐지 결과')
+    hits = models.IntegerField(default=0, verbose_name='적중 횟수')
+    last_used_at = models.DateTimeField(default=timezone.now, verbose_name='마지막 사용')
+    
+    class Meta:
+        verbose_name = '프레임 결과 캐시'
+        verbose_name_plural = '프레임 결과 캐시들'
+        indexes = [
+            models.Index(fields=['model_key', 'last_used_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.model_key[:8]}:{self.phash:x}"
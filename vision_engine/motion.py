@@ -0,0 +1,81 @@
+"""
+모션 게이트
+
+고정 카메라 영상은 대부분 빈 장면인데도 모든 프레임을 모델에 넘긴다.
+MotionGate는 축소한 흑백 프레임에 배경 차분(MOG2)을 적용해서 움직이는
+영역의 비율이 임계값보다 작으면 추론을 건너뛰게 한다. 건너뛴 프레임은
+직전 탐지 결과를 그대로 쓰거나(reuse) 빈 결과로 처리한다.
+"""
+import cv2
+
+
+# 움직임 영역 비율 임계값 / 배경 차분용 축소 너비
+DEFAULT_MOTION_THRESHOLD = 0.002
+DEFAULT_MOTION_WIDTH = 160
+
+# 움직임이 없어도 이 프레임 수마다 한 번은 추론 (멈춘 물체 갱신)
+DEFAULT_MOTION_REFRESH = 150
+
+
+class MotionGate:
+    """프레임마다 추론이 필요한지 판단하고 건너뛴 프레임 수를 집계"""
+
+    def __init__(self, threshold=DEFAULT_MOTION_THRESHOLD, width=DEFAULT_MOTION_WIDTH,
+                 refresh=DEFAULT_MOTION_REFRESH, reuse=True, history=300):
+        """
+        threshold: 움직임 영역 비율 (0~1) 이 값 미만이면 추론 생략
+        refresh: 연속으로 건너뛸 수 있는 최대 프레임 수 (0이면 제한 없음)
+        reuse: 건너뛴 프레임에 직전 탐지 결과를 사용 (False면 빈 결과)
+        """
+        self.params = {
+            'threshold': threshold, 'width': width, 'refresh': refresh,
+            'reuse': reuse, 'history': history,
+        }
+        self.threshold = threshold
+        self.width = width
+        self.refresh = refresh
+        self.reuse = reuse
+        self.subtractor = cv2.createBackgroundSubtractorMOG2(
+            history=history, varThreshold=25, detectShadows=False
+        )
+        self.frames = 0
+        self.gated = 0
+        self._skipped = 0
+
+    def clone(self):
+        """같은 설정의 새 게이트 (구간별 / 프로세스별로 따로 씀)"""
+        return MotionGate(**self.params)
+
+    def get_motion_ratio(self, frame):
+        """움직이는 픽셀 비율"""
+        height, width = frame.shape[:2]
+        if width > self.width:
+            frame = cv2.resize(frame, (self.width, max(1, int(height * self.width / width))),
+                               interpolation=cv2.INTER_AREA)
+        if frame.ndim == 3:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGRA2GRAY if frame.shape[2] == 4 else cv2.COLOR_BGR2GRAY)
+        frame = cv2.GaussianBlur(frame, (5, 5), 0)
+
+        mask = self.subtractor.apply(frame)
+        return cv2.countNonZero(mask) / mask.size
+
+    def check(self, frame):
+        """추론해야 하면 True (첫 프레임과 refresh 주기는 항상 추론)"""
+        ratio = self.get_motion_ratio(frame)
+        self.frames += 1
+
+        if self.frames == 1 or ratio >= self.threshold or (self.refresh and self._skipped >= self.refresh):
+            self._skipped = 0
+            return True
+
+        self._skipped += 1
+        self.gated += 1
+        return False
+
+    def get_stats(self):
+        return {'frames': self.frames, 'gated_frames': self.gated}
+
+    def print_stats(self):
+        if self.frames:
+            print(f"🚦 모션 게이트: {self.frames}프레임 중 {self.gated}프레임 추론 생략 "
+                  f"({self.gated / self.frames * 100:.1f}%)")
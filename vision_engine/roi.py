@@ -0,0 +1,100 @@
+"""
+관심 영역 (ROI)
+
+부두/게이트처럼 화면 일부만 중요한 영상은 전체 프레임을 추론할 필요가 없다.
+RegionMask는 ROI 다각형들을 감싸는 사각형만 잘라서 모델에 넘기고
+(YOLO는 입력을 640으로 줄이므로 잘라낸 영역은 더 높은 해상도로 추론된다),
+박스를 원래 좌표로 옮긴 뒤 중심이 다각형 밖에 있는 탐지는 버린다.
+
+다각형 좌표는 [[x, y], ...] 형식이며 값이 모두 1 이하이면 프레임 크기에
+대한 비율, 아니면 픽셀 좌표로 본다.
+"""
+import cv2
+import numpy as np
+
+
+# 잘라낼 영역 여백 (프레임 크기 대비 비율, 경계에 걸친 물체 보존)
+DEFAULT_ROI_PADDING = 0.02
+
+ROI_COLOR = (0, 200, 255)
+
+
+def to_pixel_polygon(polygon, width, height):
+    """다각형 좌표를 픽셀 좌표 배열로 변환"""
+    points = np.asarray(polygon, dtype=np.float64).reshape(-1, 2)
+    if points.size and points.max() <= 1.0:
+        points = points * [width, height]
+    return np.round(points).astype(np.int32)
+
+
+def validate_polygons(polygons):
+    """다각형 목록 형식 검사 (잘못되면 ValueError)"""
+    if not isinstance(polygons, list) or not polygons:
+        raise ValueError("ROI 다각형 목록이 비어 있습니다")
+    for polygon in polygons:
+        if not isinstance(polygon, list) or len(polygon) < 3:
+            raise ValueError("ROI 다각형은 점이 3개 이상이어야 합니다")
+        for point in polygon:
+            if not isinstance(point, (list, tuple)) or len(point) != 2 \
+                    or not all(isinstance(value, (int, float)) for value in point):
+                raise ValueError(f"ROI 좌표 형식이 올바르지 않습니다: {point}")
+
+
+class RegionMask:
+    """ROI 다각형 마스크 + 잘라낼 영역"""
+
+    def __init__(self, polygons, width, height, padding=DEFAULT_ROI_PADDING):
+        self.width = width
+        self.height = height
+        self.polygons = [to_pixel_polygon(polygon, width, height) for polygon in polygons]
+
+        self.mask = np.zeros((height, width), dtype=np.uint8)
+        cv2.fillPoly(self.mask, self.polygons, 255)
+
+        # 모든 다각형을 감싸는 사각형 (여백 포함, 프레임 안으로 제한)
+        x, y, w, h = cv2.boundingRect(np.concatenate(self.polygons))
+        pad_x, pad_y = int(width * padding), int(height * padding)
+        self.x1 = max(0, x - pad_x)
+        self.y1 = max(0, y - pad_y)
+        self.x2 = min(width, x + w + pad_x)
+        self.y2 = min(height, y + h + pad_y)
+
+        if self.x2 <= self.x1 or self.y2 <= self.y1:
+            raise ValueError("ROI가 프레임 밖에 있습니다")
+
+    def get_area_ratio(self):
+        """잘라낸 영역 / 전체 프레임 (추론 면적 비율)"""
+        return (self.x2 - self.x1) * (self.y2 - self.y1) / (self.width * self.height)
+
+    def crop(self, frame):
+        return frame[self.y1:self.y2, self.x1:self.x2]
+
+    def contains(self, bbox):
+        """박스 중심이 ROI 안에 있는지 (bbox: 프레임 좌표 [x, y, w, h])"""
+        x, y, w, h = bbox
+        cx = min(max(int(x + w / 2), 0), self.width - 1)
+        cy = min(max(int(y + h / 2), 0), self.height - 1)
+        return self.mask[cy, cx] > 0
+
+    def detect(self, detector, frame):
+        """잘라낸 영역만 추론하고 ROI 안의 탐지만 프레임 좌표로 반환"""
+        return self.to_frame(detector.detect_frame(self.crop(frame)))
+
+    def detect_batch(self, detector, frames):
+        """detect의 배치 버전 (잘라낸 영역들을 한 번에 추론)"""
+        return [self.to_frame(detections) for detections in detector.detect_batch([self.crop(f) for f in frames])]
+
+    def to_frame(self, detections):
+        """잘라낸 영역 기준 탐지를 프레임 좌표로 옮기고 ROI 밖 탐지는 버림"""
+        result = []
+        for det in detections:
+            x, y, w, h = det['bbox']
+            det = dict(det, bbox=[x + self.x1, y + self.y1, w, h])
+            if self.contains(det['bbox']):
+                result.append(det)
+        return result
+
+    def draw(self, frame):
+        """ROI 경계 표시"""
+        cv2.polylines(frame, self.polygons, True, ROI_COLOR, 2)
+        return frame
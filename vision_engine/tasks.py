@@ -1,14 +1,225 @@
 from django.utils import timezone
-from .models import Detection
-from .detector import VideoDetector
+from jobs.cancel import JobCancelled, get_cancel_token
+from jobs.progress import get_progress_reporter
+from .models import Detection, RegionOfInterest
+from .detector import MultiModelDetector
+from .inference import get_detector
 import os
+import shutil
 from pathlib import Path
 from django.conf import settings
+from videos.retention import register_artifact, restore_artifact, touch_artifact
+from videos.storage import delete_media_prefix, get_media_store, local_media_path, publish_media
 
 
-def process_detection(detection_id):
-    """탐지 작업 실행 (백그라운드)"""
+# 전처리 + 탐지(fused) 작업에서 인코딩할 수 있는 출력
+FUSED_OUTPUTS = ('annotated', 'preprocessed')
+
+# YOLO 모델 크기별 상대 추론 비용 (yolov8n = 1)
+YOLO_SIZE_FACTORS = {'n': 1.0, 's': 2.5, 'm': 6.0, 'l': 10.0, 'x': 16.0}
+
+# 크기를 알 수 없는 모델의 기준 파일 크기 (yolov8n.pt 약 6MB)
+REFERENCE_MODEL_SIZE = 6 * 1024 * 1024
+
+
+def get_model_cost_factor(model):
+    """모델 크기 기반 상대 추론 비용"""
+    if model is None:
+        return 1.0
+
+    version = (getattr(model, 'yolo_version', '') or '').lower()
+    stem = os.path.splitext(os.path.basename(version))[0]
+    if stem and stem[-1] in YOLO_SIZE_FACTORS:
+        return YOLO_SIZE_FACTORS[stem[-1]]
+
+    if model.file_size:
+        return max(1.0, model.file_size / REFERENCE_MODEL_SIZE)
+    return 2.0
+
+
+def estimate_detection_cost(detection_id):
+    """탐지 작업 비용 추정 (프레임 수 x (디코딩/인코딩 해상도 + 모델 크기))"""
+    from jobs.cost import probe_media
+
+    detection = Detection.objects.select_related('analysis', 'base_model', 'custom_model').get(id=detection_id)
+    analysis = detection.analysis
+    if not analysis.output_video_path:
+        return None
+
+    input_path = get_media_store().source(analysis.output_video_path)
+    frames, width, height = probe_media(input_path)
+    if not frames:
+        return None
+
+    # YOLO는 입력을 640 크기로 줄여서 추론하므로 추론 비용은 해상도와 무관
+    megapixels = width * height / 1_000_000
+    return frames * (megapixels + 2.0 * get_model_cost_factor(detection.get_model()))
+
+
+def get_detection_output_path(detection):
+    """탐지 결과 파일 경로 (media/detection_results/<id>/detected_<원본이름>)"""
+    output_dir = Path('media/detection_results') / str(detection.id)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    # 원본 파일명 가져오기
+    analysis = detection.analysis
+    media_obj = getattr(analysis, 'video', None) or getattr(analysis, 'image', None)
+    if media_obj and hasattr(media_obj, 'file') and media_obj.file:
+        original_filename = os.path.basename(media_obj.file.name)
+    else:
+        original_filename = "detected_result.mp4"
+    
+    return output_dir / f'detected_{original_filename}'
+
+
+def get_motion_gate(detection):
+    """
+    탐지 작업의 모션 게이트 (사용하지 않으면 None)
+
+    DETECTION_MOTION_THRESHOLD: 움직임 영역 비율 임계값
+    DETECTION_MOTION_REFRESH: 움직임이 없어도 추론하는 최대 간격 (프레임)
+    DETECTION_MOTION_REUSE: 건너뛴 프레임에 직전 탐지 결과 사용
+    """
+    from .motion import DEFAULT_MOTION_REFRESH, DEFAULT_MOTION_THRESHOLD, MotionGate
+
+    if not detection.motion_gate:
+        return None
+    return MotionGate(
+        threshold=getattr(settings, 'DETECTION_MOTION_THRESHOLD', DEFAULT_MOTION_THRESHOLD),
+        refresh=getattr(settings, 'DETECTION_MOTION_REFRESH', DEFAULT_MOTION_REFRESH),
+        reuse=getattr(settings, 'DETECTION_MOTION_REUSE', True),
+    )
+
+
+def save_detection_results(detection, model, results, output_path, reporter):
+    """탐지 결과 저장 및 완료 처리 (JSON 결과는 완료 시 한 번만 기록)"""
+    detection.detection_data = results['detections']
+    detection.total_detections = results['total_detections']
+    detection.detection_summary = results['summary']
+    detection.gated_frames = results.get('gated_frames', 0)
+    detection.cache_lookups = results.get('cache_lookups', 0)
+    detection.cache_hits = results.get('cache_hits', 0)
+    
+    # 출력 경로 저장
+    if output_path:
+        relative_path = Path(output_path).relative_to('media')
+        detection.output_video_path = str(relative_path).replace('\\', '/')
+        publish_media(detection.output_video_path)
+    
+    # 모델 사용 횟수 증가
+    model.increment_usage()
+    
+    # 완료
+    detection.status = 'completed'
+    detection.completed_at = timezone.now()
+    detection.progress = 100
+    detection.processed_frames = reporter.state.get('processed_frames', detection.processed_frames)
+    detection.total_frames = reporter.state.get('total_frames', detection.total_frames)
+    detection.save(update_fields=[
+        'detection_data', 'total_detections', 'detection_summary', 'gated_frames',
+        'cache_lookups', 'cache_hits', 'output_video_path',
+        'status', 'completed_at', 'progress', 'processed_frames', 'total_frames',
+    ])
+    if output_path:
+        register_artifact('detection', detection.id, detection.output_video_path)
+    
+    print(f"\n{'='*60}")
+    print(f"✨ 탐지 완료!")
+    print(f"   총 탐지: {detection.total_detections}")
+    print(f"   클래스: {len(detection.detection_summary)}")
+    if detection.gated_frames:
+        print(f"   추론 생략: {detection.gated_frames}프레임")
+    if detection.cache_lookups:
+        print(f"   캐시 적중률: {detection.get_cache_hit_rate()}%")
+    print(f"{'='*60}\n")
+
+
+def estimate_fused_cost(detection_id, outputs=FUSED_OUTPUTS):
+    """전처리 + 탐지 작업 비용 추정 (원본 1회 디코딩 + 전처리 + 추론 + 선택한 출력 인코딩)"""
+    from analysis.tasks import STEP_COST_WEIGHTS
+    from jobs.cost import probe_media
+
+    detection = Detection.objects.select_related('analysis', 'base_model', 'custom_model').get(id=detection_id)
+    media = detection.analysis.get_media()
+    if not media or not media.file:
+        return None
+
+    frames, width, height = probe_media(get_media_store().source(media.file.name))
+    if not frames:
+        return None
+
+    megapixels = width * height / 1_000_000
+    pipeline = detection.analysis.preprocessing_pipeline or []
+    step_weight = sum(STEP_COST_WEIGHTS.get(step.get('type'), 2.0) for step in pipeline)
+    codec_weight = 0.5 + 0.5 * len(outputs)
+    return frames * (megapixels * (codec_weight + step_weight) + 2.0 * get_model_cost_factor(detection.get_model()))
+
+
+def estimate_multi_cost(detection_id):
+    """여러 모델 탐지 비용 추정 (원본 1회 디코딩 + 모델별 추론 / 인코딩)"""
+    from analysis.tasks import STEP_COST_WEIGHTS
+    from jobs.cost import probe_media
+
+    lead = Detection.objects.select_related('analysis').get(id=detection_id)
+    analysis = lead.analysis
+    batch = list(lead.get_batch().select_related('base_model', 'custom_model'))
+
+    if analysis.output_video_path:
+        input_path = get_media_store().source(analysis.output_video_path)
+        step_weight = 0.0
+    else:
+        media = analysis.get_media()
+        if not media or not media.file:
+            return None
+        input_path = get_media_store().source(media.file.name)
+        step_weight = sum(STEP_COST_WEIGHTS.get(step.get('type'), 2.0) for step in analysis.preprocessing_pipeline or [])
+
+    frames, width, height = probe_media(input_path)
+    if not frames:
+        return None
+
+    megapixels = width * height / 1_000_000
+    inference = sum(2.0 * get_model_cost_factor(detection.get_model()) for detection in batch)
+    return frames * (megapixels * (0.5 + 0.5 * len(batch) + step_weight) + inference)
+
+
+def get_chunked_detector(model):
+    """
+    구간 분할 탐지기 (워커 수 = 작업 스레드 예산 / 워커당 스레드)
+
+    DETECTION_CHUNK_THREADS: 워커 1개의 torch 스레드 수
+    DETECTION_CHUNK_SECONDS: 구간 길이 (초)
+    DETECTION_CHUNK_WORKERS: 워커 수 상한 (None이면 스레드 예산으로 결정)
+    DETECTION_CHUNK_BATCH: 워커가 한 번에 추론할 프레임 수
+    """
+    from jobs.scheduler import get_thread_budget
+    from .chunked import DEFAULT_CHUNK_BATCH, DEFAULT_CHUNK_SECONDS, DEFAULT_CHUNK_THREADS, ChunkedVideoDetector
+
+    threads = getattr(settings, 'DETECTION_CHUNK_THREADS', DEFAULT_CHUNK_THREADS)
+    workers = max(1, get_thread_budget('chunked') // threads)
+    max_workers = getattr(settings, 'DETECTION_CHUNK_WORKERS', None)
+    if max_workers:
+        workers = min(workers, max_workers)
+
+    return ChunkedVideoDetector(
+        model,
+        workers=workers,
+        threads_per_worker=threads,
+        chunk_seconds=getattr(settings, 'DETECTION_CHUNK_SECONDS', DEFAULT_CHUNK_SECONDS),
+        batch_size=getattr(settings, 'DETECTION_CHUNK_BATCH', DEFAULT_CHUNK_BATCH),
+    )
+
+
+def process_detection(detection_id, chunked=False):
+    """
+    탐지 작업 실행 (백그라운드)
+
+    chunked: 동영상을 시간 구간으로 나눠 여러 프로세스에서 병렬로 탐지
+    (vision_engine.chunked, 이미지는 항상 단일 프로세스)
+    """
     detection = None
+    cancel_check = get_cancel_token()
+    reporter = get_progress_reporter('chunked' if chunked else 'detection', detection_id)
     
     try:
         print(f"\n{'='*60}")
@@ -25,7 +236,7 @@ def process_detection(detection_id):
         # 상태 업데이트
         detection.status = 'processing'
         detection.started_at = timezone.now()
-        detection.save()
+        detection.save(update_fields=['status', 'started_at'])
         
         print(f"📹 분석 ID: {analysis.id}")
         print(f"🤖 모델: {detection.get_model_name()}")
@@ -34,7 +245,10 @@ def process_detection(detection_id):
         if not analysis.output_video_path:
             raise ValueError("전처리된 파일이 없습니다")
         
-        input_path = os.path.join(settings.BASE_DIR, 'media', analysis.output_video_path)
+        # 예산 초과로 삭제된 전처리 결과면 먼저 다시 만듦 (videos.retention)
+        restore_artifact('analysis', analysis.id, analysis.output_video_path)
+        touch_artifact(analysis.output_video_path)
+        input_path = local_media_path(analysis.output_video_path)
         
         if not os.path.exists(input_path):
             raise FileNotFoundError(f"파일을 찾을 수 없습니다: {input_path}")
@@ -42,65 +256,164 @@ def process_detection(detection_id):
         print(f"📂 입력: {input_path}")
         
         # 출력 경로 설정
-        output_dir = Path('media/detection_results') / str(detection.id)
-        output_dir.mkdir(parents=True, exist_ok=True)
-        
-        # 원본 파일명 가져오기
-        media_obj = getattr(analysis, 'video', None) or getattr(analysis, 'image', None)
-        if media_obj and hasattr(media_obj, 'file') and media_obj.file:
-            original_filename = os.path.basename(media_obj.file.name)
-        else:
-            original_filename = "detected_result.mp4"
-        
-        output_filename = f'detected_{original_filename}'
-        output_path = output_dir / output_filename
+        output_path = get_detection_output_path(detection)
         
         print(f"📤 출력: {output_path}")
         
         # 탐지 실행
-        detector = VideoDetector(model)
+        if chunked and analysis.get_media_type() == 'video':
+            detector = get_chunked_detector(model)
+        else:
+            detector = get_detector(model)
         
-        # 진행률 콜백
+        # 진행률 콜백 (행 저장 대신 진행률 채널에 스로틀해서 기록)
         def progress_callback(current, total, progress):
-            detection.processed_frames = current
-            detection.total_frames = total
-            detection.progress = progress
-            detection.save()
-            print(f"⏳ 진행: {current}/{total} ({progress}%)")
+            reporter.update(current, total, progress, force=progress >= 85)
         
         # 실행
         results = detector.process_video(
             input_path,
             str(output_path),
-            progress_callback
+            progress_callback,
+            cancel_check,
+            motion_gate=get_motion_gate(detection),
+            regions=RegionOfInterest.get_polygons_for(analysis.video),
         )
         
-        # 결과 저장
-        detection.save_results(results['detections'])
-        detection.total_detections = results['total_detections']
-        detection.detection_summary = results['summary']
+        save_detection_results(detection, model, results, output_path, reporter)
         
-        # 출력 경로 저장
-        relative_path = output_path.relative_to('media')
-        detection.output_video_path = str(relative_path).replace('\\', '/')
+        return True
         
-        # 모델 사용 횟수 증가
-        model.increment_usage()
+    except JobCancelled as e:
+        print(f"🛑 탐지 중단: {e}")
+        cleanup_cancelled_detection(detection_id)
+        raise
         
-        # 완료
-        detection.status = 'completed'
-        detection.completed_at = timezone.now()
-        detection.progress = 100
-        detection.save()
+    except Exception as e:
+        print(f"❌ 에러: {e}")
+        import traceback
+        traceback.print_exc()
+        
+        if detection:
+            detection.status = 'failed'
+            detection.error_message = str(e)
+            detection.save(update_fields=['status', 'error_message'])
         
+        return False
+
+
+def process_chunked_detection(detection_id):
+    """구간 분할 병렬 탐지 작업 (작업 종류 'chunked')"""
+    return process_detection(detection_id, chunked=True)
+
+
+def process_fused_detection(detection_id, outputs=FUSED_OUTPUTS):
+    """
+    전처리 + 탐지 한 번에 실행 (백그라운드)
+
+    원본을 한 번만 디코딩하고, 컴파일된 전처리 파이프라인을 메모리에서 적용한
+    프레임을 바로 탐지기에 넣는다. 재인코딩된 전처리 파일을 다시 디코딩하지
+    않으므로 인코딩/디코딩 왕복과 화질 손실이 없고, outputs에 있는 결과
+    ('annotated': 탐지 결과, 'preprocessed': 전처리 결과)만 인코딩한다.
+    """
+    from analysis.models import Analysis
+    from analysis.preprocessing import VideoPreprocessor
+    from analysis.tasks import get_analysis_output_path
+    
+    detection = None
+    analysis = None
+    outputs = [name for name in outputs if name in FUSED_OUTPUTS]
+    save_preprocessed = 'preprocessed' in outputs
+    cancel_check = get_cancel_token()
+    reporter = get_progress_reporter('fused', detection_id)
+    
+    try:
         print(f"\n{'='*60}")
-        print(f"✨ 탐지 완료!")
-        print(f"   총 탐지: {detection.total_detections}")
-        print(f"   클래스: {len(detection.detection_summary)}")
+        print(f"⚡ 전처리 + 탐지 작업 시작: ID={detection_id} (출력: {', '.join(outputs) or '데이터만'})")
         print(f"{'='*60}\n")
         
+        detection = Detection.objects.select_related('analysis').get(id=detection_id)
+        analysis = detection.analysis
+        model = detection.get_model()
+        
+        if not model:
+            raise ValueError("모델이 선택되지 않았습니다")
+        
+        media = analysis.get_media()
+        if not media or not media.file:
+            raise ValueError("미디어를 찾을 수 없습니다")
+        
+        input_path = local_media_path(media.file.name)
+        if not os.path.exists(input_path):
+            raise FileNotFoundError(f"파일을 찾을 수 없습니다: {input_path}")
+        
+        # 파이프라인을 먼저 컴파일 (잘못된 단계면 바로 실패)
+        transform = VideoPreprocessor().compile_pipeline(analysis.preprocessing_pipeline)
+        
+        # 상태 업데이트
+        now = timezone.now()
+        detection.status = 'processing'
+        detection.started_at = now
+        detection.save(update_fields=['status', 'started_at'])
+        
+        if save_preprocessed:
+            Analysis.objects.filter(id=analysis.id).update(
+                status='processing', started_at=now, current_step='전처리 + 탐지 실행 중',
+                error_message='', updated_at=now,
+            )
+        
+        output_path = get_detection_output_path(detection) if 'annotated' in outputs else None
+        preprocessed_path = get_analysis_output_path(analysis) if save_preprocessed else None
+        
+        print(f"📂 입력 (원본): {input_path}")
+        print(f"🤖 모델: {detection.get_model_name()}")
+        
+        # 탐지 실행
+        detector = get_detector(model)
+        
+        def progress_callback(current, total, progress):
+            reporter.update(current, total, progress, force=progress >= 85)
+        
+        results = detector.process_video(
+            input_path,
+            output_path,
+            progress_callback,
+            cancel_check,
+            transform=transform,
+            preprocessed_path=preprocessed_path,
+            motion_gate=get_motion_gate(detection),
+            regions=RegionOfInterest.get_polygons_for(analysis.video),
+        )
+        
+        # 전처리 결과를 저장했으면 분석도 완료 처리
+        if save_preprocessed:
+            relative_path = str(preprocessed_path.relative_to('media')).replace('\\', '/')
+            publish_media(relative_path)
+            Analysis.objects.filter(id=analysis.id).update(
+                status='completed',
+                completed_at=timezone.now(),
+                progress=100,
+                output_video_path=relative_path,
+                current_step='완료',
+                processed_frames=reporter.state.get('processed_frames', 0),
+                total_frames=reporter.state.get('total_frames', 0),
+                updated_at=timezone.now(),
+            )
+            register_artifact('analysis', analysis.id, relative_path)
+        
+        save_detection_results(detection, model, results, output_path, reporter)
+        
         return True
         
+    except JobCancelled as e:
+        print(f"🛑 전처리 + 탐지 중단: {e}")
+        cleanup_cancelled_detection(detection_id)
+        if analysis and save_preprocessed:
+            Analysis.objects.filter(id=analysis.id, status='processing').update(
+                status='cancelled', current_step='취소됨',
+            )
+        raise
+        
     except Exception as e:
         print(f"❌ 에러: {e}")
         import traceback
@@ -109,6 +422,166 @@ def process_detection(detection_id):
         if detection:
             detection.status = 'failed'
             detection.error_message = str(e)
-            detection.save()
+            detection.save(update_fields=['status', 'error_message'])
+        if analysis and save_preprocessed:
+            Analysis.objects.filter(id=analysis.id, status='processing').update(
+                status='failed', error_message=str(e), current_step='실패',
+            )
+        
+        return False
+
+
+def process_multi_detection(detection_id):
+    """
+    여러 모델 탐지 실행 (백그라운드)
+
+    detection_id는 대표 탐지이고 batch_lead로 연결된 탐지들을 함께 처리한다.
+    프레임을 한 번만 디코딩해서 모든 모델에 넘기고 (코어가 허용하는 만큼
+    병렬로), 결과는 모델별 Detection 행에 따로 저장한다. 분석이 완료되지
+    않았으면 원본에 전처리 파이프라인을 메모리에서 적용해서 탐지한다.
+    """
+    from analysis.preprocessing import VideoPreprocessor
+    from jobs.scheduler import get_thread_budget
+    
+    batch_ids = []
+    cancel_check = get_cancel_token()
+    reporter = get_progress_reporter('multi', detection_id)
+    
+    try:
+        lead = Detection.objects.select_related('analysis').get(id=detection_id)
+        analysis = lead.analysis
+        batch = list(lead.get_batch().select_related('base_model', 'custom_model'))
+        batch_ids = [detection.id for detection in batch]
+        
+        print(f"\n{'='*60}")
+        print(f"🔍 여러 모델 탐지 작업 시작: ID={detection_id} (모델 {len(batch)}개)")
+        print(f"{'='*60}\n")
+        
+        models = [detection.get_model() for detection in batch]
+        if not all(models):
+            raise ValueError("모델이 선택되지 않은 탐지가 있습니다")
+        
+        # 입력: 전처리 결과가 있으면 그대로, 없으면 원본 + 전처리 파이프라인
+        transform = None
+        if analysis.output_video_path:
+            restore_artifact('analysis', analysis.id, analysis.output_video_path)
+            touch_artifact(analysis.output_video_path)
+            input_path = local_media_path(analysis.output_video_path)
+        else:
+            media = analysis.get_media()
+            if not media or not media.file:
+                raise ValueError("미디어를 찾을 수 없습니다")
+            input_path = local_media_path(media.file.name)
+            transform = VideoPreprocessor().compile_pipeline(analysis.preprocessing_pipeline)
+        
+        if not os.path.exists(input_path):
+            raise FileNotFoundError(f"파일을 찾을 수 없습니다: {input_path}")
+        
+        # 상태 업데이트
+        Detection.objects.filter(id__in=batch_ids).update(status='processing', started_at=timezone.now())
+        
+        output_paths = [get_detection_output_path(detection) for detection in batch]
+        
+        print(f"📂 입력: {input_path}")
+        for detection in batch:
+            print(f"🤖 모델: {detection.get_model_name()}")
+        
+        # 탐지 실행 (모델 수와 스레드 예산 중 작은 만큼 병렬)
+        detector = MultiModelDetector(
+            [get_detector(model) for model in models],
+            max_workers=get_thread_budget('multi'),
+        )
+        
+        def progress_callback(current, total, progress):
+            reporter.update(current, total, progress, force=progress >= 85)
+        
+        results = detector.process_video(
+            input_path,
+            [str(path) for path in output_paths],
+            progress_callback,
+            cancel_check,
+            transform=transform,
+            motion_gate=get_motion_gate(lead),
+            regions=RegionOfInterest.get_polygons_for(analysis.video),
+        )
+        
+        # 실행 중에 삭제된 탐지는 결과 폴더만 정리
+        alive = set(Detection.objects.filter(id__in=batch_ids).values_list('id', flat=True))
+        for detection, model, result, output_path in zip(batch, models, results, output_paths):
+            if detection.id in alive:
+                save_detection_results(detection, model, result, output_path, reporter)
+            else:
+                shutil.rmtree(output_path.parent, ignore_errors=True)
+        
+        return True
+        
+    except JobCancelled as e:
+        print(f"🛑 여러 모델 탐지 중단: {e}")
+        for batch_id in batch_ids or [detection_id]:
+            cleanup_cancelled_detection(batch_id)
+        raise
+        
+    except Exception as e:
+        print(f"❌ 에러: {e}")
+        import traceback
+        traceback.print_exc()
+        
+        Detection.objects.filter(id__in=batch_ids or [detection_id]).update(
+            status='failed', error_message=str(e)
+        )
         
         return False
+
+
+def cleanup_cancelled_detection(detection_id):
+    """취소된 탐지의 부분 결과 정리 (행이 삭제됐으면 결과 폴더째 삭제)"""
+    # 행을 다시 만들지 않도록 save() 대신 update() 사용
+    updated = Detection.objects.filter(id=detection_id).update(status='cancelled', error_message='')
+    if not updated:
+        delete_media_prefix(f'detection_results/{detection_id}')
+
+
+def start_detection_task(detection_id):
+    """탐지 작업을 작업 큐에 등록 (runworker 프로세스가 실행)"""
+    from jobs.queue import enqueue
+    priority = Detection.objects.filter(id=detection_id).values_list('priority', flat=True).first() or 0
+    return enqueue('detection', detection_id, priority=priority)
+
+
+def start_rebuild_task(detection_id):
+    """
+    삭제된(videos.retention) 탐지 결과 동영상을 다시 만드는 작업 등록
+
+    전처리 결과가 있으면 일반 탐지, 전처리 + 탐지로만 실행했으면 탐지 결과만 다시 인코딩
+    """
+    analysis_output = (
+        Detection.objects.filter(id=detection_id)
+        .values_list('analysis__output_video_path', flat=True)
+        .first()
+    )
+    if analysis_output:
+        return start_detection_task(detection_id)
+    return start_fused_task(detection_id, outputs=('annotated',))
+
+
+def start_chunked_task(detection_id):
+    """구간 분할 병렬 탐지 작업을 작업 큐에 등록"""
+    from jobs.queue import enqueue
+    priority = Detection.objects.filter(id=detection_id).values_list('priority', flat=True).first() or 0
+    return enqueue('chunked', detection_id, priority=priority)
+
+
+def start_fused_task(detection_id, outputs=FUSED_OUTPUTS):
+    """전처리 + 탐지 작업을 작업 큐에 등록"""
+    from jobs.queue import enqueue
+    priority = Detection.objects.filter(id=detection_id).values_list('priority', flat=True).first() or 0
+    return enqueue('fused', detection_id, payload={'outputs': list(outputs)}, priority=priority)
+
+
+def start_multi_task(detection_id):
+    """여러 모델 탐지 작업을 작업 큐에 등록 (detection_id: 대표 탐지)"""
+    from jobs.queue import enqueue
+    priority = Detection.objects.filter(id=detection_id).values_list('priority', flat=True).first() or 0
+    job = enqueue('multi', detection_id, priority=priority)
+    Detection.objects.filter(batch_lead_id=detection_id).update(status='queued', error_message='')
+    return job
@@ -1,3 +1,636 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import zipfile
+from multiprocessing import Pipe, resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from types import SimpleNamespace
 
-# Create your tests here.
+import cv2
+import numpy as np
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from analysis.models import Analysis
+from analysis.preprocessing import VideoPreprocessor
+from videos.models import Image
+from . import chunked
+from .detector import MultiModelDetector, VideoDetector
+from .framecache import CachedDetector, FrameCache, compute_phash, to_signed, to_unsigned
+from .inference import InferenceServer, ModelBatcher
+from .models import Detection, FrameResultCache
+from .motion import MotionGate
+from .roi import RegionMask, to_pixel_polygon, validate_polygons
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class DetectionExportTests(TestCase):
+    def setUp(self):
+        image = Image.objects.create(title='export', file='images/export.png', width=200, height=100)
+        analysis = Analysis.objects.create(image=image, status='completed')
+        self.detection = Detection.objects.create(
+            analysis=analysis,
+            title='export',
+            status='completed',
+            detection_data=[
+                {'frame': 0, 'detections': [
+                    {'label': 'person', 'confidence': 0.91234, 'bbox': [10, 20, 30, 40]},
+                ]},
+                {'frame': 5, 'detections': [
+                    {'label': 'car', 'confidence': 0.5, 'bbox': [100, 50, 20, 10]},
+                    {'label': 'person', 'confidence': 0.7, 'bbox': [0, 0, 10, 10]},
+                ]},
+            ],
+            detection_summary={'person': 2, 'car': 1},
+        )
+
+    def export(self, export_format, **params):
+        url = reverse('vision_engine:detection_export', args=[self.detection.id, export_format])
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content)
+
+    def test_csv(self):
+        response, content = self.export('csv')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn(f'detection_{self.detection.id}.csv', response['Content-Disposition'])
+        self.assertEqual(list(csv.reader(io.StringIO(content.decode()))), [
+            ['frame', 'time_sec', 'label', 'confidence', 'x', 'y', 'width', 'height'],
+            ['0', '', 'person', '0.9123', '10', '20', '30', '40'],
+            ['5', '', 'car', '0.5', '100', '50', '20', '10'],
+            ['5', '', 'person', '0.7', '0', '0', '10', '10'],
+        ])
+
+    def test_csv_frame_range_and_labels(self):
+        _, content = self.export('csv', start=1, labels='person')
+        rows = list(csv.reader(io.StringIO(content.decode())))[1:]
+        self.assertEqual(rows, [['5', '', 'person', '0.7', '0', '0', '10', '10']])
+
+    def test_parquet(self):
+        import pyarrow.parquet as pq
+
+        _, content = self.export('parquet')
+        table = pq.read_table(io.BytesIO(content))
+        self.assertEqual(table.column('frame').to_pylist(), [0, 5, 5])
+        self.assertEqual(table.column('label').to_pylist(), ['person', 'car', 'person'])
+        self.assertEqual(table.column('x').to_pylist(), [10, 100, 0])
+
+    def test_coco(self):
+        _, content = self.export('coco')
+        data = json.loads(content)
+        self.assertEqual(data['categories'], [{'id': 1, 'name': 'car'}, {'id': 2, 'name': 'person'}])
+        self.assertEqual([image['id'] for image in data['images']], [1, 6])
+        self.assertEqual((data['images'][0]['width'], data['images'][0]['height']), (200, 100))
+        self.assertEqual(
+            [(a['id'], a['image_id'], a['category_id'], a['bbox'], a['area']) for a in data['annotations']],
+            [(1, 1, 2, [10, 20, 30, 40], 1200), (2, 6, 1, [100, 50, 20, 10], 200), (3, 6, 2, [0, 0, 10, 10], 100)],
+        )
+
+    def test_coco_label_filter(self):
+        _, content = self.export('coco', labels='car')
+        data = json.loads(content)
+        self.assertEqual(data['categories'], [{'id': 1, 'name': 'car'}])
+        self.assertEqual([image['id'] for image in data['images']], [6])
+        self.assertEqual(len(data['annotations']), 1)
+
+    def test_yolo(self):
+        _, content = self.export('yolo')
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            self.assertEqual(archive.read('classes.txt').decode(), 'car\nperson\n')
+            self.assertEqual(
+                archive.read('labels/frame_000000.txt').decode(),
+                '1 0.125000 0.400000 0.150000 0.400000 0.9123\n',
+            )
+            self.assertEqual(archive.read('labels/frame_000005.txt').decode().splitlines(), [
+                '0 0.550000 0.550000 0.100000 0.100000 0.5000',
+                '1 0.025000 0.050000 0.050000 0.100000 0.7000',
+            ])
+
+    def test_detection_data_is_not_loaded_with_row(self):
+        column = f'"{Detection._meta.db_table}"."detection_data"'
+        with CaptureQueriesContext(connection) as queries:
+            self.export('csv')
+        self.assertFalse([query['sql'] for query in queries if column in query['sql']])
+
+    def test_unfinished_detection_redirects(self):
+        Detection.objects.filter(pk=self.detection.pk).update(status='processing')
+        response = self.client.get(reverse('vision_engine:detection_export', args=[self.detection.id, 'csv']))
+        self.assertEqual(response.status_code, 302)
+
+
+class DetectionEventsTests(TestCase):
+    async def test_finished_detection_sends_done(self):
+        image = await Image.objects.acreate(title='events', file='images/events.png')
+        analysis = await Analysis.objects.acreate(image=image, status='completed')
+        detection = await Detection.objects.acreate(
+            analysis=analysis, title='events', status='completed', progress=100,
+            detection_data=[{'frame': 0, 'detections': []}],
+        )
+
+        response = await self.async_client.get(reverse('vision_engine:detection_events', args=[detection.id]))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = [chunk async for chunk in response.streaming_content]
+        self.assertTrue(events[1].startswith(b'event: done\n'))
+
+    async def test_missing_detection(self):
+        response = await self.async_client.get(reverse('vision_engine:detection_events', args=[12345]))
+        self.assertEqual(response.status_code, 404)
+
+
+def write_test_video(path, values, size=(64, 48), fps=10):
+    """밝기가 values인 단색 프레임으로 된 MJPG 동영상"""
+    out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), fps, size)
+    for value in values:
+        out.write(np.full((size[1], size[0], 3), value, dtype=np.uint8))
+    out.release()
+    return path
+
+
+class BrightnessDetector(VideoDetector):
+    """프레임 밝기를 라벨로 돌려주는 탐지기 (모델 로드 없음)"""
+
+    def __init__(self, prefix=''):
+        super().__init__(SimpleNamespace(model_type='test'))
+        self.prefix = prefix
+        self.calls = 0
+
+    def detect_frame(self, frame):
+        self.calls += 1
+        return [{'label': self.prefix + str(round(frame.mean() / 20)), 'confidence': 0.9, 'bbox': [1, 1, 2, 2]}]
+
+
+class FusedDetectionTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+
+    def test_compiled_pipeline_matches_steps(self):
+        preprocessor = VideoPreprocessor()
+        pipeline = [
+            {'type': 'gaussian_blur', 'params': {'kernel_size': 5}},
+            {'type': 'threshold', 'params': {'threshold': 100}},
+        ]
+        frame = np.random.default_rng(0).integers(0, 255, (32, 32, 3), dtype=np.uint8)
+
+        expected = frame
+        for step in pipeline:
+            expected = preprocessor.apply_preprocessing(expected, step['type'], step['params'])
+        np.testing.assert_array_equal(preprocessor.compile_pipeline(pipeline)(frame), expected)
+
+        with self.assertRaises(ValueError):
+            preprocessor.compile_pipeline([{'type': 'unknown'}])
+
+    def test_detects_on_transformed_frames(self):
+        video_path = write_test_video(os.path.join(self.tmp, 'input.avi'), [0, 40, 80, 160, 200, 240])
+        output_path = os.path.join(self.tmp, 'annotated.mp4')
+        preprocessed_path = os.path.join(self.tmp, 'preprocessed.mp4')
+        transform = VideoPreprocessor().compile_pipeline([{'type': 'threshold', 'params': {'threshold': 100}}])
+
+        results = BrightnessDetector().process_video(
+            video_path, output_path, transform=transform, preprocessed_path=preprocessed_path,
+        )
+
+        labels = [item['detections'][0]['label'] for item in results['detections']]
+        self.assertEqual(labels, ['0', '0', '0', '13', '13', '13'])
+        self.assertEqual(results['summary'], {'0': 3, '13': 3})
+        self.assertEqual(sorted(os.listdir(self.tmp)), ['annotated.mp4', 'input.avi', 'preprocessed.mp4'])
+
+        cap = cv2.VideoCapture(preprocessed_path)
+        self.assertEqual(int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), 6)
+        cap.release()
+
+    def test_only_requested_outputs_are_encoded(self):
+        video_path = write_test_video(os.path.join(self.tmp, 'input.avi'), [0, 200])
+
+        results = BrightnessDetector().process_video(video_path, None)
+        self.assertEqual(results['total_detections'], 2)
+        self.assertEqual(os.listdir(self.tmp), ['input.avi'])
+
+
+class MultiModelDetectorTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        self.video_path = write_test_video(os.path.join(self.tmp, 'input.avi'), [0, 100, 200])
+
+    def test_results_per_model(self):
+        detectors = [BrightnessDetector('a'), BrightnessDetector('b')]
+        output_path = os.path.join(self.tmp, 'a.mp4')
+
+        results = MultiModelDetector(detectors, max_workers=2).process_video(self.video_path, [output_path, None])
+
+        self.assertEqual([detector.calls for detector in detectors], [3, 3])
+        self.assertEqual(
+            [[item['detections'][0]['label'] for item in result['detections']] for result in results],
+            [['a0', 'a5', 'a10'], ['b0', 'b5', 'b10']],
+        )
+        self.assertEqual([result['total_detections'] for result in results], [3, 3])
+        self.assertEqual(sorted(os.listdir(self.tmp)), ['a.mp4', 'input.avi'])
+
+    def test_worker_count_capped_by_models(self):
+        self.assertEqual(MultiModelDetector([BrightnessDetector()], max_workers=8).max_workers, 1)
+        self.assertEqual(MultiModelDetector([BrightnessDetector()] * 3, max_workers=0).max_workers, 1)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class SelectModelTests(TestCase):
+    def setUp(self):
+        from modelhub.models import BaseModel
+
+        image = Image.objects.create(title='select', file='images/select.png', width=20, height=10)
+        self.analysis = Analysis.objects.create(image=image, status='completed')
+        self.models = [
+            BaseModel.objects.create(name=name, display_name=name, model_file=f'models/{name}.pt')
+            for name in ('yolov8n', 'yolov8s')
+        ]
+
+    def test_several_models_create_one_batch(self):
+        url = reverse('vision_engine:select_model', args=[self.analysis.id])
+        response = self.client.post(url, {
+            'models': [f'base:{model.id}' for model in self.models] + [f'base:{self.models[0].id}'],
+            'title': 'batch',
+        })
+
+        lead, member = Detection.objects.order_by('id')
+        self.assertRedirects(
+            response, reverse('vision_engine:execute_detection', args=[lead.id]), fetch_redirect_response=False,
+        )
+        self.assertEqual((lead.batch_lead_id, member.batch_lead_id), (None, lead.id))
+        self.assertEqual([lead.base_model_id, member.base_model_id], [model.id for model in self.models])
+
+    def test_no_model_selected(self):
+        response = self.client.post(reverse('vision_engine:select_model', args=[self.analysis.id]), {})
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Detection.objects.exists())
+
+
+class BatchDetector:
+    """프레임 밝기를 라벨로 돌려주는 탐지기 (배치 크기 기록, 단일 프레임 추론은 금지)"""
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def detect_batch(self, frames):
+        self.batch_sizes.append(len(frames))
+        return [
+            [{'label': str(round(frame.mean() / 20)), 'confidence': 0.9, 'bbox': [1, 1, 2, 2]}]
+            for frame in frames
+        ]
+
+    def detect_frame(self, frame):
+        raise AssertionError("구간 탐지는 detect_batch를 써야 합니다")
+
+    def draw_detections(self, frame, detections):
+        return frame
+
+
+class DetectChunkTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        self.video_path = write_test_video(os.path.join(self.tmp, 'input.avi'), [value * 20 for value in range(10)])
+
+        self.detector = BatchDetector()
+        chunked._worker.update(
+            counters=[0], stop_event=threading.Event(), detectors={('test.Model', 1): self.detector},
+        )
+        self.addCleanup(chunked._worker.clear)
+
+    def test_plan_chunks(self):
+        self.assertEqual(chunked.plan_chunks(100, 10, chunk_seconds=4), [(0, 34), (34, 68), (68, 100)])
+        self.assertEqual(chunked.plan_chunks(100, 10, chunk_seconds=60, min_chunks=4),
+                         [(0, 25), (25, 50), (50, 75), (75, 100)])
+        self.assertEqual(chunked.plan_chunks(3, 10, min_chunks=8), [(0, 1), (1, 2), (2, 3)])
+        self.assertEqual(chunked.plan_chunks(0, 10), [])
+
+    def test_frames_inferred_in_batches(self):
+        result = chunked._detect_chunk(0, 'test.Model', 1, self.video_path, 0, 10, None, batch_size=4)
+
+        self.assertEqual(self.detector.batch_sizes, [4, 4, 2])
+        self.assertEqual([item['frame'] for item in result['detections']], list(range(10)))
+        self.assertEqual(
+            [item['detections'][0]['label'] for item in result['detections']],
+            [str(value) for value in range(10)],
+        )
+        self.assertEqual(result['total_detections'], 10)
+        self.assertEqual(chunked._worker['counters'][0], 10)
+
+    def test_chunk_starts_mid_video(self):
+        result = chunked._detect_chunk(0, 'test.Model', 1, self.video_path, 6, 9, None, batch_size=8)
+
+        self.assertEqual(self.detector.batch_sizes, [3])
+        self.assertEqual([item['frame'] for item in result['detections']], [6, 7, 8])
+        self.assertEqual(result['detections'][0]['detections'][0]['label'], '6')
+        self.assertEqual(chunked._worker['counters'][0], 3)
+
+    def test_stop_event_cancels_chunk(self):
+        from jobs.cancel import JobCancelled
+
+        chunked._worker['stop_event'].set()
+        with self.assertRaises(JobCancelled):
+            chunked._detect_chunk(0, 'test.Model', 1, self.video_path, 0, 10, None)
+
+
+class RetainingDetector:
+    """마지막 배치를 계속 들고 있는 탐지기 (ultralytics predictor처럼)"""
+
+    def __init__(self):
+        self.last_batch = None
+
+    def detect_batch(self, frames):
+        if frames[0].mean() == 255:
+            raise RuntimeError("bad frame")
+        self.last_batch = frames
+        return [[{'class_name': 'x', 'mean': float(frame.mean())}] for frame in frames]
+
+
+class InferenceServerTests(SimpleTestCase):
+    def test_client_disconnect_with_retained_frames(self):
+        server = InferenceServer('unused')
+        detector = RetainingDetector()
+        server.batchers[('test.Model', 1)] = ModelBatcher(detector, max_batch=4, max_wait=0.001)
+
+        frame = np.full((4, 4, 3), 7, dtype=np.uint8)
+        shm = SharedMemory(create=True, size=frame.nbytes)
+        np.ndarray(frame.shape, dtype=frame.dtype, buffer=shm.buf)[...] = frame
+        client, server_conn = Pipe()
+        replies = []
+
+        def run_client():
+            client.send(('load', 'test.Model', 1))
+            replies.append(client.recv())
+            client.send(('detect', shm.name, frame.shape, frame.dtype.str))
+            replies.append(client.recv())
+            client.close()
+
+        thread = threading.Thread(target=run_client)
+        thread.start()
+        try:
+            # 탐지기가 프레임을 들고 있어도 연결 종료 시 공유 메모리를 닫을 수 있어야 함
+            server._handle_client(server_conn)
+        finally:
+            thread.join()
+            # 같은 프로세스라 _attach가 지운 resource tracker 등록을 되돌림
+            resource_tracker.register(shm._name, 'shared_memory')
+            shm.close()
+            shm.unlink()
+
+        self.assertEqual(replies[0], ('ok', None))
+        self.assertEqual(replies[1], ('ok', [{'class_name': 'x', 'mean': 7.0}]))
+        self.assertEqual(detector.last_batch[0].tolist(), frame.tolist())
+
+
+class ModelBatcherTests(SimpleTestCase):
+    def test_requests_are_batched(self):
+        detector = RetainingDetector()
+        batcher = ModelBatcher(detector, max_batch=3, max_wait=5)
+
+        futures = [batcher.submit(np.full((2, 2, 3), value, dtype=np.uint8)) for value in (1, 2, 3)]
+
+        self.assertEqual([future.result(timeout=5) for future in futures],
+                         [[{'class_name': 'x', 'mean': float(value)}] for value in (1, 2, 3)])
+        self.assertEqual((batcher.batches, batcher.frames, len(detector.last_batch)), (1, 3, 3))
+
+    def test_error_is_sent_to_every_request(self):
+        batcher = ModelBatcher(RetainingDetector(), max_batch=2, max_wait=5)
+        futures = [batcher.submit(np.full((2, 2, 3), 255, dtype=np.uint8)) for _ in range(2)]
+
+        for future in futures:
+            with self.assertRaises(RuntimeError):
+                future.result(timeout=5)
+        self.assertEqual(batcher.batches, 0)
+
+
+class MotionGateTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        # 정지 장면 6프레임 후 장면 변화
+        self.video_path = write_test_video(os.path.join(self.tmp, 'input.avi'), [50] * 6 + [200] * 2)
+
+    def test_static_frames_are_gated(self):
+        gate = MotionGate(refresh=0)
+        still = np.full((48, 64, 3), 50, dtype=np.uint8)
+        moved = still.copy()
+        moved[10:40, 10:50] = 200
+
+        self.assertEqual([gate.check(still) for _ in range(4)], [True, False, False, False])
+        self.assertTrue(gate.check(moved))
+        self.assertEqual(gate.get_stats(), {'frames': 5, 'gated_frames': 3})
+
+    def test_refresh_forces_inference(self):
+        gate = MotionGate(refresh=2)
+        still = np.full((48, 64, 3), 50, dtype=np.uint8)
+        self.assertEqual([gate.check(still) for _ in range(7)], [True, False, False, True, False, False, True])
+        self.assertEqual(gate.clone().params, gate.params)
+
+    def test_gated_frames_reuse_previous_detections(self):
+        detector = BrightnessDetector()
+        results = detector.process_video(self.video_path, None, motion_gate=MotionGate(refresh=0))
+
+        self.assertEqual(detector.calls, 2)
+        self.assertEqual(results['gated_frames'], 6)
+        self.assertEqual(
+            [item['detections'][0]['label'] for item in results['detections']],
+            ['2'] * 6 + ['10'] * 2,
+        )
+
+    def test_gated_frames_without_reuse_are_empty(self):
+        results = BrightnessDetector().process_video(self.video_path, None, motion_gate=MotionGate(refresh=0, reuse=False))
+
+        self.assertEqual([item['frame'] for item in results['detections']], [0, 6])
+        self.assertEqual(results['total_detections'], 2)
+
+    def test_chunk_batches_only_frames_with_motion(self):
+        detector = BatchDetector()
+        chunked._worker.update(counters=[0], stop_event=threading.Event(), detectors={('test.Model', 1): detector})
+        self.addCleanup(chunked._worker.clear)
+
+        result = chunked._detect_chunk(0, 'test.Model', 1, self.video_path, 0, 8, None,
+                                       gate_params=MotionGate(refresh=0).params, batch_size=4)
+
+        # 직전 결과 재사용은 배치 경계를 넘어서도 유지
+        self.assertEqual(detector.batch_sizes, [1, 1])
+        self.assertEqual(result['gated_frames'], 6)
+        self.assertEqual(
+            [item['detections'][0]['label'] for item in result['detections']],
+            ['2'] * 6 + ['10'] * 2,
+        )
+
+
+class BoxDetector(VideoDetector):
+    """잘라낸 영역 크기를 기록하고 정해진 박스를 돌려주는 탐지기"""
+
+    def __init__(self, boxes):
+        super().__init__(SimpleNamespace(model_type='test'))
+        self.boxes = boxes
+        self.shapes = []
+
+    def detect_frame(self, frame):
+        self.shapes.append(frame.shape[:2])
+        return [{'label': 'x', 'confidence': 0.9, 'bbox': list(bbox)} for bbox in self.boxes]
+
+
+class RegionMaskTests(SimpleTestCase):
+    # 오른쪽 아래 사분면 (64x48 프레임 기준 비율 좌표)
+    QUADRANT = [[0.5, 0.5], [1, 0.5], [1, 1], [0.5, 1]]
+
+    def test_polygon_coordinates(self):
+        self.assertEqual(to_pixel_polygon(self.QUADRANT, 64, 48).tolist(), [[32, 24], [64, 24], [64, 48], [32, 48]])
+        self.assertEqual(to_pixel_polygon([[10, 5], [20, 5], [20, 9]], 64, 48).tolist(), [[10, 5], [20, 5], [20, 9]])
+
+        validate_polygons([self.QUADRANT])
+        for polygons in ([], [[[0, 0], [1, 1]]], [[[0, 0], [1, 1], ['a', 1]]], 'x'):
+            with self.assertRaises(ValueError):
+                validate_polygons(polygons)
+
+    def test_crop_with_padding(self):
+        mask = RegionMask([self.QUADRANT], 64, 48)
+        self.assertEqual((mask.x1, mask.y1, mask.x2, mask.y2), (31, 24, 64, 48))
+        self.assertEqual(mask.crop(np.zeros((48, 64, 3), dtype=np.uint8)).shape, (24, 33, 3))
+
+        with self.assertRaises(ValueError):
+            RegionMask([[[100, 100], [120, 100], [120, 120]]], 64, 48)
+
+    def test_boxes_mapped_to_frame_and_filtered(self):
+        # 대각선 아래쪽 삼각형: 잘라낸 사각형 안이어도 삼각형 밖 중심은 버림
+        mask = RegionMask([[[0, 0], [63, 47], [0, 47]]], 64, 48, padding=0)
+        detector = BoxDetector([[2, 30, 4, 4], [50, 2, 4, 4]])
+
+        detections = mask.detect(detector, np.zeros((48, 64, 3), dtype=np.uint8))
+        self.assertEqual([det['bbox'] for det in detections], [[2, 30, 4, 4]])
+        self.assertEqual(mask.to_frame([]), [])
+
+    def test_single_process_infers_crop_only(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp, ignore_errors=True)
+        video_path = write_test_video(os.path.join(tmp, 'input.avi'), [0, 100])
+        detector = BoxDetector([[1, 1, 2, 2]])
+
+        results = detector.process_video(video_path, None, regions=[self.QUADRANT])
+
+        self.assertEqual(detector.shapes, [(24, 33), (24, 33)])
+        self.assertEqual(results['detections'][0]['detections'][0]['bbox'], [1 + 31, 1 + 24, 2, 2])
+
+    def test_chunk_batch_maps_boxes_to_frame(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp, ignore_errors=True)
+        video_path = write_test_video(os.path.join(tmp, 'input.avi'), [value * 20 for value in range(10)])
+        detector = BatchDetector()
+        chunked._worker.update(counters=[0], stop_event=threading.Event(), detectors={('test.Model', 1): detector})
+        self.addCleanup(chunked._worker.clear)
+
+        result = chunked._detect_chunk(0, 'test.Model', 1, video_path, 2, 5, None,
+                                       regions=[self.QUADRANT], batch_size=8)
+
+        self.assertEqual(detector.batch_sizes, [3])
+        self.assertEqual([item['frame'] for item in result['detections']], [2, 3, 4])
+        self.assertEqual(result['detections'][0]['detections'][0]['bbox'], [1 + 31, 1 + 24, 2, 2])
+
+
+class FrameCacheTests(TestCase):
+    KEY = 'a' * 40
+
+    def frame(self, seed):
+        # 부드러운 무늬 프레임 (pHash는 밝기보다 구조를 봄)
+        pattern = np.random.default_rng(seed).integers(0, 256, (3, 4), dtype=np.uint8)
+        return cv2.cvtColor(cv2.resize(pattern, (64, 48), interpolation=cv2.INTER_CUBIC), cv2.COLOR_GRAY2BGR)
+
+    def test_phash_of_similar_frames(self):
+        frame = self.frame(0)
+        noisy = np.clip(frame.astype(np.int16) + np.random.default_rng(1).integers(-3, 4, frame.shape), 0, 255)
+
+        self.assertEqual(compute_phash(frame), compute_phash(frame.copy()))
+        self.assertLessEqual(bin(compute_phash(frame) ^ compute_phash(noisy.astype(np.uint8))).count('1'), 2)
+        self.assertGreater(bin(compute_phash(frame) ^ compute_phash(self.frame(1))).count('1'), 10)
+        for value in (0, 1, (1 << 63) - 1, 1 << 63, (1 << 64) - 1):
+            self.assertEqual(to_unsigned(to_signed(value)), value)
+
+    def test_lookup_by_hamming_distance(self):
+        cache = FrameCache(self.KEY, max_distance=2)
+        phash = (1 << 63) | 0b1010
+        cache.add(phash, [{'label': 'car'}])
+
+        self.assertEqual(cache.lookup(phash ^ 0b11), [{'label': 'car'}])
+        self.assertIsNone(cache.lookup(phash ^ 0b111))
+        self.assertEqual((cache.lookups, cache.hits), (2, 1))
+
+    def test_saved_entries_are_shared(self):
+        cache = FrameCache(self.KEY)
+        cache.add(1 << 63, [{'label': 'car'}])
+        cache.save()
+
+        entry = FrameResultCache.objects.get()
+        self.assertEqual(entry.phash, to_signed(1 << 63))
+
+        other = FrameCache(self.KEY)
+        self.assertEqual(other.lookup(1 << 63), [{'label': 'car'}])
+        self.assertIsNone(FrameCache('b' * 40).lookup(1 << 63))
+        other.save()
+        entry.refresh_from_db()
+        self.assertEqual(entry.hits, 1)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        from datetime import timedelta
+        from django.utils import timezone
+
+        now = timezone.now()
+        old, used = [
+            FrameResultCache.objects.create(
+                model_key=self.KEY, phash=phash, detections=[], last_used_at=now - timedelta(days=days),
+            )
+            for phash, days in ((0b1111 << 8, 2), (0b1111 << 16, 1))
+        ]
+
+        cache = FrameCache(self.KEY, max_entries=2)
+        self.assertEqual(cache.lookup(used.phash), [])
+        cache.add(0b1111 << 24, [])
+        cache.save()
+
+        self.assertEqual(
+            set(FrameResultCache.objects.values_list('phash', flat=True)),
+            {used.phash, 0b1111 << 24},
+        )
+        self.assertFalse(FrameResultCache.objects.filter(id=old.id).exists())
+
+    def test_batch_infers_only_misses(self):
+        detector = BatchDetector()
+        cached = CachedDetector(detector, FrameCache(self.KEY))
+        first, second = self.frame(0), self.frame(1)
+
+        expected = [dets[0]['label'] for dets in cached.detect_batch([first, second, first.copy()])]
+        self.assertEqual(detector.batch_sizes, [3])
+
+        results = cached.detect_batch([first, second])
+        self.assertEqual(detector.batch_sizes, [3])
+        self.assertEqual([dets[0]['label'] for dets in results], expected[:2])
+        self.assertEqual(cached.save_cache(), {'cache_lookups': 5, 'cache_hits': 2})
+        self.assertEqual(FrameResultCache.objects.count(), 3)
+
+    def test_chunk_reports_cache_stats(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp, ignore_errors=True)
+        video_path = os.path.join(tmp, 'input.avi')
+        out = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*'MJPG'), 10, (64, 48))
+        for seed in (0, 0, 0, 0, 1, 1, 1, 1):
+            out.write(self.frame(seed))
+        out.release()
+        detector = BatchDetector()
+        chunked._worker.update(
+            counters=[0], stop_event=threading.Event(),
+            detectors={('test.Model', 1): CachedDetector(detector, FrameCache(self.KEY))},
+        )
+        self.addCleanup(chunked._worker.clear)
+
+        result = chunked._detect_chunk(0, 'test.Model', 1, video_path, 0, 8, None, batch_size=2)
+
+        # 같은 무늬의 두 번째 배치는 캐시에서
+        self.assertEqual(detector.batch_sizes, [2, 2])
+        self.assertEqual((result['cache_lookups'], result['cache_hits']), (8, 4))
+        self.assertEqual(len(result['detections']), 8)
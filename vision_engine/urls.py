@@ -13,15 +13,27 @@ urlpatterns = [
     # 탐지 실행
     path('<int:detection_id>/execute/', views.execute_detection, name='execute_detection'),
     
+    # 탐지 취소
+    path('<int:detection_id>/cancel/', views.cancel_detection, name='cancel_detection'),
+    
     # 진행 상황
     path('<int:detection_id>/progress/', views.detection_progress, name='detection_progress'),
     
     # 상태 API
     path('<int:detection_id>/status/', views.detection_status, name='detection_status'),
     
+    # 진행률 스트림 (SSE)
+    path('<int:detection_id>/events/', views.detection_events, name='detection_events'),
+    
     # 결과
     path('<int:detection_id>/result/', views.detection_result, name='detection_result'),
     
+    # 결과 파일 (Range 스트리밍)
+    path('<int:detection_id>/output/', views.serve_detection_output, name='serve_detection_output'),
+    
+    # 결과 내보내기 (csv / parquet / coco / yolo)
+    path('<int:detection_id>/export/<str:export_format>/', views.detection_export, name='detection_export'),
+    
     # 삭제
     path('<int:detection_id>/delete/', views.detection_delete, name='detection_delete'),
 ]
@@ -1,52 +1,78 @@
-from django.shortcuts import render, redirect, get_object_or_404
-from django.http import JsonResponse
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.contrib import messages
 from django.utils import timezone
 from analysis.models import Analysis
+from jobs.events import event_stream_response, progress_events
+from jobs.progress import get_job_progress
+from jobs.queue import get_active_job, request_cancel
+from jobs.scheduler import get_queue_info, parse_priority
 from modelhub.models import BaseModel, CustomModel
-from .models import Detection
-import threading
+from videos.retention import serve_artifact
+from videos.search import rank_queryset
+from .models import Detection, RegionOfInterest
+from .exporters import DetectionExporter
 
 
 def select_model(request, analysis_id):
     """모델 선택 페이지"""
     analysis = get_object_or_404(Analysis, id=analysis_id)
     
-    # 분석이 완료되지 않았으면 리다이렉트
-    if analysis.status != 'completed':
-        messages.error(request, '분석이 완료되지 않았습니다.')
-        return redirect('analysis_result', analysis_id=analysis_id)
+    # 분석이 진행 중이면 리다이렉트 (완료 전이면 전처리 + 탐지를 한 번에 실행)
+    if analysis.status in ('queued', 'processing'):
+        messages.error(request, '분석이 진행 중입니다. 완료 후 다시 시도해주세요.')
+        return redirect('analysis_progress', analysis_id=analysis_id)
     
     # 활성화된 모델 목록
     base_models = BaseModel.objects.filter(is_active=True)
     custom_models = CustomModel.objects.filter(is_active=True)
     
     if request.method == 'POST':
-        model_type = request.POST.get('model_type')  # 'base' or 'custom'
-        model_id = request.POST.get('model_id')
-        title = request.POST.get('title', '')
-        description = request.POST.get('description', '')
+        # 선택한 모델 목록 ('base:<id>' / 'custom:<id>'), 예전 폼은 model_type + model_id
+        selected = request.POST.getlist('models')
+        if not selected and request.POST.get('model_id'):
+            selected = [f"{request.POST.get('model_type')}:{request.POST.get('model_id')}"]
         
-        # Detection 생성
-        detection = Detection.objects.create(
-            analysis=analysis,
-            title=title or f"객체 탐지 - {timezone.now().strftime('%Y%m%d_%H%M%S')}",
-            description=description,
-            status='ready'
-        )
+        models = []
+        for value in dict.fromkeys(selected):
+            model_type, _, model_id = value.partition(':')
+            if model_type == 'base':
+                models.append(get_object_or_404(BaseModel, id=model_id))
+            else:
+                models.append(get_object_or_404(CustomModel, id=model_id))
         
-        # 모델 할당
-        if model_type == 'base':
-            model = get_object_or_404(BaseModel, id=model_id)
-            detection.base_model = model
-        else:
-            model = get_object_or_404(CustomModel, id=model_id)
-            detection.custom_model = model
+        if not models:
+            messages.error(request, '모델을 하나 이상 선택해주세요.')
+            return redirect('vision_engine:select_model', analysis_id=analysis_id)
         
-        detection.save()
+        title = request.POST.get('title', '') or f"객체 탐지 - {timezone.now().strftime('%Y%m%d_%H%M%S')}"
+        description = request.POST.get('description', '')
+        
+        # Detection 생성 (여러 모델이면 모델마다 하나씩, 첫 번째가 대표)
+        lead = None
+        for model in models:
+            detection = Detection(
+                analysis=analysis,
+                batch_lead=lead,
+                title=title if len(models) == 1 else f"{title} ({model})",
+                description=description,
+                status='ready'
+            )
+            
+            # 모델 할당
+            if isinstance(model, BaseModel):
+                detection.base_model = model
+            else:
+                detection.custom_model = model
+            
+            detection.save()
+            lead = lead or detection
         
-        messages.success(request, '탐지 작업이 생성되었습니다.')
-        return redirect('vision_engine:execute_detection', detection_id=detection.id)
+        if len(models) > 1:
+            messages.success(request, f'탐지 작업 {len(models)}개가 생성되었습니다. 한 번의 디코딩으로 함께 실행됩니다.')
+        else:
+            messages.success(request, '탐지 작업이 생성되었습니다.')
+        return redirect('vision_engine:execute_detection', detection_id=lead.id)
     
     context = {
         'analysis': analysis,
@@ -60,22 +86,89 @@ def execute_detection(request, detection_id):
     """탐지 실행 페이지"""
     detection = get_object_or_404(Detection, id=detection_id)
     
+    # 여러 모델 실행은 대표 탐지에서 함께 실행
+    if detection.batch_lead_id:
+        return redirect('vision_engine:execute_detection', detection_id=detection.batch_lead_id)
+    
+    batch = list(detection.get_batch())
+    
     if request.method == 'POST':
-        # 백그라운드로 탐지 실행
-        from .tasks import process_detection
+        if detection.status in ('queued', 'processing'):
+            messages.warning(request, '이미 대기 중이거나 처리 중입니다.')
+            return redirect('vision_engine:detection_progress', detection_id=detection.id)
+        
+        priority = parse_priority(request.POST.get('priority'), Detection.PRIORITY_CHOICES)
+        if priority is not None and priority != detection.priority:
+            Detection.objects.filter(id__in=[member.id for member in batch]).update(priority=priority)
+            detection.priority = priority
+        
+        motion_gate = request.POST.get('motion_gate') == 'on'
+        if motion_gate != detection.motion_gate:
+            Detection.objects.filter(id__in=[member.id for member in batch]).update(motion_gate=motion_gate)
+            detection.motion_gate = motion_gate
+        
+        # 작업 큐에 등록 (워커 프로세스가 실행)
+        from .tasks import (
+            FUSED_OUTPUTS, start_chunked_task, start_detection_task, start_fused_task, start_multi_task,
+        )
         
-        thread = threading.Thread(target=process_detection, args=(detection_id,))
-        thread.start()
+        analysis = detection.analysis
+        if len(batch) > 1:
+            if analysis.status in ('queued', 'processing'):
+                messages.error(request, '분석이 진행 중입니다. 완료 후 다시 시도해주세요.')
+                return redirect('vision_engine:execute_detection', detection_id=detection.id)
+            
+            start_multi_task(detection.id)
+            messages.info(request, f'탐지 작업 {len(batch)}개가 대기열에 등록되었습니다.')
+            return redirect('vision_engine:detection_progress', detection_id=detection.id)
         
-        messages.info(request, '탐지 작업이 시작되었습니다.')
+        mode = request.POST.get('mode', 'detection')
+        if mode != 'fused' and analysis.status != 'completed':
+            # 전처리 결과가 없으면 원본에서 전처리 + 탐지를 함께 실행
+            mode = 'fused'
+        
+        if mode == 'fused':
+            if analysis.status in ('queued', 'processing'):
+                messages.error(request, '분석이 진행 중입니다. 완료 후 다시 시도해주세요.')
+                return redirect('vision_engine:execute_detection', detection_id=detection.id)
+            
+            outputs = [name for name in request.POST.getlist('outputs') if name in FUSED_OUTPUTS]
+            start_fused_task(detection_id, outputs)
+            messages.info(request, '전처리 + 탐지 작업이 대기열에 등록되었습니다.')
+        elif mode == 'chunked' and analysis.video:
+            start_chunked_task(detection_id)
+            messages.info(request, '구간 분할 탐지 작업이 대기열에 등록되었습니다.')
+        else:
+            start_detection_task(detection_id)
+            messages.info(request, '탐지 작업이 대기열에 등록되었습니다.')
         return redirect('vision_engine:detection_progress', detection_id=detection.id)
     
     context = {
         'detection': detection,
+        'batch': batch,
+        'regions': RegionOfInterest.get_polygons_for(detection.analysis.video),
     }
     return render(request, 'vision_engine/execute_detection.html', context)
 
 
+def cancel_detection(request, detection_id):
+    """탐지 취소"""
+    detection = get_object_or_404(Detection, id=detection_id)
+    
+    if request.method == 'POST':
+        job = request_cancel(Detection.JOB_KINDS, detection.get_job_object_id())
+        if job is None:
+            messages.warning(request, '취소할 작업이 없습니다.')
+        elif job.status == 'cancelled':
+            # 여러 모델 실행이면 함께 대기 중이던 탐지도 취소
+            detection.get_batch().filter(status='queued').update(status='cancelled')
+            messages.success(request, '대기 중인 탐지를 취소했습니다.')
+        else:
+            messages.info(request, '탐지 취소를 요청했습니다. 현재 프레임 처리 후 중단됩니다.')
+    
+    return redirect('vision_engine:detection_progress', detection_id=detection.id)
+
+
 def detection_progress(request, detection_id):
     """탐지 진행 상황 페이지"""
     detection = get_object_or_404(Detection, id=detection_id)
@@ -86,17 +179,43 @@ def detection_progress(request, detection_id):
     return render(request, 'vision_engine/detection_progress.html', context)
 
 
-def detection_status(request, detection_id):
-    """탐지 상태 API (AJAX)"""
-    detection = get_object_or_404(Detection, id=detection_id)
+def get_detection_status(detection_id):
+    """상태 API / SSE 공용 상태 정보 (탐지가 없으면 None)"""
+    # JSON 결과 필드는 읽지 않음
+    detection = (
+        Detection.objects
+        .only('id', 'batch_lead_id', 'status', 'progress', 'processed_frames', 'total_frames', 'error_message')
+        .filter(id=detection_id)
+        .first()
+    )
+    if detection is None:
+        return None
     
-    return JsonResponse({
+    job = get_active_job(Detection.JOB_KINDS, detection.get_job_object_id())
+    progress = get_job_progress(job)
+    
+    return {
+        **get_queue_info(job),
         'status': detection.status,
-        'progress': detection.progress,
-        'processed_frames': detection.processed_frames,
-        'total_frames': detection.total_frames,
+        'progress': progress.get('progress', detection.progress),
+        'processed_frames': progress.get('processed_frames', detection.processed_frames),
+        'total_frames': progress.get('total_frames', detection.total_frames),
         'error_message': detection.error_message,
-    })
+    }
+
+
+def detection_status(request, detection_id):
+    """탐지 상태 API (AJAX)"""
+    data = get_detection_status(detection_id)
+    if data is None:
+        raise Http404('탐지 작업을 찾을 수 없습니다.')
+    return JsonResponse(data)
+
+
+async def detection_events(request, detection_id):
+    """탐지 진행률 SSE 스트림 (바뀔 때만 전송, ASGI에서 실행)"""
+    await aget_object_or_404(Detection.objects.only('id'), id=detection_id)
+    return event_stream_response(progress_events(lambda: get_detection_status(detection_id)))
 
 
 def detection_result(request, detection_id):
@@ -109,6 +228,62 @@ def detection_result(request, detection_id):
     return render(request, 'vision_engine/detection_result.html', context)
 
 
+def serve_detection_output(request, detection_id):
+    """탐지 결과 파일 제공 (동영상은 Range 요청 지원)"""
+    detection = get_object_or_404(Detection, id=detection_id)
+    
+    if not detection.output_video_path:
+        raise Http404("탐지 결과 파일이 없습니다.")
+    
+    return serve_artifact(request, 'detection', detection, not_found_message="탐지 결과 파일을 찾을 수 없습니다.")
+
+
+def detection_export(request, detection_id, export_format):
+    """탐지 결과 내보내기 (CSV / Parquet / COCO / YOLO 스트리밍)"""
+    # detection_data는 iter_detection_frames가 DB에서 조금씩 읽으므로 행과 함께 올리지 않음
+    detection = get_object_or_404(Detection.objects.defer('detection_data'), id=detection_id)
+
+    if export_format not in DetectionExporter.FORMATS:
+        raise Http404("지원하지 않는 내보내기 형식입니다.")
+
+    if detection.status != 'completed':
+        messages.error(request, '완료된 탐지만 내보낼 수 있습니다.')
+        return redirect('vision_engine:detection_result', detection_id=detection_id)
+
+    # 프레임 범위 / 라벨 필터
+    try:
+        start_frame = int(request.GET['start']) if request.GET.get('start') else None
+        end_frame = int(request.GET['end']) if request.GET.get('end') else None
+    except ValueError:
+        messages.error(request, '프레임 범위가 올바르지 않습니다.')
+        return redirect('vision_engine:detection_result', detection_id=detection_id)
+
+    labels = [label.strip() for label in request.GET.get('labels', '').split(',') if label.strip()]
+
+    exporter = DetectionExporter(
+        detection,
+        start_frame=start_frame,
+        end_frame=end_frame,
+        labels=labels or None,
+    )
+
+    try:
+        content = exporter.stream(export_format)
+        # 첫 조각을 미리 만들어서 의존성/입력 오류를 응답 전에 확인
+        first_chunk = next(content, b'')
+    except (ImportError, ValueError) as e:
+        messages.error(request, f'내보내기 실패: {e}')
+        return redirect('vision_engine:detection_result', detection_id=detection_id)
+
+    def stream():
+        yield first_chunk
+        yield from content
+
+    response = StreamingHttpResponse(stream(), content_type=exporter.get_content_type(export_format))
+    response['Content-Disposition'] = f'attachment; filename="{exporter.get_filename(export_format)}"'
+    return response
+
+
 def detection_list(request):
     """전체 탐지 목록"""
     detections = Detection.objects.all().order_by('-created_at')
@@ -118,8 +293,14 @@ def detection_list(request):
     if status:
         detections = detections.filter(status=status)
     
+    # 검색 (제목, 설명, 탐지된 라벨 - 관련도 순)
+    query = request.GET.get('q', '').strip()
+    if query:
+        detections = rank_queryset(detections, 'detection', query)
+    
     context = {
         'detections': detections,
+        'query': query,
     }
     return render(request, 'vision_engine/detection_list.html', context)
 
@@ -130,6 +311,10 @@ def detection_delete(request, detection_id):
     
     if request.method == 'POST':
         analysis_id = detection.analysis.id
+        
+        # 실행 중인 작업이 삭제된 폴더에 계속 쓰지 않도록 먼저 취소
+        # (여러 모델 실행의 대표 탐지면 함께 실행 중인 탐지도 중단됨)
+        request_cancel(Detection.JOB_KINDS, detection.id)
         detection.delete()
         
         messages.success(request, '탐지 작업이 삭제되었습니다.')